@@ -0,0 +1,1256 @@
+"""
+Almacenes intercambiables para los artículos y movimientos del Inventario
+
+Inventario mantiene las reglas del negocio (validaciones, stock suficiente, etc.) y delega
+en un almacén el guardado y las consultas. Hay tres implementaciones:
+
+- AlmacenMemoria: diccionario de artículos y lista de movimientos (comportamiento original)
+- AlmacenColumnar: como AlmacenMemoria, pero los movimientos se guardan en columnas
+  compactas (array) y los objetos MovimientoInventario se crean solo cuando se piden
+- AlmacenSQLite: archivo SQLite local con índices y escrituras agrupadas en transacciones,
+  para catálogos e historiales que no caben en memoria
+
+AlmacenSincronizado envuelve cualquiera de ellos para usarlo desde varios hilos.
+
+Los tres guardan el historial en orden de registro, que es también orden de fecha (el
+Inventario sella y guarda cada movimiento en una misma sección crítica, ver
+Inventario._registrar_movimiento): cada movimiento tiene una posición fija (0, 1, 2...) y
+las consultas por rango de fechas son una búsqueda binaria sobre esas posiciones (ver
+posiciones_entre y VistaMovimientos).
+
+Los almacenes en memoria admiten además descartar el comienzo del historial una vez
+archivado (ver archivo_movimientos.py): las posiciones se vuelven a contar desde 0.
+"""
+
+import math
+import sqlite3
+import threading
+import weakref
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterator, Sequence
+from datetime import datetime, timedelta
+from itertools import islice
+
+from articulo import Articulo
+from identificadores import formatear_id, numero_id
+from movimiento_inventario import MovimientoInventario, TipoMovimiento
+
+_numpy = False  # Todavía no se intentó importar
+
+def cargar_numpy():
+    """
+    Importa numpy la primera vez que se necesita (así no retrasa el arranque del programa)
+
+    numpy es opcional: sin él las agregaciones se hacen con bucles.
+
+    Returns:
+        module: El módulo numpy o None si no está instalado
+    """
+    global _numpy
+    if _numpy is False:
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+        _numpy = numpy
+    return _numpy
+
+EPOCA = datetime(1970, 1, 1)
+UN_MICROSEGUNDO = timedelta(microseconds=1)
+
+def a_microsegundos(fecha_hora):
+    """
+    Convierte una fecha (sin zona horaria) a microsegundos desde 1970-01-01
+
+    Args:
+        fecha_hora (datetime): Fecha a convertir
+
+    Returns:
+        int: Microsegundos desde la época
+    """
+    return (fecha_hora - EPOCA) // UN_MICROSEGUNDO
+
+def desde_microsegundos(microsegundos):
+    """
+    Convierte microsegundos desde 1970-01-01 de vuelta a datetime
+
+    Args:
+        microsegundos (int): Microsegundos desde la época
+
+    Returns:
+        datetime: Fecha correspondiente
+    """
+    return EPOCA + timedelta(microseconds=microsegundos)
+
+def variacion_movimiento(movimiento):
+    """
+    Variación que produce un movimiento en el stock (negativa en las salidas)
+
+    Args:
+        movimiento (MovimientoInventario): Movimiento a evaluar
+
+    Returns:
+        float: Cantidad con signo
+    """
+    return movimiento.cantidad if movimiento.es_entrada() else -movimiento.cantidad
+
+def calcular_saldos(movimientos, articulos):
+    """
+    Calcula el saldo (stock) que dejó cada movimiento de un guardado
+
+    Se recorre hacia atrás desde el stock final de cada artículo, así no hace falta
+    consultar el saldo anterior en el almacén.
+
+    Args:
+        movimientos (list): Movimientos en orden, ya aplicados al stock
+        articulos (iterable): Artículos afectados, con el stock ya actualizado
+
+    Returns:
+        list: Saldo después de cada movimiento, en el mismo orden
+    """
+    actuales = {articulo.codigo: articulo.cantidad for articulo in articulos}
+    saldos = [0.0] * len(movimientos)
+    for posicion in range(len(movimientos) - 1, -1, -1):
+        movimiento = movimientos[posicion]
+        saldo = actuales[movimiento.codigo_articulo]
+        saldos[posicion] = saldo
+        actuales[movimiento.codigo_articulo] = saldo - variacion_movimiento(movimiento)
+    return saldos
+
+def pagina_hacia_atras(leer, cantidad, descartados, cursor, limite):
+    """
+    Página de los movimientos de un artículo, de los más recientes a los más antiguos
+
+    El cursor cuenta los movimientos del artículo desde el primero que tuvo (también los
+    ya descartados de la memoria), así no se corre con movimientos nuevos ni al compactar.
+
+    Args:
+        leer (callable): (inicio, fin) -> movimientos del artículo en memoria en [inicio, fin)
+        cantidad (int): Movimientos del artículo en memoria
+        descartados (int): Movimientos del artículo que ya se quitaron de la memoria
+        cursor (int): Cursor devuelto por la página anterior, o None para la primera
+        limite (int): Máximo de movimientos
+
+    Returns:
+        tuple: (movimientos en orden cronológico, cursor de la página siguiente o None)
+    """
+    fin = cantidad if cursor is None else max(0, min(cursor - descartados, cantidad))
+    inicio = max(0, fin - limite)
+    return leer(inicio, fin), (descartados + inicio if inicio > 0 else None)
+
+def buscar_posicion(clave, cantidad, valor, incluir_iguales=False):
+    """
+    Búsqueda binaria en un historial ordenado por fecha al que se accede por posición
+
+    Args:
+        clave (callable): Posición -> fecha (o instante) del movimiento en esa posición
+        cantidad (int): Número de movimientos del historial
+        valor: Fecha buscada, comparable con lo que retorna clave
+        incluir_iguales (bool): Si es True se salta también los movimientos con esa misma fecha
+
+    Returns:
+        int: Primera posición con fecha mayor o igual a valor (mayor si incluir_iguales)
+    """
+    inicio, fin = 0, cantidad
+    while inicio < fin:
+        medio = (inicio + fin) // 2
+        fecha = clave(medio)
+        if fecha < valor or (incluir_iguales and fecha == valor):
+            inicio = medio + 1
+        else:
+            fin = medio
+    return inicio
+
+class VistaMovimientos(Sequence):
+    TAMANO_BLOQUE = 1000
+
+    def __init__(self, leer, posiciones):
+        """
+        Vista de solo lectura de un tramo del historial, sin copiar los movimientos
+
+        Admite len(), índices (también negativos), cortes (que dan otra vista) y recorrerla
+        en ambos sentidos; al recorrerla los movimientos se leen del almacén por bloques.
+
+        Args:
+            leer (callable): leer(inicio, fin) -> lista de movimientos en las posiciones [inicio, fin)
+            posiciones (range): Posiciones del historial que abarca la vista
+        """
+        self._leer = leer
+        self.posiciones = posiciones
+
+    def __len__(self):
+        return len(self.posiciones)
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return VistaMovimientos(self._leer, self.posiciones[indice])
+        posicion = self.posiciones[indice]
+        return self._leer(posicion, posicion + 1)[0]
+
+    def __iter__(self):
+        return self._recorrer(self.posiciones)
+
+    def __reversed__(self):
+        return self._recorrer(self.posiciones[::-1])
+
+    def __repr__(self):
+        return f"VistaMovimientos({len(self)} movimientos)"
+
+    def _recorrer(self, posiciones):
+        bloque = self.TAMANO_BLOQUE
+        if posiciones.step == 1:
+            for inicio in range(posiciones.start, posiciones.stop, bloque):
+                yield from self._leer(inicio, min(inicio + bloque, posiciones.stop))
+        elif posiciones.step == -1:
+            for fin in range(posiciones.start + 1, posiciones.stop + 1, -bloque):
+                yield from reversed(self._leer(max(fin - bloque, posiciones.stop + 1), fin))
+        else:
+            for posicion in posiciones:
+                yield self._leer(posicion, posicion + 1)[0]
+
+class AlmacenMemoria:
+    def __init__(self):
+        """
+        Inicializa un almacén vacío en memoria
+        """
+        self.articulos = {}  # Diccionario con código como clave y Articulo como valor
+        # Orden de alta para listar por páginas (ver articulos_despues); None con un catálogo
+        # mapeado, que ya lo tiene
+        self.orden_articulos = []
+        self.posiciones_articulos = {}  # Código -> posición en orden_articulos
+        self.movimientos = []  # Lista de todos los movimientos
+        self.movimientos_por_articulo = {}  # Código -> movimientos del artículo en orden de registro
+        self.descartados_por_articulo = {}  # Código -> movimientos del artículo ya archivados y quitados
+        self.movimientos_por_id = {}  # ID -> movimiento
+        # Saldos acumulados por artículo: instante (µs) y stock después de cada movimiento
+        self.instantes_por_articulo = {}
+        self.saldos_por_articulo = {}
+
+    def contiene_articulo(self, codigo):
+        return codigo in self.articulos
+
+    def agregar_articulo(self, articulo):
+        self.articulos[articulo.codigo] = articulo
+        if self.orden_articulos is not None:
+            self.posiciones_articulos[articulo.codigo] = len(self.orden_articulos)
+            self.orden_articulos.append(articulo)
+
+    def obtener_articulo(self, codigo):
+        return self.articulos.get(codigo)
+
+    def iterar_articulos(self):
+        return iter(self.articulos.values())
+
+    def articulos_despues(self, codigo=None, limite=100):
+        """
+        Artículos que siguen a uno en orden de alta (para listar por páginas)
+
+        Args:
+            codigo (str): Último código de la página anterior, o None para empezar por el primero
+            limite (int): Máximo de artículos
+
+        Returns:
+            list: Artículos en orden de alta, o None si el código no existe
+        """
+        if self.orden_articulos is None:
+            return self.articulos.articulos_despues(codigo, limite)
+        if codigo is None:
+            inicio = 0
+        else:
+            posicion = self.posiciones_articulos.get(codigo)
+            if posicion is None:
+                return None
+            inicio = posicion + 1
+        return self.orden_articulos[inicio:inicio + limite]
+
+    def contar_articulos(self):
+        return len(self.articulos)
+
+    def cargar_catalogo(self, articulos):
+        """
+        Reemplaza el catálogo (vacío) por uno ya armado, por ejemplo un CatalogoMapeado
+
+        Args:
+            articulos: Mapeo código -> Articulo (con articulos_despues, ver CatalogoMapeado)
+        """
+        self.articulos = articulos
+        self.orden_articulos = self.posiciones_articulos = None
+
+    def guardar_movimiento(self, movimiento, articulo):
+        """
+        Guarda un movimiento ya aplicado al stock del artículo
+
+        Args:
+            movimiento (MovimientoInventario): Movimiento registrado
+            articulo (Articulo): Artículo afectado, con el stock ya actualizado
+        """
+        self.movimientos.append(movimiento)
+        self.movimientos_por_articulo.setdefault(movimiento.codigo_articulo, []).append(movimiento)
+        self.movimientos_por_id[movimiento.id] = movimiento
+        self._agregar_saldo(movimiento, articulo.cantidad)
+
+    def _agregar_saldo(self, movimiento, saldo):
+        codigo = movimiento.codigo_articulo
+        instantes = self.instantes_por_articulo.get(codigo)
+        if instantes is None:
+            instantes = self.instantes_por_articulo[codigo] = array('q')
+            self.saldos_por_articulo[codigo] = array('d')
+        instantes.append(a_microsegundos(movimiento.fecha_hora))
+        self.saldos_por_articulo[codigo].append(saldo)
+
+    def guardar_movimientos(self, movimientos, articulos):
+        """
+        Guarda un lote de movimientos ya aplicados al stock
+
+        Args:
+            movimientos (list): Movimientos del lote en orden
+            articulos (iterable): Artículos afectados, con el stock ya actualizado
+        """
+        self.movimientos.extend(movimientos)
+        por_articulo = self.movimientos_por_articulo
+        por_id = self.movimientos_por_id
+        for movimiento, saldo in zip(movimientos, calcular_saldos(movimientos, articulos)):
+            por_articulo.setdefault(movimiento.codigo_articulo, []).append(movimiento)
+            por_id[movimiento.id] = movimiento
+            self._agregar_saldo(movimiento, saldo)
+
+    def cargar_historial(self, filas):
+        """
+        Agrega movimientos ya guardados, con el saldo que dejó cada uno, sin tocar el stock
+        (al arrancar, el stock sale de la instantánea; ver PersistenciaInventario.cargar)
+
+        Args:
+            filas (iterable): (MovimientoInventario, saldo) en orden de fecha
+        """
+        por_articulo = self.movimientos_por_articulo
+        por_id = self.movimientos_por_id
+        for movimiento, saldo in filas:
+            self.movimientos.append(movimiento)
+            por_articulo.setdefault(movimiento.codigo_articulo, []).append(movimiento)
+            por_id[movimiento.id] = movimiento
+            self._agregar_saldo(movimiento, saldo)
+
+    def movimientos_articulo(self, codigo):
+        return list(self.movimientos_por_articulo.get(codigo, []))
+
+    def pagina_movimientos_articulo(self, codigo, cursor=None, limite=50):
+        """
+        Una página de movimientos de un artículo (ver pagina_hacia_atras)
+
+        Returns:
+            tuple: (movimientos en orden cronológico, cursor de la página siguiente o None)
+        """
+        movimientos = self.movimientos_por_articulo.get(codigo, [])
+        return pagina_hacia_atras(lambda inicio, fin: movimientos[inicio:fin], len(movimientos),
+                                  self.descartados_por_articulo.get(codigo, 0), cursor, limite)
+
+    def _saldo_en_instante(self, articulo, microsegundos):
+        instantes = self.instantes_por_articulo.get(articulo.codigo)
+        if not instantes:
+            return articulo.cantidad
+        posicion = bisect_right(instantes, microsegundos)
+        saldos = self.saldos_por_articulo[articulo.codigo]
+        if posicion:
+            return saldos[posicion - 1]
+        # Antes del primer movimiento conocido: el stock que había antes de ese movimiento
+        return saldos[0] - variacion_movimiento(self.movimientos_por_articulo[articulo.codigo][0])
+
+    def saldo_en_fecha(self, codigo, fecha_hora):
+        """
+        Stock que tenía un artículo en una fecha (incluye los movimientos de ese mismo instante)
+
+        Es una búsqueda binaria sobre los instantes de los movimientos del artículo, que
+        guardan el saldo acumulado después de cada uno: O(log n) en movimientos del artículo.
+        Antes del primer movimiento conocido se devuelve el stock previo a ese movimiento, y
+        un artículo sin movimientos tiene su stock actual: supone que el historial está
+        completo (Inventario.obtener_stock_en_fecha responde None cuando no lo está).
+
+        Args:
+            codigo (str): Código del artículo
+            fecha_hora (datetime): Instante de la consulta
+
+        Returns:
+            float: Stock en esa fecha o None si no existe el artículo
+        """
+        articulo = self.obtener_articulo(codigo)
+        if articulo is None:
+            return None
+        return self._saldo_en_instante(articulo, a_microsegundos(fecha_hora))
+
+    def saldos_en_fecha(self, fecha_hora):
+        """
+        Stock de todos los artículos en una fecha
+
+        Args:
+            fecha_hora (datetime): Instante de la consulta
+
+        Returns:
+            dict: Código -> stock en esa fecha, en orden de alta
+        """
+        microsegundos = a_microsegundos(fecha_hora)
+        return {
+            articulo.codigo: self._saldo_en_instante(articulo, microsegundos)
+            for articulo in self.articulos.values()
+        }
+
+    def obtener_movimiento(self, id_movimiento):
+        return self.movimientos_por_id.get(id_movimiento)
+
+    def todos_movimientos(self):
+        return self.movimientos.copy()
+
+    def movimientos_en_posiciones(self, inicio, fin):
+        """
+        Movimientos del historial entre dos posiciones
+
+        Args:
+            inicio (int): Primera posición
+            fin (int): Posición siguiente a la última
+
+        Returns:
+            list: Movimientos en las posiciones [inicio, fin)
+        """
+        return self.movimientos[inicio:fin]
+
+    def movimientos_con_saldo(self, fin):
+        """
+        Recorre el comienzo del historial con el saldo que dejó cada movimiento (para archivarlo)
+
+        Args:
+            fin (int): Posición siguiente a la última
+
+        Yields:
+            tuple: (MovimientoInventario, saldo) de las posiciones [0, fin)
+        """
+        usados = {}  # Código -> movimientos del artículo ya recorridos
+        for movimiento in islice(self.movimientos, fin):
+            codigo = movimiento.codigo_articulo
+            indice = usados.get(codigo, 0)
+            usados[codigo] = indice + 1
+            yield movimiento, self.saldos_por_articulo[codigo][indice]
+
+    def descartar_movimientos(self, fin):
+        """
+        Quita de la memoria el comienzo del historial (ya archivado)
+
+        Las posiciones de los movimientos que quedan pasan a contarse desde 0. El saldo
+        guardado en cada movimiento no cambia, así el stock a una fecha sigue saliendo igual.
+
+        Args:
+            fin (int): Posición siguiente a la última que se quita
+        """
+        descartados = {}  # Código -> movimientos del artículo que se quitan
+        for movimiento in islice(self.movimientos, fin):
+            codigo = movimiento.codigo_articulo
+            descartados[codigo] = descartados.get(codigo, 0) + 1
+            del self.movimientos_por_id[movimiento.id]
+        del self.movimientos[:fin]
+        for codigo, cantidad in descartados.items():
+            self.descartados_por_articulo[codigo] = self.descartados_por_articulo.get(codigo, 0) + cantidad
+            if cantidad == len(self.movimientos_por_articulo[codigo]):
+                del self.movimientos_por_articulo[codigo]
+                del self.instantes_por_articulo[codigo]
+                del self.saldos_por_articulo[codigo]
+            else:
+                del self.movimientos_por_articulo[codigo][:cantidad]
+                del self.instantes_por_articulo[codigo][:cantidad]
+                del self.saldos_por_articulo[codigo][:cantidad]
+
+    def posiciones_entre(self, desde=None, hasta=None):
+        """
+        Busca (en O(log n)) el tramo del historial con fecha entre desde y hasta, ambos incluidos
+
+        Args:
+            desde (datetime): Fecha inicial o None para empezar por el primer movimiento
+            hasta (datetime): Fecha final o None para terminar en el último movimiento
+
+        Returns:
+            tuple: (inicio, fin) con las posiciones del tramo [inicio, fin)
+        """
+        return self._posiciones_entre(lambda posicion: self.movimientos[posicion].fecha_hora, desde, hasta)
+
+    def _posiciones_entre(self, clave, desde, hasta):
+        cantidad = self.contar_movimientos()
+        inicio = buscar_posicion(clave, cantidad, desde) if desde is not None else 0
+        fin = buscar_posicion(clave, cantidad, hasta, incluir_iguales=True) if hasta is not None else cantidad
+        return inicio, max(inicio, fin)
+
+    def contar_movimientos(self):
+        return len(self.movimientos)
+
+    def ultima_fecha_movimiento(self):
+        return self.movimientos[-1].fecha_hora if self.movimientos else None
+
+    def filas_reporte(self):
+        """
+        Recorre la información de todos los artículos para el reporte
+
+        Yields:
+            dict: Información de cada artículo (ver Articulo.obtener_info)
+        """
+        for articulo in self.articulos.values():
+            yield articulo.obtener_info()
+
+    def confirmar(self):
+        """
+        En memoria no hay nada pendiente de confirmar
+        """
+
+    def cerrar(self):
+        # Un catálogo mapeado desde una instantánea binaria libera el archivo
+        cerrar = getattr(self.articulos, 'cerrar', None)
+        if cerrar is not None:
+            cerrar()
+
+class AlmacenColumnar(AlmacenMemoria):
+    ENTRADA = 1
+    SALIDA = 0
+
+    def __init__(self):
+        """
+        Inicializa un almacén en memoria con los movimientos guardados por columnas
+
+        Cada movimiento ocupa unos 57 bytes: índice del artículo, tipo, cantidad, instante en
+        microsegundos, usuario y motivo (estos dos como índices a tablas de textos únicos),
+        ID numérico, costo unitario (NaN si no tiene), saldo acumulado del artículo, más su
+        posición en el índice por artículo.
+
+        Como los IDs se generan en orden, la búsqueda por ID es binaria sobre su columna en
+        lugar de usar un diccionario (que costaría más de 100 bytes por movimiento).
+        """
+        super().__init__()
+        self.codigos = []  # Índice de artículo -> código
+        self.indice_codigos = {}  # Código -> índice de artículo
+        self.textos = []  # Tabla de textos únicos (usuarios y motivos)
+        self.indice_textos = {}
+
+        self.col_articulo = array('I')
+        self.col_tipo = array('b')
+        self.col_cantidad = array('d')
+        self.col_instante = array('q')
+        self.col_usuario = array('I')
+        self.col_motivo = array('I')
+        self.col_id = array('q')
+        self.col_costo = array('d')  # Costo unitario; NaN si el movimiento no lo tiene
+        self.col_saldo = array('d')  # Stock del artículo después de cada movimiento
+        self.ids_texto = {}  # Posición -> ID en texto de los movimientos con IDs del formato antiguo
+        self.ids_ordenados = True
+        self.posiciones_por_articulo = []  # Índice de artículo -> array de posiciones
+
+    def _internar(self, texto):
+        indice = self.indice_textos.get(texto)
+        if indice is None:
+            indice = len(self.textos)
+            self.textos.append(texto)
+            self.indice_textos[texto] = indice
+        return indice
+
+    def _indice_articulo(self, codigo):
+        indice = self.indice_codigos.get(codigo)
+        if indice is None:
+            indice = len(self.codigos)
+            self.codigos.append(codigo)
+            self.indice_codigos[codigo] = indice
+            self.posiciones_por_articulo.append(array('I'))
+        return indice
+
+    def guardar_movimiento(self, movimiento, articulo):
+        self._agregar_fila(movimiento)
+        self.col_saldo.append(articulo.cantidad)
+
+    def cargar_historial(self, filas):
+        for movimiento, saldo in filas:
+            self._agregar_fila(movimiento)
+            self.col_saldo.append(saldo)
+
+    def _agregar_fila(self, movimiento):
+        indice_articulo = self._indice_articulo(movimiento.codigo_articulo)
+        self.posiciones_por_articulo[indice_articulo].append(len(self.col_articulo))
+        self.col_articulo.append(indice_articulo)
+        self.col_tipo.append(self.ENTRADA if movimiento.es_entrada() else self.SALIDA)
+        self.col_cantidad.append(movimiento.cantidad)
+        self.col_instante.append(a_microsegundos(movimiento.fecha_hora))
+        self.col_usuario.append(self._internar(movimiento.usuario))
+        self.col_motivo.append(self._internar(movimiento.motivo))
+        self.col_costo.append(math.nan if movimiento.costo_unitario is None else movimiento.costo_unitario)
+        self._agregar_id(movimiento.id)
+
+    def _agregar_id(self, id_movimiento):
+        numero = numero_id(id_movimiento)
+        if numero is None:
+            self.ids_texto[len(self.col_id)] = id_movimiento
+            numero = -1
+        if self.col_id and numero < self.col_id[-1]:
+            self.ids_ordenados = False
+        self.col_id.append(numero)
+
+    def guardar_movimientos(self, movimientos, articulos):
+        """
+        Agrega un lote a las columnas; si todos comparten tipo, usuario y fecha (ver
+        MovimientoInventario.crear_lote) se agregan de una vez
+        """
+        if not movimientos:
+            return
+        self.col_saldo.extend(calcular_saldos(movimientos, articulos))
+        primero = movimientos[0]
+        if not all(
+            m.fecha_hora is primero.fecha_hora and m.tipo_movimiento is primero.tipo_movimiento
+            and m.usuario == primero.usuario
+            for m in movimientos
+        ):
+            for movimiento in movimientos:
+                self._agregar_fila(movimiento)
+            return
+        n = len(movimientos)
+        inicio = len(self.col_articulo)
+        indices = [self._indice_articulo(m.codigo_articulo) for m in movimientos]
+        posiciones = self.posiciones_por_articulo
+        for posicion, indice_articulo in enumerate(indices, inicio):
+            posiciones[indice_articulo].append(posicion)
+
+        self.col_articulo.extend(indices)
+        self.col_tipo.extend(array('b', [self.ENTRADA if primero.es_entrada() else self.SALIDA]) * n)
+        self.col_cantidad.extend([m.cantidad for m in movimientos])
+        self.col_instante.extend(array('q', [a_microsegundos(primero.fecha_hora)]) * n)
+        self.col_usuario.extend(array('I', [self._internar(primero.usuario)]) * n)
+        self.col_motivo.extend([self._internar(m.motivo) for m in movimientos])
+        self.col_costo.extend([math.nan if m.costo_unitario is None else m.costo_unitario for m in movimientos])
+        for movimiento in movimientos:
+            self._agregar_id(movimiento.id)
+
+    def construir_movimiento(self, posicion):
+        """
+        Crea el objeto MovimientoInventario de una fila de las columnas
+
+        Args:
+            posicion (int): Posición del movimiento en el historial
+
+        Returns:
+            MovimientoInventario: Movimiento reconstruido
+        """
+        numero = self.col_id[posicion]
+        costo = self.col_costo[posicion]
+        return MovimientoInventario.reconstruir(
+            formatear_id(numero) if numero >= 0 else self.ids_texto[posicion],
+            self.codigos[self.col_articulo[posicion]],
+            TipoMovimiento.ENTRADA if self.col_tipo[posicion] == self.ENTRADA else TipoMovimiento.SALIDA,
+            self.col_cantidad[posicion],
+            self.textos[self.col_motivo[posicion]],
+            self.textos[self.col_usuario[posicion]],
+            desde_microsegundos(self.col_instante[posicion]),
+            None if costo != costo else costo  # NaN: sin costo
+        )
+
+    def movimientos_articulo(self, codigo):
+        indice_articulo = self.indice_codigos.get(codigo)
+        if indice_articulo is None:
+            return []
+        return [self.construir_movimiento(p) for p in self.posiciones_por_articulo[indice_articulo]]
+
+    def pagina_movimientos_articulo(self, codigo, cursor=None, limite=50):
+        indice_articulo = self.indice_codigos.get(codigo)
+        posiciones = self.posiciones_por_articulo[indice_articulo] if indice_articulo is not None else ()
+        return pagina_hacia_atras(
+            lambda inicio, fin: [self.construir_movimiento(p) for p in posiciones[inicio:fin]],
+            len(posiciones), self.descartados_por_articulo.get(codigo, 0), cursor, limite
+        )
+
+    def todos_movimientos(self):
+        return [self.construir_movimiento(p) for p in range(len(self.col_articulo))]
+
+    def movimientos_en_posiciones(self, inicio, fin):
+        return [self.construir_movimiento(p) for p in range(inicio, min(fin, len(self.col_articulo)))]
+
+    def movimientos_con_saldo(self, fin):
+        saldos = self.col_saldo
+        for posicion in range(min(fin, len(self.col_articulo))):
+            yield self.construir_movimiento(posicion), saldos[posicion]
+
+    def descartar_movimientos(self, fin):
+        for columna in (self.col_articulo, self.col_tipo, self.col_cantidad, self.col_instante, self.col_usuario,
+                        self.col_motivo, self.col_id, self.col_costo, self.col_saldo):
+            del columna[:fin]
+        self.ids_texto = {p - fin: id_texto for p, id_texto in self.ids_texto.items() if p >= fin}
+        for indice_articulo, posiciones in enumerate(self.posiciones_por_articulo):
+            if posiciones:
+                quitados = bisect_left(posiciones, fin)
+                if quitados:
+                    codigo = self.codigos[indice_articulo]
+                    self.descartados_por_articulo[codigo] = self.descartados_por_articulo.get(codigo, 0) + quitados
+                self.posiciones_por_articulo[indice_articulo] = array(
+                    'I', [p - fin for p in posiciones[quitados:]]
+                )
+        # Los motivos suelen ser distintos en cada movimiento: la tabla de textos se rearma
+        # con los que siguen en uso para que tampoco crezca sin límite
+        usados = sorted(set(self.col_usuario) | set(self.col_motivo))
+        nuevo_indice = {anterior: nuevo for nuevo, anterior in enumerate(usados)}
+        self.textos = [self.textos[anterior] for anterior in usados]
+        self.indice_textos = {texto: nuevo for nuevo, texto in enumerate(self.textos)}
+        self.col_usuario = array('I', [nuevo_indice[i] for i in self.col_usuario])
+        self.col_motivo = array('I', [nuevo_indice[i] for i in self.col_motivo])
+
+    def posiciones_entre(self, desde=None, hasta=None):
+        return self._posiciones_entre(
+            self.col_instante.__getitem__,
+            a_microsegundos(desde) if desde is not None else None,
+            a_microsegundos(hasta) if hasta is not None else None
+        )
+
+    def obtener_movimiento(self, id_movimiento):
+        numero = numero_id(id_movimiento)
+        if numero is None:
+            for posicion, id_texto in self.ids_texto.items():
+                if id_texto == id_movimiento:
+                    return self.construir_movimiento(posicion)
+            return None
+        if self.ids_ordenados:
+            posicion = bisect_left(self.col_id, numero)
+        else:
+            posicion = self.col_id.index(numero) if numero in self.col_id else len(self.col_id)
+        if posicion < len(self.col_id) and self.col_id[posicion] == numero:
+            return self.construir_movimiento(posicion)
+        return None
+
+    def contar_movimientos(self):
+        return len(self.col_articulo)
+
+    def _saldo_en_instante(self, articulo, microsegundos):
+        indice_articulo = self.indice_codigos.get(articulo.codigo)
+        posiciones = self.posiciones_por_articulo[indice_articulo] if indice_articulo is not None else ()
+        if not posiciones:
+            return articulo.cantidad
+        # Búsqueda binaria del último movimiento del artículo hasta ese instante
+        instantes = self.col_instante
+        inicio, fin = 0, len(posiciones)
+        while inicio < fin:
+            medio = (inicio + fin) // 2
+            if instantes[posiciones[medio]] <= microsegundos:
+                inicio = medio + 1
+            else:
+                fin = medio
+        if inicio:
+            return self.col_saldo[posiciones[inicio - 1]]
+        primera = posiciones[0]
+        cantidad = self.col_cantidad[primera]
+        return self.col_saldo[primera] - (cantidad if self.col_tipo[primera] == self.ENTRADA else -cantidad)
+
+    def ultima_fecha_movimiento(self):
+        return desde_microsegundos(self.col_instante[-1]) if self.col_instante else None
+
+    def _cantidades_con_signo(self):
+        # Entradas en positivo y salidas en negativo: tipo 1 -> +1, tipo 0 -> -1
+        np = cargar_numpy()
+        return np.frombuffer(self.col_cantidad, dtype=np.float64) * (
+            np.frombuffer(self.col_tipo, dtype=np.int8) * 2 - 1
+        )
+
+    def totales_por_articulo(self):
+        """
+        Suma las entradas y salidas de cada artículo
+
+        Returns:
+            dict: Código -> (total entradas, total salidas)
+        """
+        np = cargar_numpy()
+        if np is not None:
+            articulos = np.frombuffer(self.col_articulo, dtype=np.uint32)
+            cantidades = np.frombuffer(self.col_cantidad, dtype=np.float64)
+            es_entrada = np.frombuffer(self.col_tipo, dtype=np.int8).astype(bool)
+            n = len(self.codigos)
+            entradas = np.bincount(articulos[es_entrada], weights=cantidades[es_entrada], minlength=n)
+            salidas = np.bincount(articulos[~es_entrada], weights=cantidades[~es_entrada], minlength=n)
+            return {codigo: (float(entradas[i]), float(salidas[i])) for i, codigo in enumerate(self.codigos)}
+
+        totales = [[0.0, 0.0] for _ in self.codigos]
+        for indice_articulo, tipo, cantidad in zip(self.col_articulo, self.col_tipo, self.col_cantidad):
+            totales[indice_articulo][0 if tipo == self.ENTRADA else 1] += cantidad
+        return {codigo: tuple(totales[i]) for i, codigo in enumerate(self.codigos)}
+
+    def totales_por_tipo(self):
+        """
+        Suma las cantidades de todas las entradas y de todas las salidas
+
+        Returns:
+            dict: {'ENTRADA': total, 'SALIDA': total}
+        """
+        np = cargar_numpy()
+        if np is not None:
+            cantidades = np.frombuffer(self.col_cantidad, dtype=np.float64)
+            es_entrada = np.frombuffer(self.col_tipo, dtype=np.int8).astype(bool)
+            entradas = float(cantidades[es_entrada].sum())
+            salidas = float(cantidades[~es_entrada].sum())
+        else:
+            entradas = salidas = 0.0
+            for tipo, cantidad in zip(self.col_tipo, self.col_cantidad):
+                if tipo == self.ENTRADA:
+                    entradas += cantidad
+                else:
+                    salidas += cantidad
+        return {TipoMovimiento.ENTRADA.value: entradas, TipoMovimiento.SALIDA.value: salidas}
+
+    def totales_por_periodo(self, periodo=timedelta(days=1)):
+        """
+        Suma el movimiento neto (entradas - salidas) por periodos de duración fija
+
+        Args:
+            periodo (timedelta): Duración de cada periodo (por defecto un día)
+
+        Returns:
+            dict: Inicio del periodo (datetime) -> cantidad neta movida en el periodo
+        """
+        ancho = periodo // UN_MICROSEGUNDO
+        np = cargar_numpy()
+        if np is not None:
+            if not len(self.col_instante):
+                return {}
+            periodos = np.frombuffer(self.col_instante, dtype=np.int64) // ancho
+            primero = int(periodos.min())
+            sumas = np.bincount(periodos - primero, weights=self._cantidades_con_signo())
+            return {
+                desde_microsegundos((primero + i) * ancho): float(total)
+                for i, total in enumerate(sumas) if total != 0
+            }
+
+        totales = {}
+        for instante, tipo, cantidad in zip(self.col_instante, self.col_tipo, self.col_cantidad):
+            inicio = instante // ancho
+            totales[inicio] = totales.get(inicio, 0.0) + (cantidad if tipo == self.ENTRADA else -cantidad)
+        return {desde_microsegundos(inicio * ancho): total for inicio, total in sorted(totales.items())}
+
+class AlmacenSincronizado:
+    def __init__(self, almacen):
+        """
+        Envuelve otro almacén para que lo usen varios hilos a la vez
+
+        Cada llamada al almacén se hace con un mismo candado, así sus estructuras internas
+        (listas, columnas, conexión SQLite) no se corrompen. Los métodos que devuelven un
+        iterador lo recorren completo dentro del candado y devuelven una lista, salvo
+        iterar_articulos y movimientos_con_saldo: el catálogo y el tramo a archivar se leen
+        por bloques, tomando el candado en cada uno, para no copiarlos enteros ni retener el
+        candado durante todo el recorrido.
+
+        Args:
+            almacen: Almacén a proteger
+        """
+        self.almacen = almacen
+        self._candado = threading.RLock()
+
+    TAMANO_BLOQUE = 1000  # Artículos o movimientos que se leen cada vez que se toma el candado
+
+    def iterar_articulos(self):
+        return self._articulos_por_bloques()
+
+    def _articulos_por_bloques(self):
+        # Los artículos no se eliminan y se recorren en orden de alta: lo ya entregado no
+        # cambia de posición aunque se agreguen otros entre dos bloques
+        entregados = 0
+        iterador = None
+        while True:
+            with self._candado:
+                nuevo = iterador is None
+                try:
+                    if nuevo:
+                        iterador = iter(self.almacen.iterar_articulos())
+                        bloque = list(islice(iterador, entregados, entregados + self.TAMANO_BLOQUE))
+                    else:
+                        bloque = list(islice(iterador, self.TAMANO_BLOQUE))
+                except RuntimeError:
+                    if nuevo:
+                        raise
+                    # Se agregaron artículos al diccionario entre dos bloques: se vuelve a
+                    # empezar salteando los ya entregados
+                    iterador = None
+                    continue
+            if not bloque:
+                return
+            entregados += len(bloque)
+            yield from bloque
+
+    def movimientos_con_saldo(self, fin):
+        # Lo usa Inventario.compactar con los candados de todos los artículos tomados: nadie
+        # agrega ni quita movimientos entre dos bloques, así el recorrido sigue donde quedó
+        # (los lectores pueden usar el almacén entre un bloque y otro)
+        iterador = None
+        while True:
+            with self._candado:
+                if iterador is None:
+                    iterador = iter(self.almacen.movimientos_con_saldo(fin))
+                bloque = list(islice(iterador, self.TAMANO_BLOQUE))
+            if not bloque:
+                return
+            yield from bloque
+
+    def __getattr__(self, nombre):
+        atributo = getattr(self.almacen, nombre)
+        if not callable(atributo):
+            return atributo
+        candado = self._candado
+
+        def sincronizado(*args, **kwargs):
+            with candado:
+                resultado = atributo(*args, **kwargs)
+                if isinstance(resultado, Iterator):
+                    resultado = list(resultado)
+                return resultado
+
+        return sincronizado
+
+class AlmacenSQLite:
+    ESQUEMA = """
+        CREATE TABLE IF NOT EXISTS articulos (
+            codigo TEXT PRIMARY KEY,
+            nombre TEXT NOT NULL,
+            descripcion TEXT NOT NULL,
+            unidad_medida TEXT NOT NULL,
+            cantidad REAL NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS movimientos (
+            id TEXT NOT NULL,
+            codigo_articulo TEXT NOT NULL REFERENCES articulos(codigo),
+            tipo_movimiento TEXT NOT NULL,
+            cantidad REAL NOT NULL,
+            motivo TEXT NOT NULL,
+            usuario TEXT NOT NULL,
+            fecha_hora TEXT NOT NULL,
+            costo_unitario REAL,
+            saldo REAL NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_movimientos_articulo_fecha
+            ON movimientos (codigo_articulo, fecha_hora);
+        CREATE INDEX IF NOT EXISTS idx_movimientos_fecha
+            ON movimientos (fecha_hora);
+        CREATE INDEX IF NOT EXISTS idx_movimientos_id
+            ON movimientos (id);
+    """
+
+    COLUMNAS_MOVIMIENTO = "id, codigo_articulo, tipo_movimiento, cantidad, motivo, usuario, fecha_hora, costo_unitario"
+    VARIACION = f"CASE tipo_movimiento WHEN '{TipoMovimiento.ENTRADA.value}' THEN cantidad ELSE -cantidad END"
+    # Stock de un artículo (a.codigo, a.cantidad) en un instante: saldo del último movimiento
+    # hasta ese instante, o el stock previo al primer movimiento, o el stock actual si no tiene
+    SALDO_EN_FECHA = f"""
+        COALESCE(
+            (SELECT saldo FROM movimientos
+             WHERE codigo_articulo = a.codigo AND fecha_hora <= :fecha
+             ORDER BY fecha_hora DESC, rowid DESC LIMIT 1),
+            (SELECT saldo - ({VARIACION}) FROM movimientos
+             WHERE codigo_articulo = a.codigo
+             ORDER BY fecha_hora, rowid LIMIT 1),
+            a.cantidad
+        )
+    """
+
+    def __init__(self, ruta, tamano_lote=500):
+        """
+        Abre (o crea) la base de datos del inventario
+
+        Args:
+            ruta (str): Ruta del archivo SQLite
+            tamano_lote (int): Escrituras que se agrupan en una misma transacción
+        """
+        self.ruta = ruta
+        self.tamano_lote = tamano_lote
+        self.escrituras_pendientes = 0
+        # Las transacciones se controlan a mano para agrupar escrituras
+        # Se permite usar la conexión desde otros hilos si el almacén está envuelto en AlmacenSincronizado
+        self.conexion = sqlite3.connect(ruta, isolation_level=None, check_same_thread=False)
+        self.conexion.execute("PRAGMA journal_mode=WAL")
+        self.conexion.execute("PRAGMA synchronous=NORMAL")
+        self.conexion.executescript(self.ESQUEMA)
+        self._migrar_saldos()
+        self._migrar_costos()
+        # Mapa de identidad: mientras alguien use un Articulo, se devuelve el mismo objeto
+        self._articulos_cargados = weakref.WeakValueDictionary()
+
+    def _migrar_saldos(self):
+        """
+        Agrega la columna de saldos a las bases creadas antes de que existiera
+
+        El saldo de cada movimiento se calcula como la suma acumulada de sus movimientos
+        anteriores del mismo artículo (el historial en SQLite está completo).
+        """
+        columnas = [fila[1] for fila in self.conexion.execute("PRAGMA table_info(movimientos)")]
+        if 'saldo' in columnas:
+            return
+        self.conexion.execute("BEGIN")
+        self.conexion.execute("ALTER TABLE movimientos ADD COLUMN saldo REAL NOT NULL DEFAULT 0")
+        self.conexion.execute(f"""
+            UPDATE movimientos SET saldo = acumulado.saldo
+            FROM (
+                SELECT rowid AS fila, SUM({self.VARIACION}) OVER (
+                    PARTITION BY codigo_articulo ORDER BY fecha_hora, rowid
+                ) AS saldo
+                FROM movimientos
+            ) AS acumulado
+            WHERE movimientos.rowid = acumulado.fila
+        """)
+        self.conexion.execute("COMMIT")
+
+    def _migrar_costos(self):
+        """
+        Agrega la columna de costo unitario a las bases creadas antes de la valoración
+        """
+        columnas = [fila[1] for fila in self.conexion.execute("PRAGMA table_info(movimientos)")]
+        if 'costo_unitario' not in columnas:
+            self.conexion.execute("ALTER TABLE movimientos ADD COLUMN costo_unitario REAL")
+
+    def _escribir(self, sql, parametros):
+        if not self.conexion.in_transaction:
+            self.conexion.execute("BEGIN")
+        self.conexion.execute(sql, parametros)
+        self.escrituras_pendientes += 1
+        if self.escrituras_pendientes >= self.tamano_lote:
+            self.confirmar()
+
+    def _articulo_desde_fila(self, fila):
+        codigo, nombre, descripcion, unidad_medida, cantidad = fila
+        articulo = self._articulos_cargados.get(codigo)
+        if articulo is None:
+            articulo = Articulo(codigo, nombre, descripcion, unidad_medida)
+            articulo.cantidad = cantidad
+            self._articulos_cargados[codigo] = articulo
+        return articulo
+
+    @staticmethod
+    def _movimiento_desde_fila(fila):
+        return MovimientoInventario.desde_registro({
+            'id': fila[0],
+            'codigo_articulo': fila[1],
+            'tipo_movimiento': fila[2],
+            'cantidad': fila[3],
+            'motivo': fila[4],
+            'usuario': fila[5],
+            'fecha_hora': fila[6],
+            'costo_unitario': fila[7]
+        })
+
+    def contiene_articulo(self, codigo):
+        if codigo in self._articulos_cargados:
+            return True
+        fila = self.conexion.execute("SELECT 1 FROM articulos WHERE codigo = ?", (codigo,)).fetchone()
+        return fila is not None
+
+    def agregar_articulo(self, articulo):
+        self._escribir(
+            "INSERT INTO articulos (codigo, nombre, descripcion, unidad_medida, cantidad) VALUES (?, ?, ?, ?, ?)",
+            (articulo.codigo, articulo.nombre, articulo.descripcion, articulo.unidad_medida, articulo.cantidad)
+        )
+        self._articulos_cargados[articulo.codigo] = articulo
+
+    def obtener_articulo(self, codigo):
+        articulo = self._articulos_cargados.get(codigo)
+        if articulo is not None:
+            return articulo
+        fila = self.conexion.execute(
+            "SELECT codigo, nombre, descripcion, unidad_medida, cantidad FROM articulos WHERE codigo = ?",
+            (codigo,)
+        ).fetchone()
+        return self._articulo_desde_fila(fila) if fila else None
+
+    def iterar_articulos(self):
+        cursor = self.conexion.execute(
+            "SELECT codigo, nombre, descripcion, unidad_medida, cantidad FROM articulos ORDER BY rowid"
+        )
+        for fila in cursor:
+            yield self._articulo_desde_fila(fila)
+
+    def contar_articulos(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM articulos").fetchone()[0]
+
+    def articulos_despues(self, codigo=None, limite=100):
+        # El orden de alta es el del rowid: se sigue desde el rowid del último código
+        if codigo is None:
+            despues = 0
+        else:
+            fila = self.conexion.execute("SELECT rowid FROM articulos WHERE codigo = ?", (codigo,)).fetchone()
+            if fila is None:
+                return None
+            despues = fila[0]
+        cursor = self.conexion.execute(
+            "SELECT codigo, nombre, descripcion, unidad_medida, cantidad FROM articulos "
+            "WHERE rowid > ? ORDER BY rowid LIMIT ?",
+            (despues, limite)
+        )
+        return [self._articulo_desde_fila(fila) for fila in cursor]
+
+    def guardar_movimiento(self, movimiento, articulo):
+        """
+        Guarda el movimiento y el nuevo stock del artículo dentro del lote en curso
+
+        Args:
+            movimiento (MovimientoInventario): Movimiento registrado
+            articulo (Articulo): Artículo afectado, con el stock ya actualizado
+        """
+        self._escribir(
+            "UPDATE articulos SET cantidad = ? WHERE codigo = ?",
+            (articulo.cantidad, articulo.codigo)
+        )
+        self._escribir(
+            f"INSERT INTO movimientos ({self.COLUMNAS_MOVIMIENTO}, saldo) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                movimiento.id,
+                movimiento.codigo_articulo,
+                movimiento.tipo_movimiento.value,
+                movimiento.cantidad,
+                movimiento.motivo,
+                movimiento.usuario,
+                movimiento.fecha_hora.isoformat(),
+                movimiento.costo_unitario,
+                articulo.cantidad
+            )
+        )
+
+    def guardar_movimientos(self, movimientos, articulos):
+        """
+        Guarda un lote completo en una única transacción (todo o nada)
+
+        Args:
+            movimientos (list): Movimientos del lote en orden
+            articulos (iterable): Artículos afectados, con el stock ya actualizado
+        """
+        articulos = list(articulos)
+        saldos = calcular_saldos(movimientos, articulos)
+        self.confirmar()
+        self.conexion.execute("BEGIN")
+        try:
+            self.conexion.executemany(
+                "UPDATE articulos SET cantidad = ? WHERE codigo = ?",
+                [(articulo.cantidad, articulo.codigo) for articulo in articulos]
+            )
+            self.conexion.executemany(
+                f"INSERT INTO movimientos ({self.COLUMNAS_MOVIMIENTO}, saldo) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (m.id, m.codigo_articulo, m.tipo_movimiento.value, m.cantidad, m.motivo, m.usuario,
+                     m.fecha_hora.isoformat(), m.costo_unitario, saldo)
+                    for m, saldo in zip(movimientos, saldos)
+                ]
+            )
+        except Exception:
+            self.conexion.execute("ROLLBACK")
+            raise
+        self.conexion.execute("COMMIT")
+
+    def movimientos_articulo(self, codigo):
+        cursor = self.conexion.execute(
+            f"SELECT {self.COLUMNAS_MOVIMIENTO} FROM movimientos "
+            "WHERE codigo_articulo = ? ORDER BY fecha_hora, rowid",
+            (codigo,)
+        )
+        return [self._movimiento_desde_fila(fila) for fila in cursor]
+
+    def pagina_movimientos_articulo(self, codigo, cursor=None, limite=50):
+        # Aquí el cursor es el rowid del movimiento siguiente al último de la página (los
+        # rowid van en orden de fecha, ver movimientos_en_posiciones)
+        if limite <= 0:
+            return [], None
+        condicion, parametros = "codigo_articulo = ?", [codigo]
+        if cursor is not None:
+            condicion += (" AND fecha_hora <= (SELECT fecha_hora FROM movimientos WHERE rowid = ?)"
+                          " AND rowid < ?")
+            parametros += [cursor, cursor]
+        filas = self.conexion.execute(
+            f"SELECT rowid, {self.COLUMNAS_MOVIMIENTO} FROM movimientos WHERE {condicion} "
+            "ORDER BY fecha_hora DESC, rowid DESC LIMIT ?",
+            parametros + [limite + 1]
+        ).fetchall()
+        siguiente = filas[limite - 1][0] if len(filas) > limite else None
+        return [self._movimiento_desde_fila(fila[1:]) for fila in reversed(filas[:limite])], siguiente
+
+    def obtener_movimiento(self, id_movimiento):
+        fila = self.conexion.execute(
+            f"SELECT {self.COLUMNAS_MOVIMIENTO} FROM movimientos WHERE id = ?", (id_movimiento,)
+        ).fetchone()
+        return self._movimiento_desde_fila(fila) if fila else None
+
+    def todos_movimientos(self):
+        cursor = self.conexion.execute(f"SELECT {self.COLUMNAS_MOVIMIENTO} FROM movimientos ORDER BY rowid")
+        return [self._movimiento_desde_fila(fila) for fila in cursor]
+
+    # Los movimientos nunca se borran, así que el rowid es la posición en el historial + 1
+
+    def movimientos_en_posiciones(self, inicio, fin):
+        cursor = self.conexion.execute(
+            f"SELECT {self.COLUMNAS_MOVIMIENTO} FROM movimientos WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+            (inicio, fin)
+        )
+        return [self._movimiento_desde_fila(fila) for fila in cursor]
+
+    def _fecha_en_posicion(self, posicion):
+        return self.conexion.execute(
+            "SELECT fecha_hora FROM movimientos WHERE rowid = ?", (posicion + 1,)
+        ).fetchone()[0]
+
+    def posiciones_entre(self, desde=None, hasta=None):
+        """
+        Busca el tramo del historial con fecha entre desde y hasta (ver AlmacenMemoria.posiciones_entre)
+
+        Cada paso de la búsqueda binaria lee una sola fila por su rowid.
+        """
+        # MAX(rowid) sale del final del árbol; COUNT(*) recorrería toda la tabla
+        cantidad = self.conexion.execute("SELECT COALESCE(MAX(rowid), 0) FROM movimientos").fetchone()[0]
+        inicio = buscar_posicion(self._fecha_en_posicion, cantidad, desde.isoformat()) if desde is not None else 0
+        fin = cantidad
+        if hasta is not None:
+            fin = buscar_posicion(self._fecha_en_posicion, cantidad, hasta.isoformat(), incluir_iguales=True)
+        return inicio, max(inicio, fin)
+
+    def contar_movimientos(self):
+        return self.conexion.execute("SELECT COUNT(*) FROM movimientos").fetchone()[0]
+
+    def ultima_fecha_movimiento(self):
+        fila = self.conexion.execute("SELECT MAX(fecha_hora) FROM movimientos").fetchone()
+        return datetime.fromisoformat(fila[0]) if fila[0] else None
+
+    def saldo_en_fecha(self, codigo, fecha_hora):
+        """
+        Stock que tenía un artículo en una fecha (ver AlmacenMemoria.saldo_en_fecha)
+
+        Usa el índice (codigo_articulo, fecha_hora) para llegar al último movimiento hasta
+        esa fecha y lee el saldo que quedó guardado en él.
+        """
+        fila = self.conexion.execute(
+            f"SELECT {self.SALDO_EN_FECHA} FROM articulos AS a WHERE a.codigo = :codigo",
+            {'codigo': codigo, 'fecha': fecha_hora.isoformat()}
+        ).fetchone()
+        return fila[0] if fila else None
+
+    def saldos_en_fecha(self, fecha_hora):
+        """
+        Stock de todos los artículos en una fecha (ver AlmacenMemoria.saldos_en_fecha)
+        """
+        cursor = self.conexion.execute(
+            f"SELECT a.codigo, {self.SALDO_EN_FECHA} FROM articulos AS a ORDER BY a.rowid",
+            {'fecha': fecha_hora.isoformat()}
+        )
+        return dict(cursor)
+
+    def filas_reporte(self):
+        """
+        Recorre la información de todos los artículos directamente desde la base de datos
+
+        Yields:
+            dict: Información de cada artículo (ver Articulo.obtener_info)
+        """
+        cursor = self.conexion.execute(
+            "SELECT codigo, nombre, descripcion, unidad_medida, cantidad FROM articulos ORDER BY rowid"
+        )
+        for codigo, nombre, descripcion, unidad_medida, cantidad in cursor:
+            yield {
+                'codigo': codigo,
+                'nombre': nombre,
+                'descripcion': descripcion,
+                'unidad_medida': unidad_medida,
+                'cantidad': cantidad
+            }
+
+    def confirmar(self):
+        """
+        Confirma la transacción del lote en curso
+        """
+        if self.conexion.in_transaction:
+            self.conexion.execute("COMMIT")
+        self.escrituras_pendientes = 0
+
+    def cerrar(self):
+        self.confirmar()
+        self.conexion.close()
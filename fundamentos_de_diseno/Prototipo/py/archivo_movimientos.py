@@ -0,0 +1,550 @@
+"""
+Archivo de movimientos: el historial guardado en segmentos comprimidos
+
+Aquí llega el historial que sale del diario en cada instantánea de la persistencia (ver
+persistencia.py) y lo que la compactación saca de la memoria (ver Inventario.compactar).
+Los movimientos se guardan en orden y con el saldo que dejó cada uno, en segmentos JSON
+Lines comprimidos con gzip. Un segmento se completa por tramos: cada tramo es un miembro
+gzip agregado al final del archivo (gzip lee los miembros seguidos como uno solo).
+
+El índice (indice.jsonl) solo crece: por cada tramo se agrega una línea con sus fechas, el
+rango de IDs y, por cada artículo que se movió en él, el saldo de apertura (antes de su
+primer movimiento) y el de cierre (después del último); al abrirlo, los tramos de un mismo
+segmento se juntan. Con esos puntos de control el stock a una fecha se responde leyendo a
+lo sumo un segmento, y el de todo el catálogo sin leer los demás.
+
+El corte separa los movimientos que ya no están en memoria (los anteriores: se leen del
+disco solo cuando se consultan) de los que además siguen cargados en memoria.
+"""
+
+import gzip
+import io
+import json
+import os
+from datetime import datetime, timedelta
+
+from almacenamiento import variacion_movimiento
+from identificadores import numero_id
+from movimiento_inventario import MovimientoInventario, TipoMovimiento
+
+MOVIMIENTOS_POR_SEGMENTO = 100000
+
+class SegmentoArchivado:
+    __slots__ = ('numero', 'archivo', 'desde', 'hasta', 'movimientos', 'id_minimo', 'id_maximo', 'ids_texto',
+                 'apertura', 'cierre', 'tamano', 'diarios')
+
+    def __init__(self, numero, archivo):
+        self.numero = numero
+        self.archivo = archivo  # Nombre del archivo .jsonl.gz en la carpeta del archivo
+        self.desde = None  # Fecha del primer movimiento
+        self.hasta = None  # Fecha del último movimiento
+        self.movimientos = 0
+        self.id_minimo = None  # Rango de los IDs numéricos (None si no hay)
+        self.id_maximo = None
+        self.ids_texto = False  # Si tiene movimientos con IDs del formato antiguo
+        self.apertura = {}  # Código -> stock antes de su primer movimiento del segmento
+        self.cierre = {}  # Código -> stock después de su último movimiento del segmento
+        self.tamano = None  # Bytes del archivo hasta el último tramo del índice (None: índice antiguo)
+        self.diarios = []  # Tramos del diario de la persistencia que se pasaron a este segmento
+
+    def a_registro(self):
+        return {
+            'numero': self.numero,
+            'archivo': self.archivo,
+            'desde': self.desde.isoformat(),
+            'hasta': self.hasta.isoformat(),
+            'movimientos': self.movimientos,
+            'id_minimo': self.id_minimo,
+            'id_maximo': self.id_maximo,
+            'ids_texto': self.ids_texto,
+            'apertura': self.apertura,
+            'cierre': self.cierre,
+            'tamano': self.tamano,
+            'diarios': self.diarios
+        }
+
+    @classmethod
+    def desde_registro(cls, registro):
+        segmento = cls(registro['numero'], registro['archivo'])
+        segmento.desde = datetime.fromisoformat(registro['desde'])
+        segmento.hasta = datetime.fromisoformat(registro['hasta'])
+        segmento.movimientos = registro['movimientos']
+        segmento.id_minimo = registro['id_minimo']
+        segmento.id_maximo = registro['id_maximo']
+        segmento.ids_texto = registro['ids_texto']
+        segmento.apertura = registro['apertura']
+        segmento.cierre = registro['cierre']
+        segmento.tamano = registro.get('tamano')
+        segmento.diarios = registro.get('diarios', [])
+        return segmento
+
+    def agregar_tramo(self, tramo):
+        """
+        Suma al segmento un tramo escrito al final de su archivo
+
+        Args:
+            tramo (SegmentoArchivado): Datos solo del tramo (mismo número de segmento)
+        """
+        self.hasta = tramo.hasta
+        self.movimientos += tramo.movimientos
+        if tramo.id_minimo is not None:
+            if self.id_minimo is None:
+                self.id_minimo, self.id_maximo = tramo.id_minimo, tramo.id_maximo
+            else:
+                self.id_minimo = min(self.id_minimo, tramo.id_minimo)
+                self.id_maximo = max(self.id_maximo, tramo.id_maximo)
+        self.ids_texto = self.ids_texto or tramo.ids_texto
+        for codigo, saldo in tramo.apertura.items():
+            self.apertura.setdefault(codigo, saldo)
+        self.cierre.update(tramo.cierre)
+        self.tamano = tramo.tamano
+        self.diarios += tramo.diarios
+
+class ArchivoMovimientos:
+    ARCHIVO_INDICE = "indice.jsonl"
+    ARCHIVO_INDICE_ANTIGUO = "indice.json"
+    ARCHIVO_SEGMENTO = "segmento-{numero:06d}.jsonl.gz"
+
+    def __init__(self, directorio, horizonte=None, movimientos_por_segmento=MOVIMIENTOS_POR_SEGMENTO):
+        """
+        Abre (o prepara) el archivo de movimientos de una carpeta
+
+        Args:
+            directorio (str): Carpeta de los segmentos y su índice (se crea al archivar)
+            horizonte (timedelta): Antigüedad a partir de la cual los movimientos se archivan
+                solos (ver Inventario._compactar_si_corresponde); None para compactar solo a mano
+            movimientos_por_segmento (int): Máximo de movimientos de cada segmento
+        """
+        self.directorio = directorio
+        self.horizonte = horizonte
+        # Se compacta cuando lo más antiguo en memoria pasa el horizonte por un décimo de
+        # él, así cada compactación mueve un tramo y no unos pocos movimientos cada vez
+        self.holgura = horizonte / 10 if horizonte is not None else None
+        self.movimientos_por_segmento = movimientos_por_segmento
+        self.ruta_indice = os.path.join(directorio, self.ARCHIVO_INDICE)
+        self.segmentos = []  # SegmentoArchivado en orden de fecha
+        self.corte = None  # Todos los movimientos anteriores a esta fecha salieron de la memoria
+        self._lineas_indice = None  # Líneas de indice.jsonl (None si todavía no existe)
+        if os.path.exists(self.ruta_indice):
+            self._leer_indice()
+        else:
+            ruta_antigua = os.path.join(directorio, self.ARCHIVO_INDICE_ANTIGUO)
+            if os.path.exists(ruta_antigua):
+                # Índice de una sola pieza de versiones anteriores: se pasa al nuevo al escribir
+                with open(ruta_antigua, 'r', encoding='utf-8') as archivo:
+                    indice = json.load(archivo)
+                self.segmentos = [SegmentoArchivado.desde_registro(r) for r in indice['segmentos']]
+                self.corte = datetime.fromisoformat(indice['corte']) if indice['corte'] else None
+
+    def _leer_indice(self):
+        por_numero = {}
+        self._lineas_indice = 0
+        with open(self.ruta_indice, 'rb') as archivo:
+            while True:
+                inicio = archivo.tell()
+                linea = archivo.readline()
+                if not linea:
+                    break
+                if not linea.endswith(b'\n'):
+                    # Línea a medias de una caída: el tramo no llegó al índice
+                    archivo.close()
+                    with open(self.ruta_indice, 'r+b') as recortar:
+                        recortar.truncate(inicio)
+                    break
+                self._lineas_indice += 1
+                registro = json.loads(linea)
+                if 'corte' in registro:
+                    self.corte = datetime.fromisoformat(registro['corte'])
+                    continue
+                tramo = SegmentoArchivado.desde_registro(registro['segmento'])
+                segmento = por_numero.get(tramo.numero)
+                if segmento is None:
+                    por_numero[tramo.numero] = tramo
+                    self.segmentos.append(tramo)
+                else:
+                    segmento.agregar_tramo(tramo)
+        # Un tramo que se escribió en el segmento pero no llegó al índice se descarta
+        if self.segmentos and self.segmentos[-1].tamano is not None:
+            ultimo = self.segmentos[-1]
+            ruta = os.path.join(self.directorio, ultimo.archivo)
+            if os.path.exists(ruta) and os.path.getsize(ruta) > ultimo.tamano:
+                with open(ruta, 'r+b') as archivo:
+                    archivo.truncate(ultimo.tamano)
+
+    def contar_movimientos(self):
+        return sum(segmento.movimientos for segmento in self.segmentos)
+
+    def contiene_diario(self, numero):
+        """
+        Indica si un tramo del diario de la persistencia ya se pasó al archivo
+
+        Args:
+            numero (int): Número del tramo del diario
+
+        Returns:
+            bool: True si sus movimientos ya están en algún segmento
+        """
+        return any(numero in segmento.diarios for segmento in reversed(self.segmentos))
+
+    def cubre(self, fecha_hora):
+        """
+        Indica si el stock en una fecha se responde con los puntos de control del archivo
+
+        Args:
+            fecha_hora (datetime): Instante de la consulta
+
+        Returns:
+            bool: True si la fecha es anterior al corte de la última compactación
+        """
+        return self.corte is not None and fecha_hora < self.corte
+
+    def compactacion_pendiente(self, primera_fecha, ahora=None):
+        """
+        Indica si el movimiento más antiguo en memoria ya pasó el horizonte (más la holgura)
+
+        Args:
+            primera_fecha (datetime): Fecha del primer movimiento en memoria, o None
+            ahora (datetime): Fecha actual (por defecto datetime.now())
+
+        Returns:
+            bool: True si corresponde compactar
+        """
+        if self.horizonte is None or primera_fecha is None:
+            return False
+        ahora = ahora or datetime.now()
+        return primera_fecha < ahora - self.horizonte - self.holgura
+
+    def archivar(self, filas, corte=None, diario=None):
+        """
+        Agrega movimientos al final del archivo
+
+        Se completa el último segmento y después se abren otros nuevos. Los tramos se
+        escriben (con fsync) antes que sus líneas del índice: una caída a mitad de camino
+        deja el archivo como estaba (lo escrito de más se recorta al abrirlo) y los
+        movimientos se vuelven a archivar la próxima vez.
+
+        Args:
+            filas (iterable): (MovimientoInventario, saldo) en orden de fecha, posteriores a
+                todo lo ya archivado
+            corte (datetime): Nueva fecha de corte (lo anterior sale de la memoria), o None
+                para dejarla como está
+            diario (int): Tramo del diario de la persistencia de donde salen, o None
+
+        Returns:
+            int: Movimientos archivados
+        """
+        os.makedirs(self.directorio, exist_ok=True)
+        ultimo = self.segmentos[-1] if self.segmentos else None
+        if ultimo is not None and (ultimo.tamano is None or ultimo.movimientos >= self.movimientos_por_segmento):
+            ultimo = None  # Completo, o escrito sin tamaño por una versión anterior: no se toca
+        siguiente = (self.segmentos[-1].numero if self.segmentos else 0) + 1
+        capacidad = self.movimientos_por_segmento - (ultimo.movimientos if ultimo is not None else 0)
+        tramos = []
+        tanda = []
+        for fila in filas:
+            tanda.append(fila)
+            if len(tanda) == capacidad:
+                tramos.append(self._escribir_tramo(tanda, ultimo, siguiente, diario))
+                if ultimo is None:
+                    siguiente += 1
+                ultimo, tanda, capacidad = None, [], self.movimientos_por_segmento
+        if tanda:
+            tramos.append(self._escribir_tramo(tanda, ultimo, siguiente, diario))
+
+        registros = [{'segmento': tramo.a_registro()} for tramo in tramos]
+        if corte is not None:
+            if self.corte is not None:
+                corte = max(corte, self.corte)
+            registros.append({'corte': corte.isoformat()})
+        if registros:
+            self._agregar_al_indice(registros)
+        por_numero = {segmento.numero: segmento for segmento in self.segmentos[-1:]}
+        for tramo in tramos:
+            segmento = por_numero.get(tramo.numero)
+            if segmento is None:
+                por_numero[tramo.numero] = tramo
+                self.segmentos.append(tramo)
+            else:
+                segmento.agregar_tramo(tramo)
+        if corte is not None:
+            self.corte = corte
+        return sum(tramo.movimientos for tramo in tramos)
+
+    def fijar_corte(self, corte):
+        """
+        Marca que los movimientos anteriores a una fecha ya no están en memoria (todos
+        tienen que estar archivados)
+
+        Args:
+            corte (datetime): Fecha de corte
+        """
+        self.archivar((), corte)
+
+    def _agregar_al_indice(self, registros):
+        if self._lineas_indice is None:
+            self._reescribir_indice()
+        with open(self.ruta_indice, 'ab') as archivo:
+            for registro in registros:
+                archivo.write((json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8'))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        self._lineas_indice += len(registros)
+        if self._lineas_indice > 4 * len(self.segmentos) + 64:
+            # Muchos tramos sueltos: se reescribe con una línea por segmento (después de
+            # sumar los tramos nuevos, ver archivar)
+            self._lineas_indice = None
+
+    def _reescribir_indice(self):
+        temporal = self.ruta_indice + '.tmp'
+        with open(temporal, 'wb') as archivo:
+            registros = [{'segmento': segmento.a_registro()} for segmento in self.segmentos]
+            if self.corte is not None:
+                registros.append({'corte': self.corte.isoformat()})
+            for registro in registros:
+                archivo.write((json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8'))
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        os.replace(temporal, self.ruta_indice)
+        self._lineas_indice = len(registros)
+        try:
+            os.remove(os.path.join(self.directorio, self.ARCHIVO_INDICE_ANTIGUO))
+        except OSError:
+            pass
+
+    def _escribir_tramo(self, filas, segmento, numero, diario):
+        # Datos solo del tramo; archivar los suma al segmento (ver SegmentoArchivado.agregar_tramo)
+        if segmento is not None:
+            numero = segmento.numero
+        tramo = SegmentoArchivado(numero, self.ARCHIVO_SEGMENTO.format(numero=numero))
+        apertura, cierre = tramo.apertura, tramo.cierre
+        ids = []
+        lineas = []
+        codificar = json.JSONEncoder(ensure_ascii=False).encode
+        fecha_anterior = fecha_iso = None
+        for m, saldo in filas:
+            codigo = m.codigo_articulo
+            if codigo not in apertura:
+                apertura[codigo] = saldo - variacion_movimiento(m)
+            cierre[codigo] = saldo
+            numero_movimiento = numero_id(m.id)
+            if numero_movimiento is None:
+                tramo.ids_texto = True
+            else:
+                ids.append(numero_movimiento)
+            if m.fecha_hora is not fecha_anterior:
+                fecha_anterior = m.fecha_hora
+                fecha_iso = fecha_anterior.isoformat()
+            lineas.append(codificar([m.id, codigo, m.tipo_movimiento.value, m.cantidad, m.motivo, m.usuario,
+                                     fecha_iso, m.costo_unitario, saldo]))
+        lineas.append('')
+        # Se comprime todo el tramo de una vez: escribir línea por línea costaba el doble
+        comprimido = gzip.compress('\n'.join(lineas).encode('utf-8'))
+        ruta = os.path.join(self.directorio, tramo.archivo)
+        with open(ruta, 'r+b' if segmento is not None else 'wb') as crudo:
+            if segmento is not None:
+                crudo.truncate(segmento.tamano)
+                crudo.seek(segmento.tamano)
+            crudo.write(comprimido)
+            crudo.flush()
+            os.fsync(crudo.fileno())
+            tramo.tamano = crudo.tell()
+        tramo.desde = filas[0][0].fecha_hora
+        tramo.hasta = filas[-1][0].fecha_hora
+        tramo.movimientos = len(filas)
+        if ids:
+            tramo.id_minimo, tramo.id_maximo = min(ids), max(ids)
+        if diario is not None:
+            tramo.diarios = [diario]
+        return tramo
+
+    def _leer_filas(self, segmento):
+        """
+        Recorre las filas de un segmento del disco, con la fecha ya convertida
+
+        Yields:
+            tuple: (fila, fecha_hora), donde fila es [id, código, tipo, cantidad, motivo,
+                usuario, fecha ISO, costo unitario, saldo]
+        """
+        fecha_anterior = fecha_hora = None
+        with open(os.path.join(self.directorio, segmento.archivo), 'rb') as crudo:
+            # Solo lo que figura en el índice (un tramo a medias puede seguir en el archivo)
+            contenido = crudo.read(segmento.tamano) if segmento.tamano is not None else crudo.read()
+        with gzip.open(io.BytesIO(contenido), 'rt', encoding='utf-8') as archivo:
+            for linea in archivo:
+                fila = json.loads(linea)
+                if fila[6] != fecha_anterior:
+                    fecha_anterior = fila[6]
+                    fecha_hora = datetime.fromisoformat(fecha_anterior)
+                yield fila, fecha_hora
+
+    def _leer_segmento(self, segmento):
+        """
+        Recorre los movimientos de un segmento del disco
+
+        Yields:
+            MovimientoInventario: Movimientos en orden
+        """
+        for movimiento, _ in self._leer_con_saldo(segmento):
+            yield movimiento
+
+    def _leer_con_saldo(self, segmento):
+        for fila, fecha_hora in self._leer_filas(segmento):
+            yield MovimientoInventario.reconstruir(
+                fila[0], fila[1], TipoMovimiento(fila[2]), fila[3], fila[4], fila[5], fecha_hora, fila[7]
+            ), fila[8]
+
+    def movimientos(self, desde=None, hasta=None, codigo=None):
+        """
+        Recorre los movimientos que salieron de la memoria (anteriores al corte) de un rango
+        de fechas (ambas incluidas)
+
+        Solo se leen los segmentos que se superponen con el rango (y, si se indica un
+        artículo, en los que ese artículo se movió), de a uno.
+
+        Args:
+            desde (datetime): Fecha inicial o None
+            hasta (datetime): Fecha final o None
+            codigo (str): Solo los movimientos de este artículo, o None para todos
+
+        Yields:
+            MovimientoInventario: Movimientos en orden de fecha
+        """
+        corte = self.corte
+        if corte is None:
+            return
+        for segmento in self.segmentos:
+            if desde is not None and segmento.hasta < desde:
+                continue
+            if (hasta is not None and segmento.desde > hasta) or segmento.desde >= corte:
+                break
+            if codigo is not None and codigo not in segmento.apertura:
+                continue
+            for movimiento in self._leer_segmento(segmento):
+                if desde is not None and movimiento.fecha_hora < desde:
+                    continue
+                if (hasta is not None and movimiento.fecha_hora > hasta) or movimiento.fecha_hora >= corte:
+                    break
+                if codigo is None or movimiento.codigo_articulo == codigo:
+                    yield movimiento
+
+    def recorrer_historial(self, desde=None):
+        """
+        Recorre los movimientos archivados a partir de una fecha, con su saldo (para volver
+        a cargar en memoria el historial posterior al corte, ver PersistenciaInventario.cargar)
+
+        Args:
+            desde (datetime): Fecha inicial (incluida) o None para todos
+
+        Yields:
+            tuple: (MovimientoInventario, saldo) en orden de fecha
+        """
+        for segmento in self.segmentos:
+            if desde is not None and segmento.hasta < desde:
+                continue
+            for movimiento, saldo in self._leer_con_saldo(segmento):
+                if desde is None or movimiento.fecha_hora >= desde:
+                    yield movimiento, saldo
+
+    def obtener_movimiento(self, id_movimiento):
+        """
+        Busca un movimiento archivado por su ID (solo en los segmentos cuyo rango de IDs lo incluye)
+
+        Args:
+            id_movimiento (str): ID del movimiento
+
+        Returns:
+            MovimientoInventario: El movimiento o None si no está archivado
+        """
+        numero = numero_id(id_movimiento)
+        for segmento in self.segmentos:
+            if numero is None:
+                if not segmento.ids_texto:
+                    continue
+            elif segmento.id_minimo is None or not segmento.id_minimo <= numero <= segmento.id_maximo:
+                continue
+            for movimiento in self._leer_segmento(segmento):
+                if movimiento.id == id_movimiento:
+                    return movimiento
+        return None
+
+    def _saldo_en_segmento(self, segmento, codigo, fecha_hora):
+        # Saldo de apertura, actualizado con los movimientos del artículo hasta la fecha
+        saldo = segmento.apertura[codigo]
+        for fila, fecha_fila in self._leer_filas(segmento):
+            if fecha_fila > fecha_hora:
+                break
+            if fila[1] == codigo:
+                saldo = fila[8]
+        return saldo
+
+    def saldo_en_fecha(self, codigo, fecha_hora):
+        """
+        Stock de un artículo en una fecha según los puntos de control del archivo
+
+        Args:
+            codigo (str): Código del artículo
+            fecha_hora (datetime): Instante de la consulta (incluye los movimientos de ese instante)
+
+        Returns:
+            float: Stock en esa fecha, o None si el artículo no tiene movimientos archivados
+                (entonces su stock sale del historial en memoria)
+        """
+        saldo = None
+        for segmento in self.segmentos:
+            if codigo not in segmento.apertura:
+                continue
+            if segmento.desde > fecha_hora:
+                # Si no se movió antes, el stock es el que tenía antes de este segmento
+                return saldo if saldo is not None else segmento.apertura[codigo]
+            if segmento.hasta <= fecha_hora:
+                saldo = segmento.cierre[codigo]
+            else:
+                return self._saldo_en_segmento(segmento, codigo, fecha_hora)
+        return saldo
+
+    def saldos_en_fecha(self, fecha_hora):
+        """
+        Stock en una fecha de todos los artículos con movimientos archivados
+
+        Lee a lo sumo el segmento que contiene la fecha; los demás aportan sus puntos de control.
+
+        Args:
+            fecha_hora (datetime): Instante de la consulta
+
+        Returns:
+            dict: Código -> stock en esa fecha
+        """
+        saldos = {}
+        posteriores = []
+        for segmento in self.segmentos:
+            if segmento.desde > fecha_hora:
+                posteriores.append(segmento)
+            elif segmento.hasta <= fecha_hora:
+                saldos.update(segmento.cierre)
+            else:
+                saldos.update(segmento.apertura)
+                for fila, fecha_fila in self._leer_filas(segmento):
+                    if fecha_fila > fecha_hora:
+                        break
+                    saldos[fila[1]] = fila[8]
+        # Los que recién se mueven después de la fecha tienen el stock de antes de moverse
+        for segmento in posteriores:
+            for codigo, saldo in segmento.apertura.items():
+                saldos.setdefault(codigo, saldo)
+        return saldos
+
+def horizonte_desde_dias(texto):
+    """
+    Convierte un número de días (por ejemplo de una variable de entorno) en horizonte
+
+    Args:
+        texto (str): Días, admite decimales
+
+    Returns:
+        timedelta: Horizonte o None si el texto está vacío o no es un número positivo
+    """
+    try:
+        dias = float(texto)
+    except (TypeError, ValueError):
+        return None
+    return timedelta(days=dias) if dias > 0 else None
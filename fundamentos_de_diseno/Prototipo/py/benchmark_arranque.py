@@ -0,0 +1,107 @@
+"""
+Medición del tiempo de arranque del sistema (en frío, un proceso nuevo por medición)
+
+Mide por separado:
+- el proceso completo hasta tener el menú listo (intérprete + imports + SistemaInventario)
+- el import de main.py
+- la creación de SistemaInventario (incluye cargar los datos guardados)
+- la primera vez que se usa el generador de PDF (import de reportlab y estilos)
+
+También muestra los módulos que más tardan en importarse. Si se indica un límite, termina
+con error cuando la mediana del arranque lo supera, así una regresión se nota enseguida.
+
+Uso:
+    python benchmark_arranque.py [repeticiones] [limite_ms]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+
+# Código que corre cada proceso medido; imprime sus tiempos internos en JSON
+MEDICION = """
+import json, time
+inicio = time.perf_counter()
+import main
+importado = time.perf_counter()
+sistema = main.SistemaInventario()
+creado = time.perf_counter()
+sistema.generador_pdf
+con_pdf = time.perf_counter()
+sistema.inventario.cerrar()
+print(json.dumps({
+    'import_main': importado - inicio,
+    'crear_sistema': creado - importado,
+    'primer_pdf': con_pdf - creado,
+}))
+"""
+
+def medir_una_vez(entorno):
+    inicio = time.perf_counter()
+    salida = subprocess.run(
+        [sys.executable, '-c', MEDICION], cwd=DIRECTORIO, env=entorno,
+        capture_output=True, text=True, check=True
+    ).stdout
+    total = time.perf_counter() - inicio
+    tiempos = json.loads(salida.strip().splitlines()[-1])
+    # El menú queda listo antes de usar el PDF: se descuenta esa parte del total
+    tiempos['arranque'] = total - tiempos['primer_pdf']
+    return tiempos
+
+def imports_mas_lentos(entorno, cantidad=8):
+    resultado = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=DIRECTORIO, env=entorno,
+        capture_output=True, text=True, check=True
+    )
+    # Cada módulo aparece después de lo que importa y con dos espacios más de sangría:
+    # se guardan los imports directos de main (sangría 3) hasta llegar a la línea de main
+    directos = []
+    for linea in resultado.stderr.splitlines():
+        partes = linea.split('|')
+        if len(partes) != 3 or not partes[1].strip().isdigit():
+            continue
+        nombre = partes[2].rstrip()
+        sangria = len(nombre) - len(nombre.lstrip())
+        if sangria == 1:
+            if nombre.strip() == 'main':
+                break
+            directos = []
+        elif sangria == 3:
+            directos.append((int(partes[1]), nombre.strip()))
+    return sorted(directos, reverse=True)[:cantidad]
+
+def main():
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    limite_ms = float(sys.argv[2]) if len(sys.argv) > 2 else None
+
+    with tempfile.TemporaryDirectory() as datos:
+        entorno = dict(os.environ, INVENTARIO_DATOS=datos)
+        medir_una_vez(entorno)  # Calienta la caché de archivos del sistema operativo
+        mediciones = [medir_una_vez(entorno) for _ in range(repeticiones)]
+        lentos = imports_mas_lentos(entorno)
+
+    print(f"Arranque en frío ({repeticiones} procesos), mediana y máximo en ms:\n")
+    for clave, titulo in (('arranque', 'Hasta el menú (proceso completo)'),
+                          ('import_main', 'import main'),
+                          ('crear_sistema', 'SistemaInventario()'),
+                          ('primer_pdf', 'Primer uso del PDF (reportlab)')):
+        valores = [m[clave] * 1000 for m in mediciones]
+        print(f"  {titulo:<34} {statistics.median(valores):8.1f} {max(valores):8.1f}")
+
+    print("\nImports más lentos de main.py (ms, acumulado):")
+    for microsegundos, nombre in lentos:
+        print(f"  {microsegundos / 1000:8.1f}  {nombre}")
+
+    mediana = statistics.median(m['arranque'] for m in mediciones) * 1000
+    if limite_ms is not None and mediana > limite_ms:
+        print(f"\nREGRESIÓN: el arranque ({mediana:.1f} ms) supera el límite de {limite_ms:.1f} ms")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
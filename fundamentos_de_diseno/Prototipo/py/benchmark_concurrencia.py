@@ -0,0 +1,97 @@
+"""
+Prueba de carga con varios hilos sobre un Inventario concurrente
+
+Varios operadores (hilos) hacen entradas y salidas al azar sobre el mismo inventario.
+Al final se verifica que:
+- ningún artículo quedó con stock negativo
+- el stock de cada artículo coincide con la suma de sus movimientos
+- hay exactamente un movimiento por cada operación que se aceptó
+
+Se comparan candados por franjas, un único candado global (1 franja) y, como referencia,
+un solo hilo sin candados.
+
+Uso:
+    python benchmark_concurrencia.py [hilos] [operaciones_por_hilo] [articulos]
+"""
+
+import random
+import sys
+import threading
+import time
+
+from inventario import Inventario
+
+def preparar_inventario(articulos, concurrente, franjas):
+    inventario = Inventario(concurrente=concurrente, franjas_candados=franjas)
+    for i in range(articulos):
+        inventario.agregar_articulo(f"ART{i:05d}", f"Artículo {i}", "", "unidades")
+    return inventario
+
+def operar(inventario, articulos, operaciones, semilla, aceptadas):
+    generador = random.Random(semilla)
+    exitos = 0
+    for _ in range(operaciones):
+        codigo = f"ART{generador.randrange(articulos):05d}"
+        cantidad = generador.randint(1, 10)
+        # Un poco más de salidas que de entradas para que haya salidas rechazadas por stock
+        if generador.random() < 0.45:
+            exito = inventario.entrada_mercancia(codigo, cantidad, usuario=f"op{semilla}")
+        else:
+            exito = inventario.salida_mercancia(codigo, cantidad, usuario=f"op{semilla}")
+        exitos += exito
+    aceptadas.append(exitos)
+
+def verificar(inventario, aceptadas):
+    errores = []
+    for articulo in inventario.listar_articulos():
+        if articulo.cantidad < 0:
+            errores.append(f"{articulo.codigo}: stock negativo ({articulo.cantidad})")
+        saldo = sum(
+            m.cantidad if m.es_entrada() else -m.cantidad
+            for m in inventario.obtener_movimientos_articulo(articulo.codigo)
+        )
+        if saldo != articulo.cantidad:
+            errores.append(f"{articulo.codigo}: stock {articulo.cantidad} != movimientos {saldo}")
+    total_movimientos = len(inventario.obtener_todos_movimientos())
+    if total_movimientos != sum(aceptadas):
+        errores.append(f"{total_movimientos} movimientos para {sum(aceptadas)} operaciones aceptadas")
+    return errores
+
+def ejecutar(nombre, hilos, operaciones, articulos, concurrente=True, franjas=64):
+    inventario = preparar_inventario(articulos, concurrente, franjas)
+    aceptadas = []
+    trabajadores = [
+        threading.Thread(target=operar, args=(inventario, articulos, operaciones, semilla, aceptadas))
+        for semilla in range(hilos)
+    ]
+    inicio = time.perf_counter()
+    for trabajador in trabajadores:
+        trabajador.start()
+    for trabajador in trabajadores:
+        trabajador.join()
+    segundos = time.perf_counter() - inicio
+
+    errores = verificar(inventario, aceptadas)
+    total = hilos * operaciones
+    estado = "OK" if not errores else f"{len(errores)} ERRORES"
+    print(f"{nombre:<28} {hilos:>3} hilos  {total / segundos:>10,.0f} op/s  "
+          f"{sum(aceptadas):>8} aceptadas  {estado}")
+    for error in errores[:5]:
+        print(f"    {error}")
+    inventario.cerrar()
+    return not errores
+
+def main():
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    operaciones = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    articulos = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    print(f"{hilos} hilos x {operaciones} operaciones sobre {articulos} artículos\n")
+    correcto = ejecutar("Sin candados (1 hilo)", 1, hilos * operaciones, articulos, concurrente=False)
+    correcto &= ejecutar("Candado global (1 franja)", hilos, operaciones, articulos, franjas=1)
+    correcto &= ejecutar("Candados por franjas (64)", hilos, operaciones, articulos, franjas=64)
+    correcto &= ejecutar("Pocos artículos, 64 franjas", hilos, operaciones, 4, franjas=64)
+    sys.exit(0 if correcto else 1)
+
+if __name__ == "__main__":
+    main()
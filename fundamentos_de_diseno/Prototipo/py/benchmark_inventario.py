@@ -0,0 +1,362 @@
+"""
+Suite de rendimiento del Inventario y de los reportes, con carga sintética reproducible
+
+Para cada escala (número de movimientos; hay un artículo cada 10 movimientos) se arma un
+inventario nuevo en un proceso aparte, así la memoria pico de cada escala es la suya, y se
+mide:
+- agregar_articulo (todos los artículos de la escala)
+- la carga del historial en lotes (registrar_movimientos_lote)
+- entrada_mercancia, salida_mercancia y obtener_movimientos_articulo sobre artículos
+  elegidos con una distribución de Zipf: unos pocos artículos concentran la mayoría de
+  los movimientos, como en un inventario real
+- generar_reporte_inventario, la primera vez y luego con una entrada entre cada repetición
+- los reportes PDF del inventario y del artículo con más movimientos (hasta --pdf-hasta)
+
+De cada operación se guarda la cantidad medida, operaciones por segundo, percentiles de
+latencia (p50, p90, p99, máximo) y la memoria pico del proceso al terminarla, en un
+archivo JSON. Con "comparar" se contrastan dos archivos y se marca como regresión lo que
+empeoró más que la tolerancia (termina con error si hay alguna).
+
+Uso:
+    python benchmark_inventario.py [--escalas 1000,10000,100000] [--almacen memoria]
+                                   [--semilla 42] [--pdf-hasta 100000] [--salida resultados.json]
+    python benchmark_inventario.py comparar base.json nuevo.json [--tolerancia 0.10]
+
+Las escalas grandes (1M a 10M movimientos) conviene medirlas con --almacen columnar o
+sqlite: con el almacén en memoria cada movimiento es un objeto de Python.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from itertools import accumulate
+
+try:
+    import resource
+except ImportError:  # Windows: no se informa la memoria pico
+    resource = None
+
+from almacenamiento import AlmacenColumnar, AlmacenSQLite
+from inventario import Inventario
+from movimiento_inventario import TipoMovimiento
+
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+ESCALAS = (1_000, 10_000, 100_000)
+MOVIMIENTOS_POR_ARTICULO = 10
+MUESTRAS = 2000  # Llamadas medidas de cada operación individual
+REPETICIONES_REPORTE = 5
+REPETICIONES_PDF_ARTICULO = 3
+TAMANO_LOTE = 10_000
+SESGO_ZIPF = 1.1
+VERSION_RESULTADOS = 1
+
+class CargaSintetica:
+    def __init__(self, articulos, semilla=42, sesgo=SESGO_ZIPF):
+        """
+        Generador de operaciones reproducible (misma semilla, mismas operaciones)
+
+        El artículo de rango k se elige con probabilidad proporcional a 1 / k^sesgo; los
+        rangos se reparten al azar entre los códigos para que los más usados no sean
+        siempre los primeros dados de alta.
+
+        Args:
+            articulos (int): Número de artículos
+            semilla (int): Semilla del generador
+            sesgo (float): Exponente de la distribución de Zipf (0 = uniforme)
+        """
+        self.azar = random.Random(semilla)
+        self.codigos = [f"B{numero:08d}" for numero in range(articulos)]
+        self._por_rango = list(self.codigos)
+        self.azar.shuffle(self._por_rango)
+        self._pesos = list(accumulate(1.0 / (rango + 1) ** sesgo for rango in range(articulos)))
+
+    def elegir(self, cantidad):
+        """Retorna códigos de artículo elegidos con la distribución sesgada"""
+        return self.azar.choices(self._por_rango, cum_weights=self._pesos, k=cantidad)
+
+    @property
+    def mas_usado(self):
+        return self._por_rango[0]
+
+    def historial(self, movimientos):
+        """
+        Genera el historial en lotes de operaciones para registrar_movimientos_lote
+
+        Lleva el stock de cada artículo para que ninguna salida lo deje en negativo.
+
+        Args:
+            movimientos (int): Número total de movimientos
+
+        Returns:
+            iterator: Listas de tuplas (código, tipo, cantidad, motivo, fecha_hora, costo_unitario)
+        """
+        stock = {}
+        pendientes = movimientos
+        while pendientes > 0:
+            lote = []
+            for codigo in self.elegir(min(TAMANO_LOTE, pendientes)):
+                disponible = stock.get(codigo, 0)
+                if disponible > 0 and self.azar.random() < 0.4:
+                    cantidad = self.azar.randint(1, disponible)
+                    stock[codigo] = disponible - cantidad
+                    lote.append((codigo, TipoMovimiento.SALIDA, cantidad, "Venta", None, None))
+                else:
+                    cantidad = self.azar.randint(1, 50)
+                    stock[codigo] = disponible + cantidad
+                    costo = round(self.azar.uniform(1, 100), 2)
+                    lote.append((codigo, TipoMovimiento.ENTRADA, cantidad, "Compra", None, costo))
+            pendientes -= len(lote)
+            yield lote
+
+def memoria_pico_mb():
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux la informa en KB y macOS en bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+def resumir(duraciones, cantidad=None):
+    """
+    Resume las duraciones de una operación
+
+    Args:
+        duraciones (list): Segundos de cada llamada
+        cantidad (int): Elementos procesados si no es uno por llamada (por ejemplo, la carga en lotes)
+
+    Returns:
+        dict: n, total, operaciones por segundo, percentiles en microsegundos y memoria pico
+    """
+    ordenadas = sorted(duraciones)
+    total = sum(ordenadas)
+
+    def percentil(p):
+        # Rango más cercano: el valor por debajo del cual queda el p% de las mediciones
+        return ordenadas[max(0, -(-len(ordenadas) * p // 100) - 1)] * 1e6
+
+    n = cantidad if cantidad is not None else len(ordenadas)
+    return {
+        'n': n,
+        'total_s': total,
+        'ops_por_s': n / total if total > 0 else None,
+        'p50_us': percentil(50),
+        'p90_us': percentil(90),
+        'p99_us': percentil(99),
+        'max_us': ordenadas[-1] * 1e6,
+        'memoria_pico_mb': memoria_pico_mb()
+    }
+
+def medir_llamadas(funcion, argumentos):
+    duraciones = []
+    reloj = time.perf_counter
+    for argumento in argumentos:
+        inicio = reloj()
+        funcion(*argumento)
+        duraciones.append(reloj() - inicio)
+    return duraciones
+
+def crear_inventario_prueba(tipo_almacen, directorio):
+    if tipo_almacen == 'sqlite':
+        return Inventario(almacen=AlmacenSQLite(os.path.join(directorio, 'benchmark.db')))
+    return Inventario(almacen=AlmacenColumnar() if tipo_almacen == 'columnar' else None)
+
+def medir_escala(movimientos, tipo_almacen='memoria', semilla=42, pdf_hasta=100_000):
+    """
+    Mide todas las operaciones en una escala (se llama en un proceso nuevo por escala)
+
+    Args:
+        movimientos (int): Movimientos del historial
+        tipo_almacen (str): "memoria", "columnar" o "sqlite"
+        semilla (int): Semilla de la carga sintética
+        pdf_hasta (int): Escala máxima en la que se miden los PDF
+
+    Returns:
+        dict: Artículos, movimientos y resumen de cada operación
+    """
+    articulos = max(1, movimientos // MOVIMIENTOS_POR_ARTICULO)
+    carga = CargaSintetica(articulos, semilla)
+    operaciones = {}
+    with tempfile.TemporaryDirectory() as directorio:
+        inventario = crear_inventario_prueba(tipo_almacen, directorio)
+
+        operaciones['agregar_articulo'] = resumir(medir_llamadas(
+            inventario.agregar_articulo,
+            ((codigo, f"Artículo {codigo}", "Generado por el benchmark", "unidades") for codigo in carga.codigos)
+        ))
+
+        duraciones = medir_llamadas(inventario.registrar_movimientos_lote, ((lote,) for lote in carga.historial(movimientos)))
+        operaciones['carga_historial_lotes'] = resumir(duraciones, cantidad=movimientos)
+
+        operaciones['entrada_mercancia'] = resumir(medir_llamadas(
+            inventario.entrada_mercancia,
+            ((codigo, carga.azar.randint(1, 50), "Compra", "Benchmark", 10.0) for codigo in carga.elegir(MUESTRAS))
+        ))
+        operaciones['salida_mercancia'] = resumir(medir_llamadas(
+            inventario.salida_mercancia, ((codigo, 1, "Venta", "Benchmark") for codigo in carga.elegir(MUESTRAS))
+        ))
+        operaciones['obtener_movimientos_articulo'] = resumir(medir_llamadas(
+            inventario.obtener_movimientos_articulo, ((codigo,) for codigo in carga.elegir(MUESTRAS))
+        ))
+
+        # La primera vez arma el resumen desde el almacén; las siguientes solo rearman lo que cambió
+        operaciones['generar_reporte_inventario_inicial'] = resumir(
+            medir_llamadas(inventario.generar_reporte_inventario, [()])
+        )
+        duraciones = []
+        for codigo in carga.elegir(REPETICIONES_REPORTE):
+            inventario.entrada_mercancia(codigo, 1, "Compra", "Benchmark", 10.0)
+            duraciones.extend(medir_llamadas(inventario.generar_reporte_inventario, [()]))
+        operaciones['generar_reporte_inventario'] = resumir(duraciones)
+
+        if movimientos <= pdf_hasta:
+            from reporte_pdf import GeneradorReportePDF
+            generador = GeneradorReportePDF()
+            ruta = os.path.join(directorio, 'inventario.pdf')
+            operaciones['pdf_inventario'] = resumir(medir_llamadas(
+                generador.generar_reporte_inventario, [(inventario, ruta)]
+            ))
+            ruta = os.path.join(directorio, 'articulo.pdf')
+            operaciones['pdf_articulo'] = resumir(medir_llamadas(
+                generador.generar_reporte_articulo, [(inventario, carga.mas_usado, ruta)] * REPETICIONES_PDF_ARTICULO
+            ))
+        inventario.cerrar()
+
+    return {
+        'articulos': articulos,
+        'movimientos': movimientos,
+        'memoria_pico_mb': memoria_pico_mb(),
+        'operaciones': operaciones
+    }
+
+def version_codigo():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=DIRECTORIO,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def ejecutar(escalas, tipo_almacen, semilla, pdf_hasta, ruta_salida):
+    resultados = {
+        'version': VERSION_RESULTADOS,
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'codigo': version_codigo(),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'almacen': tipo_almacen,
+        'semilla': semilla,
+        'escalas': {}
+    }
+    for escala in escalas:
+        print(f"Escala {escala:,} movimientos ({tipo_almacen})...", flush=True)
+        salida = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--medir-escala', str(escala),
+             '--almacen', tipo_almacen, '--semilla', str(semilla), '--pdf-hasta', str(pdf_hasta)],
+            cwd=DIRECTORIO, capture_output=True, text=True, check=True
+        ).stdout
+        medicion = json.loads(salida.strip().splitlines()[-1])
+        resultados['escalas'][str(escala)] = medicion
+        mostrar_escala(medicion)
+        # Se guarda después de cada escala: si una escala grande falla quedan las anteriores
+        with open(ruta_salida, 'w', encoding='utf-8') as archivo:
+            json.dump(resultados, archivo, indent=2)
+    print(f"\nResultados en {ruta_salida}")
+    return resultados
+
+def mostrar_escala(medicion):
+    memoria = medicion['memoria_pico_mb']
+    print(f"  {medicion['articulos']:,} artículos, {medicion['movimientos']:,} movimientos"
+          + (f", memoria pico {memoria:,.0f} MB" if memoria is not None else ""))
+    print(f"  {'Operación':<36} {'n':>9} {'op/s':>12} {'p50 µs':>11} {'p90 µs':>11} {'p99 µs':>11}")
+    for nombre, datos in medicion['operaciones'].items():
+        print(f"  {nombre:<36} {datos['n']:>9,} {datos['ops_por_s'] or 0:>12,.1f} "
+              f"{datos['p50_us']:>11,.1f} {datos['p90_us']:>11,.1f} {datos['p99_us']:>11,.1f}")
+
+def comparar(base, nuevo, tolerancia=0.10):
+    """
+    Compara dos archivos de resultados
+
+    Es regresión si bajan las operaciones por segundo, o suben la latencia p50 o la memoria
+    pico, más que la tolerancia. El p99 se muestra pero no se marca (varía mucho entre corridas).
+
+    Args:
+        base (dict): Resultados de referencia
+        nuevo (dict): Resultados a comparar
+        tolerancia (float): Cambio relativo aceptado (0.10 = 10%)
+
+    Returns:
+        list: Regresiones como (escala, operación, métrica, valor base, valor nuevo)
+    """
+    regresiones = []
+    for clave in ('almacen', 'semilla', 'python'):
+        if base.get(clave) != nuevo.get(clave):
+            print(f"Atención: distinto {clave} ({base.get(clave)} / {nuevo.get(clave)}), la comparación puede no ser justa")
+    # (métrica, True si más es mejor; None si solo se muestra)
+    metricas = (('ops_por_s', True), ('p50_us', False), ('p99_us', None), ('memoria_pico_mb', False))
+    print(f"{'Escala':>10} {'Operación':<36} {'Métrica':<16} {'Base':>14} {'Nuevo':>14} {'Cambio':>9}")
+    for escala, medicion in nuevo['escalas'].items():
+        referencia = base['escalas'].get(escala)
+        if referencia is None:
+            continue
+        for operacion, datos in medicion['operaciones'].items():
+            datos_base = referencia['operaciones'].get(operacion)
+            if datos_base is None:
+                continue
+            for metrica, mas_es_mejor in metricas:
+                antes, ahora = datos_base.get(metrica), datos.get(metrica)
+                if not antes or ahora is None:
+                    continue
+                cambio = (ahora - antes) / antes
+                empeoro = mas_es_mejor is not None and (-cambio if mas_es_mejor else cambio) > tolerancia
+                if empeoro:
+                    regresiones.append((escala, operacion, metrica, antes, ahora))
+                print(f"{int(escala):>10,} {operacion:<36} {metrica:<16} {antes:>14,.1f} {ahora:>14,.1f} "
+                      f"{cambio:>+8.1%}{'  REGRESIÓN' if empeoro else ''}")
+    return regresiones
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == 'comparar':
+        analizador = argparse.ArgumentParser(description="Compara dos archivos de resultados")
+        analizador.add_argument('comando')
+        analizador.add_argument('base')
+        analizador.add_argument('nuevo')
+        analizador.add_argument('--tolerancia', type=float, default=0.10)
+        argumentos = analizador.parse_args()
+        with open(argumentos.base, encoding='utf-8') as archivo:
+            base = json.load(archivo)
+        with open(argumentos.nuevo, encoding='utf-8') as archivo:
+            nuevo = json.load(archivo)
+        regresiones = comparar(base, nuevo, argumentos.tolerancia)
+        if regresiones:
+            print(f"\n{len(regresiones)} REGRESIONES (tolerancia {argumentos.tolerancia:.0%})")
+            sys.exit(1)
+        print("\nSin regresiones")
+        return
+
+    analizador = argparse.ArgumentParser(description="Suite de rendimiento del inventario")
+    analizador.add_argument('--escalas', default=','.join(str(e) for e in ESCALAS),
+                            help="Movimientos de cada escala, separados por comas")
+    analizador.add_argument('--almacen', choices=('memoria', 'columnar', 'sqlite'), default='memoria')
+    analizador.add_argument('--semilla', type=int, default=42)
+    analizador.add_argument('--pdf-hasta', type=int, default=100_000,
+                            help="Escala máxima en la que se miden los reportes PDF")
+    analizador.add_argument('--salida', default='resultados_benchmark.json')
+    analizador.add_argument('--medir-escala', type=int, help=argparse.SUPPRESS)
+    argumentos = analizador.parse_args()
+
+    if argumentos.medir_escala is not None:
+        # Proceso hijo: mide una escala e imprime el resultado en JSON
+        medicion = medir_escala(argumentos.medir_escala, argumentos.almacen, argumentos.semilla, argumentos.pdf_hasta)
+        print(json.dumps(medicion))
+        return
+
+    escalas = [int(escala.replace('_', '')) for escala in argumentos.escalas.split(',') if escala.strip()]
+    ejecutar(escalas, argumentos.almacen, argumentos.semilla, argumentos.pdf_hasta, argumentos.salida)
+
+if __name__ == "__main__":
+    main()
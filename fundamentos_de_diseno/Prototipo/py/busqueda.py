@@ -0,0 +1,373 @@
+"""
+Búsqueda de artículos por código, nombre o descripción (texto parcial, sin importar acentos)
+
+El índice vive en memoria y tiene dos partes:
+
+- Índice invertido: por cada campo (código, nombre, descripción), cada palabra normalizada
+  apunta a la lista de artículos que la contienen.
+- Trie de prefijos por ráfagas (burst trie): las hojas son listas ordenadas de hasta
+  TAMANO_HOJA palabras, donde las que empiezan con lo escrito se encuentran con una búsqueda
+  binaria; cuando una hoja se llena se parte en un nodo con una hoja por letra. Un trie con
+  un nodo por letra costaría más de 100 bytes por letra en Python; así solo hay nodos donde
+  el vocabulario es denso (por ejemplo, códigos que comparten el mismo comienzo).
+
+Cada palabra de la consulta debe aparecer (completa o como prefijo) en el artículo. El
+puntaje premia las coincidencias exactas y el campo: código > nombre > descripción. Las
+listas se recorren de mayor a menor puntaje posible: las palabras de cada prefijo salen
+del trie de la más corta a la más larga (un prefijo cubre más de una palabra corta) y,
+si la consulta tiene una sola palabra, se deja de bajar por el trie en cuanto ningún
+artículo más puede entrar en el resultado. Con varias palabras se expanden completas,
+porque un artículo tiene que coincidir con todas.
+"""
+
+import heapq
+import re
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left, insort
+from itertools import count
+
+CAMPOS = ('codigo', 'nombre', 'descripcion')
+PESOS_CAMPOS = (3.0, 2.0, 1.0)  # Peso de cada campo en el puntaje, en el orden de CAMPOS
+TAMANO_HOJA = 256
+MINIMO_PREFIJO = 2  # Con menos letras solo se buscan palabras exactas
+
+ACENTOS = str.maketrans({
+    **dict(zip('áàäâãéèëêíìïîóòöôõúùüûñçø', 'aaaaaeeeeiiiiooooouuuunco')),
+    'ß': 'ss', 'æ': 'ae', 'œ': 'oe'
+})
+PALABRA = re.compile(r'[a-z0-9]+')
+
+def normalizar(texto):
+    """
+    Pasa un texto a minúsculas y sin acentos ni signos
+
+    Args:
+        texto (str): Texto original
+
+    Returns:
+        list: Palabras normalizadas
+    """
+    texto = texto.lower().translate(ACENTOS)
+    try:
+        texto.encode('ascii')
+    except UnicodeEncodeError:
+        # Letras con acentos menos comunes: se descompone la letra y se quita el acento
+        texto = ''.join(c for c in unicodedata.normalize('NFKD', texto) if not unicodedata.combining(c))
+    return PALABRA.findall(texto)
+
+class NodoTrie:
+    __slots__ = ('hijos', 'palabras', 'termina')
+
+    def __init__(self):
+        """
+        Inicializa una hoja vacía
+        """
+        self.hijos = None  # Letra -> NodoTrie (solo en los nodos que se partieron)
+        self.palabras = []  # Palabras ordenadas (solo en las hojas)
+        self.termina = False  # Si el prefijo del nodo es también una palabra
+
+class TriePrefijos:
+    def __init__(self):
+        """
+        Inicializa un trie vacío
+        """
+        self.raiz = NodoTrie()
+
+    def agregar(self, palabra, ordenar=True):
+        """
+        Agrega una palabra nueva
+
+        Args:
+            palabra (str): Palabra normalizada que todavía no está en el trie
+            ordenar (bool): Si es False la hoja queda desordenada hasta llamar a ordenar()
+        """
+        nodo, profundidad = self.raiz, 0
+        while nodo.hijos is not None:
+            if profundidad == len(palabra):
+                nodo.termina = True
+                return
+            letra = palabra[profundidad]
+            hijo = nodo.hijos.get(letra)
+            if hijo is None:
+                hijo = nodo.hijos[letra] = NodoTrie()
+            nodo, profundidad = hijo, profundidad + 1
+        if not ordenar:
+            nodo.palabras.append(palabra)
+            return
+        insort(nodo.palabras, palabra)
+        if len(nodo.palabras) > TAMANO_HOJA:
+            self._partir(nodo, profundidad)
+
+    def ordenar(self):
+        """
+        Ordena las hojas (y parte las que quedaron llenas) después de agregar sin ordenar
+        """
+        pendientes = [(self.raiz, 0)]
+        while pendientes:
+            nodo, profundidad = pendientes.pop()
+            if nodo.hijos is None:
+                nodo.palabras.sort()
+                if len(nodo.palabras) <= TAMANO_HOJA:
+                    continue
+                self._partir(nodo, profundidad, recursivo=False)
+            pendientes.extend((hijo, profundidad + 1) for hijo in nodo.hijos.values())
+
+    @staticmethod
+    def _partir(nodo, profundidad, recursivo=True):
+        # Cada palabra baja a la hoja de su siguiente letra; como estaban ordenadas, cada
+        # hoja nueva también queda ordenada
+        nodo.hijos = {}
+        for palabra in nodo.palabras:
+            if len(palabra) == profundidad:
+                nodo.termina = True
+                continue
+            hijo = nodo.hijos.get(palabra[profundidad])
+            if hijo is None:
+                hijo = nodo.hijos[palabra[profundidad]] = NodoTrie()
+            hijo.palabras.append(palabra)
+        nodo.palabras = None
+        if recursivo:
+            for hijo in nodo.hijos.values():
+                if len(hijo.palabras) > TAMANO_HOJA:
+                    TriePrefijos._partir(hijo, profundidad + 1)
+
+    def palabras_con_prefijo(self, prefijo):
+        """
+        Recorre las palabras que empiezan con un prefijo
+
+        Args:
+            prefijo (str): Comienzo normalizado
+
+        Returns:
+            iterator: Palabras en orden alfabético
+        """
+        nodo, profundidad = self.raiz, 0
+        while nodo.hijos is not None and profundidad < len(prefijo):
+            nodo = nodo.hijos.get(prefijo[profundidad])
+            if nodo is None:
+                return
+            profundidad += 1
+        if nodo.hijos is None:
+            palabras = nodo.palabras
+            for posicion in range(bisect_left(palabras, prefijo), len(palabras)):
+                if not palabras[posicion].startswith(prefijo):
+                    break
+                yield palabras[posicion]
+            return
+        # El prefijo llega a un nodo interno: todas las palabras debajo empiezan con él
+        pendientes = [(nodo, prefijo)]
+        while pendientes:
+            nodo, texto = pendientes.pop()
+            if nodo.hijos is None:
+                yield from nodo.palabras
+                continue
+            if nodo.termina:
+                yield texto
+            pendientes.extend((nodo.hijos[letra], texto + letra) for letra in sorted(nodo.hijos, reverse=True))
+
+    def palabras_por_largo(self, prefijo):
+        """
+        Recorre las palabras que empiezan con un prefijo, de la más corta a la más larga
+
+        Baja por el trie a medida que se piden palabras (primero los nodos menos profundos),
+        así quien deja de pedir no paga el resto del subárbol.
+
+        Args:
+            prefijo (str): Comienzo normalizado
+
+        Returns:
+            iterator: Palabras de menor a mayor largo
+        """
+        nodo, profundidad = self.raiz, 0
+        while nodo.hijos is not None and profundidad < len(prefijo):
+            nodo = nodo.hijos.get(prefijo[profundidad])
+            if nodo is None:
+                return
+            profundidad += 1
+        if nodo.hijos is None:
+            palabras = nodo.palabras
+            inicio = bisect_left(palabras, prefijo)
+            fin = inicio
+            while fin < len(palabras) and palabras[fin].startswith(prefijo):
+                fin += 1
+            yield from sorted(palabras[inicio:fin], key=len)
+            return
+        # Montículo por largo (mínimo) de: palabras listas, nodos internos y hojas a medio
+        # recorrer (con sus palabras ordenadas por largo)
+        orden = count()
+        pendientes = [(len(prefijo), next(orden), nodo, prefijo)]
+        while pendientes:
+            largo, _, elemento, dato = heapq.heappop(pendientes)
+            if elemento is None:
+                yield dato
+            elif isinstance(elemento, list):
+                yield elemento[dato]
+                if dato + 1 < len(elemento):
+                    heapq.heappush(pendientes, (len(elemento[dato + 1]), next(orden), elemento, dato + 1))
+            else:
+                if elemento.termina:
+                    heapq.heappush(pendientes, (largo, next(orden), None, dato))
+                for letra, hijo in elemento.hijos.items():
+                    if hijo.hijos is not None:
+                        heapq.heappush(pendientes, (largo + 1, next(orden), hijo, dato + letra))
+                    elif hijo.palabras:
+                        palabras = sorted(hijo.palabras, key=len)
+                        heapq.heappush(pendientes, (len(palabras[0]), next(orden), palabras, 0))
+
+class IndiceBusqueda:
+    def __init__(self):
+        """
+        Inicializa un índice vacío; se completa desde el almacén la primera vez que se usa
+        """
+        self.codigos = []  # Número de artículo -> código
+        self.entradas = tuple({} for _ in CAMPOS)  # Por campo: palabra -> array de números de artículo
+        self.trie = TriePrefijos()
+        self._construido = False
+        self._candado = threading.Lock()
+
+    def construir(self, almacen):
+        """
+        Indexa todos los artículos del almacén (solo la primera vez)
+
+        Args:
+            almacen: Almacén del inventario
+        """
+        with self._candado:
+            if self._construido:
+                return
+            for articulo in almacen.iterar_articulos():
+                self._indexar(articulo, ordenar=False)
+            # Las palabras se ordenan una sola vez al final en lugar de insertarlas en orden
+            self.trie.ordenar()
+            self._construido = True
+
+    def articulo_agregado(self, articulo):
+        """
+        Agrega un artículo nuevo al índice
+
+        Args:
+            articulo (Articulo): Artículo recién agregado
+        """
+        with self._candado:
+            if self._construido:
+                self._indexar(articulo)
+
+    def _indexar(self, articulo, ordenar=True):
+        numero = len(self.codigos)
+        self.codigos.append(articulo.codigo)
+        for entradas, texto in zip(self.entradas, (articulo.codigo, articulo.nombre, articulo.descripcion)):
+            for palabra in set(normalizar(texto)):
+                numeros = entradas.get(palabra)
+                if numeros is None:
+                    if not self._en_vocabulario(palabra):
+                        self.trie.agregar(palabra, ordenar)
+                    numeros = entradas[palabra] = array('I')
+                numeros.append(numero)
+
+    def _en_vocabulario(self, palabra):
+        return any(palabra in entradas for entradas in self.entradas)
+
+    def _listas_termino(self, termino):
+        """
+        Recorre las listas de artículos donde puede coincidir un término, de mayor a menor puntaje
+
+        Las palabras se sacan del trie recién cuando se piden (ver palabras_por_largo).
+
+        Args:
+            termino (str): Palabra normalizada de la consulta
+
+        Returns:
+            iterator: Tuplas (puntaje, array de números de artículo)
+        """
+        if len(termino) < MINIMO_PREFIJO:
+            palabras = [termino] if self._en_vocabulario(termino) else []
+        else:
+            palabras = self.trie.palabras_por_largo(termino)
+        # Una palabra más larga nunca vale más que una más corta en el mismo campo: lo ya
+        # encontrado se entrega cuando ninguna palabra que falte puede superarlo
+        tope = max(PESOS_CAMPOS)
+        encontradas = []
+        orden = count()
+        for palabra in palabras:
+            # Exacta vale el doble; un prefijo vale más cuanto más de la palabra cubre
+            factor = 2.0 if palabra == termino else len(termino) / len(palabra)
+            while encontradas and -encontradas[0][0] >= tope * factor:
+                puntaje, _, numeros = heapq.heappop(encontradas)
+                yield -puntaje, numeros
+            for entradas, peso in zip(self.entradas, PESOS_CAMPOS):
+                numeros = entradas.get(palabra)
+                if numeros is not None:
+                    heapq.heappush(encontradas, (-factor * peso, next(orden), numeros))
+        while encontradas:
+            puntaje, _, numeros = heapq.heappop(encontradas)
+            yield -puntaje, numeros
+
+    @staticmethod
+    def _puntajes_termino(listas, candidatos=None, limite=None):
+        # Número de artículo -> mejor puntaje del término en ese artículo. Las listas vienen
+        # de mayor a menor puntaje; con un límite se deja de recorrer cuando ya ningún
+        # artículo nuevo puede entrar entre los primeros
+        puntajes = {}
+        anterior = None
+        for puntaje, numeros in listas:
+            if (limite is not None and puntaje != anterior and len(puntajes) >= limite
+                    and heapq.nlargest(limite, puntajes.values())[-1] > puntaje):
+                break
+            anterior = puntaje
+            for numero in numeros:
+                if candidatos is not None and numero not in candidatos:
+                    continue
+                if puntaje > puntajes.get(numero, 0.0):
+                    puntajes[numero] = puntaje
+        return puntajes
+
+    def buscar(self, texto, almacen, limite=10):
+        """
+        Busca los artículos que mejor coinciden con un texto
+
+        Args:
+            texto (str): Palabras a buscar (completas o el comienzo de cada una)
+            almacen: Almacén del inventario (se usa solo la primera vez)
+            limite (int): Máximo de resultados
+
+        Returns:
+            list: Tuplas (código, puntaje) de mayor a menor puntaje
+        """
+        terminos = list(dict.fromkeys(normalizar(texto)))
+        if not terminos or limite <= 0:
+            return []
+        self.construir(almacen)
+        with self._candado:
+            if len(terminos) == 1:
+                # Una sola palabra: se recorre solo hasta completar el límite
+                total = self._puntajes_termino(self._listas_termino(terminos[0]), limite=limite)
+                return self._mejores(total, limite)
+            listas_terminos = []
+            for termino in terminos:
+                listas = list(self._listas_termino(termino))
+                if not listas:
+                    return []
+                listas_terminos.append(listas)
+            # Todas las palabras deben coincidir: se empieza por la que aparece en menos
+            # artículos y las demás solo se miran en los artículos que ya coinciden
+            listas_terminos.sort(key=lambda listas: sum(len(numeros) for _, numeros in listas))
+            total = None
+            for listas in listas_terminos:
+                if total is None:
+                    total = self._puntajes_termino(listas)
+                else:
+                    puntajes = self._puntajes_termino(listas, candidatos=total)
+                    total = {numero: puntaje + total[numero] for numero, puntaje in puntajes.items()}
+                if not total:
+                    return []
+            return self._mejores(total, limite)
+
+    def _mejores(self, total, limite):
+        # A igual puntaje, primero el artículo dado de alta antes
+        if not total:
+            return []
+        minimo = heapq.nlargest(limite, total.values())[-1]
+        mejores = sorted((-puntaje, numero) for numero, puntaje in total.items() if puntaje >= minimo)
+        return [(self.codigos[numero], -puntaje) for puntaje, numero in mejores[:limite]]
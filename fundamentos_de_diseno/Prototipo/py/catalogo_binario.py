@@ -0,0 +1,362 @@
+"""
+Instantánea binaria del catálogo (artículos y stock) que se abre con mmap
+
+Leer un millón de artículos de JSON al arrancar cuesta varios segundos. En este formato el
+archivo se mapea en memoria y cada Articulo se crea recién cuando se lo pide, así el
+arranque y las búsquedas por código cuestan unos pocos fallos de página.
+
+Formato (enteros little-endian):
+
+    cabecera   mágico (8 bytes), versión, cantidad de artículos, y posición de cada sección
+    registros  uno por artículo en orden de alta, de ancho fijo: posición y largo en la
+               tabla de textos del código, nombre, descripción y unidad, y el stock (double)
+    índice     números de registro ordenados por código, para buscar por búsqueda binaria
+    textos     los textos en UTF-8, sin repetir (las unidades, por ejemplo, aparecen una vez)
+"""
+
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import MutableMapping
+
+from articulo import Articulo
+
+MAGICO = b'INVCAT\r\n'
+VERSION = 1
+CABECERA = struct.Struct('<8sIIQQQ')  # Mágico, versión, cantidad, registros, índice, textos
+REGISTRO = struct.Struct('<8Id')  # (posición, largo) x 4 textos, cantidad
+ENTEROS_POR_REGISTRO = REGISTRO.size // 4
+NUMERO = struct.Struct('<I')
+
+def codificar_articulo(articulo):
+    """
+    Fila de un artículo como la escribe escribir_filas
+
+    Args:
+        articulo (Articulo): Artículo a codificar
+
+    Returns:
+        tuple: (código, nombre, descripción, unidad) en UTF-8 y stock
+    """
+    return (articulo.codigo.encode('utf-8'), articulo.nombre.encode('utf-8'),
+            articulo.descripcion.encode('utf-8'), articulo.unidad_medida.encode('utf-8'), articulo.cantidad)
+
+def escribir_catalogo(archivo, articulos):
+    """
+    Escribe la instantánea binaria de un catálogo
+
+    Args:
+        archivo: Archivo abierto en modo binario para escribir
+        articulos: CatalogoMapeado (los artículos que no se usaron se copian sin crearlos) o
+            cualquier iterable de Articulo
+
+    Returns:
+        int: Artículos escritos
+    """
+    if isinstance(articulos, CatalogoMapeado):
+        return escribir_filas(archivo, articulos.filas_codificadas())
+    return escribir_filas(archivo, map(codificar_articulo, articulos))
+
+def escribir_filas(archivo, filas):
+    """
+    Escribe la instantánea binaria de un catálogo a partir de sus filas ya codificadas
+
+    Args:
+        archivo: Archivo abierto en modo binario para escribir
+        filas (iterable): Filas de codificar_articulo en orden de alta (sin códigos repetidos)
+
+    Returns:
+        int: Artículos escritos
+    """
+    textos = bytearray()
+    posiciones = {}  # Texto -> posición en la tabla de textos
+    registros = bytearray()
+    codigos = []
+    empaquetar = REGISTRO.pack
+    for fila in filas:
+        campos = []
+        for texto in fila[:4]:
+            posicion = posiciones.get(texto)
+            if posicion is None:
+                posicion = posiciones[texto] = len(textos)
+                textos += texto
+            campos += (posicion, len(texto))
+        registros += empaquetar(*campos, fila[4])
+        codigos.append(fila[0])
+    indice = bytearray(NUMERO.size * len(codigos))
+    for posicion, numero in enumerate(sorted(range(len(codigos)), key=codigos.__getitem__)):
+        NUMERO.pack_into(indice, posicion * NUMERO.size, numero)
+
+    inicio_registros = CABECERA.size
+    inicio_indice = inicio_registros + len(registros)
+    inicio_textos = inicio_indice + len(indice)
+    archivo.write(CABECERA.pack(MAGICO, VERSION, len(codigos), inicio_registros, inicio_indice, inicio_textos))
+    archivo.write(registros)
+    archivo.write(indice)
+    archivo.write(textos)
+    return len(codigos)
+
+def leer_articulos(ruta):
+    """
+    Recorre todos los artículos de una instantánea binaria (objetos nuevos, que no dependen
+    del archivo)
+
+    Args:
+        ruta (str): Archivo escrito con escribir_catalogo
+
+    Yields:
+        Articulo: Cada artículo en orden de alta
+    """
+    catalogo = CatalogoMapeado(ruta)
+    try:
+        for numero in range(catalogo._cantidad):
+            yield catalogo._crear(catalogo._registro(numero))
+    finally:
+        catalogo.cerrar()
+
+def fusionar_catalogos(archivo, ruta_base, rutas_cambios):
+    """
+    Escribe un catálogo con los artículos de una base más los cambios posteriores (los
+    mismos artículos con otro stock, o artículos nuevos), copiando las filas sin crear
+    los Articulo
+
+    Args:
+        archivo: Archivo abierto en modo binario para escribir
+        ruta_base (str): Catálogo base, o None si todavía no hay
+        rutas_cambios (list): Catálogos con los cambios, del más antiguo al más nuevo
+
+    Returns:
+        int: Artículos escritos
+    """
+    cambios = {}  # Código en UTF-8 -> fila más nueva (en orden de alta de los nuevos)
+    for ruta in rutas_cambios:
+        catalogo = CatalogoMapeado(ruta)
+        for fila in catalogo.filas_codificadas():
+            cambios[fila[0]] = fila
+        catalogo.cerrar()
+
+    def filas():
+        if ruta_base is not None:
+            base = CatalogoMapeado(ruta_base)
+            try:
+                for fila in base.filas_codificadas():
+                    yield cambios.pop(fila[0], fila)
+            finally:
+                base.cerrar()
+        yield from cambios.values()
+
+    return escribir_filas(archivo, filas())
+
+class ArticuloSoloLectura(Articulo):
+    """
+    Artículo leído del archivo al recorrer el catálogo, sin guardarlo
+
+    No es el objeto del catálogo: cambiarlo no cambiaría nada, así que cualquier
+    asignación (también actualizar_cantidad) lanza AttributeError. Para modificar un
+    artículo hay que pedirlo por su código.
+    """
+
+    def __setattr__(self, nombre, valor):
+        if '_fijo' in self.__dict__:
+            raise AttributeError(f"El artículo '{self.codigo}' es de solo lectura: pídalo por código para modificarlo")
+        super().__setattr__(nombre, valor)
+
+class CatalogoMapeado(MutableMapping):
+    def __init__(self, ruta):
+        """
+        Abre una instantánea binaria del catálogo
+
+        Se usa como el diccionario código -> Articulo de los almacenes en memoria. Cada
+        artículo del archivo se crea la primera vez que se pide por su código y desde
+        entonces es siempre el mismo objeto (los cambios de stock se hacen sobre él). Los
+        artículos que se agregan después se guardan aparte, en memoria.
+
+        Args:
+            ruta (str): Archivo escrito con escribir_catalogo
+        """
+        self.ruta = ruta
+        with open(ruta, 'rb') as archivo:
+            self._mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        magico, version, cantidad, registros, indice, textos = CABECERA.unpack_from(self._mapa, 0)
+        if magico != MAGICO or version != VERSION:
+            self._mapa.close()
+            raise ValueError(f"{ruta} no es una instantánea de catálogo válida")
+        self._cantidad = cantidad
+        self._inicio_registros = registros
+        self._inicio_indice = indice
+        self._inicio_textos = textos
+        # El índice y la posición de cada código se leen como arreglos de enteros sobre el
+        # mismo mapeo (sin copiarlos)
+        self._indice = self._enteros(indice, cantidad)
+        self._enteros_registros = self._enteros(registros, cantidad * ENTEROS_POR_REGISTRO)
+        self._articulos = {}  # Código -> Articulo ya creado (del archivo o agregado después)
+        self._por_numero = {}  # Número de registro -> Articulo ya creado
+        self._nuevos = []  # Artículos agregados después de abrir el archivo, en orden
+        self._posiciones_nuevos = {}  # Código -> posición en _nuevos
+
+    def _enteros(self, inicio, cantidad):
+        vista = memoryview(self._mapa)[inicio:inicio + 4 * cantidad]
+        if sys.byteorder == 'little':
+            return vista.cast('I')
+        # En máquinas big-endian se copian y se invierten los bytes
+        enteros = array('I')
+        enteros.frombytes(vista)
+        enteros.byteswap()
+        vista.release()
+        return enteros
+
+    def _registro(self, numero):
+        return REGISTRO.unpack_from(self._mapa, self._inicio_registros + numero * REGISTRO.size)
+
+    def _texto(self, posicion, largo):
+        inicio = self._inicio_textos + posicion
+        return self._mapa[inicio:inicio + largo]
+
+    def _crear(self, registro, clase=Articulo):
+        texto = self._texto
+        articulo = clase(
+            texto(registro[0], registro[1]).decode('utf-8'),
+            texto(registro[2], registro[3]).decode('utf-8'),
+            texto(registro[4], registro[5]).decode('utf-8'),
+            texto(registro[6], registro[7]).decode('utf-8')
+        )
+        articulo.cantidad = registro[8]
+        return articulo
+
+    def _leer(self, numero):
+        articulo = self._crear(self._registro(numero), ArticuloSoloLectura)
+        articulo._fijo = True
+        return articulo
+
+    def _buscar(self, codigo):
+        # Búsqueda binaria en el índice ordenado por código (los bytes UTF-8 se ordenan igual
+        # que los textos)
+        clave = codigo.encode('utf-8')
+        indice, enteros, mapa, textos = self._indice, self._enteros_registros, self._mapa, self._inicio_textos
+        bajo, alto = 0, self._cantidad
+        while bajo < alto:
+            medio = (bajo + alto) // 2
+            numero = indice[medio]
+            inicio = textos + enteros[numero * ENTEROS_POR_REGISTRO]
+            actual = mapa[inicio:inicio + enteros[numero * ENTEROS_POR_REGISTRO + 1]]
+            if actual < clave:
+                bajo = medio + 1
+            elif actual > clave:
+                alto = medio
+            else:
+                return numero
+        return None
+
+    def get(self, codigo, defecto=None):
+        articulo = self._articulos.get(codigo)
+        if articulo is not None:
+            return articulo
+        numero = self._buscar(codigo) if isinstance(codigo, str) else None
+        if numero is None:
+            return defecto
+        articulo = self._articulos[codigo] = self._por_numero[numero] = self._crear(self._registro(numero))
+        return articulo
+
+    def __getitem__(self, codigo):
+        articulo = self.get(codigo)
+        if articulo is None:
+            raise KeyError(codigo)
+        return articulo
+
+    def __contains__(self, codigo):
+        return codigo in self._articulos or (isinstance(codigo, str) and self._buscar(codigo) is not None)
+
+    def __setitem__(self, codigo, articulo):
+        if codigo in self:
+            raise KeyError(f"El artículo '{codigo}' ya existe")
+        self._articulos[codigo] = articulo
+        self._posiciones_nuevos[codigo] = len(self._nuevos)
+        self._nuevos.append(articulo)
+
+    def __delitem__(self, codigo):
+        raise TypeError("Los artículos no se pueden eliminar del catálogo")
+
+    def __len__(self):
+        return self._cantidad + len(self._nuevos)
+
+    def __iter__(self):
+        return (articulo.codigo for articulo in self.values())
+
+    def values(self):
+        """
+        Recorre los artículos en orden de alta
+
+        Los que todavía no se usaron se leen del archivo sin guardarlos (un recorrido
+        completo, como el de un reporte, no deja todo el catálogo en memoria). Esos salen
+        como ArticuloSoloLectura: modificarlos lanza AttributeError, porque el cambio se
+        perdería. Los cambios se hacen siempre sobre los que se piden por código.
+
+        Yields:
+            Articulo: Cada artículo
+        """
+        por_numero, leer = self._por_numero, self._leer
+        for numero in range(self._cantidad):
+            articulo = por_numero.get(numero)
+            yield articulo if articulo is not None else leer(numero)
+        yield from list(self._nuevos)
+
+    def articulos_despues(self, codigo=None, limite=100):
+        """
+        Artículos que siguen a uno en orden de alta (ver AlmacenMemoria.articulos_despues)
+
+        El número de registro es la posición en el orden de alta, y los agregados después
+        van a continuación: el código se ubica con la búsqueda binaria del índice.
+
+        Returns:
+            list: Artículos en orden de alta, o None si el código no existe
+        """
+        if codigo is None:
+            inicio = 0
+        else:
+            numero = self._buscar(codigo) if isinstance(codigo, str) else None
+            if numero is None:
+                numero = self._posiciones_nuevos.get(codigo)
+                if numero is None:
+                    return None
+                numero += self._cantidad
+            inicio = numero + 1
+        fin = inicio + limite
+        por_numero, leer = self._por_numero, self._leer
+        articulos = []
+        for numero in range(inicio, min(fin, self._cantidad)):
+            articulo = por_numero.get(numero)
+            articulos.append(articulo if articulo is not None else leer(numero))
+        articulos.extend(self._nuevos[max(0, inicio - self._cantidad):max(0, fin - self._cantidad)])
+        return articulos
+
+    def items(self):
+        return ((articulo.codigo, articulo) for articulo in self.values())
+
+    def filas_codificadas(self):
+        """
+        Recorre los artículos como (código, nombre, descripción, unidad) en UTF-8 y stock
+
+        Los que no se usaron se copian tal cual del archivo, sin crear el Articulo.
+
+        Yields:
+            tuple: (bytes, bytes, bytes, bytes, float)
+        """
+        texto = self._texto
+        for numero in range(self._cantidad):
+            articulo = self._por_numero.get(numero)
+            if articulo is None:
+                r = self._registro(numero)
+                yield texto(r[0], r[1]), texto(r[2], r[3]), texto(r[4], r[5]), texto(r[6], r[7]), r[8]
+            else:
+                yield codificar_articulo(articulo)
+        yield from map(codificar_articulo, list(self._nuevos))
+
+    def cerrar(self):
+        """
+        Libera el mapeo del archivo (los artículos ya creados siguen siendo válidos)
+        """
+        for enteros in (self._indice, self._enteros_registros):
+            if isinstance(enteros, memoryview):
+                enteros.release()
+        self._mapa.close()
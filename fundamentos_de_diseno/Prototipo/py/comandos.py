@@ -0,0 +1,408 @@
+"""
+Modo por lotes: ejecuta operaciones leídas de un archivo o de la entrada estándar, sin menú
+
+Pensado para procesos automáticos (por ejemplo, el cierre del día desde cron):
+
+    python main.py --script operaciones.txt
+    generar_operaciones | python main.py --script -
+
+Cada línea es un comando, escrito como palabras (se admiten comillas y parámetros
+nombre=valor) o como un objeto JSON con la clave "op":
+
+    agregar A100 "Tornillo 3/8" "Caja de 100" caja
+    entrada A100 50 costo_unitario=12.5 motivo="Compra 3321"
+    salida A100 5
+    {"op": "salida", "codigo": "A100", "cantidad": 5, "motivo": "Venta 991"}
+    stock A100
+    reposicion A100 20
+    bajo_reposicion 10
+    reporte
+    reporte_pdf cierre.pdf
+    compactar 90
+
+Las líneas vacías y las que empiezan con # se ignoran. Por cada comando se escribe una
+línea JSON con el resultado: {"linea": N, "op": ..., "ok": true, ...} o, si falló,
+{"linea": N, "op": ..., "ok": false, "error": "..."}. Un comando que falla no detiene
+a los siguientes. Si un comando deja artículos en su punto de reposición, su resultado
+lleva además "alertas": [{"codigo": ..., "stock": ..., "punto_reposicion": ...}].
+
+Las entradas (o salidas) seguidas del mismo usuario se registran juntas como un lote
+(entrada_mercancia_lote / salida_mercancia_lote), con un solo paso por los candados y el
+diario. El resultado sigue siendo uno por línea y el mismo que de a una: si alguna del
+grupo falla, se informa en su línea y se registran las demás. Las alertas de reposición
+de un grupo van en la última línea del grupo que movió ese artículo.
+"""
+
+import json
+import math
+import shlex
+import sys
+from datetime import datetime, timedelta
+
+class ErrorComando(Exception):
+    pass
+
+TAMANO_GRUPO = 1000  # Entradas o salidas seguidas que se registran como máximo en un mismo lote
+
+# Comando (y método de EjecutorComandos que lo atiende) -> parámetros en el orden en que se
+# escriben como palabras
+COMANDOS = {
+    'agregar': ('codigo', 'nombre', 'descripcion', 'unidad_medida'),
+    'entrada': ('codigo', 'cantidad', 'motivo', 'costo_unitario', 'usuario'),
+    'salida': ('codigo', 'cantidad', 'motivo', 'usuario'),
+    'stock': ('codigo',),
+    'reposicion': ('codigo', 'punto'),
+    'bajo_reposicion': ('limite',),
+    'reporte': (),
+    'reporte_pdf': ('archivo',),
+    'compactar': ('dias',),
+}
+
+def leer_comando(linea):
+    """
+    Interpreta una línea de comando
+
+    Args:
+        linea (str): Línea sin el salto final
+
+    Returns:
+        tuple: (comando, parámetros) o None si la línea está vacía o es un comentario
+    """
+    linea = linea.strip()
+    if not linea or linea.startswith('#'):
+        return None
+    if linea.startswith('{'):
+        try:
+            datos = json.loads(linea)
+        except ValueError:
+            raise ErrorComando("La línea no es JSON válido")
+        if not isinstance(datos, dict):
+            raise ErrorComando("Se esperaba un objeto JSON")
+        comando = str(datos.pop('op', '')).strip().lower()
+        if comando not in COMANDOS:
+            raise ErrorComando(f"Comando desconocido: '{comando}'")
+        return comando, datos
+    try:
+        palabras = shlex.split(linea)
+    except ValueError as error:
+        raise ErrorComando(f"Línea mal formada: {error}")
+    comando = palabras[0].lower()
+    if comando not in COMANDOS:
+        raise ErrorComando(f"Comando desconocido: '{comando}'")
+    nombres = COMANDOS[comando]
+    datos = {}
+    posicion = 0
+    for palabra in palabras[1:]:
+        nombre, igual, valor = palabra.partition('=')
+        if igual and nombre in nombres:
+            datos[nombre] = valor
+            continue
+        if posicion >= len(nombres):
+            raise ErrorComando(f"Sobran parámetros para '{comando}'")
+        datos[nombres[posicion]] = palabra
+        posicion += 1
+    return comando, datos
+
+class EjecutorComandos:
+    def __init__(self, inventario, usuario="Script", generador_pdf=None):
+        """
+        Inicializa el ejecutor
+
+        Args:
+            inventario (Inventario): Inventario sobre el que se opera
+            usuario (str): Usuario de los movimientos que no indican otro
+            generador_pdf (callable): Función sin argumentos que retorna el GeneradorReportePDF
+                (se pide recién cuando se usa reporte_pdf)
+        """
+        self.inventario = inventario
+        self.usuario = usuario
+        self.generador_pdf = generador_pdf
+        self._alertas = []  # Cruces de puntos de reposición del comando en curso
+        inventario.suscribir_reposicion(self._alerta_reposicion)
+
+    def _alerta_reposicion(self, articulo, punto):
+        self._alertas.append({'codigo': articulo.codigo, 'stock': articulo.cantidad, 'punto_reposicion': punto})
+
+    def ejecutar(self, entrada, salida):
+        """
+        Ejecuta todas las líneas de una entrada
+
+        Args:
+            entrada (iterable): Líneas de comandos (un archivo abierto, sys.stdin...)
+            salida: Archivo donde se escribe una línea JSON por comando
+
+        Returns:
+            tuple: (comandos ejecutados, comandos que fallaron)
+        """
+        ejecutados = fallidos = 0
+        escribir = salida.write
+        for resultado in self._resultados(entrada):
+            ejecutados += 1
+            if not resultado['ok']:
+                fallidos += 1
+            escribir(json.dumps(resultado, ensure_ascii=False) + '\n')
+        salida.flush()
+        return ejecutados, fallidos
+
+    def _resultados(self, entrada):
+        # Resultados en el orden de las líneas; las entradas y salidas se juntan en grupos
+        # y el grupo se aplica antes de dar cualquier resultado posterior
+        grupo = []  # (línea, comando, usuario, operación) seguidas, del mismo comando y usuario
+        for numero, linea in enumerate(entrada, 1):
+            comando = None
+            try:
+                leido = leer_comando(linea)
+                if leido is None:
+                    continue
+                comando, datos = leido
+                resultado = {'linea': numero, 'op': comando, 'ok': True}
+                if comando in ('entrada', 'salida'):
+                    usuario, operacion = getattr(self, comando)(datos)
+                    if grupo and (grupo[0][1] != comando or grupo[0][2] != usuario or len(grupo) >= TAMANO_GRUPO):
+                        yield from self._aplicar_grupo(grupo)
+                        grupo = []
+                    grupo.append((numero, comando, usuario, operacion))
+                    continue
+                if grupo:
+                    yield from self._aplicar_grupo(grupo)
+                    grupo = []
+                resultado.update(getattr(self, comando)(datos))
+            except ErrorComando as error:
+                resultado = {'linea': numero, 'op': comando, 'ok': False, 'error': str(error)}
+            except Exception as error:
+                resultado = {'linea': numero, 'op': comando, 'ok': False, 'error': f"Error inesperado: {error}"}
+            if grupo:
+                yield from self._aplicar_grupo(grupo)
+                grupo = []
+            if self._alertas:
+                resultado['alertas'] = self._alertas
+                self._alertas = []
+            yield resultado
+        if grupo:
+            yield from self._aplicar_grupo(grupo)
+
+    def _aplicar_grupo(self, grupo):
+        """
+        Registra un grupo de entradas o de salidas como lote
+
+        Si el lote se rechaza se quitan las operaciones con error y se registra el resto:
+        la validación del lote ya salta las que fallan (no cuentan para el stock de las
+        siguientes), así que falla lo mismo que fallaría ejecutándolas de a una.
+
+        Args:
+            grupo (list): Tuplas (línea, comando, usuario, operación) del mismo comando y usuario
+
+        Returns:
+            list: Resultados de las líneas del grupo, en orden
+        """
+        comando, usuario = grupo[0][1], grupo[0][2]
+        if comando == 'entrada':
+            registrar = self.inventario.entrada_mercancia_lote
+        else:
+            registrar = self.inventario.salida_mercancia_lote
+        errores = {}  # Línea -> mensaje
+        pendientes = grupo
+        try:
+            while pendientes:
+                aplicado, fallas = registrar([operacion for *_, operacion in pendientes], usuario)
+                if aplicado:
+                    break
+                posiciones = {posicion for posicion, _ in fallas}
+                for posicion, mensaje in fallas:
+                    errores[pendientes[posicion][0]] = mensaje
+                pendientes = [op for posicion, op in enumerate(pendientes) if posicion not in posiciones]
+        except Exception as error:
+            self._alertas = []
+            return [{'linea': numero, 'op': comando, 'ok': False, 'error': f"Error inesperado: {error}"}
+                    for numero, *_ in grupo]
+
+        # Stock después de cada línea: se parte del final y se descuenta hacia atrás
+        stock = {}
+        despues = {}
+        signo = 1 if comando == 'entrada' else -1
+        for numero, _, _, (codigo, cantidad, *_) in reversed(pendientes):
+            if codigo not in stock:
+                stock[codigo] = self.inventario.obtener_stock_actual(codigo)
+            despues[numero] = stock[codigo]
+            stock[codigo] -= signo * cantidad
+        ultima = {operacion[0]: numero for numero, *_, operacion in pendientes}
+        alertas = {}
+        for alerta in self._alertas:
+            alertas.setdefault(ultima.get(alerta['codigo']), []).append(alerta)
+        self._alertas = []
+
+        resultados = []
+        for numero, _, _, operacion in grupo:
+            if numero in errores:
+                resultado = {'linea': numero, 'op': comando, 'ok': False, 'error': errores[numero]}
+            else:
+                resultado = {'linea': numero, 'op': comando, 'ok': True, 'codigo': operacion[0], 'stock': despues[numero]}
+            if numero in alertas:
+                resultado['alertas'] = alertas[numero]
+            resultados.append(resultado)
+        return resultados
+
+    # ------------------------------------------------------------------
+    # Validación de parámetros (los mismos mensajes que la API web)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _texto(datos, campo, obligatorio=True):
+        valor = str(datos.get(campo) or '').strip()
+        if obligatorio and not valor:
+            raise ErrorComando(f"Falta el campo '{campo}'")
+        return valor
+
+    @staticmethod
+    def _cantidad(datos):
+        try:
+            cantidad = float(datos.get('cantidad'))
+        except (TypeError, ValueError):
+            raise ErrorComando("La cantidad debe ser un número")
+        if not math.isfinite(cantidad):
+            raise ErrorComando("La cantidad debe ser un número finito")
+        if not cantidad > 0:
+            raise ErrorComando("La cantidad debe ser mayor a 0")
+        return cantidad
+
+    @staticmethod
+    def _costo_unitario(datos):
+        if datos.get('costo_unitario') in (None, ''):
+            return None
+        try:
+            costo_unitario = float(datos['costo_unitario'])
+        except (TypeError, ValueError):
+            raise ErrorComando("El costo unitario debe ser un número")
+        if not math.isfinite(costo_unitario):
+            raise ErrorComando("El costo unitario debe ser un número finito")
+        if not costo_unitario >= 0:
+            raise ErrorComando("El costo unitario no puede ser negativo")
+        return costo_unitario
+
+    def _articulo(self, datos):
+        codigo = self._texto(datos, 'codigo').upper()
+        articulo = self.inventario.obtener_articulo(codigo)
+        if articulo is None:
+            raise ErrorComando(f"No existe un artículo con el código '{codigo}'")
+        return articulo
+
+    # ------------------------------------------------------------------
+    # Comandos
+    # ------------------------------------------------------------------
+
+    def agregar(self, datos):
+        codigo = self._texto(datos, 'codigo').upper()
+        nombre = self._texto(datos, 'nombre')
+        descripcion = self._texto(datos, 'descripcion', obligatorio=False)
+        unidad_medida = self._texto(datos, 'unidad_medida', obligatorio=False) or "Un"
+        if not self.inventario.agregar_articulo(codigo, nombre, descripcion, unidad_medida):
+            raise ErrorComando(f"Ya existe un artículo con el código '{codigo}'")
+        return {'codigo': codigo}
+
+    # Las entradas y salidas solo se validan: retornan (usuario, operación del lote) y se
+    # registran en grupo (ver _aplicar_grupo)
+
+    def entrada(self, datos):
+        cantidad = self._cantidad(datos)
+        costo_unitario = self._costo_unitario(datos)
+        articulo = self._articulo(datos)
+        motivo = self._texto(datos, 'motivo', obligatorio=False) or "Entrada de mercancía"
+        usuario = self._texto(datos, 'usuario', obligatorio=False) or self.usuario
+        return usuario, (articulo.codigo, cantidad, motivo, costo_unitario)
+
+    def salida(self, datos):
+        cantidad = self._cantidad(datos)
+        articulo = self._articulo(datos)
+        motivo = self._texto(datos, 'motivo', obligatorio=False) or "Salida de mercancía"
+        usuario = self._texto(datos, 'usuario', obligatorio=False) or self.usuario
+        return usuario, (articulo.codigo, cantidad, motivo)
+
+    def stock(self, datos):
+        articulo = self._articulo(datos)
+        return {'codigo': articulo.codigo, 'stock': self.inventario.obtener_stock_actual(articulo.codigo),
+                'unidad_medida': articulo.unidad_medida}
+
+    def reposicion(self, datos):
+        articulo = self._articulo(datos)
+        punto = None
+        if datos.get('punto') not in (None, ''):
+            try:
+                punto = float(datos['punto'])
+            except (TypeError, ValueError):
+                raise ErrorComando("El punto de reposición debe ser un número")
+            if not punto >= 0:
+                raise ErrorComando("El punto de reposición no puede ser negativo")
+        self.inventario.establecer_punto_reposicion(articulo.codigo, punto)
+        return {'codigo': articulo.codigo, 'punto_reposicion': punto}
+
+    def bajo_reposicion(self, datos):
+        limite = None
+        if datos.get('limite') not in (None, ''):
+            try:
+                limite = int(datos['limite'])
+            except (TypeError, ValueError):
+                raise ErrorComando("El límite debe ser un número entero")
+        articulos = self.inventario.articulos_bajo_reposicion(limite)
+        return {'articulos': [
+            {'codigo': a['codigo'], 'stock': a['cantidad'], 'punto_reposicion': a['punto_reposicion'],
+             'faltante': a['faltante']}
+            for a in articulos
+        ]}
+
+    def reporte(self, datos):
+        # Solo los totales: el detalle por artículo puede ser enorme (para eso, reporte_pdf)
+        reporte = self.inventario.generar_reporte_inventario()
+        return {
+            'fecha_reporte': reporte['fecha_reporte'],
+            'total_articulos': reporte['total_articulos'],
+            'total_movimientos': reporte['total_movimientos'],
+            'por_unidad': reporte['por_unidad'],
+            'valor': reporte['valoracion']['valor'],
+        }
+
+    def reporte_pdf(self, datos):
+        if self.generador_pdf is None:
+            raise ErrorComando("No hay generador de reportes PDF")
+        archivo = self._texto(datos, 'archivo', obligatorio=False) or None
+        try:
+            ruta = self.generador_pdf().generar_reporte_inventario(self.inventario, archivo)
+        except ImportError:
+            raise ErrorComando("La librería 'reportlab' no está instalada")
+        return {'archivo': ruta}
+
+    def compactar(self, datos):
+        # Sin días se usa el horizonte configurado (INVENTARIO_HORIZONTE_DIAS)
+        antes_de = None
+        if datos.get('dias') not in (None, ''):
+            try:
+                dias = float(datos['dias'])
+            except (TypeError, ValueError):
+                raise ErrorComando("Los días deben ser un número")
+            if not dias >= 0:
+                raise ErrorComando("Los días no pueden ser negativos")
+            antes_de = datetime.now() - timedelta(days=dias)
+        archivados = self.inventario.compactar(antes_de)
+        if archivados is None:
+            raise ErrorComando("El inventario no admite compactar o falta el campo 'dias'")
+        return {'archivados': archivados}
+
+def ejecutar_script(inventario, origen, salida=None, usuario="Script", generador_pdf=None):
+    """
+    Ejecuta un archivo de comandos (o la entrada estándar si origen es '-')
+
+    Args:
+        inventario (Inventario): Inventario sobre el que se opera
+        origen (str): Ruta del archivo de comandos, o '-'
+        salida: Archivo donde se escriben los resultados (por defecto la salida estándar)
+        usuario (str): Usuario de los movimientos
+        generador_pdf (callable): Ver EjecutorComandos
+
+    Returns:
+        tuple: (comandos ejecutados, comandos que fallaron)
+    """
+    ejecutor = EjecutorComandos(inventario, usuario, generador_pdf)
+    salida = salida if salida is not None else sys.stdout
+    if origen == '-':
+        return ejecutor.ejecutar(sys.stdin, salida)
+    with open(origen, encoding='utf-8') as entrada:
+        return ejecutor.ejecutar(entrada, salida)
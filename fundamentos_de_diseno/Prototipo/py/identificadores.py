@@ -0,0 +1,209 @@
+"""
+Generador de IDs de movimientos: únicos, ordenados en el tiempo y baratos de generar
+
+Cada ID es un entero de 63 bits con la misma idea que los "snowflake IDs":
+
+    | 41 bits: milisegundos desde 2020-01-01 | 10 bits: fragmento | 12 bits: secuencia |
+
+- Los milisegundos hacen que los IDs queden ordenados por fecha de creación (hasta ~2089)
+- El fragmento distingue procesos o sucursales que generan IDs a la vez (0 a 1023)
+- La secuencia permite 4096 IDs por milisegundo; si se agota se toma el milisegundo siguiente
+
+En texto se escriben como "MOV_" + 16 dígitos hexadecimales, así también se ordenan bien
+como cadenas.
+"""
+
+import os
+import threading
+import time
+from datetime import datetime
+
+BITS_FRAGMENTO = 10
+BITS_SECUENCIA = 12
+MAX_FRAGMENTO = (1 << BITS_FRAGMENTO) - 1
+MAX_SECUENCIA = (1 << BITS_SECUENCIA) - 1
+EPOCA_MS = 1577836800000  # 2020-01-01 00:00:00 UTC
+PREFIJO = "MOV_"
+
+class GeneradorIds:
+    def __init__(self, fragmento=0):
+        """
+        Inicializa el generador
+
+        Args:
+            fragmento (int): Número de proceso o sucursal (0 a 1023)
+        """
+        if not 0 <= fragmento <= MAX_FRAGMENTO:
+            raise ValueError(f"El fragmento debe estar entre 0 y {MAX_FRAGMENTO}")
+        self.fragmento = fragmento
+        self._ultimo_ms = 0
+        self._secuencia = 0
+        self._candado = threading.Lock()
+
+    def _reservar(self, cantidad):
+        # Reserva `cantidad` pares (milisegundo, secuencia) consecutivos y retorna el primero.
+        # Nunca retrocede aunque el reloj del sistema lo haga.
+        ahora = time.time_ns() // 1_000_000 - EPOCA_MS
+        if ahora > self._ultimo_ms:
+            self._ultimo_ms = ahora
+            self._secuencia = 0
+        inicio = self._ultimo_ms, self._secuencia
+
+        total = self._secuencia + cantidad
+        self._ultimo_ms += total >> BITS_SECUENCIA
+        self._secuencia = total & MAX_SECUENCIA
+        return inicio
+
+    def siguiente(self):
+        """
+        Genera un nuevo ID
+
+        Returns:
+            int: ID numérico
+        """
+        with self._candado:
+            ms, secuencia = self._reservar(1)
+        return (ms << (BITS_FRAGMENTO + BITS_SECUENCIA)) | (self.fragmento << BITS_SECUENCIA) | secuencia
+
+    def siguientes(self, cantidad):
+        """
+        Genera un bloque de IDs consecutivos con una sola reserva
+
+        Args:
+            cantidad (int): Número de IDs
+
+        Returns:
+            list: IDs numéricos en orden creciente
+        """
+        with self._candado:
+            ms, secuencia = self._reservar(cantidad)
+        base_fragmento = self.fragmento << BITS_SECUENCIA
+        ids = []
+        while len(ids) < cantidad:
+            tomar = min(cantidad - len(ids), MAX_SECUENCIA + 1 - secuencia)
+            base = (ms << (BITS_FRAGMENTO + BITS_SECUENCIA)) | base_fragmento
+            ids.extend(range(base + secuencia, base + secuencia + tomar))
+            ms += 1
+            secuencia = 0
+        return ids
+
+class SecuenciadorMovimientos:
+    def __init__(self, generador):
+        """
+        Asigna a los movimientos su ID y su fecha y hora, siempre en el mismo orden
+
+        La fecha es la hora local, pero nunca retrocede: si el reloj del sistema vuelve
+        atrás (un ajuste manual, o el cambio de horario de verano, cuando la hora local se
+        repite) se sigue usando la última fecha entregada hasta que el reloj la alcance.
+        Así el historial, que se guarda en el orden en que se sellan los movimientos (ver
+        Inventario._registrar_movimiento), queda ordenado a la vez por posición, ID y fecha.
+
+        Args:
+            generador (GeneradorIds): Generador de los IDs
+        """
+        self.generador = generador
+        self._ultima = None  # Última fecha entregada
+        self._candado = threading.Lock()
+
+    def _ahora(self):
+        actual = datetime.now()
+        if self._ultima is not None and actual < self._ultima:
+            return self._ultima
+        self._ultima = actual
+        return actual
+
+    def ahora(self):
+        """
+        Returns:
+            datetime: Fecha y hora actual, nunca anterior a la última entregada
+        """
+        with self._candado:
+            return self._ahora()
+
+    def avanzar(self, fecha_hora):
+        """
+        Evita entregar fechas anteriores a una ya usada (por ejemplo, la del último
+        movimiento guardado al arrancar, o la de un historial importado)
+
+        Args:
+            fecha_hora (datetime): Fecha ya usada, o None
+        """
+        with self._candado:
+            if fecha_hora is not None and (self._ultima is None or fecha_hora > self._ultima):
+                self._ultima = fecha_hora
+
+    def sellar(self, movimientos):
+        """
+        Asigna ID a los movimientos que no lo tienen, y la fecha actual (una sola lectura
+        del reloj para todos) a los que no tienen fecha
+
+        Args:
+            movimientos (list): Movimientos en el orden en que se van a guardar
+        """
+        with self._candado:
+            fecha_hora = None
+            sin_id = []
+            for movimiento in movimientos:
+                if movimiento.fecha_hora is None:
+                    if fecha_hora is None:
+                        fecha_hora = self._ahora()
+                    movimiento.fecha_hora = fecha_hora
+                elif self._ultima is None or movimiento.fecha_hora > self._ultima:
+                    self._ultima = movimiento.fecha_hora
+                if movimiento.id is None:
+                    sin_id.append(movimiento)
+            if sin_id:
+                for movimiento, numero in zip(sin_id, self.generador.siguientes(len(sin_id))):
+                    movimiento.id = formatear_id(numero)
+
+def formatear_id(numero):
+    """
+    Convierte un ID numérico a su forma de texto
+
+    Args:
+        numero (int): ID numérico
+
+    Returns:
+        str: ID con el formato MOV_XXXXXXXXXXXXXXXX
+    """
+    return f"{PREFIJO}{numero:016X}"
+
+def numero_id(id_movimiento):
+    """
+    Convierte un ID en texto a su forma numérica
+
+    Args:
+        id_movimiento (str): ID con el formato MOV_XXXXXXXXXXXXXXXX
+
+    Returns:
+        int: ID numérico o None si el ID tiene otro formato (IDs antiguos basados en la fecha)
+    """
+    if len(id_movimiento) != len(PREFIJO) + 16 or not id_movimiento.startswith(PREFIJO):
+        return None
+    try:
+        return int(id_movimiento[len(PREFIJO):], 16)
+    except ValueError:
+        return None
+
+def decodificar_id(id_movimiento):
+    """
+    Obtiene la fecha, el fragmento y la secuencia con que se generó un ID
+
+    Args:
+        id_movimiento (str o int): ID en texto o numérico
+
+    Returns:
+        tuple: (fecha_hora, fragmento, secuencia)
+    """
+    numero = id_movimiento if isinstance(id_movimiento, int) else numero_id(id_movimiento)
+    if numero is None:
+        raise ValueError(f"ID de movimiento inválido: '{id_movimiento}'")
+    ms = numero >> (BITS_FRAGMENTO + BITS_SECUENCIA)
+    fragmento = (numero >> BITS_SECUENCIA) & MAX_FRAGMENTO
+    secuencia = numero & MAX_SECUENCIA
+    return datetime.fromtimestamp((ms + EPOCA_MS) / 1000), fragmento, secuencia
+
+# Generador compartido por el proceso; el fragmento se puede fijar con INVENTARIO_FRAGMENTO
+GENERADOR_IDS = GeneradorIds(int(os.environ.get('INVENTARIO_FRAGMENTO', '0')))
+# Secuenciador compartido: IDs del generador del proceso y fechas que no retroceden
+SECUENCIADOR = SecuenciadorMovimientos(GENERADOR_IDS)
@@ -0,0 +1,276 @@
+"""
+Importador de artículos y movimientos desde archivos CSV o JSON Lines
+
+Los archivos se leen fila a fila con generadores y se aplican al Inventario en bloques de
+tamaño fijo, así la memoria usada no depende del tamaño del archivo. Las filas rechazadas
+se escriben (con su número de línea y el motivo) en un archivo de rechazos y durante la
+importación se muestra el avance y la velocidad.
+
+Columnas esperadas:
+- Artículos: codigo, nombre, descripcion (opcional), unidad_medida
+- Movimientos: codigo, tipo (ENTRADA/SALIDA), cantidad, motivo (opcional),
+  fecha_hora (opcional, formato ISO: 2024-05-31 18:45:00), costo_unitario (opcional)
+
+Uso:
+    python importador.py articulos catalogo.csv
+    python importador.py movimientos historial.jsonl
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from itertools import islice
+
+from movimiento_inventario import TipoMovimiento, cantidad_valida, costo_valido
+
+class ErrorFila(ValueError):
+    """Fila con datos inválidos"""
+
+def leer_registros(ruta):
+    """
+    Recorre las filas de un archivo CSV o JSON Lines según su extensión
+
+    Args:
+        ruta (str): Ruta del archivo (.csv, .jsonl o .ndjson)
+
+    Yields:
+        tuple: (número de línea, dict con la fila) o (número de línea, ErrorFila)
+    """
+    extension = os.path.splitext(ruta)[1].lower()
+    with open(ruta, 'r', encoding='utf-8-sig', newline='') as archivo:
+        if extension == '.csv':
+            lector = csv.DictReader(archivo)
+            for fila in lector:
+                yield lector.line_num, fila
+        elif extension in ('.jsonl', '.ndjson'):
+            for numero_linea, linea in enumerate(archivo, 1):
+                if not linea.strip():
+                    continue
+                try:
+                    fila = json.loads(linea)
+                except ValueError as error:
+                    yield numero_linea, ErrorFila(f"JSON inválido: {error}")
+                    continue
+                if isinstance(fila, dict):
+                    yield numero_linea, fila
+                else:
+                    yield numero_linea, ErrorFila("Se esperaba un objeto JSON")
+        else:
+            raise ValueError(f"Formato no soportado: '{extension}' (use .csv o .jsonl)")
+
+def _texto(fila, campo, obligatorio=True):
+    valor = fila.get(campo)
+    valor = '' if valor is None else str(valor).strip()
+    if obligatorio and not valor:
+        raise ErrorFila(f"Falta el campo '{campo}'")
+    return valor
+
+def convertir_articulo(fila):
+    """
+    Convierte una fila en los datos de un artículo
+
+    Returns:
+        tuple: (codigo, nombre, descripcion, unidad_medida)
+    """
+    return (
+        _texto(fila, 'codigo').upper(),
+        _texto(fila, 'nombre'),
+        _texto(fila, 'descripcion', obligatorio=False),
+        _texto(fila, 'unidad_medida')
+    )
+
+def convertir_movimiento(fila):
+    """
+    Convierte una fila en una operación para Inventario.registrar_movimientos_lote
+
+    Returns:
+        tuple: (codigo, tipo_movimiento, cantidad, motivo, fecha_hora, costo_unitario)
+    """
+    codigo = _texto(fila, 'codigo').upper()
+    try:
+        tipo_movimiento = TipoMovimiento(_texto(fila, 'tipo').upper())
+    except ValueError:
+        raise ErrorFila(f"Tipo de movimiento inválido: '{fila.get('tipo')}'")
+    try:
+        cantidad = float(_texto(fila, 'cantidad'))
+    except ValueError:
+        raise ErrorFila(f"Cantidad inválida: '{fila.get('cantidad')}'")
+    if not cantidad_valida(cantidad):
+        raise ErrorFila(f"Cantidad inválida: '{fila.get('cantidad')}' (debe ser un número finito mayor a 0)")
+    motivo = _texto(fila, 'motivo', obligatorio=False)
+    if not motivo:
+        motivo = "Importación de historial"
+    fecha_texto = _texto(fila, 'fecha_hora', obligatorio=False)
+    try:
+        fecha_hora = datetime.fromisoformat(fecha_texto) if fecha_texto else None
+    except ValueError:
+        raise ErrorFila(f"Fecha inválida: '{fecha_texto}'")
+    costo_texto = _texto(fila, 'costo_unitario', obligatorio=False)
+    try:
+        costo_unitario = float(costo_texto) if costo_texto else None
+    except ValueError:
+        raise ErrorFila(f"Costo unitario inválido: '{costo_texto}'")
+    if costo_unitario is not None and not costo_valido(costo_unitario):
+        raise ErrorFila(f"Costo unitario inválido: '{costo_texto}' (debe ser un número finito no negativo)")
+    return codigo, tipo_movimiento, cantidad, motivo, fecha_hora, costo_unitario
+
+def en_bloques(iterable, tamano):
+    """
+    Agrupa un iterable en listas de como máximo `tamano` elementos
+
+    Yields:
+        list: Cada bloque
+    """
+    iterador = iter(iterable)
+    while True:
+        bloque = list(islice(iterador, tamano))
+        if not bloque:
+            return
+        yield bloque
+
+class ResultadoImportacion:
+    def __init__(self):
+        self.leidas = 0
+        self.aplicadas = 0
+        self.rechazadas = 0
+        self.segundos = 0.0
+
+    def filas_por_segundo(self):
+        return self.leidas / self.segundos if self.segundos else 0.0
+
+    def __str__(self):
+        return (f"{self.leidas} filas leídas, {self.aplicadas} aplicadas, {self.rechazadas} rechazadas "
+                f"en {self.segundos:.1f} s ({self.filas_por_segundo():.0f} filas/s)")
+
+class ImportadorInventario:
+    def __init__(self, inventario, tamano_bloque=5000, usuario="Importación",
+                 salida_progreso=sys.stderr, intervalo_progreso=1.0):
+        """
+        Inicializa el importador
+
+        Args:
+            inventario (Inventario): Inventario donde se aplican las filas
+            tamano_bloque (int): Filas que se aplican juntas
+            usuario (str): Usuario con el que se registran los movimientos
+            salida_progreso: Flujo donde se escribe el avance (None para no mostrarlo)
+            intervalo_progreso (float): Segundos entre dos mensajes de avance
+        """
+        self.inventario = inventario
+        self.tamano_bloque = tamano_bloque
+        self.usuario = usuario
+        self.salida_progreso = salida_progreso
+        self.intervalo_progreso = intervalo_progreso
+
+    def importar_articulos(self, ruta, ruta_rechazos=None):
+        """
+        Importa un catálogo de artículos
+
+        Args:
+            ruta (str): Archivo CSV o JSON Lines
+            ruta_rechazos (str): Archivo de rechazos (por defecto, junto al archivo importado)
+
+        Returns:
+            ResultadoImportacion: Totales de la importación
+        """
+        return self._importar(ruta, ruta_rechazos, convertir_articulo, self._aplicar_articulos)
+
+    def importar_movimientos(self, ruta, ruta_rechazos=None):
+        """
+        Importa un historial de movimientos (en orden cronológico)
+
+        Args:
+            ruta (str): Archivo CSV o JSON Lines
+            ruta_rechazos (str): Archivo de rechazos (por defecto, junto al archivo importado)
+
+        Returns:
+            ResultadoImportacion: Totales de la importación
+        """
+        return self._importar(ruta, ruta_rechazos, convertir_movimiento, self._aplicar_movimientos)
+
+    def _importar(self, ruta, ruta_rechazos, convertir, aplicar):
+        if ruta_rechazos is None:
+            ruta_rechazos = ruta + '.rechazos.txt'
+        resultado = ResultadoImportacion()
+        inicio = ultimo_aviso = time.perf_counter()
+
+        with open(ruta_rechazos, 'w', encoding='utf-8') as rechazos:
+            def rechazar(numero_linea, motivo):
+                resultado.rechazadas += 1
+                rechazos.write(f"línea {numero_linea}: {motivo}\n")
+
+            def filas_validas():
+                for numero_linea, fila in leer_registros(ruta):
+                    resultado.leidas += 1
+                    try:
+                        if isinstance(fila, ErrorFila):
+                            raise fila
+                        yield numero_linea, convertir(fila)
+                    except ErrorFila as error:
+                        rechazar(numero_linea, error)
+
+            for bloque in en_bloques(filas_validas(), self.tamano_bloque):
+                resultado.aplicadas += aplicar(bloque, rechazar)
+                ahora = time.perf_counter()
+                if self.salida_progreso is not None and ahora - ultimo_aviso >= self.intervalo_progreso:
+                    ultimo_aviso = ahora
+                    resultado.segundos = ahora - inicio
+                    self.salida_progreso.write(f"  ... {resultado}\n")
+                    self.salida_progreso.flush()
+
+        resultado.segundos = time.perf_counter() - inicio
+        if resultado.rechazadas == 0:
+            os.remove(ruta_rechazos)
+        return resultado
+
+    def _aplicar_articulos(self, bloque, rechazar):
+        aplicadas = 0
+        for numero_linea, datos in bloque:
+            if self.inventario.agregar_articulo(*datos):
+                aplicadas += 1
+            else:
+                rechazar(numero_linea, f"Ya existe un artículo con el código '{datos[0]}'")
+        return aplicadas
+
+    def _aplicar_movimientos(self, bloque, rechazar):
+        # El lote es todo o nada: se quitan las filas con error y se reintenta con el resto
+        while bloque:
+            exito, errores = self.inventario.registrar_movimientos_lote(
+                [operacion for _, operacion in bloque], self.usuario
+            )
+            if exito:
+                return len(bloque)
+            posiciones_con_error = set()
+            for posicion, mensaje in errores:
+                if posicion not in posiciones_con_error:
+                    posiciones_con_error.add(posicion)
+                    rechazar(bloque[posicion][0], mensaje)
+            bloque = [fila for posicion, fila in enumerate(bloque) if posicion not in posiciones_con_error]
+        return 0
+
+def main():
+    """Importa un archivo en el inventario configurado para main.py"""
+    if len(sys.argv) != 3 or sys.argv[1] not in ('articulos', 'movimientos'):
+        print("Uso: python importador.py articulos|movimientos ARCHIVO(.csv|.jsonl)")
+        sys.exit(2)
+
+    from main import crear_inventario
+
+    inventario = crear_inventario()
+    try:
+        importador = ImportadorInventario(inventario)
+        if sys.argv[1] == 'articulos':
+            resultado = importador.importar_articulos(sys.argv[2])
+        else:
+            resultado = importador.importar_movimientos(sys.argv[2])
+    finally:
+        inventario.cerrar()
+
+    print(f"Importación terminada: {resultado}")
+    if resultado.rechazadas:
+        print(f"  Filas rechazadas en: {sys.argv[2]}.rechazos.txt")
+
+if __name__ == "__main__":
+    main()
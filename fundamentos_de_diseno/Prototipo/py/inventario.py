@@ -2,17 +2,75 @@
 Clase Inventario para gestionar el  inventarios
 """
 
+from almacenamiento import AlmacenMemoria, AlmacenSincronizado, VistaMovimientos
 from articulo import Articulo
-from movimiento_inventario import MovimientoInventario, TipoMovimiento
+from busqueda import IndiceBusqueda
+from identificadores import SECUENCIADOR
+from metricas import METRICAS
+from movimiento_inventario import MovimientoInventario, TipoMovimiento, cantidad_valida, costo_valido
+from reposicion import AlertasReposicion
+from resumen import ResumenInventario
+from valoracion import ValoracionInventario
+from contextlib import ExitStack, nullcontext
 from datetime import datetime
+import threading
+import time
+
+# Contexto vacío que se usa en lugar de un candado cuando el inventario no es concurrente
+SIN_CANDADO = nullcontext()
+# Segundos entre dos revisiones de si corresponde compactar el historial
+INTERVALO_REVISION_ARCHIVO = 60
 
 class Inventario:
-    def __init__(self):
+    def __init__(self, persistencia=None, almacen=None, concurrente=False, franjas_candados=64, archivo=None):
         """
         Inicializa el sistema de inventario
+        
+        Args:
+            persistencia (PersistenciaInventario): Almacenamiento en disco (opcional).
+                Si se indica, se carga el estado guardado y cada operación queda registrada.
+            almacen: Almacén de artículos y movimientos (por defecto AlmacenMemoria)
+            concurrente (bool): Permite que varios hilos usen el inventario a la vez.
+                Cada artículo se protege con uno de `franjas_candados` candados (según su
+                código), así artículos distintos se mueven en paralelo y la verificación de
+                stock y su actualización no se mezclan entre hilos. El ID y la fecha de cada
+                movimiento se asignan en una sola sección crítica junto con su guardado (ver
+                _registrar_movimiento), así el historial queda en orden de fecha y de ID.
+            franjas_candados (int): Número de candados repartidos entre los artículos
+            archivo (ArchivoMovimientos): Archivo de los movimientos antiguos (opcional, ver
+                compactar). Si tiene horizonte, el historial en memoria se compacta solo. Con
+                persistencia siempre hay uno (ahí queda el historial, ver persistencia.py).
         """
-        self.articulos = {}  # Diccionario con código como clave y Articulo como valor
-        self.movimientos = []  # Lista de todos los movimientos
+        almacen = almacen if almacen is not None else AlmacenMemoria()
+        if concurrente:
+            self._candados = [threading.Lock() for _ in range(franjas_candados)]
+            self._candado_secuencia = threading.Lock()
+            almacen = AlmacenSincronizado(almacen)
+        else:
+            self._candados = None
+            self._candado_secuencia = SIN_CANDADO
+        self.almacen = almacen
+        self.resumen = ResumenInventario()
+        self.valoracion = ValoracionInventario()
+        self.busqueda = IndiceBusqueda()
+        self.reposicion = AlertasReposicion()
+        self.persistencia = None
+        self.archivo = archivo
+        self._descartados = 0  # Movimientos que salieron de la memoria (corre los cursores)
+        self._proxima_revision = 0.0
+        # Una instantánea a la vez (ver _tomar_instantanea); también la toman compactar y cerrar
+        self._candado_instantanea = threading.Lock()
+        
+        if persistencia is not None:
+            # Se asigna después de cargar para que la reconstrucción no se vuelva a escribir en disco
+            persistencia.cargar(self)
+            self.persistencia = persistencia
+            # Los cruces de los puntos de reposición al reproducir el diario ya se avisaron
+            self.reposicion.descartar_pendientes()
+        # Las fechas nuevas no pueden quedar antes de lo ya guardado (aunque el reloj haya retrocedido)
+        SECUENCIADOR.avanzar(self.almacen.ultima_fecha_movimiento())
+        if self.archivo is not None:
+            SECUENCIADOR.avanzar(self.archivo.corte)
     
     def agregar_articulo(self, codigo, nombre, descripcion, unidad_medida):
         """
@@ -27,13 +85,167 @@ class Inventario:
         Returns:
             bool: True si se agregó exitosamente, False si ya existe
         """
-        if codigo in self.articulos:
-            return False
+        with self._candado_articulo(codigo):
+            if self.almacen.contiene_articulo(codigo):
+                return False
+            
+            self._alta_articulo(Articulo(codigo, nombre, descripcion, unidad_medida))
         
-        nuevo_articulo = Articulo(codigo, nombre, descripcion, unidad_medida)
-        self.articulos[codigo] = nuevo_articulo
+        self._mantenimiento()
         return True
     
+    def _alta_articulo(self, articulo):
+        """
+        Agrega al almacén, los índices y el diario un artículo que todavía no existe
+        
+        Args:
+            articulo (Articulo): Artículo nuevo
+        """
+        self.almacen.agregar_articulo(articulo)
+        self.resumen.articulo_agregado(articulo)
+        self.busqueda.articulo_agregado(articulo)
+        
+        if self.persistencia is not None:
+            self.persistencia.registrar_articulo(articulo)
+    
+    def _candado_articulo(self, codigo):
+        """
+        Retorna el candado que protege el stock de un artículo
+        
+        Args:
+            codigo (str): Código del artículo
+            
+        Returns:
+            Candado del artículo (o un contexto vacío si el inventario no es concurrente)
+        """
+        if self._candados is None:
+            return SIN_CANDADO
+        return self._candados[hash(codigo) % len(self._candados)]
+    
+    def _candados_articulos(self, codigos):
+        """
+        Toma los candados de varios artículos siempre en el mismo orden (evita bloqueos mutuos)
+        
+        Args:
+            codigos (iterable): Códigos de los artículos; None para tomar todos los candados
+            
+        Returns:
+            ExitStack: Contexto que libera los candados al salir
+        """
+        pila = ExitStack()
+        if self._candados is not None:
+            if codigos is None:
+                franjas = range(len(self._candados))
+            else:
+                franjas = sorted({hash(codigo) % len(self._candados) for codigo in codigos})
+            for franja in franjas:
+                pila.enter_context(self._candados[franja])
+        return pila
+    
+    def _mantenimiento(self):
+        """
+        Tareas que se hacen entre operaciones (ya sin candados tomados): instantánea de la
+        persistencia, compactación y avisos de reposición
+        """
+        self._tomar_instantanea_si_corresponde()
+        self._compactar_si_corresponde()
+        self.reposicion.despachar()
+    
+    def _tomar_instantanea_si_corresponde(self):
+        """
+        Toma la instantánea de la persistencia cuando corresponde
+        
+        Si otro hilo ya está tomando una, esta operación sigue de largo.
+        """
+        if self.persistencia is None or not self.persistencia.instantanea_pendiente():
+            return
+        if not self._candado_instantanea.acquire(blocking=False):
+            return
+        try:
+            if self.persistencia.instantanea_pendiente():
+                self._tomar_instantanea()
+        finally:
+            self._candado_instantanea.release()
+    
+    def _tomar_instantanea(self):
+        """
+        Toma una instantánea de la persistencia (con _candado_instantanea tomado)
+        
+        Con todos los candados tomados, para que no haya operaciones a medias, solo se
+        copia lo que cambió y se rota el diario; la escritura en disco se hace después,
+        mientras las operaciones siguen (ver PersistenciaInventario.capturar).
+        """
+        # Si la valoración todavía no se leyó del disco, se lee antes de detener a todos
+        self.valoracion.completar()
+        with self._candados_articulos(None):
+            captura = self.persistencia.capturar()
+        self.persistencia.escribir_instantanea(captura)
+    
+    def _compactar_si_corresponde(self):
+        """
+        Compacta el historial si lo más antiguo en memoria ya pasó el horizonte del archivo
+        
+        Se revisa a lo sumo una vez por minuto (INTERVALO_REVISION_ARCHIVO).
+        """
+        if self.archivo is None or self.archivo.horizonte is None:
+            return
+        ahora = time.monotonic()
+        if ahora < self._proxima_revision:
+            return
+        self._proxima_revision = ahora + INTERVALO_REVISION_ARCHIVO
+        primero = self.almacen.movimientos_en_posiciones(0, 1)
+        if primero and self.archivo.compactacion_pendiente(primero[0].fecha_hora):
+            self.compactar()
+    
+    def compactar(self, antes_de=None):
+        """
+        Archiva los movimientos anteriores a una fecha y los quita de la memoria
+        
+        Los movimientos van en orden a segmentos comprimidos del archivo, que guarda por
+        cada artículo su saldo de apertura y de cierre en cada segmento. En memoria queda
+        solo la ventana reciente: el stock actual no cambia, el stock a una fecha anterior
+        sale de los puntos de control del archivo y los movimientos archivados se leen del
+        disco cuando se piden (ver movimientos_archivados).
+        
+        Las vistas de movimientos tomadas antes de compactar dejan de ser válidas; los
+        cursores de pagina_movimientos siguen valiendo. El tramo se lee del almacén por
+        bloques (con varios hilos, el candado del almacén se suelta entre uno y otro) y el
+        archivo lo escribe de a un segmento, así la memoria no depende del tamaño del tramo.
+        
+        Args:
+            antes_de (datetime): Fecha de corte (se archiva lo anterior); por defecto la
+                fecha actual menos el horizonte del archivo
+            
+        Returns:
+            int: Movimientos archivados, o None si no hay archivo, el almacén no admite
+                compactar (SQLite ya guarda el historial en disco) o no hay fecha de corte
+        """
+        if self.archivo is None or not hasattr(self.almacen, 'descartar_movimientos'):
+            return None
+        if antes_de is None:
+            if self.archivo.horizonte is None:
+                return None
+            antes_de = datetime.now() - self.archivo.horizonte
+        # Con todos los candados tomados no hay operaciones a medias mientras se archiva
+        with self._candado_instantanea, self._candados_articulos(None):
+            fin = self.almacen.posiciones_entre(desde=antes_de)[0]
+            if not fin:
+                return 0
+            # El resumen y la valoración se arman desde el historial la primera vez que se
+            # usan: se arman ahora, mientras está completo, y desde ahí siguen solos
+            self.resumen.construir(self.almacen)
+            self.valoracion.construir(self.almacen)
+            if self.persistencia is not None:
+                # Con persistencia cada instantánea ya pasa el historial al archivo: se toma
+                # una para que llegue hasta ahora y solo se mueve el corte
+                self.persistencia.tomar_instantanea()
+                self.archivo.fijar_corte(antes_de)
+            else:
+                self.archivo.archivar(self.almacen.movimientos_con_saldo(fin), antes_de)
+            self.almacen.descartar_movimientos(fin)
+            self._descartados += fin
+        return fin
+    
     def obtener_articulo(self, codigo):
         """
         Obtiene un artículo por su código
@@ -44,9 +256,10 @@ class Inventario:
         Returns:
             Articulo: El artículo encontrado o None si no existe
         """
-        return self.articulos.get(codigo)
+        return self.almacen.obtener_articulo(codigo)
     
-    def entrada_mercancia(self, codigo_articulo, cantidad, motivo="Entrada de mercancía", usuario="Sistema"):
+    def entrada_mercancia(self, codigo_articulo, cantidad, motivo="Entrada de mercancía", usuario="Sistema",
+                          costo_unitario=None):
         """
         Registra una entrada de mercancía
         
@@ -55,30 +268,34 @@ class Inventario:
             cantidad (float): Cantidad a ingresar
             motivo (str): Motivo de la entrada
             usuario (str): Usuario que realiza la operación
+            costo_unitario (float): Costo de cada unidad (si no se indica, se valora al costo
+                promedio vigente del artículo)
             
         Returns:
             bool: True si la operación fue exitosa, False en caso contrario
         """
-        if codigo_articulo not in self.articulos:
+        if not cantidad_valida(cantidad):
             return False
-        
-        if cantidad <= 0:
+        if costo_unitario is not None and not costo_valido(costo_unitario):
             return False
         
-        articulo = self.articulos[codigo_articulo]
-        nueva_cantidad = articulo.cantidad + cantidad
-        articulo.actualizar_cantidad(nueva_cantidad)
-        
-        # Registrar el movimiento
-        movimiento = MovimientoInventario(
-            codigo_articulo, 
-            TipoMovimiento.ENTRADA, 
-            cantidad, 
-            motivo, 
-            usuario
-        )
-        self.movimientos.append(movimiento)
+        with self._candado_articulo(codigo_articulo):
+            if not self.almacen.contiene_articulo(codigo_articulo):
+                return False
+            
+            # Registrar el movimiento
+            movimiento = MovimientoInventario(
+                codigo_articulo, 
+                TipoMovimiento.ENTRADA, 
+                cantidad, 
+                motivo, 
+                usuario,
+                costo_unitario,
+                sellar=False
+            )
+            self._aplicar_movimiento(movimiento)
         
+        self._mantenimiento()
         return True
     
     def salida_mercancia(self, codigo_articulo, cantidad, motivo="Salida de mercancía", usuario="Sistema"):
@@ -94,32 +311,236 @@ class Inventario:
         Returns:
             bool: True si la operación fue exitosa, False en caso contrario
         """
-        if codigo_articulo not in self.articulos:
+        if not cantidad_valida(cantidad):
             return False
         
-        if cantidad <= 0:
-            return False
+        # La verificación de stock y la actualización se hacen con el candado del artículo
+        with self._candado_articulo(codigo_articulo):
+            articulo = self.almacen.obtener_articulo(codigo_articulo)
+            if articulo is None:
+                return False
+            
+            # Verificar que hay suficiente stock
+            if articulo.cantidad < cantidad:
+                return False
+            
+            # Registrar el movimiento
+            movimiento = MovimientoInventario(
+                codigo_articulo, 
+                TipoMovimiento.SALIDA, 
+                cantidad, 
+                motivo, 
+                usuario,
+                sellar=False
+            )
+            self._aplicar_movimiento(movimiento)
         
-        articulo = self.articulos[codigo_articulo]
+        self._mantenimiento()
+        return True
+    
+    def entrada_mercancia_lote(self, operaciones, usuario="Sistema"):
+        """
+        Registra muchas entradas de mercancía de una sola vez (todas o ninguna)
         
-        # Verificar que hay suficiente stock
-        if articulo.cantidad < cantidad:
-            return False
+        Args:
+            operaciones (iterable): Tuplas (código, cantidad), (código, cantidad, motivo) o
+                (código, cantidad, motivo, costo_unitario)
+            usuario (str): Usuario que realiza la operación
+            
+        Returns:
+            tuple: (True, []) si se aplicaron todas, o (False, errores) sin aplicar ninguna,
+                donde errores es una lista de (posición de la operación, mensaje)
+        """
+        return self._procesar_lote(operaciones, TipoMovimiento.ENTRADA, "Entrada de mercancía", usuario)
+    
+    def salida_mercancia_lote(self, operaciones, usuario="Sistema"):
+        """
+        Registra muchas salidas de mercancía de una sola vez (todas o ninguna)
         
-        nueva_cantidad = articulo.cantidad - cantidad
-        articulo.actualizar_cantidad(nueva_cantidad)
+        El stock se valida con el total del lote por artículo, no solo con cada salida.
         
-        # Registrar el movimiento
-        movimiento = MovimientoInventario(
-            codigo_articulo, 
-            TipoMovimiento.SALIDA, 
-            cantidad, 
-            motivo, 
-            usuario
-        )
-        self.movimientos.append(movimiento)
+        Args:
+            operaciones (iterable): Tuplas (código, cantidad) o (código, cantidad, motivo)
+            usuario (str): Usuario que realiza la operación
+            
+        Returns:
+            tuple: (True, []) si se aplicaron todas, o (False, errores) sin aplicar ninguna,
+                donde errores es una lista de (posición de la operación, mensaje)
+        """
+        return self._procesar_lote(operaciones, TipoMovimiento.SALIDA, "Salida de mercancía", usuario)
+    
+    def registrar_movimientos_lote(self, operaciones, usuario="Sistema"):
+        """
+        Registra entradas y salidas mezcladas con su fecha original (por ejemplo, un
+        historial importado), todas o ninguna
         
-        return True
+        Las fechas deben venir en orden, no pueden ser anteriores al último movimiento
+        registrado ni posteriores a la fecha actual, para que el historial siga ordenado
+        en el tiempo.
+        
+        Args:
+            operaciones (iterable): Tuplas (código, tipo_movimiento, cantidad, motivo, fecha_hora)
+                o (código, tipo_movimiento, cantidad, motivo, fecha_hora, costo_unitario);
+                fecha_hora puede ser None para usar la fecha actual
+            usuario (str): Usuario que realiza la operación
+            
+        Returns:
+            tuple: (True, []) si se aplicaron todas, o (False, errores) sin aplicar ninguna,
+                donde errores es una lista de (posición de la operación, mensaje)
+        """
+        operaciones = list(operaciones)
+        # El orden de las fechas es global: se toman todos los candados, no solo los del lote
+        with self._candados_articulos(None):
+            ahora = SECUENCIADOR.ahora()
+            ultima_fecha = self.almacen.ultima_fecha_movimiento()
+            if ultima_fecha is None and self.archivo is not None:
+                # Todo el historial está archivado: no se admiten fechas anteriores al corte
+                ultima_fecha = self.archivo.corte
+            errores = []
+            fechas = []
+            for posicion, operacion in enumerate(operaciones):
+                fecha_hora = operacion[4] if operacion[4] is not None else ahora
+                if ultima_fecha is not None and fecha_hora < ultima_fecha:
+                    errores.append((posicion, f"Fecha anterior al último movimiento registrado ({ultima_fecha})"))
+                elif fecha_hora > ahora:
+                    errores.append((posicion, f"Fecha posterior a la fecha actual ({ahora})"))
+                else:
+                    ultima_fecha = fecha_hora
+                fechas.append(fecha_hora)
+            
+            articulos, variaciones, errores_stock = self._validar_lote(
+                (op[0], op[2], op[1] == TipoMovimiento.SALIDA, op[5] if len(op) > 5 else None)
+                for op in operaciones
+            )
+            errores = sorted(errores + errores_stock)
+            if errores:
+                return False, errores
+            
+            # Los IDs se asignan al guardarlos (ver _guardar_lote)
+            movimientos = [
+                MovimientoInventario.reconstruir(
+                    None, op[0], op[1], op[2], op[3], usuario, fecha_hora, op[5] if len(op) > 5 else None
+                )
+                for op, fecha_hora in zip(operaciones, fechas)
+            ]
+            self._guardar_lote(movimientos, articulos, variaciones)
+        
+        self._mantenimiento()
+        return True, []
+    
+    def _procesar_lote(self, operaciones, tipo_movimiento, motivo_defecto, usuario):
+        operaciones = list(operaciones)
+        es_salida = tipo_movimiento == TipoMovimiento.SALIDA
+        # Se validan y aplican con los candados de todos los artículos del lote tomados
+        with self._candados_articulos(op[0] for op in operaciones):
+            articulos, variaciones, errores = self._validar_lote(
+                (op[0], op[1], es_salida, op[3] if len(op) > 3 else None) for op in operaciones
+            )
+            if errores:
+                return False, errores
+            
+            # Todos los movimientos del lote comparten la misma fecha y hora (ver _guardar_lote)
+            movimientos = MovimientoInventario.crear_lote(operaciones, tipo_movimiento, motivo_defecto, usuario)
+            self._guardar_lote(movimientos, articulos, variaciones)
+        
+        self._mantenimiento()
+        return True, []
+    
+    def _validar_lote(self, filas):
+        """
+        Valida un lote completo antes de tocar el stock
+        
+        Args:
+            filas (iterable): Tuplas (código, cantidad, es_salida, costo_unitario) en el orden del lote
+            
+        Returns:
+            tuple: (articulos, variaciones, errores): artículos afectados por código, variación
+                neta de stock por código y lista de (posición, mensaje)
+        """
+        articulos = {}  # Código -> Articulo afectado por el lote
+        variaciones = {}  # Código -> variación neta de stock en el lote
+        errores = []
+        obtener_articulo = self.almacen.obtener_articulo
+        for posicion, (codigo, cantidad, es_salida, costo_unitario) in enumerate(filas):
+            articulo = articulos.get(codigo)
+            if articulo is None:
+                articulo = obtener_articulo(codigo)
+                if articulo is None:
+                    errores.append((posicion, f"No existe un artículo con el código '{codigo}'"))
+                    continue
+                articulos[codigo] = articulo
+            if not cantidad_valida(cantidad):
+                errores.append((posicion, "La cantidad debe ser un número finito mayor a 0"))
+                continue
+            if costo_unitario is not None and not costo_valido(costo_unitario):
+                errores.append((posicion, "El costo unitario debe ser un número finito no negativo"))
+                continue
+            variacion = variaciones.get(codigo, 0)
+            if es_salida:
+                if cantidad > articulo.cantidad + variacion:
+                    errores.append((posicion, f"Stock insuficiente. Stock disponible: {articulo.cantidad + variacion}"))
+                    continue
+                variaciones[codigo] = variacion - cantidad
+            else:
+                variaciones[codigo] = variacion + cantidad
+        return articulos, variaciones, errores
+    
+    def _guardar_lote(self, movimientos, articulos, variaciones):
+        # El stock se actualiza una sola vez por artículo
+        movimientos_por_articulo = {}
+        for movimiento in movimientos:
+            codigo = movimiento.codigo_articulo
+            movimientos_por_articulo[codigo] = movimientos_por_articulo.get(codigo, 0) + 1
+        for codigo, variacion in variaciones.items():
+            articulo = articulos[codigo]
+            articulo.actualizar_cantidad(articulo.cantidad + variacion)
+            self.resumen.stock_cambiado(articulo, variacion, movimientos_por_articulo[codigo])
+            self.reposicion.stock_cambiado(articulo)
+        
+        # Como en _registrar_movimiento: se sellan y se guardan sin que otro hilo se intercale
+        with self._candado_secuencia:
+            SECUENCIADOR.sellar(movimientos)
+            self.almacen.guardar_movimientos(movimientos, articulos.values())
+            if self.persistencia is not None:
+                self.persistencia.registrar_lote(movimientos)
+        self.valoracion.registrar(movimientos)
+    
+    def _aplicar_movimiento(self, movimiento):
+        """
+        Actualiza el stock del artículo con un movimiento ya validado y lo registra
+        
+        Args:
+            movimiento (MovimientoInventario): Movimiento a aplicar
+        """
+        articulo = self.almacen.obtener_articulo(movimiento.codigo_articulo)
+        variacion = movimiento.cantidad if movimiento.es_entrada() else -movimiento.cantidad
+        articulo.actualizar_cantidad(articulo.cantidad + variacion)
+        self.resumen.stock_cambiado(articulo, variacion)
+        self.reposicion.stock_cambiado(articulo)
+        
+        self._registrar_movimiento(movimiento, articulo)
+        self.valoracion.registrar((movimiento,))
+    
+    def _registrar_movimiento(self, movimiento, articulo):
+        """
+        Sella un movimiento (ID y fecha, si no los tiene) y lo guarda en el almacén y en el
+        diario en disco
+        
+        Es la sección crítica que ordena el historial: con varios hilos, el movimiento que
+        se sella primero es también el que se guarda primero, así la posición en el
+        historial, el ID y la fecha van siempre en el mismo orden (lo necesitan las
+        búsquedas por rango de fechas) y el diario se reproduce en ese mismo orden.
+        
+        Args:
+            movimiento (MovimientoInventario): Movimiento ya aplicado al stock
+            articulo (Articulo): Artículo afectado
+        """
+        with self._candado_secuencia:
+            SECUENCIADOR.sellar((movimiento,))
+            self.almacen.guardar_movimiento(movimiento, articulo)
+            
+            if self.persistencia is not None:
+                self.persistencia.registrar_movimiento(movimiento)
     
     def listar_articulos(self):
         """
@@ -128,7 +549,74 @@ class Inventario:
         Returns:
             list: Lista de artículos
         """
-        return list(self.articulos.values())
+        return list(self.almacen.iterar_articulos())
+    
+    def iterar_articulos(self):
+        """
+        Recorre los artículos del inventario sin armar una lista (para inventarios muy grandes)
+        
+        Con el catálogo mapeado de la persistencia, los artículos que todavía no se usaron
+        salen de solo lectura (ver catalogo_binario.ArticuloSoloLectura).
+        
+        Returns:
+            iterator: Artículos en orden de alta
+        """
+        return iter(self.almacen.iterar_articulos())
+    
+    def articulos_despues(self, codigo=None, limite=100):
+        """
+        Obtiene una página de artículos en orden de alta, a continuación de un código
+        
+        El costo depende del tamaño de la página y no de cuántos artículos hay antes.
+        
+        Args:
+            codigo (str): Último código de la página anterior, o None para la primera
+            limite (int): Máximo de artículos
+            
+        Returns:
+            list: Artículos, o None si el código no existe
+        """
+        return self.almacen.articulos_despues(codigo, limite)
+    
+    def buscar_articulos(self, texto, limite=10, con_puntaje=False):
+        """
+        Busca artículos por código, nombre o descripción
+        
+        Cada palabra del texto puede estar completa o ser el comienzo de una palabra del
+        artículo; no importan mayúsculas ni acentos. El índice se arma la primera vez y
+        después se mantiene al día con cada artículo nuevo.
+        
+        Args:
+            texto (str): Palabras a buscar
+            limite (int): Máximo de resultados
+            con_puntaje (bool): Si es True retorna tuplas (Articulo, puntaje)
+            
+        Returns:
+            list: Artículos de mayor a menor coincidencia
+        """
+        resultados = []
+        for codigo, puntaje in self.busqueda.buscar(texto, self.almacen, limite):
+            articulo = self.almacen.obtener_articulo(codigo)
+            resultados.append((articulo, puntaje) if con_puntaje else articulo)
+        return resultados
+    
+    def contar_articulos(self):
+        """
+        Cuenta los artículos del inventario
+        
+        Returns:
+            int: Número de artículos
+        """
+        return self.almacen.contar_articulos()
+    
+    def contar_movimientos(self):
+        """
+        Cuenta los movimientos del inventario (los que están en memoria, sin los archivados)
+        
+        Returns:
+            int: Número de movimientos
+        """
+        return self.almacen.contar_movimientos()
     
     def obtener_stock_actual(self, codigo_articulo):
         """
@@ -143,44 +631,361 @@ class Inventario:
         articulo = self.obtener_articulo(codigo_articulo)
         return articulo.cantidad if articulo else None
     
-    def obtener_movimientos_articulo(self, codigo_articulo):
+    def establecer_punto_reposicion(self, codigo_articulo, punto):
+        """
+        Fija el punto de reposición (stock mínimo) de un artículo
+        
+        Cuando el stock llega al punto o baja de él se avisa una vez a los suscriptores
+        (ver suscribir_reposicion); si ya está por debajo al fijarlo, se avisa enseguida.
+        
+        Args:
+            codigo_articulo (str): Código del artículo
+            punto (float): Punto de reposición, o None para quitarlo
+            
+        Returns:
+            bool: True si se fijó, False si no existe el artículo o el punto es negativo
+        """
+        if punto is not None and not punto >= 0:
+            return False
+        with self._candado_articulo(codigo_articulo):
+            articulo = self.almacen.obtener_articulo(codigo_articulo)
+            if articulo is None:
+                return False
+            self.reposicion.establecer(articulo, punto)
+            
+            if self.persistencia is not None:
+                self.persistencia.registrar_punto_reposicion(codigo_articulo, punto)
+        
+        self._mantenimiento()
+        return True
+    
+    def articulos_bajo_reposicion(self, limite=None):
+        """
+        Obtiene los artículos que están en o por debajo de su punto de reposición
+        
+        Sale de un montículo ordenado por stock - punto que se mantiene con cada movimiento:
+        los k más urgentes cuestan O(k log n), sin recorrer el catálogo.
+        
+        Args:
+            limite (int): Máximo de artículos, o None para todos
+            
+        Returns:
+            list: Información de cada artículo (ver Articulo.obtener_info) con 'punto_reposicion'
+                y 'faltante' (punto - stock), el que más falta primero
+        """
+        resultado = []
+        for _, codigo in self.reposicion.debajo_del_punto(limite):
+            punto = self.reposicion.puntos.get(codigo)
+            if punto is None:
+                continue  # Se quitó mientras tanto
+            info = self.almacen.obtener_articulo(codigo).obtener_info()
+            info['punto_reposicion'] = punto
+            info['faltante'] = punto - info['cantidad']
+            resultado.append(info)
+        return resultado
+    
+    def suscribir_reposicion(self, funcion):
+        """
+        Registra una función que se llama cada vez que un artículo llega a su punto de reposición
+        
+        Se llama una sola vez por cada cruce (hasta que el stock vuelva a superar el punto),
+        después de terminada la operación que lo produjo.
+        
+        Args:
+            funcion (callable): funcion(articulo, punto)
+        """
+        self.reposicion.suscribir(funcion)
+    
+    def _historial_cubre(self, fecha_hora):
+        desde = self.persistencia.historial_desde if self.persistencia is not None else None
+        return desde is None or fecha_hora >= desde
+    
+    def obtener_stock_en_fecha(self, codigo_articulo, fecha_hora):
+        """
+        Obtiene el stock que tenía un artículo en una fecha pasada
+        
+        Cada movimiento guarda el saldo que dejó, así la consulta es una búsqueda binaria
+        sobre las fechas de los movimientos del artículo en lugar de volver a sumarlos. Con
+        persistencia el historial se recupera del archivo de movimientos al arrancar; solo
+        los datos migrados de una instantánea antigua sin diario no lo tienen completo.
+        
+        Args:
+            codigo_articulo (str): Código del artículo
+            fecha_hora (datetime): Fecha de la consulta (incluye los movimientos de ese instante)
+            
+        Returns:
+            float: Cantidad en esa fecha, o None si no existe el artículo o si el historial
+                guardado no llega a esa fecha
+        """
+        if not self._historial_cubre(fecha_hora):
+            return None
+        if self.archivo is not None and self.archivo.cubre(fecha_hora):
+            # Antes del corte de la compactación responden los puntos de control del archivo
+            # (salvo los artículos que nunca se movieron antes del corte)
+            if not self.almacen.contiene_articulo(codigo_articulo):
+                return None
+            saldo = self.archivo.saldo_en_fecha(codigo_articulo, fecha_hora)
+            if saldo is not None:
+                return saldo
+        return self.almacen.saldo_en_fecha(codigo_articulo, fecha_hora)
+    
+    def obtener_stock_catalogo_en_fecha(self, fecha_hora):
+        """
+        Obtiene el stock de todos los artículos en una fecha pasada
+        
+        Args:
+            fecha_hora (datetime): Fecha de la consulta
+            
+        Returns:
+            dict: Código -> cantidad en esa fecha, o None si el historial guardado no llega
+                a esa fecha (ver obtener_stock_en_fecha)
+        """
+        if not self._historial_cubre(fecha_hora):
+            return None
+        saldos = self.almacen.saldos_en_fecha(fecha_hora)
+        if self.archivo is not None and self.archivo.cubre(fecha_hora):
+            for codigo, saldo in self.archivo.saldos_en_fecha(fecha_hora).items():
+                if codigo in saldos:
+                    saldos[codigo] = saldo
+        return saldos
+    
+    def obtener_valor_inventario(self):
+        """
+        Obtiene el valor total del inventario (se mantiene al día con cada movimiento)
+        
+        Returns:
+            dict: {'promedio': valor por costo promedio, 'fifo': valor por capas FIFO}
+        """
+        return self.valoracion.valor_inventario(self.almacen)
+    
+    def obtener_valoracion_articulo(self, codigo_articulo):
+        """
+        Obtiene la valoración de un artículo
+        
+        Args:
+            codigo_articulo (str): Código del artículo
+            
+        Returns:
+            dict: Cantidad, costo promedio, valor por cada método y capas FIFO (cantidad, costo),
+                o None si no existe el artículo
+        """
+        if not self.almacen.contiene_articulo(codigo_articulo):
+            return None
+        return self.valoracion.valoracion_articulo(codigo_articulo, self.almacen)
+    
+    def obtener_costo_ventas(self, periodo='mes'):
+        """
+        Obtiene el costo de ventas (costo de la mercancía que salió) por periodo
+        
+        Args:
+            periodo (str): 'dia' o 'mes'
+            
+        Returns:
+            dict: Periodo ('AAAA-MM-DD' o 'AAAA-MM') -> {'promedio': costo, 'fifo': costo}
+        """
+        return self.valoracion.costo_ventas(self.almacen, periodo)
+    
+    def obtener_movimientos_articulo(self, codigo_articulo, incluir_archivados=False):
         """
         Obtiene todos los movimientos de un artículo específico
         
         Args:
             codigo_articulo (str): Código del artículo
+            incluir_archivados (bool): Si es True se leen también los movimientos archivados
+                (ver compactar); si no, solo los que están en memoria
             
         Returns:
             list: Lista de movimientos del artículo
         """
-        return [mov for mov in self.movimientos if mov.codigo_articulo == codigo_articulo]
+        movimientos = self.almacen.movimientos_articulo(codigo_articulo)
+        if incluir_archivados and self.archivo is not None:
+            movimientos = list(self.archivo.movimientos(codigo=codigo_articulo)) + movimientos
+        return movimientos
+    
+    def pagina_movimientos_articulo(self, codigo_articulo, cursor=None, limite=50):
+        """
+        Obtiene una página de movimientos de un artículo, de la más reciente a la más antigua
+        
+        Solo los que están en memoria (sin los archivados). Como en pagina_movimientos, el
+        cursor no se corre aunque se registren movimientos nuevos o se compacte.
+        
+        Args:
+            codigo_articulo (str): Código del artículo
+            cursor (int): Cursor devuelto por la página anterior, o None para la primera
+            limite (int): Máximo de movimientos por página
+            
+        Returns:
+            tuple: (movimientos en orden cronológico, cursor de la página siguiente o None)
+        """
+        return self.almacen.pagina_movimientos_articulo(codigo_articulo, cursor, limite)
+    
+    def obtener_movimiento(self, id_movimiento):
+        """
+        Obtiene un movimiento por su ID
+        
+        Args:
+            id_movimiento (str): ID del movimiento
+            
+        Returns:
+            MovimientoInventario: El movimiento o None si no existe
+        """
+        movimiento = self.almacen.obtener_movimiento(id_movimiento)
+        if movimiento is None and self.archivo is not None:
+            movimiento = self.archivo.obtener_movimiento(id_movimiento)
+        return movimiento
+    
+    def movimientos_archivados(self, desde=None, hasta=None, codigo_articulo=None):
+        """
+        Recorre los movimientos archivados por la compactación, leyéndolos del disco
+        
+        Args:
+            desde (datetime): Fecha inicial (incluida) o None
+            hasta (datetime): Fecha final (incluida) o None
+            codigo_articulo (str): Solo los movimientos de este artículo, o None para todos
+            
+        Yields:
+            MovimientoInventario: Movimientos archivados en orden de fecha
+        """
+        if self.archivo is not None:
+            yield from self.archivo.movimientos(desde, hasta, codigo_articulo)
     
     def obtener_todos_movimientos(self):
         """
         Obtiene todos los movimientos del inventario
         
         Returns:
-            list: Lista de todos los movimientos
+            VistaMovimientos: Vista de solo lectura de todo el historial (no lo copia)
         """
-        return self.movimientos.copy()
+        return self.movimientos_entre()
     
-    def generar_reporte_inventario(self):
+    def movimientos_entre(self, desde=None, hasta=None):
         """
-        Genera un reporte completo del inventario
+        Obtiene los movimientos entre dos fechas (ambas incluidas) sin copiarlos
+        
+        El tramo se ubica con una búsqueda binaria sobre el historial, que está en orden
+        de fecha también con varios hilos (ver _registrar_movimiento), así que el costo
+        depende de los movimientos que se usen y no del total.
         
+        Args:
+            desde (datetime): Fecha inicial o None para empezar por el primer movimiento
+            hasta (datetime): Fecha final o None para llegar hasta el último
+            
         Returns:
-            dict: Reporte con información del inventario
+            VistaMovimientos: Vista de solo lectura (admite len, índices, cortes y reversed)
         """
-        total_articulos = len(self.articulos)
-        total_movimientos = len(self.movimientos)
+        inicio, fin = self.almacen.posiciones_entre(desde, hasta)
+        return VistaMovimientos(self.almacen.movimientos_en_posiciones, range(inicio, fin))
+    
+    def ultimos_movimientos(self, cantidad=10):
+        """
+        Obtiene los movimientos más recientes
         
-        articulos_info = []
-        for articulo in self.articulos.values():
-            articulos_info.append(articulo.obtener_info())
+        Args:
+            cantidad (int): Número de movimientos a obtener
+            
+        Returns:
+            list: Movimientos, el más reciente primero
+        """
+        if cantidad <= 0:
+            return []
+        return list(reversed(self.movimientos_entre()[-cantidad:]))
+    
+    def consultar_movimientos(self, desde=None, hasta=None, tipo_movimiento=None, usuario=None,
+                              recientes_primero=False):
+        """
+        Recorre los movimientos de un rango de fechas que cumplen los filtros indicados
         
-        return {
-            'fecha_reporte': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'total_articulos': total_articulos,
-            'total_movimientos': total_movimientos,
-            'articulos': articulos_info
-        }
\ No newline at end of file
+        Args:
+            desde (datetime): Fecha inicial (incluida) o None
+            hasta (datetime): Fecha final (incluida) o None
+            tipo_movimiento (TipoMovimiento): Solo entradas o solo salidas, o None para ambas
+            usuario (str): Solo los movimientos de este usuario, o None para todos
+            recientes_primero (bool): Si es True se recorre del más reciente al más antiguo
+            
+        Yields:
+            MovimientoInventario: Movimientos que cumplen los filtros
+        """
+        for _, movimiento in self._recorrer_movimientos(desde, hasta, tipo_movimiento, usuario,
+                                                        recientes_primero):
+            yield movimiento
+    
+    def pagina_movimientos(self, desde=None, hasta=None, tipo_movimiento=None, usuario=None,
+                           cursor=None, limite=50, recientes_primero=False):
+        """
+        Obtiene una página de movimientos (mismos filtros que consultar_movimientos)
+        
+        El cursor es la posición en el historial por donde sigue la página siguiente: como
+        el historial solo crece, las páginas no se corren aunque se registren movimientos nuevos
+        (ni aunque se compacte: el cursor cuenta también los movimientos archivados).
+        
+        Args:
+            cursor (int): Cursor devuelto por la página anterior, o None para la primera
+            limite (int): Máximo de movimientos por página
+            
+        Returns:
+            tuple: (lista de movimientos, cursor de la página siguiente o None si no hay más)
+        """
+        pagina = []
+        for posicion, movimiento in self._recorrer_movimientos(desde, hasta, tipo_movimiento, usuario,
+                                                               recientes_primero, cursor):
+            if len(pagina) == limite:
+                return pagina, posicion
+            pagina.append(movimiento)
+        return pagina, None
+    
+    def _recorrer_movimientos(self, desde, hasta, tipo_movimiento, usuario, recientes_primero, cursor=None):
+        inicio, fin = self.almacen.posiciones_entre(desde, hasta)
+        if cursor is not None:
+            cursor -= self._descartados
+            if recientes_primero:
+                fin = min(fin, cursor + 1)
+            else:
+                inicio = max(inicio, cursor)
+        posiciones = range(inicio, max(inicio, fin))
+        if recientes_primero:
+            posiciones = posiciones[::-1]
+        vista = VistaMovimientos(self.almacen.movimientos_en_posiciones, posiciones)
+        for posicion, movimiento in zip(posiciones, vista):
+            if tipo_movimiento is not None and movimiento.tipo_movimiento != tipo_movimiento:
+                continue
+            if usuario is not None and movimiento.usuario != usuario:
+                continue
+            yield posicion + self._descartados, movimiento
+    
+    def generar_reporte_inventario(self):
+        """
+        Genera un reporte completo del inventario
+        
+        El reporte sale del resumen que se mantiene al día con cada operación (ver
+        ResumenInventario): solo se rearman las filas de los artículos que cambiaron.
+        La clave 'version' cambia cada vez que cambia el inventario.
+        
+        Returns:
+            dict: Reporte con información del inventario y su valoración
+        """
+        reporte = self.resumen.reporte(self.almacen)
+        reporte['valoracion'] = {
+            'valor': self.obtener_valor_inventario(),
+            'costo_ventas_por_mes': self.obtener_costo_ventas('mes')
+        }
+        return reporte
+    
+    def cerrar(self):
+        """
+        Guarda en disco lo pendiente y libera la persistencia y el almacén
+        """
+        if self.persistencia is not None:
+            # Espera a que termine de escribirse una instantánea en curso
+            with self._candado_instantanea:
+                self.persistencia.cerrar()
+            self.persistencia = None
+        self.almacen.cerrar()
+
+# Operaciones que se miden cuando las métricas están activas (ver metricas.py)
+METRICAS.registrar_clase(Inventario, (
+    'agregar_articulo', 'entrada_mercancia', 'salida_mercancia', 'entrada_mercancia_lote',
+    'salida_mercancia_lote', 'registrar_movimientos_lote', 'obtener_articulo', 'obtener_stock_actual',
+    'obtener_stock_en_fecha', 'obtener_movimientos_articulo', 'movimientos_entre', 'pagina_movimientos',
+    'buscar_articulos', 'generar_reporte_inventario', 'obtener_valor_inventario', 'compactar',
+    'articulos_bajo_reposicion'
+), 'inventario_operacion', 'operacion')
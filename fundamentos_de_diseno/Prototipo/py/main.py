@@ -2,16 +2,130 @@
 Archivo principal del sistema de inventarios importadora este seria el panel principal
 """
 
+from almacenamiento import AlmacenColumnar, AlmacenSQLite
+from archivo_movimientos import ArchivoMovimientos, horizonte_desde_dias
 from inventario import Inventario
-from movimiento_inventario import TipoMovimiento
-from reporte_pdf import GeneradorReportePDF
+from metricas import METRICAS
+from movimiento_inventario import TipoMovimiento, cantidad_valida, costo_valido
+from paginador import Paginador
+from persistencia import PersistenciaInventario
+from datetime import datetime
 import os
+import sys
+
+# Carpeta donde se guarda el inventario entre ejecuciones (se puede cambiar con INVENTARIO_DATOS)
+DIRECTORIO_DATOS = os.environ.get(
+    'INVENTARIO_DATOS',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'datos')
+)
+# "memoria" o "columnar" (ambos con diario + instantáneas) o "sqlite" (base de datos local)
+TIPO_ALMACEN = os.environ.get('INVENTARIO_ALMACEN', 'memoria')
+# Archivo donde se dejan las métricas en formato Prometheus después de cada operación del menú
+# (activa las métricas; vacío para no exportarlas)
+ARCHIVO_METRICAS = os.environ.get('INVENTARIO_METRICAS_ARCHIVO')
+# Días de movimientos que se mantienen en memoria; los anteriores se archivan comprimidos en
+# datos/archivo (vacío para no compactar solo; solo almacenes "memoria" y "columnar")
+HORIZONTE_MOVIMIENTOS = horizonte_desde_dias(os.environ.get('INVENTARIO_HORIZONTE_DIAS'))
+# Máximo de filas que muestra cada listado (vacío para mostrar todas)
+LIMITE_FILAS = int(os.environ['INVENTARIO_LIMITE_FILAS']) if os.environ.get('INVENTARIO_LIMITE_FILAS', '').isdigit() else None
+
+def crear_inventario(directorio_datos=DIRECTORIO_DATOS, tipo_almacen=TIPO_ALMACEN, concurrente=False):
+    """
+    Crea el inventario con el almacenamiento configurado
+    
+    Args:
+        directorio_datos (str): Carpeta de datos
+        tipo_almacen (str): "memoria", "columnar" o "sqlite"
+        concurrente (bool): Si el inventario se usará desde varios hilos (servidor_api.py)
+        
+    Returns:
+        Inventario: Inventario listo para usar
+    """
+    if tipo_almacen == 'sqlite':
+        os.makedirs(directorio_datos, exist_ok=True)
+        inventario = Inventario(almacen=AlmacenSQLite(os.path.join(directorio_datos, 'inventario.db')),
+                                concurrente=concurrente)
+    else:
+        almacen = AlmacenColumnar() if tipo_almacen == 'columnar' else None
+        archivo = ArchivoMovimientos(os.path.join(directorio_datos, 'archivo'), HORIZONTE_MOVIMIENTOS)
+        inventario = Inventario(persistencia=PersistenciaInventario(directorio_datos), almacen=almacen,
+                                concurrente=concurrente, archivo=archivo)
+    METRICAS.observar_inventario(inventario)
+    return inventario
+
+ENCABEZADO_ARTICULOS = [f"{'Código':<10} {'Nombre':<20} {'Stock':<15} {'Unidad':<10}", "-" * 60]
+
+# Formato de las filas de los listados: se leen los atributos directamente, sin armar el
+# diccionario de obtener_info() por cada fila, e isoformat() es varias veces más rápido que
+# strftime() para la fecha (da el mismo texto)
+def formato_articulo(articulo):
+    return f"{articulo.codigo:<10} {articulo.nombre:<20} {articulo.cantidad:<15} {articulo.unidad_medida:<10}"
+
+def formato_movimiento(mov):
+    return (f"{mov.fecha_hora.isoformat(' ', 'seconds')}  {mov.codigo_articulo:<12} {mov.tipo_movimiento.value:<10} "
+            f"{mov.cantidad:<12} {mov.motivo:<25}")
+
+def formato_movimiento_articulo(mov):
+    return (f"{mov.fecha_hora.isoformat(' ', 'seconds')}  {mov.tipo_movimiento.value:<10} {mov.cantidad:<12} "
+            f"{mov.motivo:<25} {mov.usuario:<15}")
+
+def limpiar_pantalla():
+    # Secuencia ANSI en lugar de lanzar el programa clear en cada operación
+    if os.name == 'nt':
+        os.system('cls')
+    else:
+        print("\033[2J\033[H", end="", flush=True)
+
+# Opción del menú -> método de SistemaInventario que la atiende
+OPCIONES = {
+    "1": 'agregar_articulo',
+    "2": 'entrada_mercancia',
+    "3": 'salida_mercancia',
+    "4": 'consultar_stock',
+    "5": 'listar_articulos',
+    "6": 'ver_movimientos_articulo',
+    "7": 'ver_todos_movimientos',
+    "8": 'generar_reporte',
+    "9": 'generar_reporte_pdf_completo',
+    "10": 'generar_reporte_pdf_articulo',
+    "12": 'generar_reportes_pdf_articulos',
+    "13": 'consultar_stock_en_fecha',
+    "14": 'buscar_articulos',
+}
+OPCION_SALIR = "11"  # Salir conserva su número de siempre; las opciones nuevas van después
 
 class SistemaInventario:
-    def __init__(self):
-        self.inventario = Inventario()
+    def __init__(self, directorio_datos=DIRECTORIO_DATOS, perfilador=None):
+        """
+        Inicializa el sistema
+        
+        Args:
+            directorio_datos (str): Carpeta de datos
+            perfilador (Perfilador): Si se indica, cada opción del menú y cada PDF se perfila
+                (ver perfilado.py)
+        """
+        if ARCHIVO_METRICAS:
+            METRICAS.activar()
+        self.inventario = crear_inventario(directorio_datos)
         self.usuario_actual = "Administrador"
-        self.generador_pdf = GeneradorReportePDF()
+        self.paginador = Paginador(limite_filas=LIMITE_FILAS)
+        self.perfilador = perfilador
+        self._generador_pdf = None
+    
+    @property
+    def generador_pdf(self):
+        """
+        Generador de reportes PDF; reportlab se importa recién la primera vez que se usa
+        (así el programa arranca rápido aunque no se pida ningún PDF)
+        """
+        if self._generador_pdf is None:
+            from reporte_pdf import GeneradorReportePDF
+            self._generador_pdf = GeneradorReportePDF()
+            if self.perfilador is not None:
+                self.perfilador.envolver(self._generador_pdf, (
+                    'generar_reporte_inventario', 'generar_reporte_articulo', 'generar_reportes_articulos'
+                ), prefijo='pdf_')
+        return self._generador_pdf
     
     def mostrar_menu(self):
         """este seria el panel principal"""
@@ -29,6 +143,9 @@ class SistemaInventario:
         print("9. Generar reporte PDF del inventario")
         print("10. Generar reporte PDF de artículo")
         print("11. Salir")
+        print("12. Generar reportes PDF de todos los artículos")
+        print("13. Consultar stock a una fecha")
+        print("14. Buscar artículos")
         print("="*50)
     
     def agregar_articulo(self):
@@ -66,18 +183,28 @@ class SistemaInventario:
         
         try:
             cantidad = float(input("Cantidad a ingresar: "))
-            if cantidad <= 0:
-                print(" Error: La cantidad debe ser mayor a 0")
+            if not cantidad_valida(cantidad):
+                print(" Error: La cantidad debe ser un número finito mayor a 0")
                 return
         except ValueError:
             print(" Error: Ingrese un número válido")
             return
         
+        texto_costo = input("Costo unitario (opcional): ").strip()
+        try:
+            costo_unitario = float(texto_costo) if texto_costo else None
+        except ValueError:
+            print(" Error: Ingrese un costo válido")
+            return
+        if costo_unitario is not None and not costo_valido(costo_unitario):
+            print(" Error: El costo unitario debe ser un número finito no negativo")
+            return
+        
         motivo = input("Motivo (opcional): ").strip()
         if not motivo:
             motivo = "Entrada de mercancía"
         
-        if self.inventario.entrada_mercancia(codigo, cantidad, motivo, self.usuario_actual):
+        if self.inventario.entrada_mercancia(codigo, cantidad, motivo, self.usuario_actual, costo_unitario):
             nuevo_stock = self.inventario.obtener_stock_actual(codigo)
             print(f" Entrada registrada exitosamente")
             print(f"  Stock anterior: {articulo.cantidad - cantidad} {articulo.unidad_medida}")
@@ -99,8 +226,8 @@ class SistemaInventario:
         
         try:
             cantidad = float(input("Cantidad a retirar: "))
-            if cantidad <= 0:
-                print(" Error: La cantidad debe ser mayor a 0")
+            if not cantidad_valida(cantidad):
+                print(" Error: La cantidad debe ser un número finito mayor a 0")
                 return
         except ValueError:
             print(" Error: Ingrese un número válido")
@@ -137,20 +264,98 @@ class SistemaInventario:
         print(f"  Nombre: {articulo.nombre}")
         print(f"  Descripción: {articulo.descripcion}")
         print(f"  Stock actual: {articulo.cantidad} {articulo.unidad_medida}")
+        valoracion = self.inventario.obtener_valoracion_articulo(codigo)
+        print(f"  Costo promedio: ${valoracion['costo_promedio']:,.2f}")
+        print(f"  Valor: ${valoracion['valor_promedio']:,.2f} (promedio) / ${valoracion['valor_fifo']:,.2f} (FIFO)")
+    
+    def _leer_fecha(self, mensaje, opcional=False, fin_del_dia=False):
+        """
+        Pide una fecha por teclado
+        
+        Args:
+            mensaje (str): Texto a mostrar
+            opcional (bool): Si es True una respuesta vacía es válida (retorna None)
+            fin_del_dia (bool): Si solo se escribe la fecha, tomar el final de ese día
+            
+        Returns:
+            datetime: Fecha leída, None si se dejó vacía o False si no es válida
+        """
+        texto = input(mensaje).strip()
+        if not texto and opcional:
+            return None
+        try:
+            fecha_hora = datetime.fromisoformat(texto)
+        except ValueError:
+            print(" Error: Fecha no válida")
+            return False
+        if len(texto) == 10 and fin_del_dia:
+            fecha_hora = fecha_hora.replace(hour=23, minute=59, second=59, microsecond=999999)
+        return fecha_hora
+    
+    def consultar_stock_en_fecha(self):
+        """Interfaz para consultar el stock de un artículo (o de todos) en una fecha pasada"""
+        print("\n--- CONSULTAR STOCK A UNA FECHA ---")
+        fecha_hora = self._leer_fecha("Fecha (AAAA-MM-DD o AAAA-MM-DD HH:MM): ", fin_del_dia=True)
+        if fecha_hora is False:
+            return
+        codigo = input("Código del artículo (vacío para todos): ").strip().upper()
+        
+        if codigo:
+            articulo = self.inventario.obtener_articulo(codigo)
+            if not articulo:
+                print(f" Error: No existe un artículo con el código '{codigo}'")
+                return
+            cantidad = self.inventario.obtener_stock_en_fecha(codigo, fecha_hora)
+            if cantidad is None:
+                print(" El historial guardado no llega a esa fecha")
+                return
+            print(f"\nStock de {articulo.nombre} al {fecha_hora:%Y-%m-%d %H:%M:%S}: "
+                  f"{cantidad} {articulo.unidad_medida}")
+            print(f"  Stock actual: {articulo.cantidad} {articulo.unidad_medida}")
+            return
+        
+        saldos = self.inventario.obtener_stock_catalogo_en_fecha(fecha_hora)
+        if saldos is None:
+            print(" El historial guardado no llega a esa fecha")
+            return
+        if not saldos:
+            print("No hay artículos registrados en el inventario")
+            return
+        
+        print(f"\nStock al {fecha_hora:%Y-%m-%d %H:%M:%S}")
+        self.paginador.mostrar(
+            saldos.items(),
+            lambda fila: f"{fila[0]:<10} {fila[1]:<15} {self.inventario.obtener_stock_actual(fila[0]):<15}",
+            [f"{'Código':<10} {'Stock en fecha':<15} {'Stock actual':<15}", "-" * 45]
+        )
     
     def listar_articulos(self):
         """Interfaz para listar todos los artículos"""
         print("\n--- LISTADO DE ARTÍCULOS ---")
-        articulos = self.inventario.listar_articulos()
-        
-        if not articulos:
+        if not self.inventario.contar_articulos():
             print("No hay artículos registrados en el inventario")
             return
         
-        print(f"{'Código':<10} {'Nombre':<20} {'Stock':<15} {'Unidad':<10}")
-        print("-" * 60)
-        for articulo in articulos:
-            print(f"{articulo.codigo:<10} {articulo.nombre:<20} {articulo.cantidad:<15} {articulo.unidad_medida:<10}")
+        # Se recorre el catálogo a medida que se muestran las páginas, sin armar una lista
+        self.paginador.mostrar(self.inventario.iterar_articulos(), formato_articulo, ENCABEZADO_ARTICULOS)
+    
+    def buscar_articulos(self):
+        """Interfaz para buscar artículos por código, nombre o descripción"""
+        print("\n--- BUSCAR ARTÍCULOS ---")
+        texto = input("Texto a buscar (palabras completas o su comienzo): ").strip()
+        if not texto:
+            print(" Error: Debe escribir algo para buscar")
+            return
+        
+        resultados = self.inventario.buscar_articulos(texto, limite=20)
+        if not resultados:
+            print(f"No se encontraron artículos para '{texto}'")
+            return
+        
+        for linea in ENCABEZADO_ARTICULOS:
+            print(linea)
+        for articulo in resultados:
+            print(formato_articulo(articulo))
     
     def ver_movimientos_articulo(self):
         """Interfaz para ver movimientos de un artículo específico"""
@@ -169,28 +374,32 @@ class SistemaInventario:
             return
         
         print(f"\nMovimientos del artículo: {articulo.nombre}")
-        print(f"{'Fecha/Hora':<20} {'Tipo':<10} {'Cantidad':<12} {'Motivo':<25} {'Usuario':<15}")
-        print("-" * 85)
-        
-        for mov in movimientos:
-            info = mov.obtener_info()
-            print(f"{info['fecha_hora']:<20} {info['tipo_movimiento']:<10} {info['cantidad']:<12} {info['motivo']:<25} {info['usuario']:<15}")
+        self.paginador.mostrar(movimientos, formato_movimiento_articulo, [
+            f"{'Fecha/Hora':<20} {'Tipo':<10} {'Cantidad':<12} {'Motivo':<25} {'Usuario':<15}", "-" * 85
+        ])
     
     def ver_todos_movimientos(self):
         """Interfaz para ver todos los movimientos"""
         print("\n--- TODOS LOS MOVIMIENTOS ---")
-        movimientos = self.inventario.obtener_todos_movimientos()
+        print("(deje las fechas vacías para ver todo el historial)")
+        desde = self._leer_fecha("Desde (AAAA-MM-DD o AAAA-MM-DD HH:MM): ", opcional=True)
+        if desde is False:
+            return
+        hasta = self._leer_fecha("Hasta (AAAA-MM-DD o AAAA-MM-DD HH:MM): ", opcional=True, fin_del_dia=True)
+        if hasta is False:
+            return
+        # Vista del tramo pedido: se ubica por búsqueda binaria y no copia el historial
+        movimientos = self.inventario.movimientos_entre(desde, hasta)
         
         if not movimientos:
             print("No hay movimientos registrados")
             return
         
-        print(f"{'Fecha/Hora':<20} {'Artículo':<12} {'Tipo':<10} {'Cantidad':<12} {'Motivo':<25}")
-        print("-" * 85)
-        
-        for mov in movimientos:
-            info = mov.obtener_info()
-            print(f"{info['fecha_hora']:<20} {info['codigo_articulo']:<12} {info['tipo_movimiento']:<10} {info['cantidad']:<12} {info['motivo']:<25}")
+        print(f"{len(movimientos)} movimientos")
+        # La vista permite saltar a cualquier página: solo se leen y formatean las que se muestran
+        self.paginador.mostrar(movimientos, formato_movimiento, [
+            f"{'Fecha/Hora':<20} {'Artículo':<12} {'Tipo':<10} {'Cantidad':<12} {'Motivo':<25}", "-" * 85
+        ])
     
     def generar_reporte(self):
         """Interfaz para generar reporte de inventario"""
@@ -201,11 +410,28 @@ class SistemaInventario:
         print(f"Total de artículos: {reporte['total_articulos']}")
         print(f"Total de movimientos: {reporte['total_movimientos']}")
         print("\nDetalle de artículos:")
-        print(f"{'Código':<10} {'Nombre':<20} {'Stock':<15} {'Unidad':<10}")
-        print("-" * 60)
-        
-        for articulo_info in reporte['articulos']:
-            print(f"{articulo_info['codigo']:<10} {articulo_info['nombre']:<20} {articulo_info['cantidad']:<15} {articulo_info['unidad_medida']:<10}")
+        self.paginador.mostrar(
+            reporte['articulos'],
+            lambda info: f"{info['codigo']:<10} {info['nombre']:<20} {info['cantidad']:<15} {info['unidad_medida']:<10}",
+            ENCABEZADO_ARTICULOS
+        )
+        
+        print("\nTotales por unidad de medida:")
+        print(f"{'Unidad':<15} {'Artículos':<10} {'Stock total':<15}")
+        print("-" * 40)
+        for unidad, datos in sorted(reporte['por_unidad'].items()):
+            print(f"{unidad:<15} {datos['articulos']:<10} {datos['cantidad']:<15}")
+        
+        valoracion = reporte['valoracion']
+        print("\nValoración del inventario:")
+        print(f"  Costo promedio ponderado: ${valoracion['valor']['promedio']:,.2f}")
+        print(f"  FIFO:                     ${valoracion['valor']['fifo']:,.2f}")
+        if valoracion['costo_ventas_por_mes']:
+            print("\nCosto de ventas por mes:")
+            print(f"{'Mes':<10} {'Costo promedio':>18} {'FIFO':>18}")
+            print("-" * 48)
+            for mes, costos in valoracion['costo_ventas_por_mes'].items():
+                print(f"{mes:<10} {costos['promedio']:>18,.2f} {costos['fifo']:>18,.2f}")
     
     def generar_reporte_pdf_completo(self):
         """Interfaz para generar reporte completo en PDF"""
@@ -216,6 +442,10 @@ class SistemaInventario:
             print(f" Reporte PDF generado exitosamente:")
             print(f"  Archivo: {archivo_pdf}")
             print(f"  Ubicación: {os.path.dirname(archivo_pdf)}")
+            estadisticas = self.generador_pdf.estadisticas_ultimo_reporte
+            if estadisticas:
+                print(f"  {estadisticas['paginas']} páginas en {estadisticas['segundos']:.1f} s "
+                      f"({estadisticas['paginas_por_segundo']:.0f} páginas/s)")
         except ImportError:
             print(" Error: La librería 'reportlab' no está instalada.")
             print("  Para instalar, ejecute: pip install reportlab")
@@ -246,47 +476,108 @@ class SistemaInventario:
         except Exception as e:
             print(f" Error al generar el reporte PDF: {e}")
     
+    def generar_reportes_pdf_articulos(self):
+        """Interfaz para generar el reporte PDF de cada artículo (cierre de mes)"""
+        print("\n--- GENERAR REPORTES PDF DE TODOS LOS ARTÍCULOS ---")
+        directorio = f"reportes_articulos_{datetime.now().strftime('%Y%m%d')}"
+        
+        try:
+            resultados = self.generador_pdf.generar_reportes_articulos(self.inventario, directorio)
+            estadisticas = self.generador_pdf.estadisticas_ultimo_reporte
+            print(f" {estadisticas['reportes']} reportes generados en {os.path.abspath(directorio)}")
+            print(f"  {estadisticas['segundos']:.1f} s con {estadisticas['procesos']} procesos "
+                  f"({estadisticas['reportes_por_segundo']:.1f} reportes/s)")
+            if resultados:
+                tiempos = sorted(segundos for _, _, segundos in resultados)
+                print(f"  Tiempo por reporte: promedio {sum(tiempos) / len(tiempos):.3f} s, "
+                      f"mediana {tiempos[len(tiempos) // 2]:.3f} s, máximo {tiempos[-1]:.3f} s")
+                for codigo, _, segundos in sorted(resultados, key=lambda r: r[2], reverse=True)[:3]:
+                    print(f"    {codigo}: {segundos:.3f} s")
+        except ImportError:
+            print(" Error: La librería 'reportlab' no está instalada.")
+            print("  Para instalar, ejecute: pip install reportlab")
+        except Exception as e:
+            print(f" Error al generar los reportes PDF: {e}")
+    
+    def ejecutar_script(self, origen):
+        """
+        Ejecuta comandos de un archivo (o de la entrada estándar) sin menú ni pausas
+        
+        Args:
+            origen (str): Ruta del archivo de comandos, o '-' para la entrada estándar
+            
+        Returns:
+            int: Comandos que fallaron (el resultado de cada uno se escribe como JSON)
+        """
+        from comandos import ejecutar_script
+        generador_pdf = lambda: self.generador_pdf
+        if self.perfilador is not None:
+            _, fallidos = self.perfilador.medir(
+                lambda: ejecutar_script(self.inventario, origen, generador_pdf=generador_pdf), "script")
+        else:
+            _, fallidos = ejecutar_script(self.inventario, origen, generador_pdf=generador_pdf)
+        if ARCHIVO_METRICAS:
+            METRICAS.exportar(ARCHIVO_METRICAS)
+        return fallidos
+    
+    def _avisar_reposicion(self, articulo, punto):
+        print(f"\n Atención: '{articulo.codigo}' ({articulo.nombre}) llegó a su punto de reposición: "
+              f"stock {articulo.cantidad} {articulo.unidad_medida}, punto {punto}")
+    
     def ejecutar(self):
         """Ejecuta el sistema principal"""
         print("¡Bienvenido al Sistema de Inventarios de la importadora!")
+        self.inventario.suscribir_reposicion(self._avisar_reposicion)
         
         while True:
             self.mostrar_menu()
-            opcion = input("\nSeleccione una opción (1-11): ").strip()
+            opcion = input("\nSeleccione una opción (1-14): ").strip()
             
-            if opcion == "1":
-                self.agregar_articulo()
-            elif opcion == "2":
-                self.entrada_mercancia()
-            elif opcion == "3":
-                self.salida_mercancia()
-            elif opcion == "4":
-                self.consultar_stock()
-            elif opcion == "5":
-                self.listar_articulos()
-            elif opcion == "6":
-                self.ver_movimientos_articulo()
-            elif opcion == "7":
-                self.ver_todos_movimientos()
-            elif opcion == "8":
-                self.generar_reporte()
-            elif opcion == "9":
-                self.generar_reporte_pdf_completo()
-            elif opcion == "10":
-                self.generar_reporte_pdf_articulo()
-            elif opcion == "11":
+            if opcion == OPCION_SALIR:
                 print("\n¡Hasta Luego!")
                 break
+            metodo = OPCIONES.get(opcion)
+            if metodo is None:
+                print(" Opción no válida. Por favor seleccione una opción del 1 al 14.")
+            elif self.perfilador is not None:
+                self.perfilador.medir(getattr(self, metodo), f"opcion{opcion}_{metodo}")
             else:
-                print(" Opción no válida. Por favor seleccione una opción del 1 al 11.")
+                getattr(self, metodo)()
             
+            if ARCHIVO_METRICAS:
+                METRICAS.exportar(ARCHIVO_METRICAS)
             input("\nPresione Enter para continuar...")
-            os.system('cls' if os.name == 'nt' else 'clear')
+            limpiar_pantalla()
 
 def main():
     """Función principal"""
-    sistema = SistemaInventario()
-    sistema.ejecutar()
+    # --perfilar [carpeta] o INVENTARIO_PERFIL=1|carpeta: perfila cada operación (ver perfilado.py)
+    perfilador = None
+    perfil = os.environ.get('INVENTARIO_PERFIL', '')
+    if '--perfilar' in sys.argv or perfil not in ('', '0'):
+        from perfilado import Perfilador
+        directorio = perfil if perfil not in ('', '0', '1') else None
+        posicion = sys.argv.index('--perfilar') + 1 if '--perfilar' in sys.argv else len(sys.argv)
+        if posicion < len(sys.argv) and not sys.argv[posicion].startswith('-'):
+            directorio = sys.argv[posicion]
+        perfilador = Perfilador(directorio)
+        print(f"Perfilado activo: los perfiles se guardan en {os.path.abspath(perfilador.directorio)}",
+              file=sys.stderr)
+    sistema = SistemaInventario(perfilador=perfilador)
+    try:
+        if '--script' in sys.argv:
+            # --script ARCHIVO|-: ejecuta los comandos sin menú (ver comandos.py)
+            posicion = sys.argv.index('--script') + 1
+            origen = sys.argv[posicion] if posicion < len(sys.argv) else '-'
+            fallidos = sistema.ejecutar_script(origen)
+            if fallidos:
+                sys.exit(1)
+        else:
+            sistema.ejecutar()
+    finally:
+        sistema.inventario.cerrar()
+        if perfilador is not None:
+            perfilador.cerrar()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
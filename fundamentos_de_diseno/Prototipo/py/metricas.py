@@ -0,0 +1,266 @@
+"""
+Métricas de rendimiento (contadores, histogramas de latencia e indicadores) en formato Prometheus
+
+Cada módulo declara qué métodos de sus clases se miden (ver registrar_clase al final de
+inventario.py y reporte_pdf.py). Mientras las métricas están desactivadas esos métodos no se
+tocan, así no cuestan nada; al activarlas cada uno se envuelve con una función que mide su
+duración y cuenta los rechazos (cuando retorna False o (False, errores)) y los errores.
+
+Se activan con INVENTARIO_METRICAS=1 (o METRICAS.activar()). El texto en formato de
+exposición de Prometheus se obtiene con METRICAS.texto_prometheus(), se escribe en un
+archivo con METRICAS.exportar(ruta) (para el "textfile collector" de node_exporter) y el
+servidor lo sirve en /metrics.
+"""
+
+import functools
+import os
+import threading
+import time
+import weakref
+from bisect import bisect_left
+from collections import deque
+
+# Límites de los intervalos de los histogramas, en segundos (de 10 µs a 10 s)
+LIMITES_SEGUNDOS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+PENDIENTES_POR_TANDA = 1024  # Observaciones encoladas antes de sumarlas al histograma
+
+def _etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    return '{' + ','.join(f'{clave}="{valor}"' for clave, valor in etiquetas) + '}'
+
+def _numero(valor):
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+class Contador:
+    __slots__ = ('valor', '_candado')
+
+    def __init__(self):
+        self.valor = 0
+        self._candado = threading.Lock()
+
+    def incrementar(self, cantidad=1):
+        with self._candado:
+            self.valor += cantidad
+
+    def lineas(self, nombre, etiquetas):
+        return [f"{nombre}{_etiquetas(etiquetas)} {_numero(self.valor)}"]
+
+class Histograma:
+    __slots__ = ('limites', 'cuentas', 'suma', 'total', '_pendientes', '_candado')
+
+    def __init__(self, limites=LIMITES_SEGUNDOS):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)  # La última es la de +Inf
+        self.suma = 0.0
+        self.total = 0
+        # Las observaciones se encolan (append de deque es seguro entre hilos y no necesita
+        # candado) y se suman por tandas; tomar un candado en cada llamada costaba más que
+        # la operación medida
+        self._pendientes = deque()
+        self._candado = threading.Lock()
+
+    def observar(self, valor):
+        pendientes = self._pendientes
+        pendientes.append(valor)
+        if len(pendientes) >= PENDIENTES_POR_TANDA:
+            self._acumular()
+
+    def _acumular(self):
+        with self._candado:
+            pendientes, limites, cuentas = self._pendientes, self.limites, self.cuentas
+            suma = 0.0
+            cantidad = len(pendientes)
+            for _ in range(cantidad):
+                valor = pendientes.popleft()
+                cuentas[bisect_left(limites, valor)] += 1
+                suma += valor
+            self.suma += suma
+            self.total += cantidad
+
+    def lineas(self, nombre, etiquetas):
+        self._acumular()
+        with self._candado:
+            cuentas, suma, total = list(self.cuentas), self.suma, self.total
+        lineas = []
+        acumulado = 0
+        # Prometheus espera cuentas acumuladas: cada intervalo incluye a los anteriores
+        for limite, cuenta in zip(self.limites + (float('inf'),), cuentas):
+            acumulado += cuenta
+            le = '+Inf' if limite == float('inf') else repr(limite)
+            lineas.append(f"{nombre}_bucket{_etiquetas(etiquetas + (('le', le),))} {acumulado}")
+        lineas.append(f"{nombre}_sum{_etiquetas(etiquetas)} {_numero(suma)}")
+        lineas.append(f"{nombre}_count{_etiquetas(etiquetas)} {total}")
+        return lineas
+
+class Indicador:
+    __slots__ = ('leer',)
+
+    def __init__(self, leer):
+        self.leer = leer  # Función sin argumentos; se llama al exportar (None = sin valor)
+
+    def lineas(self, nombre, etiquetas):
+        valor = self.leer()
+        if valor is None:
+            return []
+        return [f"{nombre}{_etiquetas(etiquetas)} {_numero(valor)}"]
+
+class RegistroMetricas:
+    def __init__(self):
+        """
+        Inicializa un registro vacío y desactivado
+        """
+        self.activo = False
+        self._familias = {}  # Nombre -> [tipo, ayuda, {etiquetas: serie}]
+        self._clases = []  # (clase, métodos, familia, etiqueta) declarados con registrar_clase
+        self._originales = []  # (clase, método, función original) mientras están envueltos
+        self._candado = threading.RLock()
+
+    def _serie(self, nombre, tipo, ayuda, etiquetas, crear):
+        with self._candado:
+            familia = self._familias.get(nombre)
+            if familia is None:
+                familia = self._familias[nombre] = [tipo, ayuda, {}]
+            serie = familia[2].get(etiquetas)
+            if serie is None:
+                serie = familia[2][etiquetas] = crear()
+            return serie
+
+    def contador(self, nombre, ayuda, **etiquetas):
+        """Retorna (y crea si hace falta) un contador con esas etiquetas"""
+        return self._serie(nombre, 'counter', ayuda, tuple(etiquetas.items()), Contador)
+
+    def histograma(self, nombre, ayuda, **etiquetas):
+        """Retorna (y crea si hace falta) un histograma de segundos con esas etiquetas"""
+        return self._serie(nombre, 'histogram', ayuda, tuple(etiquetas.items()), Histograma)
+
+    def indicador(self, nombre, ayuda, leer, **etiquetas):
+        """
+        Registra un indicador cuyo valor se lee al exportar (reemplaza al anterior con esas etiquetas)
+
+        Args:
+            nombre (str): Nombre de la métrica
+            ayuda (str): Descripción
+            leer (callable): Función sin argumentos que retorna el valor (o None)
+        """
+        with self._candado:
+            familia = self._familias.setdefault(nombre, ['gauge', ayuda, {}])
+            familia[2][tuple(etiquetas.items())] = Indicador(leer)
+
+    def observar_inventario(self, inventario):
+        """
+        Publica el tamaño del catálogo y del historial de movimientos de un inventario
+
+        Args:
+            inventario (Inventario): Inventario a observar (no se lo mantiene vivo)
+        """
+        referencia = weakref.ref(inventario)
+
+        def leer(metodo):
+            def valor():
+                actual = referencia()
+                return getattr(actual, metodo)() if actual is not None else None
+            return valor
+
+        self.indicador('inventario_articulos', "Artículos en el catálogo", leer('contar_articulos'))
+        self.indicador('inventario_movimientos', "Movimientos en el historial", leer('contar_movimientos'))
+
+    def registrar_clase(self, clase, metodos, familia, etiqueta):
+        """
+        Declara los métodos de una clase que se miden cuando las métricas están activas
+
+        Args:
+            clase (type): Clase cuyos métodos se miden
+            metodos (iterable): Nombres de los métodos
+            familia (str): Prefijo de las métricas (por ejemplo 'inventario_operacion')
+            etiqueta (str): Etiqueta que lleva el nombre del método (por ejemplo 'operacion')
+        """
+        with self._candado:
+            declaracion = (clase, tuple(metodos), familia, etiqueta)
+            self._clases.append(declaracion)
+            if self.activo:
+                self._envolver(*declaracion)
+
+    def activar(self):
+        """Empieza a medir los métodos declarados"""
+        with self._candado:
+            if self.activo:
+                return
+            self.activo = True
+            for declaracion in self._clases:
+                self._envolver(*declaracion)
+
+    def desactivar(self):
+        """Deja de medir: los métodos vuelven a ser los originales (los valores se conservan)"""
+        with self._candado:
+            self.activo = False
+            for clase, metodo, original in reversed(self._originales):
+                setattr(clase, metodo, original)
+            self._originales = []
+
+    def _envolver(self, clase, metodos, familia, etiqueta):
+        for metodo in metodos:
+            original = clase.__dict__[metodo]
+            setattr(clase, metodo, self._medido(original, familia, {etiqueta: metodo}))
+            self._originales.append((clase, metodo, original))
+
+    def _medido(self, original, familia, etiquetas):
+        duracion = self.histograma(f"{familia}_segundos", "Duración en segundos", **etiquetas)
+        rechazos = self.contador(f"{familia}_rechazos_total", "Llamadas rechazadas (retornaron False)", **etiquetas)
+        errores = self.contador(f"{familia}_errores_total", "Llamadas que terminaron con una excepción", **etiquetas)
+        reloj = time.perf_counter
+
+        observar = duracion.observar
+
+        @functools.wraps(original)
+        def medido(*args, **kwargs):
+            inicio = reloj()
+            try:
+                resultado = original(*args, **kwargs)
+            except Exception:
+                observar(reloj() - inicio)
+                errores.incrementar()
+                raise
+            observar(reloj() - inicio)
+            if resultado is False or (type(resultado) is tuple and resultado and resultado[0] is False):
+                rechazos.incrementar()
+            return resultado
+
+        return medido
+
+    def texto_prometheus(self):
+        """
+        Retorna todas las métricas en el formato de exposición de texto de Prometheus (0.0.4)
+
+        Returns:
+            str: Texto con # HELP, # TYPE y una línea por serie
+        """
+        with self._candado:
+            familias = [(nombre, tipo, ayuda, list(series.items()))
+                        for nombre, (tipo, ayuda, series) in sorted(self._familias.items())]
+        lineas = []
+        for nombre, tipo, ayuda, series in familias:
+            lineas.append(f"# HELP {nombre} {ayuda}")
+            lineas.append(f"# TYPE {nombre} {tipo}")
+            for etiquetas, serie in series:
+                lineas.extend(serie.lineas(nombre, etiquetas))
+        return '\n'.join(lineas) + '\n'
+
+    def exportar(self, ruta):
+        """
+        Escribe las métricas en un archivo (se reemplaza de una vez, nunca queda a medias)
+
+        Args:
+            ruta (str): Archivo destino, por ejemplo inventario.prom
+        """
+        temporal = f"{ruta}.{os.getpid()}.tmp"
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write(self.texto_prometheus())
+        os.replace(temporal, ruta)
+
+METRICAS = RegistroMetricas()
+if os.environ.get('INVENTARIO_METRICAS', '') not in ('', '0'):
+    METRICAS.activar()
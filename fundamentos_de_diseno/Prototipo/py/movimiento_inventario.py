@@ -2,41 +2,58 @@
 Clase MovimientoInventario para registrar entradas y salidas de mercancía
 """
 
+import math
 from datetime import datetime
 from enum import Enum
 
+from identificadores import SECUENCIADOR
+
 class TipoMovimiento(Enum):
     ENTRADA = "ENTRADA"
     SALIDA = "SALIDA"
 
+def cantidad_valida(cantidad):
+    """
+    Indica si una cantidad sirve para un movimiento: un número finito mayor a 0 (NaN e
+    infinito no, porque dejarían el stock sin sentido)
+    """
+    return math.isfinite(cantidad) and cantidad > 0
+
+def costo_valido(costo_unitario):
+    """
+    Indica si un costo unitario sirve para una entrada: un número finito mayor o igual a 0
+    """
+    return math.isfinite(costo_unitario) and costo_unitario >= 0
+
 class MovimientoInventario:
-    def __init__(self, codigo_articulo, tipo_movimiento, cantidad, motivo="", usuario="Sistema"):
+    def __init__(self, codigo_articulo, tipo_movimiento, cantidad, motivo="", usuario="Sistema",
+                 costo_unitario=None, sellar=True):
         """
         Inicializa un movimiento de inventario
         
+        El ID y la fecha salen del secuenciador (ver identificadores.py): la fecha es la
+        hora local, pero nunca anterior a la de un movimiento ya creado.
+        
         Args:
             codigo_articulo (str): Código del artículo afectado
             tipo_movimiento (TipoMovimiento): Tipo de movimiento (ENTRADA o SALIDA)
             cantidad (float): Cantidad del movimiento
             motivo (str): Motivo del movimiento
             usuario (str): Usuario que realiza el movimiento
+            costo_unitario (float): Costo de cada unidad (en las entradas; None si no se conoce)
+            sellar (bool): Si es False el ID y la fecha quedan en None hasta que el Inventario
+                los asigne al guardarlo (así el orden del historial es el de guardado)
         """
-        self.id = self._generar_id()
+        self.fecha_hora = None
+        self.id = None
         self.codigo_articulo = codigo_articulo
         self.tipo_movimiento = tipo_movimiento
         self.cantidad = cantidad
         self.motivo = motivo
         self.usuario = usuario
-        self.fecha_hora = datetime.now()
-    
-    def _generar_id(self):
-        """
-        Genera un ID único para el movimiento basado en timestamp
-        
-        Returns:
-            str: ID único del movimiento
-        """
-        return f"MOV_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}"
+        self.costo_unitario = costo_unitario
+        if sellar:
+            SECUENCIADOR.sellar((self,))
     
     def __str__(self):
         return f"{self.tipo_movimiento.value}: {self.cantidad} - {self.codigo_articulo} ({self.fecha_hora.strftime('%Y-%m-%d %H:%M:%S')})"
@@ -58,9 +75,113 @@ class MovimientoInventario:
             'cantidad': self.cantidad,
             'motivo': self.motivo,
             'usuario': self.usuario,
-            'fecha_hora': self.fecha_hora.strftime('%Y-%m-%d %H:%M:%S')
+            'fecha_hora': self.fecha_hora.strftime('%Y-%m-%d %H:%M:%S'),
+            'costo_unitario': self.costo_unitario
+        }
+    
+    def a_registro(self):
+        """
+        Retorna el movimiento como registro serializable sin perder precisión
+        
+        Returns:
+            dict: Registro con la fecha en formato ISO (incluye microsegundos)
+        """
+        return {
+            'id': self.id,
+            'codigo_articulo': self.codigo_articulo,
+            'tipo_movimiento': self.tipo_movimiento.value,
+            'cantidad': self.cantidad,
+            'motivo': self.motivo,
+            'usuario': self.usuario,
+            'fecha_hora': self.fecha_hora.isoformat(),
+            'costo_unitario': self.costo_unitario
         }
     
+    @classmethod
+    def desde_registro(cls, registro):
+        """
+        Reconstruye un movimiento a partir de un registro generado con a_registro()
+        
+        Args:
+            registro (dict): Registro del movimiento
+            
+        Returns:
+            MovimientoInventario: Movimiento con el mismo ID y fecha originales
+        """
+        return cls.reconstruir(
+            registro['id'],
+            registro['codigo_articulo'],
+            TipoMovimiento(registro['tipo_movimiento']),
+            registro['cantidad'],
+            registro['motivo'],
+            registro['usuario'],
+            datetime.fromisoformat(registro['fecha_hora']),
+            registro.get('costo_unitario')
+        )
+    
+    @classmethod
+    def crear_lote(cls, operaciones, tipo_movimiento, motivo_defecto, usuario):
+        """
+        Crea los movimientos de un lote todavía sin ID ni fecha
+        
+        El Inventario los sella al guardarlos (ver SecuenciadorMovimientos.sellar): todos
+        comparten la misma fecha y hora y sus IDs se reservan en un solo bloque.
+        
+        Args:
+            operaciones (list): Tuplas (código, cantidad), (código, cantidad, motivo) o
+                (código, cantidad, motivo, costo_unitario)
+            tipo_movimiento (TipoMovimiento): Tipo de todos los movimientos del lote
+            motivo_defecto (str): Motivo de las operaciones que no lo indican
+            usuario (str): Usuario que realiza el lote
+            
+        Returns:
+            list: Movimientos creados, en el mismo orden que las operaciones
+        """
+        reconstruir = cls.reconstruir
+        return [
+            reconstruir(
+                None,
+                operacion[0],
+                tipo_movimiento,
+                operacion[1],
+                operacion[2] if len(operacion) > 2 else motivo_defecto,
+                usuario,
+                None,
+                operacion[3] if len(operacion) > 3 else None
+            )
+            for operacion in operaciones
+        ]
+    
+    @classmethod
+    def reconstruir(cls, id_movimiento, codigo_articulo, tipo_movimiento, cantidad, motivo, usuario, fecha_hora,
+                    costo_unitario=None):
+        """
+        Crea un movimiento ya existente (guardado o archivado) sin generar un ID nuevo
+        
+        Args:
+            id_movimiento (str): ID original del movimiento
+            codigo_articulo (str): Código del artículo afectado
+            tipo_movimiento (TipoMovimiento): Tipo de movimiento
+            cantidad (float): Cantidad del movimiento
+            motivo (str): Motivo del movimiento
+            usuario (str): Usuario que realizó el movimiento
+            fecha_hora (datetime): Momento original del movimiento
+            costo_unitario (float): Costo de cada unidad o None
+            
+        Returns:
+            MovimientoInventario: Movimiento reconstruido
+        """
+        movimiento = cls.__new__(cls)
+        movimiento.id = id_movimiento
+        movimiento.codigo_articulo = codigo_articulo
+        movimiento.tipo_movimiento = tipo_movimiento
+        movimiento.cantidad = cantidad
+        movimiento.motivo = motivo
+        movimiento.usuario = usuario
+        movimiento.fecha_hora = fecha_hora
+        movimiento.costo_unitario = costo_unitario
+        return movimiento
+    
     def es_entrada(self):
         """
         Verifica si el movimiento es una entrada
@@ -0,0 +1,208 @@
+"""
+Salida por páginas para los listados de la consola (catálogo, movimientos, reportes)
+
+Las filas se formatean recién cuando se van a mostrar, así un listado de un millón de
+movimientos empieza al instante: en una terminal se muestra una página y se espera una
+orden (siguiente, anterior, ir a una página, filtrar o salir). Si la salida no es una
+terminal (redirigida a un archivo o a otro programa) se escribe todo de corrido, en bloques
+grandes en lugar de un print por fila.
+"""
+
+import shutil
+import sys
+from collections.abc import Sequence
+from itertools import islice
+
+LINEAS_POR_BLOQUE = 2000  # Líneas que se juntan en cada escritura cuando no hay terminal
+AYUDA = "Enter: siguiente | a: anterior | número: ir a página | /texto: filtrar | q: salir"
+
+class LineasListado:
+    def __init__(self, filas, formato, filtro=None, limite=None):
+        """
+        Líneas de un listado, formateadas a medida que se piden
+
+        Si las filas son una secuencia (lista, vista de movimientos) y no hay filtro, cada
+        página se formatea directamente desde su posición. Si no, se recorren una sola vez y
+        se guardan las líneas ya vistas para poder volver atrás.
+
+        Args:
+            filas (iterable): Filas a mostrar (artículos, movimientos, diccionarios...)
+            formato (callable): formato(fila) -> línea de texto
+            filtro (str): Si se indica, solo las líneas que lo contienen (sin importar mayúsculas)
+            limite (int): Máximo de líneas, o None para todas
+        """
+        self.formato = formato
+        self._directo = isinstance(filas, Sequence) and not filtro
+        if self._directo:
+            self.filas = filas
+            self._total = len(filas) if limite is None else min(len(filas), limite)
+            return
+        lineas = map(formato, filas)
+        if filtro:
+            filtro = filtro.lower()
+            lineas = (linea for linea in lineas if filtro in linea.lower())
+        self._pendientes = lineas if limite is None else islice(lineas, limite)
+        self._vistas = []
+        self._total = None
+
+    @property
+    def total(self):
+        """Número de líneas, o None si todavía no se recorrió todo"""
+        return self._total
+
+    def tramo(self, inicio, fin):
+        """
+        Retorna las líneas [inicio, fin)
+
+        Args:
+            inicio (int): Primera línea
+            fin (int): Línea siguiente a la última
+
+        Returns:
+            list: Líneas (menos de fin - inicio si el listado se termina antes)
+        """
+        if self._directo:
+            return [self.formato(fila) for fila in self.filas[inicio:min(fin, self._total)]]
+        faltan = fin - len(self._vistas)
+        if faltan > 0 and self._total is None:
+            self._vistas.extend(islice(self._pendientes, faltan))
+            if len(self._vistas) < fin:
+                self._total = len(self._vistas)
+        return self._vistas[inicio:fin]
+
+    def hay_desde(self, inicio):
+        """
+        Indica si hay alguna línea a partir de una posición
+
+        Args:
+            inicio (int): Posición
+
+        Returns:
+            bool: True si la línea inicio existe
+        """
+        return bool(self.tramo(inicio, inicio + 1))
+
+    def __iter__(self):
+        if self._directo:
+            filas = self.filas if self._total == len(self.filas) else self.filas[:self._total]
+            return map(self.formato, filas)
+        return self._recorrer()
+
+    def _recorrer(self):
+        yield from self._vistas
+        if self._total is None:
+            for linea in self._pendientes:
+                self._vistas.append(linea)
+                yield linea
+            self._total = len(self._vistas)
+
+class Paginador:
+    def __init__(self, salida=None, entrada=input, filas_por_pagina=None, limite_filas=None, interactivo=None):
+        """
+        Inicializa el paginador
+
+        Args:
+            salida: Archivo donde se escribe (por defecto la salida estándar)
+            entrada (callable): Función que lee las órdenes del usuario
+            filas_por_pagina (int): Filas por página (por defecto según el alto de la terminal)
+            limite_filas (int): Máximo de filas por listado, o None para todas
+            interactivo (bool): Si se muestra por páginas; por defecto solo si la entrada y
+                la salida son una terminal
+        """
+        self.salida = salida
+        self.entrada = entrada
+        self.filas_por_pagina = filas_por_pagina
+        self.limite_filas = limite_filas
+        self.interactivo = interactivo
+
+    def _salida(self):
+        return self.salida if self.salida is not None else sys.stdout
+
+    def _es_interactivo(self):
+        if self.interactivo is not None:
+            return self.interactivo
+        try:
+            return sys.stdin.isatty() and self._salida().isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def _filas_por_pagina(self, encabezado):
+        if self.filas_por_pagina:
+            return self.filas_por_pagina
+        # Alto de la terminal menos el encabezado, la línea de estado y la orden
+        return max(5, shutil.get_terminal_size().lines - len(encabezado) - 3)
+
+    def mostrar(self, filas, formato, encabezado=()):
+        """
+        Muestra un listado por páginas (o de corrido si no hay terminal)
+
+        Args:
+            filas (iterable): Filas a mostrar; si es una secuencia se puede saltar a cualquier página
+            formato (callable): formato(fila) -> línea de texto
+            encabezado (iterable): Líneas que se repiten arriba de cada página
+
+        Returns:
+            int: Filas mostradas (en modo por páginas, las de la última página vista)
+        """
+        encabezado = list(encabezado)
+        lineas = LineasListado(filas, formato, limite=self.limite_filas)
+        if not self._es_interactivo():
+            return self._volcar(lineas, encabezado)
+        return self._paginar(lineas, encabezado)
+
+    def _volcar(self, lineas, encabezado):
+        salida = self._salida()
+        if encabezado:
+            salida.write('\n'.join(encabezado) + '\n')
+        escritas = 0
+        iterador = iter(lineas)
+        while True:
+            bloque = list(islice(iterador, LINEAS_POR_BLOQUE))
+            if not bloque:
+                break
+            salida.write('\n'.join(bloque) + '\n')
+            escritas += len(bloque)
+        salida.flush()
+        return escritas
+
+    def _paginar(self, todas, encabezado):
+        salida = self._salida()
+        lineas = todas
+        por_pagina = self._filas_por_pagina(encabezado)
+        pagina = 0
+        filtro = None
+        while True:
+            inicio = pagina * por_pagina
+            tramo = lineas.tramo(inicio, inicio + por_pagina)
+            hay_mas = lineas.hay_desde(inicio + por_pagina)
+            titulo = encabezado + ([f"(filtro: '{filtro}')"] if filtro else [])
+            cuerpo = tramo if tramo else ["(sin filas)"]
+            salida.write('\n'.join(titulo + cuerpo) + '\n')
+            if pagina == 0 and not hay_mas and not filtro:
+                salida.flush()
+                return len(tramo)
+            total = lineas.total
+            paginas = f" de {max(1, -(-total // por_pagina))}" if total is not None else ""
+            salida.write(f"-- Página {pagina + 1}{paginas} -- {AYUDA}\n")
+            salida.flush()
+
+            orden = self.entrada("> ").strip()
+            if orden.lower() == 'q':
+                return len(tramo)
+            if orden.startswith('/'):
+                filtro = orden[1:].strip() or None
+                # Se filtra sobre las líneas ya vistas y las que faltan, sin volver a leer las filas
+                lineas = LineasListado(todas, str, filtro) if filtro else todas
+                pagina = 0
+            elif orden.lower() == 'a':
+                pagina = max(0, pagina - 1)
+            elif orden.isdigit():
+                pagina = max(0, int(orden) - 1)
+                if not lineas.hay_desde(pagina * por_pagina):
+                    # La página no existe: se va a la última (ya se sabe el total)
+                    pagina = max(0, (lineas.total - 1) // por_pagina)
+            elif orden == '':
+                if hay_mas:
+                    pagina += 1
+                else:
+                    return len(tramo)
@@ -0,0 +1,218 @@
+"""
+Modo de perfilado: dónde se va el tiempo (cProfile) y la memoria (tracemalloc) de cada operación
+
+Cada operación medida (una opción del menú, la generación de un PDF) deja en la carpeta de
+la sesión:
+
+- NNN_nombre.prof: perfil de CPU, para abrir con pstats o snakeviz
+- NNN_nombre.txt: las funciones más costosas (tiempo propio y acumulado) y las líneas que
+  más memoria dejaron reservada, con el pico de memoria de la operación
+
+y resumen.txt, que se reescribe después de cada operación (así queda aunque el programa se
+corte): las operaciones de la sesión con su duración y pico de memoria, y las funciones más
+costosas de toda la sesión.
+
+Un PDF generado desde una opción del menú se mide por separado y su perfil se suma también
+al de la opción. Los reportes por artículo en paralelo se generan en otros procesos, que no
+se perfilan (solo se ve la espera).
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+import tracemalloc
+from datetime import datetime
+
+FUNCIONES_RESUMEN = 25  # Funciones que se listan en cada resumen
+LINEAS_MEMORIA = 15  # Líneas de código con más memoria reservada que se listan
+PROFUNDIDAD_PILA = 1  # Cuadros de pila que guarda tracemalloc por reserva (más es más lento)
+
+class OperacionPerfilada:
+    __slots__ = ('numero', 'nombre', 'perfil', 'instantanea', 'inicio', 'segundos', 'pico', 'hijas')
+
+    def __init__(self, numero, nombre):
+        self.numero = numero
+        self.nombre = nombre
+        self.perfil = cProfile.Profile()
+        self.instantanea = None
+        self.inicio = None
+        self.segundos = None
+        self.pico = 0  # Bytes
+        self.hijas = []  # Perfiles de las operaciones medidas dentro de esta
+
+class Perfilador:
+    def __init__(self, directorio=None, funciones=FUNCIONES_RESUMEN):
+        """
+        Inicializa una sesión de perfilado
+
+        Args:
+            directorio (str): Carpeta donde se dejan los perfiles (por defecto
+                perfiles/AAAAMMDD_HHMMSS)
+            funciones (int): Funciones que se listan en los resúmenes
+        """
+        self.directorio = directorio or os.path.join('perfiles', datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.funciones = funciones
+        self.operaciones = []  # (número, nombre, segundos, pico en bytes, archivo .prof)
+        self._activas = []  # Pila de OperacionPerfilada en curso
+        self._total = pstats.Stats(stream=io.StringIO())  # Toda la sesión
+        self._numero = 0
+        os.makedirs(self.directorio, exist_ok=True)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(PROFUNDIDAD_PILA)
+
+    def medir(self, funcion, nombre):
+        """
+        Ejecuta una función midiendo su CPU y su memoria
+
+        Args:
+            funcion (callable): Función sin argumentos
+            nombre (str): Nombre de la operación (se usa en los archivos)
+
+        Returns:
+            Lo que retorne la función (las excepciones se propagan, con el perfil ya guardado)
+        """
+        operacion = self._empezar(nombre)
+        try:
+            return funcion()
+        finally:
+            self._terminar(operacion)
+
+    def envolver(self, objeto, metodos, prefijo=''):
+        """
+        Reemplaza métodos de un objeto por versiones medidas (solo en ese objeto)
+
+        Args:
+            objeto: Instancia cuyos métodos se miden (por ejemplo un GeneradorReportePDF)
+            metodos (iterable): Nombres de los métodos
+            prefijo (str): Se antepone al nombre de la operación
+        """
+        for metodo in metodos:
+            original = getattr(objeto, metodo)
+
+            def medido(*args, _original=original, _nombre=prefijo + metodo, **kwargs):
+                return self.medir(lambda: _original(*args, **kwargs), _nombre)
+
+            setattr(objeto, metodo, medido)
+
+    def _empezar(self, nombre):
+        # cProfile admite un solo perfil activo: el de la operación que contiene a esta se
+        # pausa y al terminar se le suma el de esta
+        if self._activas:
+            contenedora = self._activas[-1]
+            contenedora.perfil.disable()
+            contenedora.pico = max(contenedora.pico, tracemalloc.get_traced_memory()[1])
+        self._numero += 1
+        operacion = OperacionPerfilada(self._numero, nombre)
+        self._activas.append(operacion)
+        if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+; antes el pico es el de toda la sesión
+            tracemalloc.reset_peak()
+        operacion.instantanea = tracemalloc.take_snapshot()
+        operacion.inicio = time.perf_counter()
+        operacion.perfil.enable()
+        return operacion
+
+    def _terminar(self, operacion):
+        operacion.perfil.disable()
+        operacion.segundos = time.perf_counter() - operacion.inicio
+        operacion.pico = max(operacion.pico, tracemalloc.get_traced_memory()[1])
+        despues = tracemalloc.take_snapshot()
+        self._activas.pop()
+
+        estadisticas = self._estadisticas(operacion.perfil)
+        for hija in operacion.hijas:
+            estadisticas.add(hija)
+        base = os.path.join(self.directorio, f"{operacion.numero:03d}_{self._archivo(operacion.nombre)}")
+        estadisticas.dump_stats(base + '.prof')
+        with open(base + '.txt', 'w', encoding='utf-8') as archivo:
+            archivo.write(self._informe(operacion, estadisticas, despues))
+
+        if self._activas:
+            contenedora = self._activas[-1]
+            contenedora.hijas.append(estadisticas)
+            contenedora.pico = max(contenedora.pico, operacion.pico)
+            contenedora.perfil.enable()
+        else:
+            # Solo las operaciones de primer nivel se suman al total (las de adentro ya
+            # están incluidas en ellas)
+            self._total.add(estadisticas)
+        self.operaciones.append((operacion.numero, operacion.nombre, operacion.segundos, operacion.pico,
+                                 base + '.prof'))
+        self.escribir_resumen()
+
+    @staticmethod
+    def _archivo(nombre):
+        return re.sub(r'[^A-Za-z0-9_.-]+', '_', nombre).strip('_') or 'operacion'
+
+    @staticmethod
+    def _estadisticas(perfil):
+        try:
+            return pstats.Stats(perfil, stream=io.StringIO())
+        except TypeError:
+            # Un perfil sin llamadas registradas no se puede cargar: se usa uno vacío
+            return pstats.Stats(stream=io.StringIO())
+
+    def _funciones(self, estadisticas, orden):
+        salida = io.StringIO()
+        estadisticas.stream = salida
+        estadisticas.sort_stats(orden).print_stats(self.funciones)
+        # Se omite el encabezado de pstats (hasta la línea "Ordered by")
+        texto = salida.getvalue()
+        posicion = texto.find('Ordered by')
+        return texto[posicion:] if posicion >= 0 else texto
+
+    def _informe(self, operacion, estadisticas, despues):
+        lineas = [
+            f"Operación: {operacion.nombre}",
+            f"Duración: {operacion.segundos:.3f} s",
+            f"Pico de memoria (Python): {operacion.pico / 1048576:.1f} MB",
+            "",
+            "=== Funciones con más tiempo propio (tottime) ===",
+            self._funciones(estadisticas, 'tottime'),
+            "=== Funciones con más tiempo acumulado (cumtime) ===",
+            self._funciones(estadisticas, 'cumulative'),
+            "=== Líneas con más memoria reservada al terminar (diferencia con el comienzo) ===",
+        ]
+        # No se cuentan las reservas del propio perfilado (instantáneas, informes)
+        propias = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, pstats.__file__),
+                   tracemalloc.Filter(False, __file__)]
+        diferencias = despues.filter_traces(propias).compare_to(operacion.instantanea.filter_traces(propias), 'lineno')
+        diferencias = [d for d in diferencias if d.size_diff or d.count_diff][:LINEAS_MEMORIA]
+        if not diferencias:
+            lineas.append("(sin cambios)")
+        for diferencia in diferencias:
+            cuadro = diferencia.traceback[0]
+            lineas.append(f"{diferencia.size_diff / 1024:>+12.1f} KiB {diferencia.count_diff:>+10} bloques  "
+                          f"{cuadro.filename}:{cuadro.lineno}")
+        return '\n'.join(lineas) + '\n'
+
+    def escribir_resumen(self):
+        """
+        Escribe resumen.txt con todas las operaciones de la sesión y las funciones más costosas
+        """
+        lineas = [
+            f"Sesión de perfilado: {os.path.abspath(self.directorio)}",
+            "",
+            f"{'N°':>4} {'Operación':<45} {'Segundos':>10} {'Pico MB':>9}",
+            "-" * 71,
+        ]
+        for numero, nombre, segundos, pico, _ in sorted(self.operaciones):
+            lineas.append(f"{numero:>4} {nombre[:45]:<45} {segundos:>10.3f} {pico / 1048576:>9.1f}")
+        if self._total.stats:
+            lineas += ["", "=== Toda la sesión: funciones con más tiempo propio (tottime) ===",
+                       self._funciones(self._total, 'tottime'),
+                       "=== Toda la sesión: funciones con más tiempo acumulado (cumtime) ===",
+                       self._funciones(self._total, 'cumulative')]
+        temporal = os.path.join(self.directorio, 'resumen.txt.tmp')
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            archivo.write('\n'.join(lineas) + '\n')
+        os.replace(temporal, os.path.join(self.directorio, 'resumen.txt'))
+
+    def cerrar(self):
+        """
+        Escribe el resumen final y deja de seguir la memoria
+        """
+        self.escribir_resumen()
+        tracemalloc.stop()
@@ -0,0 +1,714 @@
+"""
+Persistencia del inventario en disco: diario de movimientos, instantáneas y archivo
+
+El diario es un archivo JSON Lines al que solo se agregan registros (artículos nuevos,
+movimientos y puntos de reposición). Las escrituras se agrupan y se sincronizan con fsync
+por lotes (group commit) para no pagar un fsync por operación.
+
+Cada cierto número de registros se toma una instantánea incremental, en dos pasos:
+- Con el inventario detenido (ver Inventario._tomar_instantanea) se copian solo los
+  artículos que cambiaron desde la anterior y se rota el diario: se cierra el tramo actual
+  (diario-N.jsonl) y se sigue escribiendo en uno nuevo. Cuesta O(artículos cambiados).
+- Después, ya sin frenar las operaciones, los cambios se escriben como un catálogo binario
+  chico (cambios-G.bin) con su valoración y puntos de reposición (cambios-G.json), se
+  reemplaza instantanea.json y los movimientos del tramo cerrado pasan al archivo de
+  movimientos (archivo_movimientos.py) con el saldo que dejó cada uno; el tramo se borra.
+  Cuando los cambios acumulados pesan una fracción del catálogo se consolidan en un
+  catálogo base nuevo, leyendo solo los archivos.
+
+Al arrancar se abre el catálogo base con mmap (ver catalogo_binario.py), se le aplican los
+cambios, el historial se vuelve a cargar desde el archivo y solo se reproduce el diario
+posterior a la última instantánea. El historial nunca queda solo en el diario, así que
+reiniciar no lo pierde.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+
+from archivo_movimientos import ArchivoMovimientos
+from articulo import Articulo
+from almacenamiento import variacion_movimiento
+from catalogo_binario import (CatalogoMapeado, codificar_articulo, escribir_catalogo, escribir_filas,
+                              fusionar_catalogos, leer_articulos)
+from movimiento_inventario import MovimientoInventario, TipoMovimiento
+from valoracion import RESIDUO
+
+class DiarioMovimientos:
+    def __init__(self, ruta, tamano_grupo=64, intervalo_sincronizacion=0.05):
+        """
+        Abre (o crea) el diario en modo solo-agregar
+
+        Args:
+            ruta (str): Ruta del archivo del diario
+            tamano_grupo (int): Registros pendientes que fuerzan un fsync inmediato
+            intervalo_sincronizacion (float): Segundos máximos que un registro espera su fsync
+        """
+        self.ruta = ruta
+        self.tamano_grupo = tamano_grupo
+        self.intervalo_sincronizacion = intervalo_sincronizacion
+        self.pendientes = 0
+        self._candado = threading.Lock()
+        self._cerrado = threading.Event()
+        self._archivo = open(ruta, 'ab')
+
+        # Hilo que sincroniza los registros rezagados cuando no se completa un grupo
+        self._hilo = threading.Thread(target=self._sincronizar_periodicamente, daemon=True)
+        self._hilo.start()
+
+    def agregar(self, registro):
+        """
+        Agrega un registro al final del diario
+
+        Args:
+            registro (dict): Registro serializable en JSON
+        """
+        linea = (json.dumps(registro, ensure_ascii=False) + '\n').encode('utf-8')
+        with self._candado:
+            self._archivo.write(linea)
+            self.pendientes += 1
+            if self.pendientes >= self.tamano_grupo:
+                self._sincronizar()
+
+    def sincronizar(self):
+        """
+        Fuerza que todo lo escrito quede en disco
+        """
+        with self._candado:
+            self._sincronizar()
+
+    def rotar(self, ruta):
+        """
+        Sincroniza y cierra el archivo actual y sigue escribiendo en otro
+
+        Args:
+            ruta (str): Ruta del archivo nuevo del diario
+        """
+        with self._candado:
+            self._sincronizar()
+            self._archivo.close()
+            self._archivo = open(ruta, 'ab')
+            self.ruta = ruta
+
+    def _sincronizar(self):
+        if self.pendientes == 0:
+            return
+        self._archivo.flush()
+        os.fsync(self._archivo.fileno())
+        self.pendientes = 0
+
+    def _sincronizar_periodicamente(self):
+        while not self._cerrado.wait(self.intervalo_sincronizacion):
+            with self._candado:
+                if self._archivo.closed:
+                    return
+                self._sincronizar()
+
+    def cerrar(self):
+        """
+        Sincroniza lo pendiente y cierra el diario
+        """
+        self._cerrado.set()
+        with self._candado:
+            self._sincronizar()
+            self._archivo.close()
+
+    @staticmethod
+    def leer(ruta, posicion=0):
+        """
+        Recorre los registros del diario a partir de una posición
+
+        Si el último registro quedó incompleto (caída a mitad de escritura) se descarta
+        y se recorta el archivo para que las siguientes escrituras queden bien alineadas.
+
+        Args:
+            ruta (str): Ruta del archivo del diario
+            posicion (int): Posición en bytes desde la que se empieza a leer
+
+        Yields:
+            dict: Cada registro del diario
+        """
+        if not os.path.exists(ruta):
+            return
+
+        with open(ruta, 'rb') as archivo:
+            archivo.seek(posicion)
+            while True:
+                inicio = archivo.tell()
+                linea = archivo.readline()
+                if not linea:
+                    return
+                if not linea.endswith(b'\n'):
+                    break
+                yield json.loads(linea)
+
+        with open(ruta, 'r+b') as archivo:
+            archivo.truncate(inicio)
+
+    @staticmethod
+    def movimientos(registro):
+        """
+        Movimientos de un registro del diario
+
+        Args:
+            registro (dict): Registro leído con leer
+
+        Returns:
+            list: MovimientoInventario del registro (vacía si no es de movimientos)
+        """
+        if registro['tipo'] == 'movimiento':
+            return [MovimientoInventario.desde_registro(registro['movimiento'])]
+        if registro['tipo'] != 'lote':
+            return []
+        movimientos = []
+        fecha_anterior = fecha_hora = None
+        for fila in registro['movimientos']:
+            id_movimiento, codigo, tipo, cantidad, motivo, usuario, fecha_iso = fila[:7]
+            if fecha_iso != fecha_anterior:
+                fecha_anterior = fecha_iso
+                fecha_hora = datetime.fromisoformat(fecha_iso)
+            movimientos.append(MovimientoInventario.reconstruir(
+                id_movimiento, codigo, TipoMovimiento(tipo), cantidad, motivo, usuario, fecha_hora,
+                fila[7] if len(fila) > 7 else None  # Los diarios antiguos no tienen costo
+            ))
+        return movimientos
+
+class PersistenciaInventario:
+    VERSION = 2
+    ARCHIVO_INSTANTANEA = "instantanea.json"
+    ARCHIVO_DIARIO = "diario-{numero:06d}.jsonl"
+    ARCHIVO_CATALOGO = "catalogo-{generacion}.bin"
+    ARCHIVO_VALORACION = "valoracion-{generacion}.json"
+    ARCHIVO_REPOSICION = "reposicion-{generacion}.json"
+    ARCHIVO_CAMBIOS = "cambios-{generacion}.bin"
+    ARCHIVO_CAMBIOS_DATOS = "cambios-{generacion}.json"
+    ARCHIVO_DIARIO_ANTIGUO = "diario.jsonl"  # Versiones anteriores: un solo diario
+    CARPETA_ARCHIVO = "archivo"
+
+    def __init__(self, directorio, registros_por_instantanea=1000, tamano_grupo=64,
+                 intervalo_sincronizacion=0.05, fraccion_consolidacion=0.5, cambios_maximos=64):
+        """
+        Inicializa la persistencia en un directorio de datos
+
+        Args:
+            directorio (str): Carpeta donde se guardan el diario y las instantáneas
+            registros_por_instantanea (int): Registros del diario entre dos instantáneas
+            tamano_grupo (int): Registros por grupo de fsync del diario
+            intervalo_sincronizacion (float): Segundos máximos hasta el fsync de un registro
+            fraccion_consolidacion (float): Los cambios se consolidan en un catálogo base nuevo
+                cuando suman más artículos que esta fracción del catálogo base
+            cambios_maximos (int): Instantáneas con cambios que se acumulan como mucho sobre la base
+        """
+        os.makedirs(directorio, exist_ok=True)
+        self.directorio = directorio
+        self.ruta_instantanea = os.path.join(directorio, self.ARCHIVO_INSTANTANEA)
+        self.registros_por_instantanea = registros_por_instantanea
+        self.tamano_grupo = tamano_grupo
+        self.intervalo_sincronizacion = intervalo_sincronizacion
+        self.fraccion_consolidacion = fraccion_consolidacion
+        self.cambios_maximos = cambios_maximos
+        self.registros_desde_instantanea = 0
+        self.generacion = 0  # Número de la última instantánea (nombra sus archivos)
+        self.base = None  # Generación del catálogo base, o None si todavía no hay
+        self.articulos_base = 0
+        self.cambios = []  # Generaciones cuyos cambios se aplican sobre la base, en orden
+        self.filas_cambios = 0  # Artículos en esos cambios
+        self.primer_diario = 1  # Primer tramo del diario posterior a la última instantánea
+        self.diario_actual = 1  # Tramo en el que se escribe
+        self.historial_desde = None  # Desde cuándo está completo el historial (None: desde el principio)
+        self.diario = None
+        self.inventario = None
+        self.archivo = None
+        self._cambiados = set()  # Códigos de los artículos que cambiaron desde la última instantánea
+        self._puntos = {}  # Código -> punto de reposición cambiado desde la última instantánea
+
+    def _ruta(self, plantilla, generacion):
+        return os.path.join(self.directorio, plantilla.format(generacion=generacion))
+
+    def _ruta_diario(self, numero):
+        return os.path.join(self.directorio, self.ARCHIVO_DIARIO.format(numero=numero))
+
+    def _tramos_diario(self):
+        numeros = []
+        for nombre in os.listdir(self.directorio):
+            if nombre.startswith('diario-') and nombre.endswith('.jsonl'):
+                numeros.append(int(nombre[len('diario-'):-len('.jsonl')]))
+        return sorted(numeros)
+
+    def cargar(self, inventario):
+        """
+        Reconstruye el inventario: catálogo, valoración y puntos de reposición de la última
+        instantánea, el historial desde el archivo de movimientos y el diario posterior
+
+        Si el inventario no tiene archivo de movimientos se usa uno en la carpeta de datos.
+
+        Args:
+            inventario (Inventario): Inventario vacío a reconstruir
+        """
+        if inventario.archivo is None:
+            inventario.archivo = ArchivoMovimientos(os.path.join(self.directorio, self.CARPETA_ARCHIVO))
+        self.archivo = inventario.archivo
+        instantanea = self._leer_json(self.ruta_instantanea) if os.path.exists(self.ruta_instantanea) else None
+        if instantanea is not None and instantanea.get('version') != self.VERSION:
+            self._migrar(inventario, instantanea)
+            return
+        if instantanea is None and os.path.exists(os.path.join(self.directorio, self.ARCHIVO_DIARIO_ANTIGUO)):
+            self._migrar(inventario, None)
+            return
+
+        if instantanea is not None:
+            self._abrir_instantanea(inventario, instantanea)
+        else:
+            inventario.valoracion.restaurar(None, ())
+        self._borrar_sobrantes()
+        # Tramos ya cerrados por la última instantánea que no llegaron al archivo (caída
+        # antes de pasarlos): el stock cargado es el de esa instantánea
+        self._archivar_tramos([n for n in self._tramos_diario() if n < self.primer_diario],
+                              lambda codigo: inventario.obtener_articulo(codigo).cantidad)
+        if hasattr(inventario.almacen, 'cargar_historial'):
+            # El historial que salió del diario, salvo lo anterior al corte de la compactación
+            inventario.almacen.cargar_historial(self.archivo.recorrer_historial(self.archivo.corte))
+
+        tramos = [n for n in self._tramos_diario() if n >= self.primer_diario]
+        for numero in tramos:
+            self._reproducir(inventario, self._ruta_diario(numero))
+        self.diario_actual = tramos[-1] if tramos else self.primer_diario
+        self._abrir_diario(inventario)
+
+    def _abrir_diario(self, inventario):
+        self.inventario = inventario
+        self.diario = DiarioMovimientos(self._ruta_diario(self.diario_actual), self.tamano_grupo,
+                                        self.intervalo_sincronizacion)
+
+    def _abrir_instantanea(self, inventario, instantanea):
+        self.generacion = instantanea['generacion']
+        self.base = instantanea['base']
+        self.articulos_base = instantanea['articulos_base']
+        self.cambios = instantanea['cambios']
+        self.filas_cambios = instantanea['filas_cambios']
+        self.primer_diario = instantanea['diario']
+        if instantanea['historial_desde'] is not None:
+            self.historial_desde = datetime.fromisoformat(instantanea['historial_desde'])
+
+        if self.base is not None:
+            self._abrir_catalogo(inventario, self._ruta(self.ARCHIVO_CATALOGO, self.base))
+        almacen = inventario.almacen
+        for generacion in self.cambios:
+            for articulo in leer_articulos(self._ruta(self.ARCHIVO_CAMBIOS, generacion)):
+                actual = almacen.obtener_articulo(articulo.codigo)
+                if actual is None:
+                    inventario._alta_articulo(articulo)
+                else:
+                    actual.cantidad = articulo.cantidad
+        datos = [self._leer_json(self._ruta(self.ARCHIVO_CAMBIOS_DATOS, g)) for g in self.cambios]
+        # La valoración sigue desde la instantánea; el diario posterior la actualiza al
+        # reproducirse. Se lee recién cuando se consulta: con muchos artículos es lo más
+        # lento de cargar
+        base = self.base
+        inventario.valoracion.restaurar_diferido(lambda: self._leer_valoracion(base, datos))
+        inventario.reposicion.restaurar(self._leer_reposicion(base, datos), inventario.obtener_articulo)
+
+    def _abrir_catalogo(self, inventario, ruta):
+        if hasattr(inventario.almacen, 'cargar_catalogo'):
+            inventario.almacen.cargar_catalogo(CatalogoMapeado(ruta))
+        else:
+            for articulo in leer_articulos(ruta):
+                inventario._alta_articulo(articulo)
+
+    def _leer_valoracion(self, base, datos):
+        """
+        Valoración de una instantánea: la del catálogo base más la de los artículos cambiados
+
+        Args:
+            base (int): Generación del catálogo base, o None
+            datos (list): Contenido de los cambios-G.json, en orden
+        """
+        if base is not None:
+            registro = self._leer_json(self._ruta(self.ARCHIVO_VALORACION, base))
+        else:
+            registro = {'articulos': {}, 'costo_ventas_dia': {}, 'costo_ventas_mes': {}}
+        for cambios in datos:
+            valoracion = cambios['valoracion']
+            registro['articulos'].update(valoracion['articulos'])
+            registro['costo_ventas_dia'] = valoracion['costo_ventas_dia']
+            registro['costo_ventas_mes'] = valoracion['costo_ventas_mes']
+        return registro
+
+    def _leer_reposicion(self, base, datos):
+        puntos = self._leer_json(self._ruta(self.ARCHIVO_REPOSICION, base)) if base is not None else {}
+        for cambios in datos:
+            for codigo, punto in cambios['reposicion'].items():
+                if punto is None:
+                    puntos.pop(codigo, None)
+                else:
+                    puntos[codigo] = punto
+        return puntos
+
+    def _borrar_sobrantes(self):
+        # Archivos de instantáneas anteriores que quedaron por una caída antes de borrarlos
+        actuales = set()
+        if self.base is not None:
+            actuales.update((self.ARCHIVO_CATALOGO.format(generacion=self.base),
+                             self.ARCHIVO_VALORACION.format(generacion=self.base),
+                             self.ARCHIVO_REPOSICION.format(generacion=self.base)))
+        for generacion in self.cambios:
+            actuales.update((self.ARCHIVO_CAMBIOS.format(generacion=generacion),
+                             self.ARCHIVO_CAMBIOS_DATOS.format(generacion=generacion)))
+        for nombre in os.listdir(self.directorio):
+            if nombre.startswith(('catalogo-', 'valoracion-', 'reposicion-', 'cambios-')) and nombre not in actuales:
+                self._borrar(os.path.join(self.directorio, nombre))
+
+    def _reproducir(self, inventario, ruta):
+        """
+        Aplica al inventario los registros de un tramo del diario
+
+        Args:
+            inventario (Inventario): Inventario que se está reconstruyendo (sin persistencia asignada)
+            ruta (str): Archivo del tramo
+        """
+        for registro in DiarioMovimientos.leer(ruta):
+            if registro['tipo'] == 'articulo':
+                if not inventario.almacen.contiene_articulo(registro['codigo']):
+                    inventario._alta_articulo(Articulo(
+                        registro['codigo'],
+                        registro['nombre'],
+                        registro['descripcion'],
+                        registro['unidad_medida']
+                    ))
+                self._cambiados.add(registro['codigo'])
+                self.registros_desde_instantanea += 1
+            elif registro['tipo'] == 'reposicion':
+                articulo = inventario.obtener_articulo(registro['codigo'])
+                if articulo is not None:
+                    inventario.reposicion.establecer(articulo, registro['punto'])
+                    self._puntos[registro['codigo']] = registro['punto']
+                self.registros_desde_instantanea += 1
+            else:
+                for movimiento in DiarioMovimientos.movimientos(registro):
+                    inventario._aplicar_movimiento(movimiento)
+                    self._cambiados.add(movimiento.codigo_articulo)
+                    self.registros_desde_instantanea += 1
+
+    def _archivar_tramos(self, numeros, stock):
+        """
+        Pasa al archivo de movimientos los tramos del diario cerrados por una instantánea
+        y los borra
+
+        Args:
+            numeros (list): Tramos en orden, todos anteriores a la instantánea
+            stock (callable): Código -> stock en la instantánea; los saldos de cada
+                movimiento se calculan hacia atrás desde ahí
+        """
+        pendientes = [numero for numero in numeros if not self.archivo.contiene_diario(numero)]
+        tramos = []
+        for numero in pendientes:
+            movimientos = []
+            for registro in DiarioMovimientos.leer(self._ruta_diario(numero)):
+                movimientos.extend(DiarioMovimientos.movimientos(registro))
+            tramos.append(movimientos)
+
+        saldos_tramos = []
+        actuales = {}  # Código -> stock después del movimiento que se está mirando
+        for movimientos in reversed(tramos):
+            saldos = [0.0] * len(movimientos)
+            for posicion in range(len(movimientos) - 1, -1, -1):
+                movimiento = movimientos[posicion]
+                saldo = actuales.get(movimiento.codigo_articulo)
+                if saldo is None:
+                    saldo = stock(movimiento.codigo_articulo)
+                saldos[posicion] = saldo
+                actuales[movimiento.codigo_articulo] = saldo - variacion_movimiento(movimiento)
+            saldos_tramos.append(saldos)
+        saldos_tramos.reverse()
+
+        for numero, movimientos, saldos in zip(pendientes, tramos, saldos_tramos):
+            self.archivo.archivar(zip(movimientos, saldos), diario=numero)
+        for numero in numeros:
+            self._borrar(self._ruta_diario(numero))
+
+    def _migrar(self, inventario, instantanea):
+        """
+        Pasa los datos de versiones anteriores (un solo diario e instantáneas con todo el
+        stock) al formato actual
+
+        El diario antiguo tiene todo lo ocurrido desde el principio, así que se reproduce
+        completo para recuperar el historial. Si faltara, se parte de la instantánea y el
+        historial anterior a ella queda perdido (ver historial_desde).
+        """
+        ruta_antigua = os.path.join(self.directorio, self.ARCHIVO_DIARIO_ANTIGUO)
+        almacen = inventario.almacen
+        if os.path.exists(ruta_antigua):
+            inventario.valoracion.restaurar(None, ())
+            self._reproducir(inventario, ruta_antigua)
+        else:
+            self._abrir_instantanea_antigua(inventario, instantanea)
+            self.historial_desde = datetime.fromisoformat(instantanea['fecha'])
+
+        if hasattr(almacen, 'cargar_historial'):
+            corte = self.archivo.corte
+            inicio = almacen.posiciones_entre(desde=corte)[0] if corte is not None else 0
+            if inicio:
+                # Lo anterior al corte ya lo había archivado la compactación
+                inventario.resumen.construir(almacen)
+                almacen.descartar_movimientos(inicio)
+                inventario._descartados += inicio
+            self.archivo.archivar(almacen.movimientos_con_saldo(almacen.contar_movimientos()))
+
+        # El estado completo queda como catálogo base de la primera instantánea nueva
+        generacion = (instantanea or {}).get('generacion', 0) + 1
+        articulos = getattr(almacen, 'articulos', None)
+        if not isinstance(articulos, CatalogoMapeado):
+            articulos = inventario.iterar_articulos()
+        with open(self._ruta(self.ARCHIVO_CATALOGO, generacion), 'wb') as archivo:
+            self.articulos_base = escribir_catalogo(archivo, articulos)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        self._escribir_json(self._ruta(self.ARCHIVO_VALORACION, generacion), inventario.valoracion.a_registro())
+        self._escribir_json(self._ruta(self.ARCHIVO_REPOSICION, generacion), inventario.reposicion.a_registro())
+        self.generacion = self.base = generacion
+        self.cambios, self.filas_cambios = [], 0
+        self.primer_diario = self.diario_actual = 1
+        self._guardar_instantanea(generacion, self.primer_diario)
+        self._borrar(ruta_antigua)
+        self._borrar_sobrantes()
+        self._cambiados.clear()
+        self._puntos.clear()
+        self.registros_desde_instantanea = 0
+        self._abrir_diario(inventario)
+
+    def _abrir_instantanea_antigua(self, inventario, instantanea):
+        if 'catalogo' in instantanea:
+            self._abrir_catalogo(inventario, os.path.join(self.directorio, instantanea['catalogo']))
+        else:
+            # Instantánea con los artículos dentro del JSON
+            for codigo, nombre, descripcion, unidad_medida, cantidad in instantanea['articulos']:
+                inventario._alta_articulo(Articulo(codigo, nombre, descripcion, unidad_medida))
+                inventario.obtener_articulo(codigo).actualizar_cantidad(cantidad)
+        if 'archivo_valoracion' in instantanea:
+            registro = self._leer_json(os.path.join(self.directorio, instantanea['archivo_valoracion']))
+            inventario.valoracion.restaurar(registro, ())
+        else:
+            inventario.valoracion.restaurar(instantanea.get('valoracion'), inventario.iterar_articulos())
+        inventario.reposicion.restaurar(instantanea.get('reposicion'), inventario.obtener_articulo)
+
+    @staticmethod
+    def _leer_json(ruta):
+        with open(ruta, 'r', encoding='utf-8') as archivo:
+            return json.load(archivo)
+
+    @staticmethod
+    def _escribir_json(ruta, datos):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            json.dump(datos, archivo, ensure_ascii=False)
+            archivo.flush()
+            os.fsync(archivo.fileno())
+
+    @staticmethod
+    def _borrar(ruta):
+        try:
+            os.remove(ruta)
+        except OSError:
+            pass  # No existe, o en Windows está mapeado: se borra al arrancar
+
+    def registrar_articulo(self, articulo):
+        """
+        Agrega el alta de un artículo al diario
+
+        Args:
+            articulo (Articulo): Artículo recién creado
+        """
+        self._cambiados.add(articulo.codigo)
+        self._agregar({
+            'tipo': 'articulo',
+            'codigo': articulo.codigo,
+            'nombre': articulo.nombre,
+            'descripcion': articulo.descripcion,
+            'unidad_medida': articulo.unidad_medida
+        })
+
+    def registrar_punto_reposicion(self, codigo, punto):
+        """
+        Agrega al diario el cambio del punto de reposición de un artículo
+
+        Args:
+            codigo (str): Código del artículo
+            punto (float): Nuevo punto, o None si se quitó
+        """
+        self._puntos[codigo] = punto
+        self._agregar({'tipo': 'reposicion', 'codigo': codigo, 'punto': punto})
+
+    def registrar_movimiento(self, movimiento):
+        """
+        Agrega un movimiento al diario
+
+        Args:
+            movimiento (MovimientoInventario): Movimiento ya aplicado al stock
+        """
+        self._cambiados.add(movimiento.codigo_articulo)
+        self._agregar({'tipo': 'movimiento', 'movimiento': movimiento.a_registro()})
+
+    def registrar_lote(self, movimientos):
+        """
+        Agrega un lote de movimientos al diario como un único registro
+
+        Al ser una sola línea, tras una caída el lote queda completo o no queda.
+
+        Args:
+            movimientos (list): Movimientos del lote, ya aplicados al stock
+        """
+        filas = []
+        fecha_anterior = fecha_iso = None
+        cambiados = self._cambiados
+        for m in movimientos:
+            # En los lotes normales todos comparten la fecha: se convierte una sola vez
+            if m.fecha_hora is not fecha_anterior:
+                fecha_anterior = m.fecha_hora
+                fecha_iso = fecha_anterior.isoformat()
+            filas.append([m.id, m.codigo_articulo, m.tipo_movimiento.value, m.cantidad, m.motivo, m.usuario, fecha_iso,
+                          m.costo_unitario])
+            cambiados.add(m.codigo_articulo)
+        self.diario.agregar({'tipo': 'lote', 'movimientos': filas})
+        self.registros_desde_instantanea += len(movimientos)
+
+    def _agregar(self, registro):
+        self.diario.agregar(registro)
+        self.registros_desde_instantanea += 1
+
+    def instantanea_pendiente(self):
+        """
+        Indica si ya corresponde tomar una nueva instantánea
+
+        La toma el Inventario (ver Inventario._tomar_instantanea_si_corresponde) cuando no
+        hay operaciones a medias, para que el stock guardado coincida con el corte del diario.
+
+        Returns:
+            bool: True si se superó el número de registros entre instantáneas
+        """
+        return self.registros_desde_instantanea >= self.registros_por_instantanea
+
+    def capturar(self):
+        """
+        Copia lo que cambió desde la instantánea anterior y rota el diario
+
+        Se llama con el inventario detenido (ver Inventario._tomar_instantanea) y cuesta
+        O(artículos cambiados): la escritura en disco queda para escribir_instantanea, que
+        ya no frena las operaciones.
+
+        Returns:
+            dict: Captura para escribir_instantanea
+        """
+        codigos = list(self._cambiados)
+        self._cambiados = set()
+        puntos, self._puntos = self._puntos, {}
+        obtener_articulo = self.inventario.almacen.obtener_articulo
+        filas = [codificar_articulo(obtener_articulo(codigo)) for codigo in codigos]
+        tramos = list(range(self.primer_diario, self.diario_actual + 1))
+        self.diario_actual += 1
+        self.primer_diario = self.diario_actual
+        self.diario.rotar(self._ruta_diario(self.diario_actual))
+        self.generacion += 1
+        self.registros_desde_instantanea = 0
+        return {
+            'generacion': self.generacion,
+            'diario': self.primer_diario,
+            'filas': filas,
+            'stock': {codigo: fila[4] for codigo, fila in zip(codigos, filas)},
+            'valoracion': self.inventario.valoracion.a_registro(codigos),
+            'reposicion': puntos,
+            'tramos': tramos
+        }
+
+    def escribir_instantanea(self, captura):
+        """
+        Escribe en disco una instantánea tomada con capturar (sin candados del inventario)
+
+        Primero van los archivos de cambios, después instantanea.json (se reemplaza de forma
+        atómica: una caída antes deja la anterior, que reproduce también el tramo cerrado) y
+        por último los tramos cerrados del diario pasan al archivo de movimientos. Cada
+        tanto los cambios acumulados se consolidan en un catálogo base nuevo.
+
+        Args:
+            captura (dict): Resultado de capturar (de a una y en el orden en que se tomaron)
+        """
+        generacion = captura['generacion']
+        with open(self._ruta(self.ARCHIVO_CAMBIOS, generacion), 'wb') as archivo:
+            escribir_filas(archivo, captura['filas'])
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        self._escribir_json(self._ruta(self.ARCHIVO_CAMBIOS_DATOS, generacion),
+                            {'valoracion': captura['valoracion'], 'reposicion': captura['reposicion']})
+        self.cambios.append(generacion)
+        self.filas_cambios += len(captura['filas'])
+        self._guardar_instantanea(generacion, captura['diario'])
+        self._archivar_tramos(captura['tramos'], captura['stock'].__getitem__)
+        if (self.filas_cambios > self.articulos_base * self.fraccion_consolidacion
+                or len(self.cambios) >= self.cambios_maximos):
+            self._consolidar(generacion, captura['diario'])
+
+    def tomar_instantanea(self):
+        """
+        Captura y escribe una instantánea de una vez (sin otras operaciones en curso, ver
+        Inventario._tomar_instantanea)
+        """
+        self.escribir_instantanea(self.capturar())
+
+    def _guardar_instantanea(self, generacion, diario):
+        instantanea = {
+            'version': self.VERSION,
+            'fecha': datetime.now().isoformat(),
+            'generacion': generacion,
+            'diario': diario,
+            'base': self.base,
+            'articulos_base': self.articulos_base,
+            'cambios': self.cambios,
+            'filas_cambios': self.filas_cambios,
+            'historial_desde': self.historial_desde.isoformat() if self.historial_desde is not None else None
+        }
+        ruta_temporal = self.ruta_instantanea + '.tmp'
+        self._escribir_json(ruta_temporal, instantanea)
+        os.replace(ruta_temporal, self.ruta_instantanea)
+
+    def _consolidar(self, generacion, diario):
+        """
+        Junta el catálogo base y los cambios acumulados en un catálogo base nuevo
+
+        Solo lee los archivos ya escritos: no necesita los candados del inventario.
+        """
+        ruta_base = self._ruta(self.ARCHIVO_CATALOGO, self.base) if self.base is not None else None
+        with open(self._ruta(self.ARCHIVO_CATALOGO, generacion), 'wb') as archivo:
+            articulos = fusionar_catalogos(archivo, ruta_base,
+                                           [self._ruta(self.ARCHIVO_CAMBIOS, g) for g in self.cambios])
+            archivo.flush()
+            os.fsync(archivo.fileno())
+        datos = [self._leer_json(self._ruta(self.ARCHIVO_CAMBIOS_DATOS, g)) for g in self.cambios]
+        valoracion = self._leer_valoracion(self.base, datos)
+        valoracion['articulos'] = {
+            codigo: estado for codigo, estado in valoracion['articulos'].items() if estado[0] > RESIDUO
+        }
+        self._escribir_json(self._ruta(self.ARCHIVO_VALORACION, generacion), valoracion)
+        self._escribir_json(self._ruta(self.ARCHIVO_REPOSICION, generacion), self._leer_reposicion(self.base, datos))
+
+        base_anterior, cambios_anteriores = self.base, self.cambios
+        self.base, self.articulos_base = generacion, articulos
+        self.cambios, self.filas_cambios = [], 0
+        self._guardar_instantanea(generacion, diario)
+        # Los archivos anteriores ya no se usan para arrancar (un catálogo mapeado se sigue
+        # leyendo hasta cerrar el inventario)
+        if base_anterior is not None:
+            for plantilla in (self.ARCHIVO_CATALOGO, self.ARCHIVO_VALORACION, self.ARCHIVO_REPOSICION):
+                self._borrar(self._ruta(plantilla, base_anterior))
+        for anterior in cambios_anteriores:
+            for plantilla in (self.ARCHIVO_CAMBIOS, self.ARCHIVO_CAMBIOS_DATOS):
+                self._borrar(self._ruta(plantilla, anterior))
+
+    def cerrar(self):
+        """
+        Toma una instantánea final (si hubo cambios) y cierra el diario
+        """
+        if self.diario is None:
+            return
+        if self.registros_desde_instantanea:
+            self.tomar_instantanea()
+        self.diario.cerrar()
+        self.diario = None
@@ -6,33 +6,236 @@ from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib import colors
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.platypus import Flowable, SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
 from reportlab.platypus.flowables import HRFlowable
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 from datetime import datetime
+from itertools import islice
+import hashlib
 import os
+import re
+import time
+
+from metricas import METRICAS
+
+# A partir de este número de artículos el reporte completo usa el modo de inventarios grandes
+ARTICULOS_MODO_GRANDE = 5000
+
+# Tabla de artículos del reporte completo
+COLUMNAS_ARTICULOS = ['Código', 'Nombre', 'Descripción', 'Stock', 'Unidad']
+ANCHOS_ARTICULOS = [1*inch, 1.5*inch, 2*inch, 0.8*inch, 1*inch]
+
+# Códigos que se usan tal cual en el nombre del archivo de su reporte
+CODIGO_SEGURO = re.compile(r'[A-Z0-9_.-]{1,100}')
+
+# Estilos compartidos por todos los reportes: se crean una sola vez, al importar el módulo
+# (y el módulo solo se importa la primera vez que se pide un PDF, ver main.py)
+ESTILOS = getSampleStyleSheet()
+ESTILO_TITULO = ParagraphStyle(
+    'CustomTitle',
+    parent=ESTILOS['Heading1'],
+    fontSize=18,
+    spaceAfter=30,
+    alignment=1,  # Centrado
+    textColor=colors.darkblue
+)
+ESTILO_SUBTITULO = ParagraphStyle(
+    'CustomSubtitle',
+    parent=ESTILOS['Heading2'],
+    fontSize=14,
+    spaceAfter=20,
+    textColor=colors.darkgreen
+)
+ESTILO_TABLA_ARTICULOS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+ESTILO_TABLA_MOVIMIENTOS = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+ESTILO_TABLA_HISTORIAL = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
+    ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+])
+
+def _fila_articulo(codigo, nombre, descripcion, cantidad, unidad_medida):
+    return [
+        codigo,
+        nombre,
+        descripcion[:30] + '...' if len(descripcion) > 30 else descripcion,
+        str(cantidad),
+        unidad_medida
+    ]
+
+class TablaPorPaginas(Flowable):
+    """
+    Tabla que lee sus filas de un iterador a medida que se dibuja
+    
+    reportlab calcula el diseño de una Table completa antes de partirla entre páginas, así
+    que una tabla de cientos de miles de filas tendría que estar toda en memoria. Esta
+    entrega en cada página una Table con el encabezado y solo las filas que entran ahí;
+    el resto queda en el iterador hasta la página siguiente.
+    """
+    
+    def __init__(self, filas, encabezado, anchos, estilo, pendientes=None, altos=None):
+        """
+        Args:
+            filas (iterator): Filas de la tabla (listas de textos), sin el encabezado
+            encabezado (list): Fila de títulos que se repite en cada página
+            anchos (list): Ancho de cada columna
+            estilo (TableStyle): Estilo de cada parte (la fila 0 es el encabezado)
+        """
+        super().__init__()
+        self.filas = filas
+        self.encabezado = encabezado
+        self.anchos = anchos
+        self.estilo = estilo
+        self.pendientes = pendientes if pendientes is not None else []  # Leídas y sin dibujar
+        self._altos = altos  # (alto del encabezado, alto de una fila), medidos en la primera parte
+        self._parte = None  # (ancho, alto disponible, tabla, filas que lleva)
+    
+    def _tabla(self, filas):
+        tabla = Table([self.encabezado] + filas, colWidths=self.anchos)
+        tabla.setStyle(self.estilo)
+        return tabla
+    
+    def _leer(self, cantidad):
+        faltan = cantidad - len(self.pendientes)
+        if faltan > 0:
+            self.pendientes.extend(islice(self.filas, faltan))
+    
+    def _partir(self, ancho, alto):
+        """
+        Arma la parte que entra en `alto`: (tabla, cantidad de filas que lleva)
+        """
+        if self._parte is not None and self._parte[:2] == (ancho, alto):
+            return self._parte[2:]
+        self._leer(1)
+        if self._altos is None:
+            muestra = self._tabla(self.pendientes[:1])
+            muestra.wrap(ancho, alto)
+            self._altos = muestra._rowHeights[0], muestra._rowHeights[-1]
+        alto_encabezado, alto_fila = self._altos
+        cantidad = max(0, int((alto - alto_encabezado) // alto_fila))
+        # Una fila de más para saber si todavía quedan
+        self._leer(cantidad + 1)
+        cantidad = min(cantidad, len(self.pendientes))
+        tabla = self._tabla(self.pendientes[:cantidad])
+        if tabla.wrap(ancho, alto)[1] > alto:
+            # Hay filas más altas que la medida (textos con saltos de línea)
+            acumulado = 0
+            for cantidad, alto_fila in enumerate(tabla._rowHeights):
+                acumulado += alto_fila
+                if acumulado > alto:
+                    break
+            cantidad -= 1
+            tabla = self._tabla(self.pendientes[:cantidad])
+            tabla.wrap(ancho, alto)
+        self._parte = ancho, alto, tabla, cantidad
+        return tabla, cantidad
+    
+    def wrap(self, ancho, alto):
+        tabla, cantidad = self._partir(ancho, alto)
+        if cantidad < len(self.pendientes):
+            # No entra todo lo que queda: más alto que el lugar disponible, para que se parta
+            return tabla._width, alto + self._altos[1]
+        return tabla._width, tabla._height
+    
+    def split(self, ancho, alto):
+        tabla, cantidad = self._partir(ancho, alto)
+        if cantidad <= 0:
+            return []
+        # El resto es un objeto nuevo: reportlab marca el que no entra en una página
+        resto = TablaPorPaginas(self.filas, self.encabezado, self.anchos, self.estilo,
+                                self.pendientes[cantidad:], self._altos)
+        return [tabla, resto]
+    
+    def draw(self):
+        self._parte[2].drawOn(self.canv, 0, 0)
 
 class GeneradorReportePDF:
     def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.titulo_style = ParagraphStyle(
-            'CustomTitle',
-            parent=self.styles['Heading1'],
-            fontSize=18,
-            spaceAfter=30,
-            alignment=1,  # Centrado
-            textColor=colors.darkblue
+        self.styles = ESTILOS
+        self.titulo_style = ESTILO_TITULO
+        self.subtitulo_style = ESTILO_SUBTITULO
+        self.estadisticas_ultimo_reporte = None  # Solo la completa el modo de inventarios grandes
+    
+    def generar_reporte_inventario(self, inventario, nombre_archivo=None, modo_grande=None):
+        """
+        Genera un reporte completo del inventario en PDF
+        
+        Args:
+            inventario: Instancia de la clase Inventario
+            nombre_archivo: Nombre del archivo PDF (opcional)
+            modo_grande (bool): Usar el modo para inventarios grandes (ver
+                generar_reporte_inventario_grande). Por defecto se usa si hay más de
+                ARTICULOS_MODO_GRANDE artículos.
+            
+        Returns:
+            str: Ruta del archivo PDF generado
+        """
+        self.estadisticas_ultimo_reporte = None
+        if modo_grande is None:
+            modo_grande = inventario.contar_articulos() > ARTICULOS_MODO_GRANDE
+        if modo_grande:
+            return self.generar_reporte_inventario_grande(inventario, nombre_archivo)
+        
+        if nombre_archivo is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            nombre_archivo = f"reporte_inventario_{timestamp}.pdf"
+        
+        # Las filas salen del resumen que se mantiene al día con cada operación
+        reporte_data = inventario.generar_reporte_inventario()
+        filas = (
+            _fila_articulo(a['codigo'], a['nombre'], a['descripcion'], a['cantidad'], a['unidad_medida'])
+            for a in reporte_data['articulos']
         )
-        self.subtitulo_style = ParagraphStyle(
-            'CustomSubtitle',
-            parent=self.styles['Heading2'],
-            fontSize=14,
-            spaceAfter=20,
-            textColor=colors.darkgreen
+        valoracion = reporte_data['valoracion']
+        self._construir_reporte_inventario(
+            inventario, nombre_archivo, filas, reporte_data['total_articulos'],
+            reporte_data['total_movimientos'], valoracion['valor'], valoracion['costo_ventas_por_mes']
         )
+        return os.path.abspath(nombre_archivo)
     
-    def generar_reporte_inventario(self, inventario, nombre_archivo=None):
+    def generar_reporte_inventario_grande(self, inventario, nombre_archivo=None):
         """
-        Genera un reporte completo del inventario en PDF
+        Genera el reporte completo de un inventario muy grande (cientos de miles de artículos)
+        
+        Es el mismo reporte que el normal, pero los artículos se leen del inventario a medida
+        que se arma cada página (ver TablaPorPaginas) en lugar de copiar antes las filas del
+        resumen: en memoria hay a lo sumo una página de filas. reportlab sí guarda hasta el
+        final las operaciones de dibujo de cada página ya armada (unos 20 KB por página).
+        
+        Al terminar, `self.estadisticas_ultimo_reporte` tiene las páginas, los artículos,
+        los segundos y las páginas por segundo.
         
         Args:
             inventario: Instancia de la clase Inventario
@@ -45,14 +248,51 @@ class GeneradorReportePDF:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
             nombre_archivo = f"reporte_inventario_{timestamp}.pdf"
         
-        # Crear el documento PDF
+        inicio = time.perf_counter()
+        total_articulos = inventario.contar_articulos()
+        filas = (
+            _fila_articulo(a.codigo, a.nombre, a.descripcion, a.cantidad, a.unidad_medida)
+            for a in inventario.iterar_articulos()
+        )
+        doc = self._construir_reporte_inventario(
+            inventario, nombre_archivo, filas, total_articulos, inventario.contar_movimientos(),
+            inventario.obtener_valor_inventario(), inventario.obtener_costo_ventas('mes')
+        )
+        
+        segundos = time.perf_counter() - inicio
+        self.estadisticas_ultimo_reporte = {
+            'paginas': doc.page,
+            'articulos': total_articulos,
+            'segundos': segundos,
+            'paginas_por_segundo': doc.page / segundos if segundos else 0.0
+        }
+        return os.path.abspath(nombre_archivo)
+    
+    def _construir_reporte_inventario(self, inventario, nombre_archivo, filas, total_articulos,
+                                      total_movimientos, valor, costo_ventas):
+        """
+        Construye el PDF del reporte completo (lo usan los dos modos)
+        
+        Args:
+            inventario: Instancia de la clase Inventario (para los movimientos recientes)
+            nombre_archivo (str): Nombre del archivo PDF
+            filas (iterator): Filas de la tabla de artículos (ver _fila_articulo)
+            total_articulos (int): Artículos del inventario
+            total_movimientos (int): Movimientos del inventario
+            valor (dict): Valor del inventario por costo promedio y FIFO
+            costo_ventas (dict): Mes -> costo de ventas por costo promedio y FIFO
+            
+        Returns:
+            SimpleDocTemplate: Documento ya escrito (su atributo page es el total de páginas)
+        """
         doc = SimpleDocTemplate(
             nombre_archivo,
             pagesize=A4,
             rightMargin=72,
             leftMargin=72,
             topMargin=72,
-            bottomMargin=18
+            bottomMargin=18,
+            pageCompression=1
         )
         
         # Contenido del documento
@@ -64,13 +304,13 @@ class GeneradorReportePDF:
         story.append(Spacer(1, 12))
         
         # Información general
-        reporte_data = inventario.generar_reporte_inventario()
         fecha_actual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-        
         info_general = [
             f"<b>Fecha de generación:</b> {fecha_actual}",
-            f"<b>Total de artículos:</b> {reporte_data['total_articulos']}",
-            f"<b>Total de movimientos:</b> {reporte_data['total_movimientos']}"
+            f"<b>Total de artículos:</b> {total_articulos}",
+            f"<b>Total de movimientos:</b> {total_movimientos}",
+            f"<b>Valor del inventario (costo promedio):</b> ${valor['promedio']:,.2f}",
+            f"<b>Valor del inventario (FIFO):</b> ${valor['fifo']:,.2f}"
         ]
         
         for info in info_general:
@@ -87,42 +327,28 @@ class GeneradorReportePDF:
         story.append(subtitulo_articulos)
         story.append(Spacer(1, 12))
         
-        if reporte_data['articulos']:
-            # Crear tabla de artículos
-            headers = ['Código', 'Nombre', 'Descripción', 'Stock', 'Unidad']
-            data = [headers]
-            
-            for articulo in reporte_data['articulos']:
-                fila = [
-                    articulo['codigo'],
-                    articulo['nombre'],
-                    articulo['descripcion'][:30] + '...' if len(articulo['descripcion']) > 30 else articulo['descripcion'],
-                    str(articulo['cantidad']),
-                    articulo['unidad_medida']
-                ]
-                data.append(fila)
-            
-            # Crear y estilizar la tabla
-            tabla_articulos = Table(data, colWidths=[1*inch, 1.5*inch, 2*inch, 0.8*inch, 1*inch])
-            tabla_articulos.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 9),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
-            
+        primera = next(filas, None)
+        if primera is not None:
+            # Tabla de artículos, con el encabezado repetido en cada página
+            tabla_articulos = TablaPorPaginas(filas, COLUMNAS_ARTICULOS, ANCHOS_ARTICULOS,
+                                              ESTILO_TABLA_ARTICULOS, [primera])
             story.append(tabla_articulos)
         else:
             no_articulos = Paragraph("No hay artículos registrados en el inventario.", self.styles['Normal'])
             story.append(no_articulos)
         
+        # Costo de ventas por mes (se mantiene al día con cada salida)
+        if costo_ventas:
+            story.append(Spacer(1, 30))
+            story.append(Paragraph("COSTO DE VENTAS POR MES", self.subtitulo_style))
+            story.append(Spacer(1, 12))
+            data_costos = [['Mes', 'Costo promedio', 'FIFO']]
+            for mes, costos in costo_ventas.items():
+                data_costos.append([mes, f"${costos['promedio']:,.2f}", f"${costos['fifo']:,.2f}"])
+            tabla_costos = Table(data_costos, colWidths=[1.2*inch, 1.6*inch, 1.6*inch])
+            tabla_costos.setStyle(ESTILO_TABLA_MOVIMIENTOS)
+            story.append(tabla_costos)
+        
         story.append(Spacer(1, 30))
         story.append(HRFlowable(width="100%", thickness=1, lineCap='round', color=colors.grey))
         story.append(Spacer(1, 20))
@@ -132,12 +358,9 @@ class GeneradorReportePDF:
         story.append(subtitulo_movimientos)
         story.append(Spacer(1, 12))
         
-        movimientos = inventario.obtener_todos_movimientos()
-        if movimientos:
-            # Mostrar solo los últimos 10 movimientos
-            movimientos_recientes = movimientos[-10:] if len(movimientos) > 10 else movimientos
-            movimientos_recientes.reverse()  # Mostrar los más recientes primero
-            
+        # Solo los últimos 10 movimientos, los más recientes primero (sin recorrer el historial)
+        movimientos_recientes = inventario.ultimos_movimientos(10)
+        if movimientos_recientes:
             headers_mov = ['Fecha/Hora', 'Artículo', 'Tipo', 'Cantidad', 'Usuario']
             data_mov = [headers_mov]
             
@@ -153,24 +376,12 @@ class GeneradorReportePDF:
                 data_mov.append(fila_mov)
             
             tabla_movimientos = Table(data_mov, colWidths=[1.3*inch, 1*inch, 0.8*inch, 0.8*inch, 1*inch])
-            tabla_movimientos.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightblue),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
+            tabla_movimientos.setStyle(ESTILO_TABLA_MOVIMIENTOS)
             
             story.append(tabla_movimientos)
             
-            if len(movimientos) > 10:
-                nota = Paragraph(f"<i>Mostrando los 10 movimientos más recientes de {len(movimientos)} totales.</i>", 
+            if total_movimientos > 10:
+                nota = Paragraph(f"<i>Mostrando los 10 movimientos más recientes de {total_movimientos} totales.</i>", 
                                self.styles['Normal'])
                 story.append(Spacer(1, 10))
                 story.append(nota)
@@ -192,7 +403,7 @@ class GeneradorReportePDF:
         # Construir el PDF
         doc.build(story)
         
-        return os.path.abspath(nombre_archivo)
+        return doc
     
     def generar_reporte_articulo(self, inventario, codigo_articulo, nombre_archivo=None):
         """
@@ -206,13 +417,29 @@ class GeneradorReportePDF:
         Returns:
             str: Ruta del archivo PDF generado o None si el artículo no existe
         """
-        articulo = inventario.obtener_articulo(codigo_articulo)
-        if not articulo:
+        datos = datos_reporte_articulo(inventario, codigo_articulo)
+        if datos is None:
             return None
         
         if nombre_archivo is None:
             timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            nombre_archivo = f"reporte_articulo_{codigo_articulo}_{timestamp}.pdf"
+            nombre_archivo = nombre_reporte_articulo(codigo_articulo, f"_{timestamp}")
+        
+        return self._construir_reporte_articulo(datos, nombre_archivo, datetime.now().strftime('%d/%m/%Y %H:%M:%S'))
+    
+    def _construir_reporte_articulo(self, datos, nombre_archivo, fecha_consulta):
+        """
+        Construye el PDF de un artículo a partir de sus datos (ver datos_reporte_articulo)
+        
+        Args:
+            datos (tuple): Datos del artículo y sus movimientos
+            nombre_archivo (str): Nombre del archivo PDF
+            fecha_consulta (str): Fecha que se muestra como fecha de consulta
+            
+        Returns:
+            str: Ruta del archivo PDF generado
+        """
+        codigo, nombre, descripcion, unidad_medida, cantidad, movimientos, valoracion = datos
         
         doc = SimpleDocTemplate(
             nombre_archivo,
@@ -226,18 +453,20 @@ class GeneradorReportePDF:
         story = []
         
         # Título
-        titulo = Paragraph(f"REPORTE DE ARTÍCULO: {articulo.nombre}", self.titulo_style)
+        titulo = Paragraph(f"REPORTE DE ARTÍCULO: {nombre}", self.titulo_style)
         story.append(titulo)
         story.append(Spacer(1, 20))
         
         # Información del artículo
         info_articulo = [
-            f"<b>Código:</b> {articulo.codigo}",
-            f"<b>Nombre:</b> {articulo.nombre}",
-            f"<b>Descripción:</b> {articulo.descripcion}",
-            f"<b>Unidad de medida:</b> {articulo.unidad_medida}",
-            f"<b>Stock actual:</b> {articulo.cantidad} {articulo.unidad_medida}",
-            f"<b>Fecha de consulta:</b> {datetime.now().strftime('%d/%m/%Y %H:%M:%S')}"
+            f"<b>Código:</b> {codigo}",
+            f"<b>Nombre:</b> {nombre}",
+            f"<b>Descripción:</b> {descripcion}",
+            f"<b>Unidad de medida:</b> {unidad_medida}",
+            f"<b>Stock actual:</b> {cantidad} {unidad_medida}",
+            f"<b>Costo promedio:</b> ${valoracion[0]:,.2f}",
+            f"<b>Valor:</b> ${valoracion[1]:,.2f} (costo promedio) / ${valoracion[2]:,.2f} (FIFO)",
+            f"<b>Fecha de consulta:</b> {fecha_consulta}"
         ]
         
         for info in info_articulo:
@@ -254,39 +483,23 @@ class GeneradorReportePDF:
         story.append(subtitulo_movimientos)
         story.append(Spacer(1, 12))
         
-        movimientos = inventario.obtener_movimientos_articulo(codigo_articulo)
         if movimientos:
             headers = ['Fecha/Hora', 'Tipo', 'Cantidad', 'Motivo', 'Usuario']
             data = [headers]
             
-            # Ordenar movimientos por fecha (más recientes primero)
-            movimientos_ordenados = sorted(movimientos, key=lambda x: x.fecha_hora, reverse=True)
-            
-            for mov in movimientos_ordenados:
-                info_mov = mov.obtener_info()
+            # Los movimientos ya vienen ordenados por fecha (más recientes primero)
+            for fecha_hora, tipo, cantidad_mov, motivo, usuario in movimientos:
                 fila = [
-                    info_mov['fecha_hora'],
-                    info_mov['tipo_movimiento'],
-                    str(info_mov['cantidad']),
-                    info_mov['motivo'][:25] + '...' if len(info_mov['motivo']) > 25 else info_mov['motivo'],
-                    info_mov['usuario']
+                    fecha_hora,
+                    tipo,
+                    str(cantidad_mov),
+                    motivo[:25] + '...' if len(motivo) > 25 else motivo,
+                    usuario
                 ]
                 data.append(fila)
             
             tabla = Table(data, colWidths=[1.3*inch, 0.8*inch, 0.8*inch, 1.5*inch, 1*inch])
-            tabla.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (-1, 0), colors.darkgreen),
-                ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, 0), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-                ('BACKGROUND', (0, 1), (-1, -1), colors.lightgreen),
-                ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                ('FONTSIZE', (0, 1), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.black),
-                ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            ]))
+            tabla.setStyle(ESTILO_TABLA_HISTORIAL)
             
             story.append(tabla)
         else:
@@ -306,4 +519,128 @@ class GeneradorReportePDF:
         
         doc.build(story)
         
-        return os.path.abspath(nombre_archivo)
\ No newline at end of file
+        return os.path.abspath(nombre_archivo)
+    
+    def generar_reportes_articulos(self, inventario, directorio, codigos=None, procesos=None):
+        """
+        Genera el reporte PDF de muchos artículos a la vez usando varios procesos (núcleos)
+        
+        A cada proceso se le envía solo una copia compacta de los datos del artículo y sus
+        movimientos (ver datos_reporte_articulo), no el inventario completo. Los archivos se
+        llaman siempre reporte_articulo_CODIGO.pdf (ver nombre_reporte_articulo) y todos
+        comparten la misma fecha de consulta, así repetir el lote produce los mismos nombres.
+        Si dos códigos dieran el mismo archivo se lanza ValueError en lugar de pisarlo.
+        
+        Al terminar, `self.estadisticas_ultimo_reporte` tiene los reportes, los segundos,
+        los reportes por segundo y los procesos usados.
+        
+        Args:
+            inventario: Instancia de la clase Inventario
+            directorio (str): Carpeta donde se guardan los reportes
+            codigos (iterable): Códigos de los artículos (por defecto, todos)
+            procesos (int): Número de procesos (por defecto, uno por núcleo)
+            
+        Returns:
+            list: Tuplas (código, ruta del PDF, segundos que tardó ese reporte) ordenadas por código
+        """
+        os.makedirs(directorio, exist_ok=True)
+        if codigos is None:
+            codigos = (articulo.codigo for articulo in inventario.iterar_articulos())
+        procesos = procesos or os.cpu_count() or 1
+        fecha_consulta = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+        
+        inicio = time.perf_counter()
+        resultados = []
+        with ProcessPoolExecutor(max_workers=procesos) as ejecutor:
+            # Se mantienen pocas tareas pendientes para no copiar todo el inventario de golpe
+            pendientes = set()
+            nombres = {}  # Nombre del archivo (sin distinguir mayúsculas) -> código
+            for codigo in codigos:
+                datos = datos_reporte_articulo(inventario, codigo)
+                if datos is None:
+                    continue
+                nombre = nombre_reporte_articulo(codigo)
+                anterior = nombres.setdefault(nombre.lower(), codigo)
+                if anterior != codigo:
+                    raise ValueError(f"Los artículos '{anterior}' y '{codigo}' darían el mismo archivo: {nombre}")
+                ruta = os.path.join(directorio, nombre)
+                pendientes.add(ejecutor.submit(_generar_reporte_articulo_en_proceso, datos, ruta, fecha_consulta))
+                if len(pendientes) >= procesos * 4:
+                    terminados, pendientes = wait(pendientes, return_when=FIRST_COMPLETED)
+                    resultados.extend(futuro.result() for futuro in terminados)
+            resultados.extend(futuro.result() for futuro in pendientes)
+        
+        segundos = time.perf_counter() - inicio
+        resultados.sort()
+        self.estadisticas_ultimo_reporte = {
+            'reportes': len(resultados),
+            'segundos': segundos,
+            'reportes_por_segundo': len(resultados) / segundos if segundos else 0.0,
+            'procesos': procesos
+        }
+        return resultados
+
+def datos_reporte_articulo(inventario, codigo_articulo):
+    """
+    Copia compacta (solo tuplas y textos) de lo que necesita el reporte de un artículo
+    
+    Args:
+        inventario: Instancia de la clase Inventario
+        codigo_articulo (str): Código del artículo
+        
+    Returns:
+        tuple: (codigo, nombre, descripcion, unidad_medida, cantidad, movimientos, valoracion)
+            donde movimientos son tuplas (fecha_hora, tipo, cantidad, motivo, usuario) de la
+            más reciente a la más antigua y valoracion es (costo promedio, valor promedio,
+            valor FIFO); None si el artículo no existe
+    """
+    articulo = inventario.obtener_articulo(codigo_articulo)
+    if not articulo:
+        return None
+    movimientos = sorted(inventario.obtener_movimientos_articulo(codigo_articulo),
+                         key=lambda x: x.fecha_hora, reverse=True)
+    valoracion = inventario.obtener_valoracion_articulo(codigo_articulo)
+    return (
+        articulo.codigo, articulo.nombre, articulo.descripcion, articulo.unidad_medida, articulo.cantidad,
+        [(m.fecha_hora.strftime('%Y-%m-%d %H:%M:%S'), m.tipo_movimiento.value, m.cantidad, m.motivo, m.usuario)
+         for m in movimientos],
+        (valoracion['costo_promedio'], valoracion['valor_promedio'], valoracion['valor_fifo'])
+    )
+
+def nombre_reporte_articulo(codigo_articulo, sufijo=''):
+    """
+    Nombre del reporte de un artículo, sin caracteres inválidos para un archivo
+    
+    Los códigos con otros caracteres (que se reemplazan por '_'), con minúsculas (Windows y
+    macOS no distinguen mayúsculas en los nombres) o muy largos llevan además un resumen
+    corto del código original: así "A/1" y "A_1" no terminan en el mismo archivo.
+    
+    Args:
+        codigo_articulo (str): Código del artículo
+        sufijo (str): Texto que se agrega antes de la extensión (por ejemplo, la fecha)
+        
+    Returns:
+        str: reporte_articulo_CODIGO[-resumen][sufijo].pdf
+    """
+    if CODIGO_SEGURO.fullmatch(codigo_articulo):
+        nombre = codigo_articulo
+    else:
+        resumen = hashlib.sha1(codigo_articulo.encode('utf-8')).hexdigest()[:12]
+        nombre = re.sub(r'[^A-Za-z0-9_.-]', '_', codigo_articulo[:100]) + '-' + resumen
+    return f"reporte_articulo_{nombre}{sufijo}.pdf"
+
+# Generador propio de cada proceso del lote (se crea una sola vez por proceso)
+_generador_proceso = None
+
+def _generar_reporte_articulo_en_proceso(datos, ruta, fecha_consulta):
+    global _generador_proceso
+    if _generador_proceso is None:
+        _generador_proceso = GeneradorReportePDF()
+    inicio = time.perf_counter()
+    _generador_proceso._construir_reporte_articulo(datos, ruta, fecha_consulta)
+    return datos[0], ruta, time.perf_counter() - inicio
+
+# Reportes que se miden cuando las métricas están activas (ver metricas.py)
+METRICAS.registrar_clase(GeneradorReportePDF, (
+    'generar_reporte_inventario', 'generar_reporte_articulo', 'generar_reportes_articulos'
+), 'reporte_pdf', 'reporte')
@@ -0,0 +1,163 @@
+"""
+Puntos de reposición: qué artículos hay que volver a pedir, sin recorrer el catálogo
+
+Cada artículo puede tener un punto de reposición (stock mínimo). El Inventario avisa de
+cada cambio de stock y aquí se lleva, solo para los artículos que están en o por debajo
+de su punto, la diferencia stock - punto en un montículo (heap) de mínimos: los k más
+urgentes salen en O(k log n) sin mirar el resto del catálogo.
+
+Las entradas del montículo no se borran cuando el stock vuelve a cambiar: se agrega una
+nueva y la anterior queda vieja, y se descarta cuando llega a la cima (se compara con la
+diferencia actual del artículo). Si las viejas pasan a ser mayoría, el montículo se rearma.
+
+Cuando un artículo cruza su punto hacia abajo se encola un aviso; el Inventario lo entrega
+a los suscriptores una sola vez, después de soltar sus candados (ver despachar). El aviso
+se vuelve a armar recién cuando el stock supera otra vez el punto.
+"""
+
+import heapq
+import sys
+import threading
+import traceback
+from collections import deque
+
+class AlertasReposicion:
+    def __init__(self):
+        """
+        Inicializa el índice sin puntos de reposición
+        """
+        self.puntos = {}  # Código -> punto de reposición
+        self._debajo = {}  # Código -> stock - punto de los artículos en o por debajo del punto
+        self._monticulo = []  # (stock - punto, código); puede tener entradas viejas
+        self._pendientes = deque()  # (Articulo, punto) de los cruces todavía sin avisar
+        self._suscriptores = []
+        self._candado = threading.Lock()
+
+    def establecer(self, articulo, punto):
+        """
+        Fija (o quita) el punto de reposición de un artículo
+
+        Si el artículo ya está en o por debajo del nuevo punto se avisa como un cruce.
+
+        Args:
+            articulo (Articulo): Artículo, con su stock actual
+            punto (float): Punto de reposición, o None para quitarlo
+        """
+        with self._candado:
+            if punto is None:
+                self.puntos.pop(articulo.codigo, None)
+                self._debajo.pop(articulo.codigo, None)
+                return
+            self.puntos[articulo.codigo] = punto
+            self._actualizar(articulo, punto, avisar=True)
+
+    def restaurar(self, puntos, articulos):
+        """
+        Carga los puntos guardados sin avisar (los cruces anteriores ya se avisaron)
+
+        Args:
+            puntos (dict): Código -> punto de reposición (ver a_registro)
+            articulos (callable): Código -> Articulo o None (por ejemplo almacen.obtener_articulo)
+        """
+        with self._candado:
+            for codigo, punto in (puntos or {}).items():
+                articulo = articulos(codigo)
+                if articulo is not None:
+                    self.puntos[codigo] = punto
+                    self._actualizar(articulo, punto, avisar=False)
+
+    def a_registro(self):
+        """
+        Returns:
+            dict: Código -> punto de reposición, serializable en JSON
+        """
+        with self._candado:
+            return dict(self.puntos)
+
+    def stock_cambiado(self, articulo):
+        """
+        Registra un cambio de stock ya aplicado al artículo
+
+        Args:
+            articulo (Articulo): Artículo con su stock actualizado
+        """
+        punto = self.puntos.get(articulo.codigo)
+        if punto is None:
+            return
+        with self._candado:
+            self._actualizar(articulo, punto, avisar=True)
+
+    def _actualizar(self, articulo, punto, avisar):
+        codigo = articulo.codigo
+        diferencia = articulo.cantidad - punto
+        if diferencia > 0:
+            # Por encima del punto: el aviso se vuelve a armar (su entrada queda vieja)
+            self._debajo.pop(codigo, None)
+            return
+        anterior = self._debajo.get(codigo)
+        if anterior == diferencia:
+            return
+        if anterior is None and avisar:
+            self._pendientes.append((articulo, punto))
+        self._debajo[codigo] = diferencia
+        heapq.heappush(self._monticulo, (diferencia, codigo))
+        if len(self._monticulo) > 2 * len(self._debajo) + 64:
+            self._monticulo = [(diferencia, codigo) for codigo, diferencia in self._debajo.items()]
+            heapq.heapify(self._monticulo)
+
+    def debajo_del_punto(self, limite=None):
+        """
+        Artículos en o por debajo de su punto de reposición, del más urgente al menos urgente
+
+        Args:
+            limite (int): Máximo de artículos, o None para todos
+
+        Returns:
+            list: (stock - punto, código), con la diferencia más negativa primero
+        """
+        resultado = []
+        with self._candado:
+            monticulo, debajo = self._monticulo, self._debajo
+            while monticulo and (limite is None or len(resultado) < limite):
+                diferencia, codigo = heapq.heappop(monticulo)
+                # Entradas viejas (el stock cambió después) o repetidas se descartan
+                if debajo.get(codigo) != diferencia:
+                    continue
+                if resultado and resultado[-1] == (diferencia, codigo):
+                    continue
+                resultado.append((diferencia, codigo))
+            for entrada in resultado:
+                heapq.heappush(monticulo, entrada)
+        return resultado
+
+    def suscribir(self, funcion):
+        """
+        Agrega una función que se llama una vez por cada cruce del punto de reposición
+
+        Args:
+            funcion (callable): funcion(articulo, punto)
+        """
+        self._suscriptores.append(funcion)
+
+    def despachar(self):
+        """
+        Entrega los avisos pendientes (se llama sin candados tomados, así un suscriptor
+        puede usar el inventario). Un suscriptor que falla no impide avisar a los demás.
+        """
+        pendientes = self._pendientes
+        while pendientes:
+            try:
+                articulo, punto = pendientes.popleft()
+            except IndexError:
+                return  # Otro hilo se llevó el último
+            for funcion in list(self._suscriptores):
+                try:
+                    funcion(articulo, punto)
+                except Exception:
+                    traceback.print_exc(file=sys.stderr)
+
+    def descartar_pendientes(self):
+        """
+        Olvida los avisos encolados (por ejemplo los de reproducir el diario al arrancar)
+        """
+        self._pendientes.clear()
@@ -0,0 +1,146 @@
+"""
+Resumen del inventario que se mantiene al día con cada operación
+
+En lugar de recorrer todo el catálogo cada vez que se pide un reporte, el Inventario avisa
+al resumen de cada artículo nuevo y de cada cambio de stock. El reporte solo vuelve a armar
+las filas de los artículos que cambiaron desde el reporte anterior, y el número de versión
+permite saber si algo cambió sin mirar nada más.
+"""
+
+import threading
+from collections.abc import Sequence
+from datetime import datetime
+
+class FilasReporte(Sequence):
+    """
+    Vista de solo lectura de las filas del resumen
+
+    Las filas se actualizan en el lugar con cada reporte (copiarlas costaría O(catálogo)),
+    así que la vista muestra siempre las del último reporte pedido. Para conservar las de
+    un reporte puntual hay que copiarlas con list(). Las filas (diccionarios) no se deben
+    modificar.
+    """
+
+    __slots__ = ('_filas',)
+
+    def __init__(self, filas):
+        self._filas = filas
+
+    def __len__(self):
+        return len(self._filas)
+
+    def __getitem__(self, posicion):
+        # Un corte devuelve una lista nueva (una copia de esas filas)
+        return self._filas[posicion]
+
+    def __iter__(self):
+        return iter(self._filas)
+
+    def __repr__(self):
+        return f"FilasReporte({len(self._filas)} filas)"
+
+class ResumenInventario:
+    def __init__(self):
+        """
+        Inicializa un resumen vacío; se completa desde el almacén la primera vez que se usa
+        """
+        self.version = 0
+        self.total_movimientos = 0
+        self.por_unidad = {}  # Unidad de medida -> {'articulos': n, 'cantidad': stock total}
+        self._construido = False
+        self._filas = []  # Filas del último reporte (se actualizan en el lugar)
+        self._vista = FilasReporte(self._filas)
+        self._posiciones = {}  # Código -> posición de su fila en _filas
+        self._cambiados = {}  # Código -> Articulo cambiado desde el último reporte
+        self._candado = threading.Lock()
+
+    def construir(self, almacen):
+        """
+        Arma el resumen completo recorriendo el almacén (solo la primera vez)
+
+        Args:
+            almacen: Almacén del inventario
+        """
+        with self._candado:
+            if self._construido:
+                return
+            self._filas[:] = almacen.filas_reporte()
+            self._posiciones = {fila['codigo']: i for i, fila in enumerate(self._filas)}
+            self.total_movimientos = almacen.contar_movimientos()
+            self.por_unidad = {}
+            for fila in self._filas:
+                unidad = self.por_unidad.setdefault(fila['unidad_medida'], {'articulos': 0, 'cantidad': 0.0})
+                unidad['articulos'] += 1
+                unidad['cantidad'] += fila['cantidad']
+            self._cambiados = {}
+            self._construido = True
+            self.version += 1
+
+    def articulo_agregado(self, articulo):
+        """
+        Registra un artículo nuevo
+
+        Args:
+            articulo (Articulo): Artículo recién agregado
+        """
+        with self._candado:
+            self.version += 1
+            if not self._construido:
+                return
+            unidad = self.por_unidad.setdefault(articulo.unidad_medida, {'articulos': 0, 'cantidad': 0.0})
+            unidad['articulos'] += 1
+            unidad['cantidad'] += articulo.cantidad
+            self._cambiados[articulo.codigo] = articulo
+
+    def stock_cambiado(self, articulo, variacion, movimientos=1):
+        """
+        Registra un cambio de stock ya aplicado al artículo
+
+        Args:
+            articulo (Articulo): Artículo con su stock actualizado
+            variacion (float): Variación del stock (negativa en las salidas)
+            movimientos (int): Movimientos que produjeron el cambio
+        """
+        with self._candado:
+            self.version += 1
+            if not self._construido:
+                return
+            self.total_movimientos += movimientos
+            self.por_unidad[articulo.unidad_medida]['cantidad'] += variacion
+            self._cambiados[articulo.codigo] = articulo
+
+    def reporte(self, almacen):
+        """
+        Retorna el reporte del inventario (mismo formato que Inventario.generar_reporte_inventario)
+
+        Solo se vuelven a armar las filas de los artículos que cambiaron, en el lugar: el
+        costo es O(artículos cambiados), no O(catálogo). 'articulos' es una vista de solo
+        lectura (FilasReporte) que sigue a los reportes siguientes; se copia con list() para
+        conservarla.
+
+        Args:
+            almacen: Almacén del inventario (se usa solo la primera vez)
+
+        Returns:
+            dict: Reporte con fecha, totales, filas por artículo y totales por unidad de medida
+        """
+        self.construir(almacen)
+        with self._candado:
+            if self._cambiados:
+                filas = self._filas
+                for codigo, articulo in self._cambiados.items():
+                    posicion = self._posiciones.get(codigo)
+                    if posicion is None:
+                        self._posiciones[codigo] = len(filas)
+                        filas.append(articulo.obtener_info())
+                    else:
+                        filas[posicion] = articulo.obtener_info()
+                self._cambiados = {}
+            return {
+                'fecha_reporte': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'version': self.version,
+                'total_articulos': len(self._filas),
+                'total_movimientos': self.total_movimientos,
+                'articulos': self._vista,
+                'por_unidad': {unidad: dict(datos) for unidad, datos in self.por_unidad.items()}
+            }
@@ -0,0 +1,575 @@
+"""
+Servidor HTTP (asyncio) con la API JSON del inventario y las páginas de la carpeta html/
+
+Un solo proceso atiende muchas terminales a la vez: cada conexión es una corrutina, las
+conexiones se mantienen abiertas entre peticiones (keep-alive de HTTP/1.1) y el trabajo
+pesado, como generar un PDF, se hace en un hilo aparte para no frenar a las demás. Las
+consultas que recorren el catálogo o el historial (listados, reporte, stock a una fecha,
+valoración) van a hilos lectores. Las altas, entradas y salidas se hacen de a una en un
+hilo escritor: escriben el diario y a veces disparan una instantánea o la compactación,
+que no deben frenar el bucle de eventos.
+
+Los listados se entregan por páginas (100 artículos o 50 movimientos si no se indica
+límite, a lo sumo 1000); la cabecera X-Cursor-Siguiente trae el cursor de la siguiente
+(en los artículos, el último código entregado).
+
+Rutas:
+    GET  /api/articulos?limite=N&cursor=C      Lista de artículos en orden de alta, por páginas
+    GET  /api/articulos?q=TEXTO&limite=N       Búsqueda por código, nombre o descripción (sin
+                                               importar acentos; incluye el puntaje de cada uno)
+    POST /api/articulos                        Alta {codigo, nombre, descripcion, unidad_medida}
+    GET  /api/articulos/CODIGO                 Datos y stock de un artículo
+    GET  /api/articulos/CODIGO/movimientos     Movimientos de un artículo, por páginas (como
+         ?limite=N&cursor=C                    /api/movimientos: de la más reciente a la más antigua)
+    GET  /api/articulos/CODIGO/reporte.pdf     Reporte PDF de un artículo
+    GET  /api/articulos/CODIGO/stock?fecha=F   Stock del artículo en una fecha ISO pasada
+    GET  /api/articulos/CODIGO/valoracion      Costo promedio, valor y capas FIFO del artículo
+    POST /api/entradas                         Entrada {codigo, cantidad, costo_unitario?, motivo?, usuario?}
+    POST /api/salidas                          Salida {codigo, cantidad, motivo?, usuario?}
+    GET  /api/movimientos?limite=N             Últimos movimientos, por páginas
+         &desde=F&hasta=F&tipo=T&usuario=U     Filtros opcionales por fechas ISO, tipo y usuario
+         &cursor=C                             Página siguiente (más antigua): el cursor llega en
+                                               la cabecera X-Cursor-Siguiente de la página anterior
+    GET  /api/movimientos/ID                   Un movimiento por su ID
+    GET  /api/reporte                          Reporte básico del inventario (con ETag: si no
+                                               cambió nada responde 304 Not Modified)
+    GET  /api/reporte.pdf                      Reporte PDF del inventario
+    GET  /api/stock?fecha=F                    Stock de todos los artículos en una fecha ISO
+    GET  /api/valoracion?periodo=mes|dia       Valor del inventario y costo de ventas por periodo
+    GET  /metrics                              Métricas de rendimiento en formato Prometheus
+    GET  /ARCHIVO                              Páginas, estilos y scripts de html/
+
+Las métricas se activan al iniciar el servidor (INVENTARIO_METRICAS=0 para no medir).
+
+Uso:
+    python servidor_api.py [puerto] [host]
+"""
+
+import asyncio
+import json
+import math
+import mimetypes
+import os
+import re
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, quote, unquote, urlsplit
+
+from main import DIRECTORIO_DATOS, crear_inventario
+from metricas import METRICAS
+from movimiento_inventario import TipoMovimiento
+
+DIRECTORIO_HTML = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'html')
+TAMANO_MAXIMO_CUERPO = 1024 * 1024
+MAXIMO_CABECERAS = 100
+LIMITE_ARTICULOS = 100  # Artículos por página si no se indica límite
+LIMITE_MOVIMIENTOS = 50  # Movimientos por página si no se indica límite
+LIMITE_MAXIMO = 1000
+
+RAZONES = {
+    200: 'OK', 201: 'Created', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+    500: 'Internal Server Error', 503: 'Service Unavailable'
+}
+
+class ErrorHttp(Exception):
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+        self.mensaje = mensaje
+
+class Respuesta:
+    def __init__(self, estado, cuerpo, tipo_contenido='application/json; charset=utf-8', cabeceras=None):
+        self.estado = estado
+        self.cuerpo = cuerpo
+        self.tipo_contenido = tipo_contenido
+        self.cabeceras = cabeceras or {}
+
+def respuesta_json(datos, estado=200):
+    return Respuesta(estado, json.dumps(datos, ensure_ascii=False).encode('utf-8'))
+
+class ServidorInventario:
+    def __init__(self, inventario, directorio_html=DIRECTORIO_HTML, hilos_pesados=2,
+                 tiempo_inactividad=15.0, hilos_lectura=4):
+        """
+        Inicializa el servidor
+
+        Args:
+            inventario (Inventario): Inventario a exponer (creado con concurrente=True, porque
+                los reportes PDF lo leen desde otros hilos)
+            directorio_html (str): Carpeta con las páginas estáticas
+            hilos_pesados (int): Hilos para el trabajo pesado (reportes PDF)
+            tiempo_inactividad (float): Segundos que una conexión abierta puede esperar la
+                siguiente petición antes de cerrarse
+            hilos_lectura (int): Hilos para las consultas que recorren el catálogo o el historial
+        """
+        self.inventario = inventario
+        self.directorio_html = os.path.abspath(directorio_html)
+        self.tiempo_inactividad = tiempo_inactividad
+        self.ejecutor = ThreadPoolExecutor(max_workers=hilos_pesados, thread_name_prefix='pdf')
+        # Las modificaciones van en orden por un solo hilo, fuera del bucle de eventos
+        self.escritor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='escritor')
+        # Las consultas largas, aparte de los PDF para que estos no las hagan esperar
+        self.lectores = ThreadPoolExecutor(max_workers=hilos_lectura, thread_name_prefix='lector')
+        self._archivos = {}  # Ruta -> (contenido, tipo) de los archivos estáticos ya leídos
+        self._generador_pdf = None
+        self._reporte = None  # (versión del resumen, JSON del reporte)
+        self.rutas = [
+            ('GET', r'/api/articulos', self.listar_articulos),
+            ('POST', r'/api/articulos', self.agregar_articulo),
+            ('GET', r'/api/articulos/([^/]+)', self.obtener_articulo),
+            ('GET', r'/api/articulos/([^/]+)/movimientos', self.movimientos_articulo),
+            ('GET', r'/api/articulos/([^/]+)/reporte\.pdf', self.reporte_pdf_articulo),
+            ('GET', r'/api/articulos/([^/]+)/stock', self.stock_articulo_en_fecha),
+            ('GET', r'/api/articulos/([^/]+)/valoracion', self.valoracion_articulo),
+            ('POST', r'/api/entradas', self.entrada_mercancia),
+            ('POST', r'/api/salidas', self.salida_mercancia),
+            ('GET', r'/api/movimientos', self.listar_movimientos),
+            ('GET', r'/api/movimientos/([^/]+)', self.obtener_movimiento),
+            ('GET', r'/api/reporte', self.reporte),
+            ('GET', r'/api/reporte\.pdf', self.reporte_pdf),
+            ('GET', r'/api/stock', self.stock_en_fecha),
+            ('GET', r'/api/valoracion', self.valoracion),
+            ('GET', r'/metrics', self.metricas),
+        ]
+        # Consultas cuyo costo crece con el catálogo o el historial: van a un hilo lector
+        pesadas = {self.listar_articulos, self.movimientos_articulo, self.listar_movimientos, self.reporte,
+                   self.stock_en_fecha, self.valoracion}
+        self.rutas = [(metodo, re.compile(patron + '$'), manejador, manejador in pesadas)
+                      for metodo, patron, manejador in self.rutas]
+
+    async def iniciar(self, host='127.0.0.1', puerto=8000):
+        """
+        Abre el puerto de escucha
+
+        Returns:
+            asyncio.Server: Servidor ya escuchando
+        """
+        return await asyncio.start_server(self._atender_conexion, host, puerto)
+
+    def cerrar(self):
+        """
+        Espera los trabajos pesados y las modificaciones en curso y libera el inventario
+        """
+        self.escritor.shutdown(wait=True)
+        self.lectores.shutdown(wait=True)
+        self.ejecutor.shutdown(wait=True)
+        self.inventario.cerrar()
+
+    # ------------------------------------------------------------------
+    # Protocolo HTTP/1.1
+    # ------------------------------------------------------------------
+
+    async def _atender_conexion(self, lector, escritor):
+        try:
+            while True:
+                try:
+                    solicitud = await asyncio.wait_for(self._leer_solicitud(lector), self.tiempo_inactividad)
+                except ErrorHttp as error:
+                    await self._escribir(escritor, respuesta_json({'error': error.mensaje}, error.estado), False)
+                    break
+                if solicitud is None:
+                    break
+
+                metodo, destino, version, cabeceras, cuerpo = solicitud
+                conexion = cabeceras.get('connection', '').lower()
+                mantener = conexion != 'close' if version == 'HTTP/1.1' else conexion == 'keep-alive'
+                respuesta = await self._despachar(metodo, destino, cuerpo)
+                etiqueta = respuesta.cabeceras.get('ETag')
+                if etiqueta is not None and cabeceras.get('if-none-match') == etiqueta:
+                    respuesta = Respuesta(304, b'', cabeceras={'ETag': etiqueta})
+                await self._escribir(escritor, respuesta, mantener)
+                if not mantener:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            escritor.close()
+
+    async def _leer_solicitud(self, lector):
+        linea = await lector.readline()
+        if not linea:
+            return None
+        try:
+            metodo, destino, version = linea.decode('latin-1').split()
+        except ValueError:
+            raise ErrorHttp(400, "Línea de petición inválida")
+
+        cabeceras = {}
+        while True:
+            linea = await lector.readline()
+            if linea in (b'\r\n', b'\n', b''):
+                break
+            if len(cabeceras) >= MAXIMO_CABECERAS:
+                raise ErrorHttp(400, "Demasiadas cabeceras")
+            nombre, _, valor = linea.decode('latin-1').partition(':')
+            cabeceras[nombre.strip().lower()] = valor.strip()
+
+        try:
+            longitud = int(cabeceras.get('content-length', '0'))
+        except ValueError:
+            raise ErrorHttp(400, "Content-Length inválido")
+        if longitud > TAMANO_MAXIMO_CUERPO:
+            raise ErrorHttp(413, "Cuerpo demasiado grande")
+        cuerpo = await lector.readexactly(longitud) if longitud else b''
+        return metodo.upper(), destino, version, cabeceras, cuerpo
+
+    async def _escribir(self, escritor, respuesta, mantener):
+        cabeceras = [
+            f"HTTP/1.1 {respuesta.estado} {RAZONES.get(respuesta.estado, '')}",
+            f"Content-Type: {respuesta.tipo_contenido}",
+            f"Content-Length: {len(respuesta.cuerpo)}",
+            f"Connection: {'keep-alive' if mantener else 'close'}",
+        ]
+        cabeceras.extend(f"{nombre}: {valor}" for nombre, valor in respuesta.cabeceras.items())
+        escritor.write(('\r\n'.join(cabeceras) + '\r\n\r\n').encode('latin-1') + respuesta.cuerpo)
+        await escritor.drain()
+
+    async def _despachar(self, metodo, destino, cuerpo):
+        partes = urlsplit(destino)
+        ruta = unquote(partes.path)
+        consulta = {clave: valores[-1] for clave, valores in parse_qs(partes.query).items()}
+        try:
+            if not ruta.startswith('/api/') and ruta != '/metrics':
+                if metodo != 'GET':
+                    raise ErrorHttp(405, "Método no permitido")
+                return self.archivo_estatico(ruta)
+
+            metodo_valido = False
+            for metodo_ruta, patron, manejador, pesada in self.rutas:
+                coincidencia = patron.match(ruta)
+                if coincidencia is None:
+                    continue
+                if metodo_ruta != metodo:
+                    metodo_valido = True
+                    continue
+                if metodo == 'POST':
+                    bucle = asyncio.get_running_loop()
+                    resultado = await bucle.run_in_executor(self.escritor, manejador, self._leer_json(cuerpo),
+                                                            *coincidencia.groups())
+                elif pesada:
+                    bucle = asyncio.get_running_loop()
+                    resultado = await bucle.run_in_executor(self.lectores, manejador, consulta,
+                                                            *coincidencia.groups())
+                else:
+                    resultado = manejador(consulta, *coincidencia.groups())
+                if asyncio.iscoroutine(resultado):
+                    resultado = await resultado
+                return resultado
+            if metodo_valido:
+                raise ErrorHttp(405, "Método no permitido")
+            raise ErrorHttp(404, "Ruta no encontrada")
+        except ErrorHttp as error:
+            return respuesta_json({'error': error.mensaje}, error.estado)
+        except Exception as error:
+            return respuesta_json({'error': f"Error interno: {error}"}, 500)
+
+    @staticmethod
+    def _leer_json(cuerpo):
+        try:
+            datos = json.loads(cuerpo or b'{}')
+        except ValueError:
+            raise ErrorHttp(400, "El cuerpo no es JSON válido")
+        if not isinstance(datos, dict):
+            raise ErrorHttp(400, "Se esperaba un objeto JSON")
+        return datos
+
+    def archivo_estatico(self, ruta):
+        """
+        Sirve un archivo de la carpeta html/ (se lee del disco una sola vez)
+        """
+        if ruta == '/':
+            ruta = '/index.html'
+        if ruta not in self._archivos:
+            completa = os.path.normpath(os.path.join(self.directorio_html, ruta.lstrip('/')))
+            if os.path.commonpath([completa, self.directorio_html]) != self.directorio_html \
+                    or not os.path.isfile(completa):
+                raise ErrorHttp(404, "Archivo no encontrado")
+            with open(completa, 'rb') as archivo:
+                contenido = archivo.read()
+            tipo = mimetypes.guess_type(completa)[0] or 'application/octet-stream'
+            if tipo.startswith('text/') or tipo == 'application/javascript':
+                tipo += '; charset=utf-8'
+            self._archivos[ruta] = contenido, tipo
+        contenido, tipo = self._archivos[ruta]
+        return Respuesta(200, contenido, tipo)
+
+    # ------------------------------------------------------------------
+    # Operaciones del inventario (las consultas cortas se hacen en el propio bucle de eventos,
+    # las largas en un hilo lector y las de POST en el hilo escritor)
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _campo_texto(datos, campo, obligatorio=True):
+        valor = str(datos.get(campo) or '').strip()
+        if obligatorio and not valor:
+            raise ErrorHttp(400, f"Falta el campo '{campo}'")
+        return valor
+
+    @staticmethod
+    def _cantidad(datos):
+        try:
+            cantidad = float(datos.get('cantidad'))
+        except (TypeError, ValueError):
+            raise ErrorHttp(400, "La cantidad debe ser un número")
+        if not math.isfinite(cantidad):
+            raise ErrorHttp(400, "La cantidad debe ser un número finito")
+        if not cantidad > 0:
+            raise ErrorHttp(400, "La cantidad debe ser mayor a 0")
+        return cantidad
+
+    @staticmethod
+    def _costo_unitario(datos):
+        if datos.get('costo_unitario') is None:
+            return None
+        try:
+            costo_unitario = float(datos['costo_unitario'])
+        except (TypeError, ValueError):
+            raise ErrorHttp(400, "El costo unitario debe ser un número")
+        if not math.isfinite(costo_unitario):
+            raise ErrorHttp(400, "El costo unitario debe ser un número finito")
+        if not costo_unitario >= 0:
+            raise ErrorHttp(400, "El costo unitario no puede ser negativo")
+        return costo_unitario
+
+    @staticmethod
+    def _fecha(consulta, parametro='fecha', obligatorio=True, fin_del_dia=True):
+        texto = consulta.get(parametro, '')
+        if not texto:
+            if obligatorio:
+                raise ErrorHttp(400, f"Falta el parámetro '{parametro}'")
+            return None
+        try:
+            fecha_hora = datetime.fromisoformat(texto)
+        except ValueError:
+            raise ErrorHttp(400, "La fecha debe tener formato ISO (AAAA-MM-DD[THH:MM[:SS]])")
+        if len(texto) == 10 and fin_del_dia:
+            # Solo la fecha: hasta el final de ese día
+            fecha_hora = fecha_hora.replace(hour=23, minute=59, second=59, microsecond=999999)
+        return fecha_hora
+
+    @staticmethod
+    def _entero(consulta, parametro, mensaje):
+        try:
+            return int(consulta[parametro])
+        except ValueError:
+            raise ErrorHttp(400, mensaje)
+
+    def _limite(self, consulta, defecto):
+        if 'limite' not in consulta:
+            return defecto
+        return min(self._entero(consulta, 'limite', "El límite debe ser un número entero"), LIMITE_MAXIMO)
+
+    def _articulo(self, codigo):
+        articulo = self.inventario.obtener_articulo(codigo.upper())
+        if articulo is None:
+            raise ErrorHttp(404, f"No existe un artículo con el código '{codigo}'")
+        return articulo
+
+    def listar_articulos(self, consulta):
+        if 'q' not in consulta:
+            return self._pagina_articulos(consulta)
+        limite = self._limite(consulta, 10)
+        resultados = []
+        for articulo, puntaje in self.inventario.buscar_articulos(consulta['q'], limite, con_puntaje=True):
+            info = articulo.obtener_info()
+            info['puntaje'] = puntaje
+            resultados.append(info)
+        return respuesta_json(resultados)
+
+    def _pagina_articulos(self, consulta):
+        # El cursor es el último código entregado: la página sigue desde él en orden de alta
+        # (los artículos no se eliminan), sin recorrer los anteriores
+        limite = self._limite(consulta, LIMITE_ARTICULOS)
+        if limite <= 0:
+            return respuesta_json([])
+        pagina = self.inventario.articulos_despues(consulta.get('cursor') or None, limite + 1)
+        if pagina is None:
+            raise ErrorHttp(400, "Cursor no válido")
+        respuesta = respuesta_json([a.obtener_info() for a in pagina[:limite]])
+        if len(pagina) > limite:
+            respuesta.cabeceras['X-Cursor-Siguiente'] = quote(pagina[limite - 1].codigo, safe='')
+        return respuesta
+
+    def agregar_articulo(self, datos):
+        codigo = self._campo_texto(datos, 'codigo').upper()
+        nombre = self._campo_texto(datos, 'nombre')
+        descripcion = self._campo_texto(datos, 'descripcion', obligatorio=False)
+        unidad_medida = self._campo_texto(datos, 'unidad_medida')
+        if not self.inventario.agregar_articulo(codigo, nombre, descripcion, unidad_medida):
+            raise ErrorHttp(409, f"Ya existe un artículo con el código '{codigo}'")
+        return respuesta_json(self.inventario.obtener_articulo(codigo).obtener_info(), 201)
+
+    def obtener_articulo(self, consulta, codigo):
+        return respuesta_json(self._articulo(codigo).obtener_info())
+
+    def movimientos_articulo(self, consulta, codigo):
+        articulo = self._articulo(codigo)
+        limite = self._limite(consulta, LIMITE_MOVIMIENTOS)
+        cursor = self._entero(consulta, 'cursor', "Cursor no válido") if 'cursor' in consulta else None
+        if limite <= 0:
+            return respuesta_json([])
+        pagina, siguiente = self.inventario.pagina_movimientos_articulo(articulo.codigo, cursor, limite)
+        respuesta = respuesta_json([m.a_registro() for m in pagina])
+        if siguiente is not None:
+            respuesta.cabeceras['X-Cursor-Siguiente'] = str(siguiente)
+        return respuesta
+
+    def stock_articulo_en_fecha(self, consulta, codigo):
+        articulo = self._articulo(codigo)
+        fecha_hora = self._fecha(consulta)
+        return respuesta_json({
+            'codigo': articulo.codigo,
+            'fecha': fecha_hora.isoformat(),
+            'cantidad': self.inventario.obtener_stock_en_fecha(articulo.codigo, fecha_hora)
+        })
+
+    def stock_en_fecha(self, consulta):
+        fecha_hora = self._fecha(consulta)
+        return respuesta_json({
+            'fecha': fecha_hora.isoformat(),
+            'articulos': self.inventario.obtener_stock_catalogo_en_fecha(fecha_hora)
+        })
+
+    def valoracion_articulo(self, consulta, codigo):
+        articulo = self._articulo(codigo)
+        return respuesta_json(dict(self.inventario.obtener_valoracion_articulo(articulo.codigo),
+                                   codigo=articulo.codigo))
+
+    def valoracion(self, consulta):
+        periodo = consulta.get('periodo', 'mes')
+        if periodo not in ('mes', 'dia'):
+            raise ErrorHttp(400, "El periodo debe ser 'mes' o 'dia'")
+        return respuesta_json({
+            'valor': self.inventario.obtener_valor_inventario(),
+            'costo_ventas': self.inventario.obtener_costo_ventas(periodo)
+        })
+
+    def entrada_mercancia(self, datos):
+        codigo = self._campo_texto(datos, 'codigo').upper()
+        cantidad = self._cantidad(datos)
+        costo_unitario = self._costo_unitario(datos)
+        self._articulo(codigo)
+        motivo = self._campo_texto(datos, 'motivo', obligatorio=False) or "Entrada de mercancía"
+        usuario = self._campo_texto(datos, 'usuario', obligatorio=False) or "Web"
+        if not self.inventario.entrada_mercancia(codigo, cantidad, motivo, usuario, costo_unitario):
+            raise ErrorHttp(409, "No se pudo registrar la entrada")
+        return respuesta_json(self.inventario.obtener_articulo(codigo).obtener_info(), 201)
+
+    def salida_mercancia(self, datos):
+        codigo = self._campo_texto(datos, 'codigo').upper()
+        cantidad = self._cantidad(datos)
+        self._articulo(codigo)
+        motivo = self._campo_texto(datos, 'motivo', obligatorio=False) or "Salida de mercancía"
+        usuario = self._campo_texto(datos, 'usuario', obligatorio=False) or "Web"
+        if not self.inventario.salida_mercancia(codigo, cantidad, motivo, usuario):
+            stock = self.inventario.obtener_stock_actual(codigo)
+            raise ErrorHttp(409, f"Stock insuficiente. Stock disponible: {stock}")
+        return respuesta_json(self.inventario.obtener_articulo(codigo).obtener_info(), 201)
+
+    def listar_movimientos(self, consulta):
+        desde = self._fecha(consulta, 'desde', obligatorio=False, fin_del_dia=False)
+        hasta = self._fecha(consulta, 'hasta', obligatorio=False)
+        tipo_movimiento = None
+        if consulta.get('tipo'):
+            try:
+                tipo_movimiento = TipoMovimiento(consulta['tipo'].upper())
+            except ValueError:
+                raise ErrorHttp(400, "El tipo debe ser ENTRADA o SALIDA")
+        usuario = consulta.get('usuario') or None
+        limite = self._limite(consulta, LIMITE_MOVIMIENTOS)
+        cursor = self._entero(consulta, 'cursor', "Cursor no válido") if 'cursor' in consulta else None
+        if limite <= 0:
+            return respuesta_json([])
+        # Las páginas van de la más reciente a la más antigua; cada una en orden cronológico
+        pagina, siguiente = self.inventario.pagina_movimientos(
+            desde, hasta, tipo_movimiento, usuario, cursor, limite, recientes_primero=True
+        )
+        respuesta = respuesta_json([m.a_registro() for m in reversed(pagina)])
+        if siguiente is not None:
+            respuesta.cabeceras['X-Cursor-Siguiente'] = str(siguiente)
+        return respuesta
+
+    def metricas(self, consulta):
+        return Respuesta(200, METRICAS.texto_prometheus().encode('utf-8'),
+                         'text/plain; version=0.0.4; charset=utf-8')
+
+    def obtener_movimiento(self, consulta, id_movimiento):
+        movimiento = self.inventario.obtener_movimiento(id_movimiento)
+        if movimiento is None:
+            raise ErrorHttp(404, f"No existe el movimiento '{id_movimiento}'")
+        return respuesta_json(movimiento.a_registro())
+
+    def reporte(self, consulta):
+        # Mientras la versión del resumen no cambie se reutiliza el mismo JSON ya armado
+        version = self.inventario.resumen.version
+        if self._reporte is None or self._reporte[0] != version:
+            reporte = self.inventario.generar_reporte_inventario()
+            # Las filas son una vista del resumen (ver FilasReporte): se copian para el JSON
+            reporte['articulos'] = list(reporte['articulos'])
+            self._reporte = reporte['version'], respuesta_json(reporte).cuerpo
+        version, cuerpo = self._reporte
+        return Respuesta(200, cuerpo, cabeceras={'ETag': f'"{version}"'})
+
+    # ------------------------------------------------------------------
+    # Reportes PDF (pesados: se generan en el ejecutor de hilos)
+    # ------------------------------------------------------------------
+
+    async def reporte_pdf(self, consulta):
+        return await self._pdf_en_hilo(None)
+
+    async def reporte_pdf_articulo(self, consulta, codigo):
+        articulo = self._articulo(codigo)
+        return await self._pdf_en_hilo(articulo.codigo)
+
+    async def _pdf_en_hilo(self, codigo_articulo):
+        bucle = asyncio.get_running_loop()
+        contenido, nombre = await bucle.run_in_executor(self.ejecutor, self._generar_pdf, codigo_articulo)
+        return Respuesta(200, contenido, 'application/pdf',
+                         {'Content-Disposition': f'attachment; filename="{nombre}"'})
+
+    def _generar_pdf(self, codigo_articulo):
+        try:
+            from reporte_pdf import GeneradorReportePDF, nombre_reporte_articulo
+        except ImportError:
+            raise ErrorHttp(503, "La librería 'reportlab' no está instalada")
+        if self._generador_pdf is None:
+            self._generador_pdf = GeneradorReportePDF()
+
+        with tempfile.TemporaryDirectory() as directorio:
+            if codigo_articulo is None:
+                nombre = "reporte_inventario.pdf"
+                ruta = self._generador_pdf.generar_reporte_inventario(
+                    self.inventario, os.path.join(directorio, nombre))
+            else:
+                nombre = nombre_reporte_articulo(codigo_articulo)
+                ruta = self._generador_pdf.generar_reporte_articulo(
+                    self.inventario, codigo_articulo, os.path.join(directorio, nombre))
+            with open(ruta, 'rb') as archivo:
+                return archivo.read(), nombre
+
+async def servir(servidor, host, puerto):
+    escucha = await servidor.iniciar(host, puerto)
+    print(f"Servidor del inventario en http://{host}:{puerto}/ (datos en {DIRECTORIO_DATOS})")
+    async with escucha:
+        await escucha.serve_forever()
+
+def main():
+    """Inicia el servidor con el inventario configurado para main.py"""
+    puerto = int(sys.argv[1]) if len(sys.argv) > 1 else 8000
+    host = sys.argv[2] if len(sys.argv) > 2 else '127.0.0.1'
+
+    if os.environ.get('INVENTARIO_METRICAS') != '0':
+        METRICAS.activar()
+    servidor = ServidorInventario(crear_inventario(concurrente=True))
+    try:
+        asyncio.run(servir(servidor, host, puerto))
+    except KeyboardInterrupt:
+        print("\nServidor detenido")
+    finally:
+        servidor.cerrar()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Configuración común de las pruebas (se ejecutan con `python -m pytest` desde py/)
+"""
+
+import os
+import random
+import sys
+import threading
+
+import pytest
+
+# Los módulos del prototipo están sueltos en py/, sin paquete
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from almacenamiento import AlmacenColumnar, AlmacenMemoria, AlmacenSQLite
+from inventario import Inventario
+
+@pytest.fixture(params=['memoria', 'columnar', 'sqlite'])
+def almacen(request, tmp_path):
+    """
+    Cada uno de los almacenes intercambiables del inventario
+    """
+    if request.param == 'memoria':
+        almacen = AlmacenMemoria()
+    elif request.param == 'columnar':
+        almacen = AlmacenColumnar()
+    else:
+        almacen = AlmacenSQLite(str(tmp_path / 'inventario.db'))
+    yield almacen
+    if request.param == 'sqlite':
+        almacen.cerrar()
+
+@pytest.fixture
+def inventario(almacen):
+    """
+    Inventario vacío sobre cada almacén
+    """
+    return Inventario(almacen=almacen)
+
+@pytest.fixture
+def inventario_concurrente(almacen):
+    """
+    Inventario concurrente después de 8 hilos con entradas, salidas y lotes mezclados
+    sobre 20 artículos (A00 a A19)
+    """
+    inventario = Inventario(almacen=almacen, concurrente=True, franjas_candados=8)
+    codigos = [f"A{i:02d}" for i in range(20)]
+    for codigo in codigos:
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+
+    def operar(numero_hilo):
+        azar = random.Random(numero_hilo)
+        for _ in range(400):
+            codigo = azar.choice(codigos)
+            eleccion = azar.random()
+            if eleccion < 0.5:
+                inventario.entrada_mercancia(codigo, azar.randint(1, 10), usuario=f"h{numero_hilo}")
+            elif eleccion < 0.9:
+                inventario.salida_mercancia(codigo, azar.randint(1, 10), usuario=f"h{numero_hilo}")
+            else:
+                inventario.entrada_mercancia_lote(
+                    [(azar.choice(codigos), azar.randint(1, 5)) for _ in range(3)], usuario=f"h{numero_hilo}"
+                )
+
+    hilos = [threading.Thread(target=operar, args=(n,)) for n in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    return inventario
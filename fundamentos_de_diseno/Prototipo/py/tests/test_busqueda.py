@@ -0,0 +1,38 @@
+"""
+Pruebas de la búsqueda por prefijos: el trie recorrido por largo y los prefijos que
+cubren muchas palabras
+"""
+
+import random
+
+from busqueda import TriePrefijos
+
+def test_palabras_por_largo_coincide_con_el_recorrido_completo():
+    azar = random.Random(3)
+    palabras = {''.join(azar.choice('abc') for _ in range(azar.randint(1, 9))) for _ in range(3000)}
+    trie = TriePrefijos()
+    for palabra in palabras:
+        trie.agregar(palabra)
+    for prefijo in ['', 'a', 'ab', 'abc', 'cba', 'aaaaaaaaa', 'abcabcabcz']:
+        esperadas = sorted(p for p in palabras if p.startswith(prefijo))
+        obtenidas = list(trie.palabras_por_largo(prefijo))
+        assert sorted(obtenidas) == esperadas
+        assert [len(p) for p in obtenidas] == sorted(len(p) for p in obtenidas)
+
+def test_prefijo_con_muchas_palabras_no_pierde_coincidencias(inventario):
+    for numero in range(1000):
+        nombre = 'Tornillo' if numero == 999 else 'Tuerca'
+        inventario.agregar_articulo(f"A{numero:04d}", nombre, '', 'unidades')
+    assert [a.codigo for a in inventario.buscar_articulos('a0 tornillo')] == ['A0999']
+    assert [a.codigo for a in inventario.buscar_articulos('a09 torn')] == ['A0999']
+
+def test_una_palabra_respeta_el_orden_y_el_limite(inventario):
+    inventario.agregar_articulo('TOR', 'Llave', '', 'unidades')
+    inventario.agregar_articulo('X1', 'Tor', '', 'unidades')
+    inventario.agregar_articulo('X2', 'Tornillo', '', 'unidades')
+    for numero in range(300):
+        inventario.agregar_articulo(f"Y{numero:03d}", 'Caja', f"tornillos largos {numero}", 'unidades')
+    resultados = inventario.buscar_articulos('tor', limite=3, con_puntaje=True)
+    assert [a.codigo for a, _ in resultados] == ['TOR', 'X1', 'X2']
+    assert [p for _, p in resultados] == sorted((p for _, p in resultados), reverse=True)
+    assert len(inventario.buscar_articulos('torn', limite=50)) == 50
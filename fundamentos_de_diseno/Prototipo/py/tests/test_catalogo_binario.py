@@ -0,0 +1,55 @@
+"""
+Pruebas del catálogo binario abierto con mmap
+"""
+
+import pytest
+
+from articulo import Articulo
+from catalogo_binario import ArticuloSoloLectura, CatalogoMapeado, escribir_catalogo
+
+@pytest.fixture
+def catalogo(tmp_path):
+    articulos = []
+    for i in range(5):
+        articulo = Articulo(f"A{i}", f"Artículo {i}", 'descripción', 'unidades')
+        articulo.cantidad = float(i)
+        articulos.append(articulo)
+    ruta = str(tmp_path / 'catalogo.bin')
+    with open(ruta, 'wb') as archivo:
+        escribir_catalogo(archivo, articulos)
+    catalogo = CatalogoMapeado(ruta)
+    yield catalogo
+    catalogo.cerrar()
+
+def test_por_codigo_siempre_el_mismo_objeto(catalogo):
+    articulo = catalogo['A2']
+    assert catalogo['A2'] is articulo
+    articulo.actualizar_cantidad(7)
+    assert catalogo['A2'].cantidad == 7
+    # El recorrido devuelve el objeto ya creado, con el cambio
+    recorridos = {a.codigo: a for a in catalogo.values()}
+    assert recorridos['A2'] is articulo
+    assert recorridos['A2'].cantidad == 7
+
+def test_recorrido_de_solo_lectura(catalogo):
+    leidos = list(catalogo.values())
+    assert [a.codigo for a in leidos] == ['A0', 'A1', 'A2', 'A3', 'A4']
+    assert [a.cantidad for a in leidos] == [0, 1, 2, 3, 4]
+    assert isinstance(leidos[3], ArticuloSoloLectura)
+    with pytest.raises(AttributeError):
+        leidos[3].actualizar_cantidad(10)
+    with pytest.raises(AttributeError):
+        leidos[3].nombre = 'Otro'
+    assert catalogo['A3'].cantidad == 3
+    # El que se pide por código sí se puede modificar
+    catalogo['A3'].actualizar_cantidad(10)
+    assert catalogo['A3'].cantidad == 10
+
+def test_articulos_agregados_despues(catalogo):
+    nuevo = Articulo('B', 'Artículo B', '', 'kg')
+    catalogo['B'] = nuevo
+    assert len(catalogo) == 6
+    assert list(catalogo)[-1] == 'B'
+    assert catalogo['B'] is nuevo
+    with pytest.raises(KeyError):
+        catalogo['A1'] = Articulo('A1', 'Repetido', '', 'kg')
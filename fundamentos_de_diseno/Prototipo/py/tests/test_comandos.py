@@ -0,0 +1,64 @@
+"""
+Pruebas del modo por lotes: las entradas y salidas seguidas se registran como lote y el
+resultado por línea es el mismo que ejecutándolas de a una
+"""
+
+import io
+import json
+
+import pytest
+
+from comandos import EjecutorComandos
+
+def _ejecutar(inventario, lineas):
+    salida = io.StringIO()
+    ejecutados, fallidos = EjecutorComandos(inventario).ejecutar(lineas, salida)
+    resultados = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+    assert (ejecutados, fallidos) == (len(resultados), sum(not r['ok'] for r in resultados))
+    return resultados
+
+def test_grupo_de_salidas_falla_por_linea(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    inventario.agregar_articulo('B', 'B', '', 'unidades')
+    resultados = _ejecutar(inventario, [
+        'entrada A 10',
+        'entrada B 4 costo_unitario=2',
+        '# comentario',
+        'entrada Z 1',
+        'salida A 3',
+        'salida A 8',
+        'salida A 7',
+        'salida B 1 usuario=Otro',
+        'stock A',
+    ])
+    assert [(r['linea'], r['ok'], r.get('stock')) for r in resultados] == [
+        (1, True, 10), (2, True, 4), (4, False, None), (5, True, 7), (6, False, None),
+        (7, True, 0), (8, True, 3), (9, True, 0),
+    ]
+    assert resultados[2]['error'] == "No existe un artículo con el código 'Z'"
+    assert resultados[4]['error'] == "Stock insuficiente. Stock disponible: 7.0"
+    # Las salidas 5 y 7 van en un mismo lote: comparten fecha y hora
+    salidas_a = [m for m in inventario.obtener_movimientos_articulo('A') if m.es_salida()]
+    assert len(salidas_a) == 2 and salidas_a[0].fecha_hora == salidas_a[1].fecha_hora
+    assert [m.usuario for m in inventario.obtener_movimientos_articulo('B')] == ['Script', 'Otro']
+
+def test_alertas_en_la_ultima_linea_del_grupo(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    inventario.entrada_mercancia('A', 10)
+    resultados = _ejecutar(inventario, ['reposicion A 5', 'salida A 3', 'salida A 3', 'salida A 1'])
+    assert [r.get('alertas') for r in resultados] == [
+        None, None, None, [{'codigo': 'A', 'stock': 3, 'punto_reposicion': 5}],
+    ]
+
+@pytest.mark.parametrize('valor', ['inf', '-inf', 'nan', '1e999', 'Infinity'])
+def test_cantidades_y_costos_no_finitos(inventario, valor):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    resultados = _ejecutar(inventario, [
+        f"entrada A {valor}",
+        f"entrada A 1 costo_unitario={valor}",
+        json.dumps({'op': 'salida', 'codigo': 'A', 'cantidad': valor}),
+        'entrada A 2',
+    ])
+    assert [r['ok'] for r in resultados] == [False, False, False, True]
+    assert 'finito' in resultados[0]['error'] and 'finito' in resultados[1]['error']
+    assert inventario.obtener_stock_actual('A') == 2
@@ -0,0 +1,50 @@
+"""
+Pruebas de la compactación sin persistencia: lo archivado se sigue consultando y el stock
+a una fecha no cambia a ningún lado del corte
+"""
+
+from collections.abc import Iterator
+
+import pytest
+
+from almacenamiento import AlmacenColumnar, AlmacenMemoria, AlmacenSincronizado
+from archivo_movimientos import ArchivoMovimientos
+from inventario import Inventario
+
+@pytest.mark.parametrize('clase', [AlmacenMemoria, AlmacenColumnar])
+def test_compactar_sin_persistencia(clase, tmp_path, monkeypatch):
+    # Bloques chicos: el tramo a archivar se lee en varias vueltas del candado
+    monkeypatch.setattr(AlmacenSincronizado, 'TAMANO_BLOQUE', 7)
+    archivo = ArchivoMovimientos(str(tmp_path), movimientos_por_segmento=10)
+    inventario = Inventario(almacen=clase(), concurrente=True, archivo=archivo)
+    for codigo in ('A', 'B'):
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+    for i in range(30):
+        codigo = 'AB'[i % 2]
+        if i % 5 == 4:
+            inventario.salida_mercancia(codigo, 1)
+        else:
+            inventario.entrada_mercancia(codigo, i + 1, costo_unitario=2.0)
+    todos = list(inventario.obtener_todos_movimientos())
+    fechas = [m.fecha_hora for m in todos]
+    saldos = [inventario.obtener_stock_catalogo_en_fecha(fecha) for fecha in fechas]
+    saldos_a = [inventario.obtener_stock_en_fecha('A', fecha) for fecha in fechas]
+    assert isinstance(inventario.almacen.movimientos_con_saldo(0), Iterator)
+
+    assert inventario.compactar(fechas[20]) == 20
+    assert inventario.contar_movimientos() == 10
+    assert [m.id for m in inventario.movimientos_archivados()] == [m.id for m in todos[:20]]
+    desde, hasta = fechas[5], fechas[12]
+    assert [m.id for m in inventario.movimientos_archivados(desde, hasta)] == [
+        m.id for m in todos[:20] if desde <= m.fecha_hora <= hasta
+    ]
+    assert [m.id for m in inventario.movimientos_archivados(codigo_articulo='B')] == [
+        m.id for m in todos[:20] if m.codigo_articulo == 'B'
+    ]
+    assert [m.id for m in inventario.obtener_movimientos_articulo('A', incluir_archivados=True)] == [
+        m.id for m in todos if m.codigo_articulo == 'A'
+    ]
+    # Antes y después del corte
+    assert [inventario.obtener_stock_catalogo_en_fecha(fecha) for fecha in fechas] == saldos
+    assert [inventario.obtener_stock_en_fecha('A', fecha) for fecha in fechas] == saldos_a
+    assert inventario.obtener_stock_actual('A') == saldos[-1]['A']
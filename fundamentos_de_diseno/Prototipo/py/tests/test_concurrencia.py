@@ -0,0 +1,22 @@
+"""
+Pruebas del inventario usado desde varios hilos (Inventario(concurrente=True))
+"""
+
+from identificadores import numero_id
+
+def test_historial_ordenado_por_fecha_e_id(inventario_concurrente):
+    inventario = inventario_concurrente
+    movimientos = list(inventario.obtener_todos_movimientos())
+    assert len(movimientos) > 1600
+
+    fechas = [m.fecha_hora for m in movimientos]
+    assert fechas == sorted(fechas)
+    ids = [numero_id(m.id) for m in movimientos]
+    assert ids == sorted(ids) and len(set(ids)) == len(ids)
+
+def test_stock_coincide_con_los_movimientos(inventario_concurrente):
+    inventario = inventario_concurrente
+    for articulo in inventario.listar_articulos():
+        neto = sum(m.cantidad if m.es_entrada() else -m.cantidad
+                   for m in inventario.obtener_movimientos_articulo(articulo.codigo))
+        assert articulo.cantidad == neto
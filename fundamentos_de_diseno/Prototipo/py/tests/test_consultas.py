@@ -0,0 +1,133 @@
+"""
+Pruebas de las consultas por rango de fechas, de la paginación de movimientos y del
+stock a una fecha
+"""
+
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from almacenamiento import AlmacenColumnar, AlmacenMemoria
+from archivo_movimientos import ArchivoMovimientos
+from inventario import Inventario
+from movimiento_inventario import TipoMovimiento
+
+def _en_rango(movimientos, desde, hasta):
+    return [m.id for m in movimientos
+            if (desde is None or m.fecha_hora >= desde) and (hasta is None or m.fecha_hora <= hasta)]
+
+def test_rangos_aleatorios_despues_de_carga_concurrente(inventario_concurrente):
+    inventario = inventario_concurrente
+    todos = list(inventario.obtener_todos_movimientos())
+    fechas = [m.fecha_hora for m in todos]
+    azar = random.Random(1)
+    for _ in range(200):
+        desde, hasta = sorted(azar.sample(fechas, 2))
+        desde = desde if azar.random() < 0.9 else None
+        hasta = hasta if azar.random() < 0.9 else None
+        vista = inventario.movimientos_entre(desde, hasta)
+        assert [m.id for m in vista] == _en_rango(todos, desde, hasta)
+
+def test_rango_vacio_y_limites_incluidos(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    for _ in range(5):
+        inventario.entrada_mercancia('A', 1)
+    todos = list(inventario.obtener_todos_movimientos())
+    primero, ultimo = todos[0].fecha_hora, todos[-1].fecha_hora
+    assert len(inventario.movimientos_entre(primero, ultimo)) == 5
+    assert len(inventario.movimientos_entre(ultimo + timedelta(seconds=1))) == 0
+    assert len(inventario.movimientos_entre(hasta=primero - timedelta(seconds=1))) == 0
+
+def test_paginas_cubren_todo_sin_repetir(inventario_concurrente):
+    inventario = inventario_concurrente
+    esperados = [m.id for m in inventario.consultar_movimientos(tipo_movimiento=TipoMovimiento.SALIDA)]
+    for recientes_primero in (False, True):
+        vistos = []
+        cursor = None
+        while True:
+            pagina, cursor = inventario.pagina_movimientos(
+                tipo_movimiento=TipoMovimiento.SALIDA, cursor=cursor, limite=37, recientes_primero=recientes_primero
+            )
+            vistos.extend(m.id for m in pagina)
+            if cursor is None:
+                break
+        assert vistos == (esperados[::-1] if recientes_primero else esperados)
+
+def test_cursor_no_se_corre_con_movimientos_nuevos(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    for _ in range(10):
+        inventario.entrada_mercancia('A', 1)
+    primera, cursor = inventario.pagina_movimientos(limite=4)
+    inventario.entrada_mercancia('A', 1)
+    segunda, _ = inventario.pagina_movimientos(cursor=cursor, limite=4)
+    todos = list(inventario.obtener_todos_movimientos())
+    assert [m.id for m in primera + segunda] == [m.id for m in todos[:8]]
+
+def test_articulos_por_codigo(inventario):
+    codigos = [f"A{i:02d}" for i in range(10)]
+    for codigo in reversed(codigos[5:]):
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+    for codigo in codigos[:5]:
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+    orden = [a.codigo for a in inventario.iterar_articulos()]
+    vistos, cursor = [], None
+    while True:
+        pagina = inventario.articulos_despues(cursor, 3)
+        if not pagina:
+            break
+        vistos.extend(a.codigo for a in pagina)
+        cursor = pagina[-1].codigo
+    assert vistos == orden
+    assert inventario.articulos_despues('NO', 3) is None
+
+def test_movimientos_de_un_articulo_por_paginas(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    inventario.agregar_articulo('B', 'B', '', 'unidades')
+    for i in range(11):
+        inventario.entrada_mercancia('A', i + 1)
+        inventario.entrada_mercancia('B', 1)
+    esperados = [m.id for m in inventario.obtener_movimientos_articulo('A')]
+    paginas, cursor = [], None
+    while True:
+        pagina, cursor = inventario.pagina_movimientos_articulo('A', cursor, 4)
+        paginas.append([m.id for m in pagina])
+        # Los movimientos nuevos no corren las páginas siguientes
+        inventario.entrada_mercancia('A', 1)
+        if cursor is None:
+            break
+    assert [len(pagina) for pagina in paginas] == [4, 4, 3]
+    assert [i for pagina in reversed(paginas) for i in pagina] == esperados
+    assert inventario.pagina_movimientos_articulo('X') == ([], None)
+
+@pytest.mark.parametrize('clase', [AlmacenMemoria, AlmacenColumnar])
+def test_cursor_de_un_articulo_despues_de_compactar(clase, tmp_path):
+    inventario = Inventario(almacen=clase(), archivo=ArchivoMovimientos(str(tmp_path)))
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    inventario.agregar_articulo('B', 'B', '', 'unidades')
+    for _ in range(6):
+        inventario.entrada_mercancia('A', 1)
+        inventario.entrada_mercancia('B', 1)
+    todos = [m.id for m in inventario.obtener_movimientos_articulo('A')]
+    primera, cursor = inventario.pagina_movimientos_articulo('A', limite=2)
+    corte = inventario.obtener_movimientos_articulo('A')[2].fecha_hora
+    assert inventario.compactar(corte) == 4
+    segunda, cursor = inventario.pagina_movimientos_articulo('A', cursor, 2)
+    assert [m.id for m in segunda + primera] == todos[2:]
+    # Lo archivado ya no está en memoria: ahí terminan las páginas
+    assert cursor is None
+
+def test_stock_en_fecha(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    inventario.agregar_articulo('B', 'B', '', 'unidades')
+    for _ in range(4):
+        inventario.entrada_mercancia('A', 5)
+    inventario.salida_mercancia('A', 3)
+    fechas = [m.fecha_hora for m in inventario.obtener_todos_movimientos()]
+    assert inventario.obtener_stock_en_fecha('A', datetime(2000, 1, 1)) == 0
+    assert inventario.obtener_stock_en_fecha('A', fechas[1]) == 10
+    assert inventario.obtener_stock_en_fecha('A', fechas[-1]) == 17
+    assert inventario.obtener_stock_en_fecha('B', fechas[-1]) == 0
+    assert inventario.obtener_stock_en_fecha('X', fechas[-1]) is None
+    assert inventario.obtener_stock_catalogo_en_fecha(datetime(2000, 1, 1)) == {'A': 0, 'B': 0}
+    assert inventario.obtener_stock_catalogo_en_fecha(fechas[2]) == {'A': 15, 'B': 0}
@@ -0,0 +1,54 @@
+"""
+Pruebas del generador de IDs y del secuenciador de movimientos
+"""
+
+from datetime import datetime, timedelta
+
+import identificadores
+from identificadores import GeneradorIds, SecuenciadorMovimientos, decodificar_id, formatear_id, numero_id
+from movimiento_inventario import MovimientoInventario, TipoMovimiento
+
+def test_ids_unicos_y_crecientes():
+    generador = GeneradorIds(fragmento=3)
+    ids = [generador.siguiente() for _ in range(5000)] + generador.siguientes(10000)
+    assert ids == sorted(ids)
+    assert len(set(ids)) == len(ids)
+    assert decodificar_id(ids[0])[1] == 3
+
+def test_formato_de_texto():
+    numero = GeneradorIds().siguiente()
+    texto = formatear_id(numero)
+    assert texto.startswith("MOV_") and len(texto) == 20
+    assert numero_id(texto) == numero
+    assert numero_id("MOV_20250101120000000") is None
+
+def test_la_fecha_no_retrocede_con_el_reloj(monkeypatch):
+    # Al terminar el horario de verano la hora local vuelve una hora atrás
+    base = datetime(2025, 10, 26, 2, 59, 59)
+    lecturas = iter([base, base - timedelta(minutes=59), base + timedelta(seconds=1)])
+
+    class RelojFalso(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next(lecturas)
+
+    monkeypatch.setattr(identificadores, 'datetime', RelojFalso)
+    secuenciador = SecuenciadorMovimientos(GeneradorIds())
+    movimientos = [
+        MovimientoInventario.reconstruir(None, 'A', TipoMovimiento.ENTRADA, 1, '', 'x', None)
+        for _ in range(3)
+    ]
+    for movimiento in movimientos:
+        secuenciador.sellar((movimiento,))
+    assert [m.fecha_hora for m in movimientos] == [base, base, base + timedelta(seconds=1)]
+    ids = [numero_id(m.id) for m in movimientos]
+    assert ids == sorted(ids)
+
+def test_sellar_respeta_fechas_ya_asignadas():
+    secuenciador = SecuenciadorMovimientos(GeneradorIds())
+    futura = datetime.now() + timedelta(days=1)
+    importado = MovimientoInventario.reconstruir(None, 'A', TipoMovimiento.ENTRADA, 1, '', 'x', futura)
+    secuenciador.sellar((importado,))
+    assert importado.fecha_hora == futura and importado.id is not None
+    # Lo que se selle después no queda antes de esa fecha
+    assert secuenciador.ahora() >= futura
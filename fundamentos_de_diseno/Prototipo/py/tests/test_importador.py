@@ -0,0 +1,102 @@
+"""
+Pruebas del importador: artículos y movimientos desde CSV y JSON Lines, filas rechazadas
+con su número de línea y reintento de cada bloque sin las filas con error
+"""
+
+import json
+
+import pytest
+
+from importador import ImportadorInventario
+from movimiento_inventario import TipoMovimiento
+
+def _importador(inventario, tamano_bloque=5000):
+    return ImportadorInventario(inventario, tamano_bloque=tamano_bloque, salida_progreso=None)
+
+def _rechazos(ruta):
+    with open(str(ruta) + '.rechazos.txt', encoding='utf-8') as archivo:
+        return [linea.split(':', 1)[0] for linea in archivo]
+
+def _escribir_jsonl(ruta, filas):
+    ruta.write_text(''.join((fila if isinstance(fila, str) else json.dumps(fila)) + '\n' for fila in filas),
+                    encoding='utf-8')
+
+@pytest.mark.parametrize('extension', ['csv', 'jsonl'])
+def test_articulos_y_movimientos(inventario, tmp_path, extension):
+    articulos = tmp_path / f"articulos.{extension}"
+    movimientos = tmp_path / f"movimientos.{extension}"
+    if extension == 'csv':
+        articulos.write_text(
+            "codigo,nombre,descripcion,unidad_medida\n"
+            "a1,Tornillo,,caja\n"
+            "A2,Tuerca,Acero,unidades\n",
+            encoding='utf-8')
+        movimientos.write_text(
+            "codigo,tipo,cantidad,motivo,fecha_hora,costo_unitario\n"
+            "A1,entrada,10,Compra,,2.5\n"
+            "A1,SALIDA,4,,,\n"
+            "A2,ENTRADA,3,,,\n",
+            encoding='utf-8')
+    else:
+        _escribir_jsonl(articulos, [
+            {'codigo': 'a1', 'nombre': 'Tornillo', 'unidad_medida': 'caja'},
+            {'codigo': 'A2', 'nombre': 'Tuerca', 'descripcion': 'Acero', 'unidad_medida': 'unidades'},
+        ])
+        _escribir_jsonl(movimientos, [
+            {'codigo': 'A1', 'tipo': 'entrada', 'cantidad': 10, 'motivo': 'Compra', 'costo_unitario': 2.5},
+            {'codigo': 'A1', 'tipo': 'SALIDA', 'cantidad': 4},
+            {'codigo': 'A2', 'tipo': 'ENTRADA', 'cantidad': '3'},
+        ])
+    resultado = _importador(inventario).importar_articulos(str(articulos))
+    assert (resultado.leidas, resultado.aplicadas, resultado.rechazadas) == (2, 2, 0)
+    assert inventario.obtener_articulo('A1').nombre == 'Tornillo'
+    assert inventario.obtener_articulo('A2').descripcion == 'Acero'
+    resultado = _importador(inventario).importar_movimientos(str(movimientos))
+    assert (resultado.leidas, resultado.aplicadas, resultado.rechazadas) == (3, 3, 0)
+    assert inventario.obtener_stock_actual('A1') == 6
+    assert inventario.obtener_stock_actual('A2') == 3
+    movimientos_a1 = inventario.obtener_movimientos_articulo('A1')
+    assert [(m.tipo_movimiento, m.motivo, m.usuario) for m in movimientos_a1] == [
+        (TipoMovimiento.ENTRADA, 'Compra', 'Importación'),
+        (TipoMovimiento.SALIDA, 'Importación de historial', 'Importación'),
+    ]
+    assert not (tmp_path / f"movimientos.{extension}.rechazos.txt").exists()
+
+def test_filas_invalidas_con_su_linea(inventario, tmp_path):
+    ruta = tmp_path / 'articulos.jsonl'
+    _escribir_jsonl(ruta, [
+        {'codigo': 'A1', 'nombre': 'Uno', 'unidad_medida': 'u'},
+        '[1, 2]',
+        '"x"',
+        '{no es json',
+        '',
+        {'codigo': 'A2', 'unidad_medida': 'u'},
+        {'codigo': 'a1', 'nombre': 'Repetido', 'unidad_medida': 'u'},
+        {'codigo': 'A3', 'nombre': 'Tres', 'unidad_medida': 'u'},
+    ])
+    resultado = _importador(inventario, tamano_bloque=2).importar_articulos(str(ruta))
+    assert (resultado.leidas, resultado.aplicadas, resultado.rechazadas) == (7, 2, 5)
+    assert _rechazos(ruta) == ['línea 2', 'línea 3', 'línea 4', 'línea 6', 'línea 7']
+    assert inventario.obtener_articulo('A3') is not None
+
+def test_movimientos_invalidos_no_detienen_el_bloque(inventario, tmp_path):
+    inventario.agregar_articulo('A1', 'Uno', '', 'u')
+    ruta = tmp_path / 'movimientos.csv'
+    ruta.write_text(
+        "codigo,tipo,cantidad,fecha_hora\n"
+        "A1,ENTRADA,5,\n"
+        "A1,SALIDA,9,\n"
+        "ZZ,ENTRADA,1,\n"
+        "A1,SALIDA,2,\n"
+        "A1,DEVOLUCION,1,\n"
+        "A1,ENTRADA,abc,\n"
+        "A1,ENTRADA,1,ayer\n"
+        "A1,ENTRADA,4,\n"
+        "A1,ENTRADA,nan,\n"
+        "A1,ENTRADA,inf,\n",
+        encoding='utf-8')
+    # Con bloques de 4, el primero se rechaza entero y se reintenta sin las filas 3 y 4
+    resultado = _importador(inventario, tamano_bloque=4).importar_movimientos(str(ruta))
+    assert (resultado.leidas, resultado.aplicadas, resultado.rechazadas) == (10, 3, 7)
+    assert _rechazos(ruta) == ['línea 3', 'línea 4', 'línea 6', 'línea 7', 'línea 8', 'línea 10', 'línea 11']
+    assert inventario.obtener_stock_actual('A1') == 7
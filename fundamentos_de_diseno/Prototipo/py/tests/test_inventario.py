@@ -0,0 +1,39 @@
+"""
+Pruebas del Inventario: altas, entradas, salidas e índice de movimientos por artículo
+"""
+
+def test_agregar_articulo_repetido(inventario):
+    assert inventario.agregar_articulo('A', 'Tornillo', 'Acero', 'unidades')
+    assert not inventario.agregar_articulo('A', 'Otro', '', 'unidades')
+    assert inventario.contar_articulos() == 1
+
+def test_salida_sin_stock_no_cambia_nada(inventario):
+    inventario.agregar_articulo('A', 'Tornillo', 'Acero', 'unidades')
+    assert inventario.entrada_mercancia('A', 5)
+    assert not inventario.salida_mercancia('A', 6)
+    assert not inventario.salida_mercancia('X', 1)
+    assert not inventario.entrada_mercancia('A', 0)
+    assert inventario.obtener_stock_actual('A') == 5
+    assert inventario.contar_movimientos() == 1
+
+def test_movimientos_por_articulo(inventario):
+    for codigo in ('A', 'B', 'C'):
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+    for i in range(30):
+        inventario.entrada_mercancia('ABC'[i % 3], i + 1, motivo=f"m{i}")
+    inventario.salida_mercancia('B', 2, motivo="venta")
+
+    movimientos_b = inventario.obtener_movimientos_articulo('B')
+    assert [m.motivo for m in movimientos_b] == [f"m{i}" for i in range(1, 30, 3)] + ["venta"]
+    assert all(m.codigo_articulo == 'B' for m in movimientos_b)
+    assert inventario.obtener_movimientos_articulo('X') == []
+    # Cambiar la lista devuelta no toca el índice
+    movimientos_b.clear()
+    assert len(inventario.obtener_movimientos_articulo('B')) == 11
+
+def test_obtener_movimiento_por_id(inventario):
+    inventario.agregar_articulo('A', 'Tornillo', 'Acero', 'unidades')
+    inventario.entrada_mercancia('A', 3, motivo="compra")
+    movimiento = inventario.obtener_todos_movimientos()[0]
+    assert inventario.obtener_movimiento(movimiento.id).motivo == "compra"
+    assert inventario.obtener_movimiento('MOV_FFFFFFFFFFFFFFFF') is None
@@ -0,0 +1,82 @@
+"""
+Pruebas de las operaciones por lote: se aplican todas o ninguna
+"""
+
+import math
+from datetime import datetime, timedelta
+
+import pytest
+
+from movimiento_inventario import TipoMovimiento
+
+def _preparar(inventario):
+    for codigo in ('A', 'B'):
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+    inventario.entrada_mercancia('A', 10)
+    inventario.entrada_mercancia('B', 5)
+
+def test_lote_de_entradas_completo(inventario):
+    _preparar(inventario)
+    ok, errores = inventario.entrada_mercancia_lote([('A', 1), ('B', 2, "compra"), ('A', 3, "otra", 4.5)])
+    assert ok and errores == []
+    assert inventario.obtener_stock_actual('A') == 14
+    assert inventario.obtener_stock_actual('B') == 7
+    ultimos = inventario.ultimos_movimientos(3)
+    assert [m.motivo for m in ultimos] == ["otra", "compra", "Entrada de mercancía"]
+    assert len({m.fecha_hora for m in ultimos}) == 1
+
+def test_un_error_no_aplica_nada(inventario):
+    _preparar(inventario)
+    antes = inventario.contar_movimientos()
+    ok, errores = inventario.entrada_mercancia_lote([('A', 1), ('X', 1), ('B', -2)])
+    assert not ok
+    assert [posicion for posicion, _ in errores] == [1, 2]
+    assert inventario.obtener_stock_actual('A') == 10
+    assert inventario.obtener_stock_actual('B') == 5
+    assert inventario.contar_movimientos() == antes
+
+@pytest.mark.parametrize('valor', [math.nan, math.inf, -math.inf])
+def test_cantidades_y_costos_no_finitos(inventario, valor):
+    # Una operación sola y un lote aplican la misma validación
+    _preparar(inventario)
+    antes = inventario.contar_movimientos()
+    assert not inventario.entrada_mercancia('A', valor)
+    assert not inventario.salida_mercancia('A', valor)
+    assert not inventario.entrada_mercancia('A', 1, costo_unitario=valor)
+    assert not inventario.entrada_mercancia_lote([('A', valor)])[0]
+    assert not inventario.salida_mercancia_lote([('A', valor)])[0]
+    assert not inventario.entrada_mercancia_lote([('A', 1, "compra", valor)])[0]
+    assert inventario.contar_movimientos() == antes
+    assert inventario.obtener_stock_actual('A') == 10
+
+def test_salidas_se_validan_con_el_total_del_lote(inventario):
+    _preparar(inventario)
+    # Cada salida alcanza por sí sola, pero juntas superan el stock de A
+    ok, errores = inventario.salida_mercancia_lote([('A', 6), ('B', 1), ('A', 6)])
+    assert not ok and [posicion for posicion, _ in errores] == [2]
+    assert inventario.obtener_stock_actual('A') == 10
+    assert inventario.obtener_stock_actual('B') == 5
+    ok, _ = inventario.salida_mercancia_lote([('A', 6), ('A', 4)])
+    assert ok and inventario.obtener_stock_actual('A') == 0
+
+def test_historial_importado_en_orden(inventario):
+    _preparar(inventario)
+    ultima = inventario.ultimos_movimientos(1)[0].fecha_hora
+    ENTRADA, SALIDA = TipoMovimiento.ENTRADA, TipoMovimiento.SALIDA
+    ok, errores = inventario.registrar_movimientos_lote([
+        ('A', ENTRADA, 2, "m1", ultima),
+        ('A', SALIDA, 1, "m2", ultima - timedelta(seconds=1)),
+        ('B', SALIDA, 9, "m3", None),
+        ('B', ENTRADA, 1, "m4", datetime.now() + timedelta(days=1)),
+    ])
+    assert not ok and [posicion for posicion, _ in errores] == [1, 2, 3]
+    assert inventario.obtener_stock_actual('A') == 10
+
+    ok, _ = inventario.registrar_movimientos_lote([
+        ('A', ENTRADA, 2, "m1", ultima),
+        ('A', SALIDA, 1, "m2", None, None),
+        ('B', ENTRADA, 1, "m3", None, 3.0),
+    ])
+    assert ok
+    assert inventario.obtener_stock_actual('A') == 11
+    assert [m.motivo for m in inventario.obtener_movimientos_articulo('A')][-2:] == ["m1", "m2"]
@@ -0,0 +1,91 @@
+"""
+Pruebas del registro de métricas: histogramas acumulados en el formato de Prometheus,
+rechazos y errores de los métodos medidos, y desactivar vuelve a los métodos originales
+"""
+
+import pytest
+
+from metricas import Histograma, RegistroMetricas
+
+class Operaciones:
+    def aceptar(self):
+        return True
+
+    def rechazar(self):
+        return False
+
+    def lote(self, ok):
+        return (ok, [] if ok else ['error'])
+
+    def fallar(self):
+        raise ValueError('falla')
+
+def _valores(texto, prefijo):
+    return [linea.rsplit(' ', 1) for linea in texto.splitlines() if linea.startswith(prefijo)]
+
+def test_histograma_acumulado_termina_en_inf():
+    histograma = Histograma()
+    for valor in (0.00001, 0.003, 0.004, 20.0):
+        histograma.observar(valor)
+    lineas = histograma.lineas('latencia', (('operacion', 'x'),))
+    cubetas = [linea.rsplit(' ', 1) for linea in lineas if linea.startswith('latencia_bucket')]
+    assert len(cubetas) == len(histograma.limites) + 1
+    cuentas = dict(cubetas)
+    # El límite es inclusivo y cada cubeta incluye a las anteriores
+    assert cuentas['latencia_bucket{operacion="x",le="1e-05"}'] == '1'
+    assert cuentas['latencia_bucket{operacion="x",le="0.0025"}'] == '1'
+    assert cuentas['latencia_bucket{operacion="x",le="0.005"}'] == '3'
+    assert cuentas['latencia_bucket{operacion="x",le="10.0"}'] == '3'
+    assert cubetas[-1] == ['latencia_bucket{operacion="x",le="+Inf"}', '4']
+    numeros = [int(cuenta) for _, cuenta in cubetas]
+    assert numeros == sorted(numeros)
+    assert 'latencia_count{operacion="x"} 4' in lineas
+    suma = next(linea for linea in lineas if linea.startswith('latencia_sum'))
+    assert float(suma.rsplit(' ', 1)[1]) == pytest.approx(20.00701)
+
+def test_rechazos_y_errores():
+    registro = RegistroMetricas()
+    registro.registrar_clase(Operaciones, ['aceptar', 'rechazar', 'lote', 'fallar'], 'prueba', 'operacion')
+    registro.activar()
+    try:
+        operaciones = Operaciones()
+        assert operaciones.aceptar() is True
+        assert operaciones.rechazar() is False
+        assert operaciones.lote(True) == (True, [])
+        assert operaciones.lote(False) == (False, ['error'])
+        with pytest.raises(ValueError):
+            operaciones.fallar()
+        texto = registro.texto_prometheus()
+    finally:
+        registro.desactivar()
+    assert '# TYPE prueba_segundos histogram' in texto
+    assert dict(_valores(texto, 'prueba_rechazos_total')) == {
+        'prueba_rechazos_total{operacion="aceptar"}': '0',
+        'prueba_rechazos_total{operacion="rechazar"}': '1',
+        'prueba_rechazos_total{operacion="lote"}': '1',
+        'prueba_rechazos_total{operacion="fallar"}': '0',
+    }
+    assert dict(_valores(texto, 'prueba_errores_total'))['prueba_errores_total{operacion="fallar"}'] == '1'
+    assert dict(_valores(texto, 'prueba_segundos_count')) == {
+        'prueba_segundos_count{operacion="aceptar"}': '1',
+        'prueba_segundos_count{operacion="rechazar"}': '1',
+        'prueba_segundos_count{operacion="lote"}': '2',
+        'prueba_segundos_count{operacion="fallar"}': '1',
+    }
+
+def test_desactivar_restaura_los_metodos():
+    originales = {metodo: Operaciones.__dict__[metodo] for metodo in ('aceptar', 'lote')}
+    registro = RegistroMetricas()
+    registro.registrar_clase(Operaciones, ['aceptar'], 'prueba', 'operacion')
+    # Sin activar no se toca la clase
+    assert Operaciones.__dict__['aceptar'] is originales['aceptar']
+    registro.activar()
+    # Una clase declarada con las métricas activas se envuelve en el momento
+    registro.registrar_clase(Operaciones, ['lote'], 'prueba', 'operacion')
+    assert all(Operaciones.__dict__[metodo] is not original for metodo, original in originales.items())
+    Operaciones().aceptar()
+    registro.desactivar()
+    assert all(Operaciones.__dict__[metodo] is original for metodo, original in originales.items())
+    # Los valores medidos se conservan
+    Operaciones().aceptar()
+    assert 'prueba_segundos_count{operacion="aceptar"} 1' in registro.texto_prometheus()
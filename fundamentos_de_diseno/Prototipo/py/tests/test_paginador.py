@@ -0,0 +1,92 @@
+"""
+Pruebas del paginador: líneas formateadas a pedido sobre secuencias y generadores, filtro,
+salto a una página inexistente y escritura en bloques cuando la salida no es una terminal
+"""
+
+import io
+
+import paginador
+from paginador import LineasListado, Paginador
+
+class SalidaContada(io.StringIO):
+    def __init__(self):
+        super().__init__()
+        self.escrituras = 0
+
+    def write(self, texto):
+        self.escrituras += 1
+        return super().write(texto)
+
+def _paginador(ordenes, salida, **opciones):
+    ordenes = iter(ordenes)
+    return Paginador(salida=salida, entrada=lambda _: next(ordenes), filas_por_pagina=3,
+                     interactivo=True, **opciones)
+
+def test_secuencia_formatea_solo_el_tramo():
+    formateadas = []
+
+    def formato(fila):
+        formateadas.append(fila)
+        return f"fila {fila}"
+
+    lineas = LineasListado(list(range(10)), formato, limite=8)
+    assert lineas.total == 8
+    assert lineas.tramo(3, 5) == ['fila 3', 'fila 4']
+    assert formateadas == [3, 4]
+    assert lineas.tramo(6, 20) == ['fila 6', 'fila 7']
+    assert not lineas.hay_desde(8)
+    assert list(lineas)[-1] == 'fila 7'
+
+def test_generador_se_lee_a_medida_y_se_puede_volver():
+    leidas = []
+
+    def filas():
+        for numero in range(10):
+            leidas.append(numero)
+            yield numero
+
+    lineas = LineasListado(filas(), str)
+    assert lineas.tramo(0, 3) == ['0', '1', '2']
+    assert len(leidas) == 3 and lineas.total is None
+    assert lineas.hay_desde(3) and len(leidas) == 4
+    # Volver atrás no vuelve a leer el generador
+    assert lineas.tramo(1, 2) == ['1']
+    assert len(leidas) == 4
+    assert not lineas.hay_desde(10)
+    assert lineas.total == 10
+    assert list(lineas) == [str(numero) for numero in range(10)]
+
+def test_filtro_sin_distinguir_mayusculas():
+    lineas = LineasListado([f"Fila {numero}" for numero in range(12)], str, filtro='FILA 1')
+    assert list(lineas) == ['Fila 1', 'Fila 10', 'Fila 11']
+    assert lineas.total == 3
+
+def test_ir_a_una_pagina_que_no_existe_lleva_a_la_ultima():
+    for filas in (list(range(10)), iter(range(10))):
+        salida = io.StringIO()
+        assert _paginador(['99', 'q'], salida).mostrar(filas, str, ['Encabezado']) == 1
+        texto = salida.getvalue()
+        assert '-- Página 4 de 4 --' in texto
+        assert texto.count('Encabezado') == 2
+        assert texto.split('Encabezado')[-1].splitlines()[1] == '9'
+
+def test_filtrar_y_avanzar_hasta_el_final():
+    salida = io.StringIO()
+    ordenes = ['/fila 1', '']
+    mostradas = _paginador(ordenes, salida).mostrar((f"fila {numero}" for numero in range(12)), str)
+    texto = salida.getvalue()
+    assert "(filtro: 'fila 1')" in texto
+    assert texto.split("(filtro: 'fila 1')")[-1].splitlines()[1:4] == ['fila 1', 'fila 10', 'fila 11']
+    # Con el filtro hay una sola página: Enter la termina
+    assert mostradas == 3
+
+def test_sin_terminal_escribe_en_bloques(monkeypatch):
+    monkeypatch.setattr(paginador, 'LINEAS_POR_BLOQUE', 4)
+    salida = SalidaContada()
+    assert Paginador(salida=salida).mostrar(range(10), str, ['Encabezado']) == 10
+    assert salida.getvalue() == 'Encabezado\n' + ''.join(f"{numero}\n" for numero in range(10))
+    # Encabezado y tres bloques de hasta 4 líneas
+    assert salida.escrituras == 4
+    salida = SalidaContada()
+    assert Paginador(salida=salida, limite_filas=7).mostrar(list(range(10)), str) == 7
+    assert salida.escrituras == 2
@@ -0,0 +1,45 @@
+"""
+Pruebas del modo de perfilado: operaciones anidadas dejan su .prof y su .txt, la de afuera
+incluye el perfil de la de adentro y resumen.txt lista toda la sesión
+"""
+
+import pstats
+
+import pytest
+
+from perfilado import Perfilador
+
+def _trabajo_interno():
+    return sum(range(10000))
+
+def _funciones(ruta):
+    return {funcion for _, _, funcion in pstats.Stats(str(ruta)).stats}
+
+def test_operaciones_anidadas(tmp_path):
+    perfilador = Perfilador(str(tmp_path))
+    try:
+        def opcion():
+            return perfilador.medir(_trabajo_interno, 'pdf') + 1
+
+        assert perfilador.medir(opcion, 'Opción 1: listar') == sum(range(10000)) + 1
+        with pytest.raises(ZeroDivisionError):
+            perfilador.medir(lambda: 1 / 0, 'falla')
+    finally:
+        perfilador.cerrar()
+
+    # La de adentro empieza después pero termina primero; cada una conserva su número
+    assert [(numero, nombre) for numero, nombre, *_ in perfilador.operaciones] == [
+        (2, 'pdf'), (1, 'Opción 1: listar'), (3, 'falla'),
+    ]
+    archivos = sorted(ruta.name for ruta in tmp_path.iterdir())
+    assert archivos == ['001_Opci_n_1_listar.prof', '001_Opci_n_1_listar.txt', '002_pdf.prof', '002_pdf.txt',
+                        '003_falla.prof', '003_falla.txt', 'resumen.txt']
+    assert '_trabajo_interno' in _funciones(tmp_path / '002_pdf.prof')
+    assert {'opcion', '_trabajo_interno'} <= _funciones(tmp_path / '001_Opci_n_1_listar.prof')
+    informe = (tmp_path / '002_pdf.txt').read_text(encoding='utf-8')
+    assert informe.startswith('Operación: pdf\nDuración: ')
+    assert '=== Funciones con más tiempo propio (tottime) ===' in informe
+    resumen = (tmp_path / 'resumen.txt').read_text(encoding='utf-8').splitlines()
+    filas = [linea.split()[:2] for linea in resumen[4:7]]
+    assert filas == [['1', 'Opción'], ['2', 'pdf'], ['3', 'falla']]
+    assert any('Toda la sesión' in linea for linea in resumen)
@@ -0,0 +1,294 @@
+"""
+Pruebas de la persistencia: reabrir el inventario no pierde stock, historial ni valoración
+"""
+
+import json
+import os
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+
+from almacenamiento import AlmacenColumnar, AlmacenMemoria
+from catalogo_binario import leer_articulos
+from inventario import Inventario
+from persistencia import PersistenciaInventario
+
+ALMACENES = {'memoria': AlmacenMemoria, 'columnar': AlmacenColumnar}
+
+@pytest.fixture(params=sorted(ALMACENES))
+def abrir(request, tmp_path):
+    """
+    Abre (o vuelve a abrir) un inventario con persistencia en una carpeta temporal
+    """
+    abiertos = []
+
+    def abrir_inventario(registros_por_instantanea=5, **opciones):
+        persistencia = PersistenciaInventario(str(tmp_path), registros_por_instantanea=registros_por_instantanea,
+                                              **opciones)
+        inventario = Inventario(persistencia=persistencia, almacen=ALMACENES[request.param]())
+        abiertos.append(inventario)
+        return inventario
+
+    yield abrir_inventario
+    for inventario in abiertos:
+        inventario.cerrar()
+
+def ids(movimientos):
+    return [m.id for m in movimientos]
+
+def simular_caida(inventario):
+    """
+    Deja el inventario como si el proceso se hubiera cortado: lo escrito en el diario
+    queda en disco, pero no se toma la instantánea final
+    """
+    inventario.persistencia.diario.cerrar()
+    inventario.persistencia.diario = None
+
+def test_reabrir_conserva_el_historial(abrir):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    for _ in range(10):
+        assert inventario.entrada_mercancia('A', 1)
+    antes = ids(inventario.obtener_todos_movimientos())
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert inventario.obtener_stock_actual('A') == 10
+    assert ids(inventario.obtener_todos_movimientos()) == antes
+    assert ids(inventario.obtener_movimientos_articulo('A')) == antes
+    assert inventario.obtener_movimiento(antes[0]) is not None
+
+def test_lote_rechazado_no_queda_en_el_diario(abrir):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    assert inventario.entrada_mercancia_lote([('A', 5), ('A', 2)]) == (True, [])
+    ok, errores = inventario.salida_mercancia_lote([('A', 3), ('B', 1), ('A', 1)])
+    assert not ok and [posicion for posicion, _ in errores] == [1]
+    antes = ids(inventario.obtener_todos_movimientos())
+    simular_caida(inventario)
+
+    inventario = abrir()
+    assert inventario.obtener_stock_actual('A') == 7
+    assert ids(inventario.obtener_todos_movimientos()) == antes
+    assert len(antes) == 2
+
+def test_articulos_por_codigo_despues_de_reabrir(abrir):
+    inventario = abrir()
+    for i in range(7):
+        inventario.agregar_articulo(f"A{i}", f"A{i}", '', 'unidades')
+    inventario.cerrar()
+
+    inventario = abrir()
+    inventario.agregar_articulo('B0', 'B0', '', 'unidades')
+    inventario.agregar_articulo('B1', 'B1', '', 'unidades')
+    inventario.entrada_mercancia('A2', 3)
+    vistos, cursor = [], None
+    while True:
+        pagina = inventario.articulos_despues(cursor, 4)
+        if not pagina:
+            break
+        vistos.extend((a.codigo, a.cantidad) for a in pagina)
+        cursor = pagina[-1].codigo
+    assert vistos == [(a.codigo, a.cantidad) for a in inventario.iterar_articulos()]
+    assert len(vistos) == 9 and ('A2', 3) in vistos
+    assert inventario.articulos_despues('B1', 4) == []
+    assert inventario.articulos_despues('Z', 4) is None
+
+def test_stock_en_fecha_despues_de_reabrir(abrir):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    inventario.agregar_articulo('B', 'Artículo B', '', 'unidades')
+    for _ in range(10):
+        inventario.entrada_mercancia('A', 1)
+    inventario.salida_mercancia('A', 4)
+    fechas = [m.fecha_hora for m in inventario.obtener_todos_movimientos()]
+    antes = [inventario.obtener_stock_en_fecha('A', fecha) for fecha in fechas]
+    assert antes[-1] == 6
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert inventario.obtener_stock_en_fecha('A', datetime(2000, 1, 1)) == 0
+    assert [inventario.obtener_stock_en_fecha('A', fecha) for fecha in fechas] == antes
+    assert inventario.obtener_stock_catalogo_en_fecha(datetime(2000, 1, 1)) == {'A': 0, 'B': 0}
+    assert inventario.obtener_stock_catalogo_en_fecha(fechas[4]) == {'A': 5, 'B': 0}
+
+def test_stock_en_fecha_sin_historial_guardado(abrir, tmp_path):
+    # Instantánea del formato anterior sin su diario: el historial empieza en ella
+    fecha = datetime(2024, 3, 1, 10, 0)
+    with open(tmp_path / 'instantanea.json', 'w', encoding='utf-8') as archivo:
+        json.dump({'fecha': fecha.isoformat(), 'articulos': [['A', 'Artículo A', '', 'kg', 8.0]]}, archivo)
+
+    inventario = abrir()
+    inventario.salida_mercancia('A', 3)
+    assert inventario.obtener_stock_en_fecha('A', fecha - timedelta(days=1)) is None
+    assert inventario.obtener_stock_catalogo_en_fecha(fecha - timedelta(days=1)) is None
+    assert inventario.obtener_stock_en_fecha('A', fecha) == 8
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert inventario.obtener_stock_en_fecha('A', fecha - timedelta(days=1)) is None
+    assert inventario.obtener_stock_en_fecha('A', fecha) == 8
+    assert inventario.obtener_stock_actual('A') == 5
+
+def test_caida_sin_cerrar(abrir, tmp_path):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    inventario.agregar_articulo('B', 'Artículo B', '', 'unidades')
+    for i in range(12):
+        inventario.entrada_mercancia('A' if i % 2 else 'B', 3)
+    inventario.salida_mercancia_lote([('A', 1), ('B', 2)])
+    antes = ids(inventario.obtener_todos_movimientos())
+
+    simular_caida(inventario)
+
+    # Lo posterior a la última instantánea sale del diario
+    reabierto = abrir()
+    assert ids(reabierto.obtener_todos_movimientos()) == antes
+    assert reabierto.obtener_stock_actual('A') == 17
+    assert reabierto.obtener_stock_actual('B') == 16
+
+def test_caida_antes_de_archivar_el_tramo(abrir, tmp_path):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    for _ in range(3):
+        inventario.entrada_mercancia('A', 2)
+    # La instantánea queda escrita pero el tramo cerrado del diario no llega al archivo
+    inventario.persistencia._archivar_tramos = lambda numeros, stock: None
+    inventario.entrada_mercancia('A', 2)
+    inventario.salida_mercancia('A', 1)
+    antes = ids(inventario.obtener_todos_movimientos())
+    simular_caida(inventario)
+
+    reabierto = abrir()
+    assert ids(reabierto.obtener_todos_movimientos()) == antes
+    assert reabierto.obtener_stock_actual('A') == 7
+    # Los saldos que se calcularon al archivarlo al arrancar son los de cada movimiento
+    assert reabierto.obtener_stock_en_fecha('A', reabierto.obtener_todos_movimientos()[3].fecha_hora) == 8
+
+def test_el_diario_se_rota(abrir, tmp_path):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    for _ in range(100):
+        inventario.entrada_mercancia('A', 1)
+    diarios = [nombre for nombre in os.listdir(tmp_path) if nombre.startswith('diario')]
+    # Solo el tramo en curso: los anteriores ya pasaron al archivo de movimientos
+    assert len(diarios) == 1
+    assert os.path.getsize(tmp_path / diarios[0]) < 5 * 400
+
+def test_instantanea_solo_con_los_articulos_cambiados(abrir, tmp_path):
+    inventario = abrir(registros_por_instantanea=1000)
+    for i in range(200):
+        inventario.agregar_articulo(f"A{i:03d}", f"Artículo {i}", '', 'unidades')
+    inventario.cerrar()
+
+    inventario = abrir()
+    for _ in range(5):
+        inventario.entrada_mercancia('A007', 1)
+    cambios = sorted(nombre for nombre in os.listdir(tmp_path) if nombre.startswith('cambios-') and
+                     nombre.endswith('.bin'))
+    assert [a.codigo for a in leer_articulos(str(tmp_path / cambios[-1]))] == ['A007']
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert inventario.contar_articulos() == 200
+    assert inventario.obtener_stock_actual('A007') == 5
+    assert len(inventario.obtener_movimientos_articulo('A007')) == 5
+
+def test_consolidacion_conserva_stock_valoracion_y_puntos(abrir, tmp_path):
+    inventario = abrir(registros_por_instantanea=3, cambios_maximos=4)
+    for i in range(10):
+        inventario.agregar_articulo(f"A{i}", f"Artículo {i}", '', 'unidades')
+    inventario.establecer_punto_reposicion('A1', 5)
+    for i in range(40):
+        inventario.entrada_mercancia(f"A{i % 10}", 2, costo_unitario=1.5 + i)
+        inventario.salida_mercancia(f"A{i % 7}", 1)
+    inventario.establecer_punto_reposicion('A1', None)
+    inventario.establecer_punto_reposicion('A2', 50)
+    stock = {a.codigo: a.cantidad for a in inventario.iterar_articulos()}
+    valor = inventario.obtener_valor_inventario()
+    costo_ventas = inventario.obtener_costo_ventas('dia')
+    antes = ids(inventario.obtener_todos_movimientos())
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert {a.codigo: a.cantidad for a in inventario.iterar_articulos()} == stock
+    assert inventario.obtener_valor_inventario() == pytest.approx(valor)
+    for dia, costos in inventario.obtener_costo_ventas('dia').items():
+        assert costos == pytest.approx(costo_ventas[dia])
+    assert ids(inventario.obtener_todos_movimientos()) == antes
+    assert inventario.reposicion.puntos == {'A2': 50}
+
+def test_compactar_con_persistencia(abrir):
+    inventario = abrir()
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    for _ in range(8):
+        inventario.entrada_mercancia('A', 1)
+    for _ in range(4):
+        inventario.entrada_mercancia('A', 1)
+    antes = ids(inventario.obtener_todos_movimientos())
+    assert inventario.compactar(antes_de=inventario.obtener_todos_movimientos()[8].fecha_hora) == 8
+    assert len(inventario.obtener_todos_movimientos()) == 4
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert ids(inventario.obtener_todos_movimientos()) == antes[8:]
+    assert ids(inventario.movimientos_archivados()) == antes[:8]
+    assert ids(inventario.obtener_movimientos_articulo('A', incluir_archivados=True)) == antes
+    assert inventario.obtener_stock_actual('A') == 12
+
+def test_migra_el_formato_anterior(abrir, tmp_path):
+    fecha = datetime(2024, 3, 1, 10, 0)
+    registros = [
+        {'tipo': 'articulo', 'codigo': 'A', 'nombre': 'Artículo A', 'descripcion': '', 'unidad_medida': 'kg'},
+        {'tipo': 'movimiento', 'movimiento': {
+            'id': '1', 'codigo_articulo': 'A', 'tipo_movimiento': 'ENTRADA', 'cantidad': 5.0,
+            'motivo': 'Compra', 'usuario': 'ana', 'fecha_hora': fecha.isoformat(), 'costo_unitario': 2.0}},
+        {'tipo': 'lote', 'movimientos': [
+            ['2', 'A', 'SALIDA', 2.0, 'Venta', 'ana', (fecha + timedelta(hours=1)).isoformat()]]},
+    ]
+    with open(tmp_path / 'diario.jsonl', 'w', encoding='utf-8') as archivo:
+        for registro in registros:
+            archivo.write(json.dumps(registro) + '\n')
+
+    inventario = abrir()
+    assert inventario.obtener_stock_actual('A') == 3
+    assert ids(inventario.obtener_todos_movimientos()) == ['1', '2']
+    assert not os.path.exists(tmp_path / 'diario.jsonl')
+    inventario.cerrar()
+
+    inventario = abrir()
+    assert ids(inventario.obtener_todos_movimientos()) == ['1', '2']
+    assert inventario.obtener_stock_en_fecha('A', fecha) == 5
+
+def test_instantaneas_con_varios_hilos(tmp_path):
+    persistencia = PersistenciaInventario(str(tmp_path), registros_por_instantanea=50)
+    inventario = Inventario(persistencia=persistencia, concurrente=True, franjas_candados=8)
+    codigos = [f"A{i:02d}" for i in range(20)]
+    for codigo in codigos:
+        inventario.agregar_articulo(codigo, codigo, '', 'unidades')
+
+    def operar(numero_hilo):
+        for i in range(300):
+            codigo = codigos[(numero_hilo * 7 + i) % len(codigos)]
+            if i % 3:
+                inventario.entrada_mercancia(codigo, 2)
+            else:
+                inventario.salida_mercancia(codigo, 1)
+
+    hilos = [threading.Thread(target=operar, args=(n,)) for n in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    stock = {a.codigo: a.cantidad for a in inventario.iterar_articulos()}
+    antes = ids(inventario.obtener_todos_movimientos())
+    fechas = [m.fecha_hora for m in inventario.obtener_todos_movimientos()[::97]]
+    saldos = [inventario.obtener_stock_catalogo_en_fecha(fecha) for fecha in fechas]
+    inventario.cerrar()
+
+    inventario = Inventario(persistencia=PersistenciaInventario(str(tmp_path)))
+    assert {a.codigo: a.cantidad for a in inventario.iterar_articulos()} == stock
+    assert ids(inventario.obtener_todos_movimientos()) == antes
+    assert [inventario.obtener_stock_catalogo_en_fecha(fecha) for fecha in fechas] == saldos
+    inventario.cerrar()
@@ -0,0 +1,84 @@
+"""
+Pruebas de los reportes PDF (se omiten si reportlab no está instalado)
+"""
+
+import re
+
+import pytest
+
+pytest.importorskip('reportlab')
+
+from reporte_pdf import (ANCHOS_ARTICULOS, COLUMNAS_ARTICULOS, ESTILO_TABLA_ARTICULOS, GeneradorReportePDF,
+                         TablaPorPaginas)
+
+@pytest.fixture
+def inventario_con_datos(inventario):
+    for i in range(150):
+        inventario.agregar_articulo(f"A{i:03d}", f"Artículo {i}", 'descripción', 'unidades')
+    for i in range(12):
+        inventario.entrada_mercancia(f"A{i:03d}", 10, costo_unitario=2.5)
+        inventario.salida_mercancia(f"A{i:03d}", 3)
+    return inventario
+
+def _texto_pdf(ruta):
+    pypdf = pytest.importorskip('pypdf')
+    return '\n'.join(pagina.extract_text() for pagina in pypdf.PdfReader(ruta).pages)
+
+def test_los_dos_modos_dan_el_mismo_reporte(inventario_con_datos, tmp_path):
+    generador = GeneradorReportePDF()
+    normal = _texto_pdf(generador.generar_reporte_inventario(
+        inventario_con_datos, str(tmp_path / 'normal.pdf'), modo_grande=False))
+    grande = _texto_pdf(generador.generar_reporte_inventario(
+        inventario_con_datos, str(tmp_path / 'grande.pdf'), modo_grande=True))
+    assert generador.estadisticas_ultimo_reporte['articulos'] == 150
+    assert generador.estadisticas_ultimo_reporte['paginas'] > 1
+    for texto in (normal, grande):
+        for seccion in ('DETALLE DE ARTÍCULOS', 'COSTO DE VENTAS POR MES', 'MOVIMIENTOS RECIENTES'):
+            assert seccion in texto
+        assert all(f"A{i:03d}" in texto for i in range(150))
+    # Solo cambia la fecha de generación
+    sin_fecha = re.compile(r'\d{2}/\d{2}/\d{4} \d{2}:\d{2}:\d{2}')
+    assert sin_fecha.sub('', normal) == sin_fecha.sub('', grande)
+
+def test_tabla_por_paginas_lee_de_a_una_pagina(tmp_path):
+    from reportlab.platypus import SimpleDocTemplate
+
+    leidas = []
+
+    def filas():
+        for i in range(500):
+            leidas.append(i)
+            yield [f"A{i:03d}", 'Nombre', 'Descripción', '1.0', 'kg']
+
+    tabla = TablaPorPaginas(filas(), COLUMNAS_ARTICULOS, ANCHOS_ARTICULOS, ESTILO_TABLA_ARTICULOS)
+    ancho, alto = 450, 300
+    assert tabla.wrap(ancho, alto)[1] > alto
+    primera, resto = tabla.split(ancho, alto)
+    filas_primera = len(primera._cellvalues) - 1
+    assert 0 < filas_primera < 500
+    assert primera.wrap(ancho, alto)[1] <= alto
+    # Solo se leyó lo que entra en la página (más una fila para saber si quedan)
+    assert len(leidas) == filas_primera + 1
+
+    doc = SimpleDocTemplate(str(tmp_path / 'tabla.pdf'))
+    doc.build([resto])
+    assert len(leidas) == 500
+
+def test_nombres_de_reporte_sin_choques():
+    from reporte_pdf import nombre_reporte_articulo
+
+    assert nombre_reporte_articulo('A100') == 'reporte_articulo_A100.pdf'
+    assert nombre_reporte_articulo('A-100.B') == 'reporte_articulo_A-100.B.pdf'
+    codigos = ['A/1', 'A_1', 'A\\1', 'A:1', 'a_1', 'a/1', 'Ñ1', 'A' * 300]
+    nombres = [nombre_reporte_articulo(codigo).lower() for codigo in codigos]
+    assert len(set(nombres)) == len(codigos)
+    assert all(re.fullmatch(r'[a-z0-9_.-]+', nombre) and len(nombre) < 200 for nombre in nombres)
+
+def test_lote_con_codigos_parecidos(inventario, tmp_path):
+    for codigo in ('A/1', 'A_1'):
+        inventario.agregar_articulo(codigo, f"Artículo {codigo}", '', 'kg')
+        inventario.entrada_mercancia(codigo, 1)
+    directorio = tmp_path / 'reportes'
+    resultados = GeneradorReportePDF().generar_reportes_articulos(inventario, str(directorio), procesos=1)
+    assert len({ruta for _, ruta, _ in resultados}) == 2
+    assert len(list(directorio.iterdir())) == 2
@@ -0,0 +1,42 @@
+"""
+Pruebas del resumen que arma el reporte del inventario
+"""
+
+import pytest
+
+from resumen import FilasReporte
+
+def test_reporte_solo_rearma_las_filas_cambiadas(inventario):
+    for i in range(50):
+        inventario.agregar_articulo(f"A{i:02d}", f"Artículo {i}", '', 'unidades')
+    primero = inventario.generar_reporte_inventario()
+    anteriores = list(primero['articulos'])
+
+    inventario.entrada_mercancia('A07', 3)
+    inventario.agregar_articulo('B', 'Artículo B', '', 'kg')
+    reporte = inventario.generar_reporte_inventario()
+    filas = reporte['articulos']
+    assert isinstance(filas, FilasReporte)
+    assert reporte['total_articulos'] == len(filas) == 51
+    assert reporte['version'] > primero['version']
+    assert filas[7]['cantidad'] == 3
+    assert filas[-1]['codigo'] == 'B'
+    # Las demás filas son los mismos objetos del reporte anterior
+    assert all(filas[i] is anteriores[i] for i in range(50) if i != 7)
+    assert filas[7] is not anteriores[7]
+    assert reporte['por_unidad'] == {'unidades': {'articulos': 50, 'cantidad': 3.0},
+                                     'kg': {'articulos': 1, 'cantidad': 0.0}}
+
+def test_filas_de_solo_lectura(inventario):
+    inventario.agregar_articulo('A', 'Artículo A', '', 'unidades')
+    filas = inventario.generar_reporte_inventario()['articulos']
+    with pytest.raises(TypeError):
+        filas[0] = {}
+    with pytest.raises(AttributeError):
+        filas.append({})
+    copia = list(filas)
+    inventario.entrada_mercancia('A', 2)
+    inventario.generar_reporte_inventario()
+    # La vista sigue al último reporte; la copia queda como estaba
+    assert filas[0]['cantidad'] == 2
+    assert copia[0]['cantidad'] == 0
@@ -0,0 +1,113 @@
+"""
+Pruebas de la API JSON del servidor (sin abrir un puerto: se despachan las peticiones)
+"""
+
+import asyncio
+import json
+import threading
+
+import pytest
+
+from inventario import Inventario
+from persistencia import PersistenciaInventario
+from servidor_api import LIMITE_ARTICULOS, LIMITE_MOVIMIENTOS, ServidorInventario
+
+@pytest.fixture
+def servidor(tmp_path):
+    persistencia = PersistenciaInventario(str(tmp_path), registros_por_instantanea=20)
+    servidor = ServidorInventario(Inventario(persistencia=persistencia, concurrente=True))
+    yield servidor
+    servidor.cerrar()
+
+def pedir(servidor, metodo, destino, datos=None):
+    cuerpo = json.dumps(datos).encode('utf-8') if datos is not None else b''
+    respuesta = asyncio.run(servidor._despachar(metodo, destino, cuerpo))
+    return respuesta.estado, json.loads(respuesta.cuerpo), respuesta.cabeceras
+
+def test_modificaciones_fuera_del_bucle_de_eventos(servidor, monkeypatch):
+    hilos = []
+    original = servidor.inventario.entrada_mercancia
+
+    def entrada_mercancia(*args, **kwargs):
+        hilos.append(threading.current_thread().name)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(servidor.inventario, 'entrada_mercancia', entrada_mercancia)
+    estado, _, _ = pedir(servidor, 'POST', '/api/articulos',
+                         {'codigo': 'a', 'nombre': 'A', 'unidad_medida': 'kg'})
+    assert estado == 201
+    for _ in range(30):
+        estado, datos, _ = pedir(servidor, 'POST', '/api/entradas', {'codigo': 'A', 'cantidad': 2})
+        assert estado == 201
+    assert datos['cantidad'] == 60
+    assert all(nombre.startswith('escritor') for nombre in hilos)
+    assert threading.current_thread().name not in hilos
+    estado, _, _ = pedir(servidor, 'POST', '/api/salidas', {'codigo': 'A', 'cantidad': 100})
+    assert estado == 409
+
+@pytest.mark.parametrize('cantidad', ['Infinity', '-Infinity', 'NaN', 1e400, '1e999'])
+def test_cantidad_no_finita(servidor, cantidad):
+    pedir(servidor, 'POST', '/api/articulos', {'codigo': 'A', 'nombre': 'A', 'unidad_medida': 'kg'})
+    estado, _, _ = pedir(servidor, 'POST', '/api/entradas', {'codigo': 'A', 'cantidad': cantidad})
+    assert estado == 400
+    estado, _, _ = pedir(servidor, 'POST', '/api/entradas',
+                         {'codigo': 'A', 'cantidad': 1, 'costo_unitario': cantidad})
+    assert estado == 400
+    assert servidor.inventario.obtener_stock_actual('A') == 0
+
+def test_articulos_por_paginas(servidor):
+    for i in range(LIMITE_ARTICULOS + 30):
+        servidor.inventario.agregar_articulo(f"A{i:03d}", f"Artículo {i}", '', 'kg')
+    estado, pagina, cabeceras = pedir(servidor, 'GET', '/api/articulos')
+    assert estado == 200
+    assert len(pagina) == LIMITE_ARTICULOS
+    codigos = [a['codigo'] for a in pagina]
+    while 'X-Cursor-Siguiente' in cabeceras:
+        destino = f"/api/articulos?limite=40&cursor={cabeceras['X-Cursor-Siguiente']}"
+        _, pagina, cabeceras = pedir(servidor, 'GET', destino)
+        codigos.extend(a['codigo'] for a in pagina)
+    assert codigos == [f"A{i:03d}" for i in range(LIMITE_ARTICULOS + 30)]
+
+def test_movimientos_por_paginas(servidor):
+    servidor.inventario.agregar_articulo('A', 'A', '', 'kg')
+    for _ in range(LIMITE_MOVIMIENTOS + 10):
+        servidor.inventario.entrada_mercancia('A', 1)
+    estado, pagina, cabeceras = pedir(servidor, 'GET', '/api/movimientos')
+    assert estado == 200
+    assert len(pagina) == LIMITE_MOVIMIENTOS
+    _, resto, cabeceras = pedir(servidor, 'GET', f"/api/movimientos?cursor={cabeceras['X-Cursor-Siguiente']}")
+    assert len(resto) == 10
+    assert 'X-Cursor-Siguiente' not in cabeceras
+    todos = [m.id for m in servidor.inventario.obtener_todos_movimientos()]
+    assert [m['id'] for m in resto + pagina] == todos
+
+def test_cursor_de_articulos_desconocido(servidor):
+    servidor.inventario.agregar_articulo('A', 'A', '', 'kg')
+    estado, _, _ = pedir(servidor, 'GET', '/api/articulos?cursor=NO')
+    assert estado == 400
+
+def test_movimientos_de_un_articulo_por_paginas(servidor):
+    servidor.inventario.agregar_articulo('A', 'A', '', 'kg')
+    for _ in range(LIMITE_MOVIMIENTOS + 5):
+        servidor.inventario.entrada_mercancia('A', 1)
+    estado, pagina, cabeceras = pedir(servidor, 'GET', '/api/articulos/a/movimientos')
+    assert estado == 200
+    assert len(pagina) == LIMITE_MOVIMIENTOS
+    _, resto, cabeceras = pedir(servidor, 'GET',
+                                f"/api/articulos/A/movimientos?cursor={cabeceras['X-Cursor-Siguiente']}")
+    assert 'X-Cursor-Siguiente' not in cabeceras
+    todos = [m.id for m in servidor.inventario.obtener_movimientos_articulo('A')]
+    assert [m['id'] for m in resto + pagina] == todos
+
+def test_consultas_largas_fuera_del_bucle_de_eventos(servidor, monkeypatch):
+    hilos = []
+    original = servidor.inventario.obtener_stock_catalogo_en_fecha
+
+    def obtener_stock_catalogo_en_fecha(*args, **kwargs):
+        hilos.append(threading.current_thread().name)
+        return original(*args, **kwargs)
+
+    monkeypatch.setattr(servidor.inventario, 'obtener_stock_catalogo_en_fecha', obtener_stock_catalogo_en_fecha)
+    estado, _, _ = pedir(servidor, 'GET', '/api/stock?fecha=2024-01-01')
+    assert estado == 200
+    assert len(hilos) == 1 and hilos[0].startswith('lector')
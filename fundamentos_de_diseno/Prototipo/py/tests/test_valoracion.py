@@ -0,0 +1,116 @@
+"""
+Pruebas de la valoración: costo promedio y capas FIFO con números exactos, costo de ventas
+por día y por mes, y la restauración diferida de una instantánea
+"""
+
+from datetime import datetime
+
+import pytest
+
+from almacenamiento import AlmacenMemoria
+from movimiento_inventario import MovimientoInventario, TipoMovimiento
+from valoracion import RESIDUO, ValoracionArticulo, ValoracionInventario
+
+ENTRADA, SALIDA = TipoMovimiento.ENTRADA, TipoMovimiento.SALIDA
+
+def _movimiento(tipo, cantidad, fecha, costo_unitario=None, codigo='A'):
+    return MovimientoInventario.reconstruir(None, codigo, tipo, cantidad, '', 'Prueba', fecha, costo_unitario)
+
+def test_promedio_y_fifo():
+    valoracion = ValoracionArticulo()
+    assert valoracion.entrada(10, 1.0) == 10
+    assert valoracion.entrada(10, 3.0) == 30
+    assert valoracion.costo_promedio == 2
+    assert valoracion.salida(15) == (30, 25)
+    info = valoracion.obtener_info()
+    assert (info['cantidad'], info['valor_promedio'], info['valor_fifo']) == (5, 10, 15)
+    assert info['capas_fifo'] == [(5, 3.0)]
+
+def test_entrada_sin_costo_usa_el_promedio():
+    valoracion = ValoracionArticulo()
+    # Sin existencias el promedio es 0
+    assert valoracion.entrada(2, None) == 0
+    assert valoracion.salida(2) == (0, 0)
+    valoracion.entrada(10, 1.0)
+    valoracion.entrada(10, 3.0)
+    valoracion.salida(15)
+    assert valoracion.entrada(5, None) == 10
+    assert valoracion.obtener_info()['capas_fifo'] == [(5, 3.0), (5, 2.0)]
+    # La salida cruza de una capa a la siguiente
+    assert valoracion.salida(7) == (14, 19)
+    info = valoracion.obtener_info()
+    assert (info['cantidad'], info['valor_promedio'], info['valor_fifo']) == (3, 6, 6)
+    assert info['capas_fifo'] == [(3, 2.0)]
+
+def test_vaciar_el_stock_no_deja_restos():
+    valoracion = ValoracionArticulo()
+    valoracion.entrada(0.1, 3.0)
+    valoracion.entrada(0.2, 7.0)
+    assert valoracion.cantidad != 0.3  # 0.30000000000000004
+    # Sale todo (la diferencia es menor que RESIDUO): se lleva el valor completo de cada método
+    costo_promedio, costo_fifo = valoracion.salida(0.3)
+    assert costo_promedio == pytest.approx(1.7) and costo_fifo == pytest.approx(1.7)
+    assert (valoracion.cantidad, valoracion.valor_promedio, valoracion.valor_fifo) == (0, 0, 0)
+    assert not valoracion.capas
+    assert valoracion.costo_promedio == 0
+    # Una capa que queda por debajo de RESIDUO se consume entera
+    valoracion.entrada(1, 2.0)
+    valoracion.entrada(1, 4.0)
+    assert valoracion.salida(1 - RESIDUO / 2) == pytest.approx((3, 2))
+    assert [capa[1] for capa in valoracion.capas] == [4.0]
+
+def test_costo_de_ventas_por_dia_y_por_mes(inventario):
+    inventario.agregar_articulo('A', 'A', '', 'unidades')
+    inventario.agregar_articulo('B', 'B', '', 'unidades')
+    ok, _ = inventario.registrar_movimientos_lote([
+        ('A', ENTRADA, 10, 'compra', datetime(2024, 1, 31, 9), 1.0),
+        ('A', ENTRADA, 10, 'compra', datetime(2024, 1, 31, 10), 3.0),
+        ('B', ENTRADA, 4, 'compra', datetime(2024, 1, 31, 10, 30), 5.0),
+        ('A', SALIDA, 15, 'venta', datetime(2024, 1, 31, 11)),
+        ('A', ENTRADA, 5, 'devolución', datetime(2024, 2, 1, 8)),
+        ('A', SALIDA, 7, 'venta', datetime(2024, 2, 15, 12)),
+        ('B', SALIDA, 1, 'venta', datetime(2024, 2, 15, 13)),
+        ('A', SALIDA, 3, 'venta', datetime(2024, 2, 20, 12)),
+    ])
+    assert ok
+    assert inventario.obtener_costo_ventas('dia') == {
+        '2024-01-31': {'promedio': 30, 'fifo': 25},
+        '2024-02-15': {'promedio': 19, 'fifo': 24},
+        '2024-02-20': {'promedio': 6, 'fifo': 6},
+    }
+    assert inventario.obtener_costo_ventas('mes') == {
+        '2024-01': {'promedio': 30, 'fifo': 25},
+        '2024-02': {'promedio': 25, 'fifo': 30},
+    }
+    assert inventario.obtener_valor_inventario() == {'promedio': 15, 'fifo': 15}
+    assert inventario.obtener_valoracion_articulo('A')['cantidad'] == 0
+    assert inventario.obtener_valoracion_articulo('B')['capas_fifo'] == [(3, 5.0)]
+
+def test_restauracion_diferida():
+    original = ValoracionInventario()
+    original.construir(AlmacenMemoria())
+    original.registrar([
+        _movimiento(ENTRADA, 10, datetime(2024, 3, 1), 1.0),
+        _movimiento(ENTRADA, 10, datetime(2024, 3, 2), 3.0),
+        _movimiento(SALIDA, 15, datetime(2024, 3, 3)),
+    ])
+    registro = original.a_registro()
+    lecturas = []
+
+    def leer():
+        lecturas.append(1)
+        return registro
+
+    restaurada = ValoracionInventario()
+    restaurada.restaurar_diferido(leer)
+    # Los movimientos de antes de leer el registro quedan pendientes y se aplican después
+    restaurada.registrar([_movimiento(SALIDA, 2, datetime(2024, 4, 1))])
+    assert lecturas == []
+    assert restaurada.valor_inventario(AlmacenMemoria()) == {'promedio': 6, 'fifo': 9}
+    assert lecturas == [1]
+    assert restaurada.costo_ventas(AlmacenMemoria(), 'mes') == {
+        '2024-03': {'promedio': 30, 'fifo': 25},
+        '2024-04': {'promedio': 4, 'fifo': 6},
+    }
+    assert restaurada.valoracion_articulo('A', AlmacenMemoria())['capas_fifo'] == [(3, 3.0)]
+    assert lecturas == [1]
@@ -0,0 +1,316 @@
+"""
+Valoración del inventario por costo promedio ponderado y por capas FIFO
+
+Cada entrada trae su costo unitario y cada movimiento actualiza la valoración de su
+artículo por los dos métodos a la vez:
+
+- Costo promedio: se guarda el valor total del artículo; las salidas salen al costo
+  promedio vigente (valor / cantidad).
+- FIFO: cada entrada es una capa (cantidad, costo); las salidas consumen las capas más
+  antiguas primero. Cada capa se crea una vez y se consume una vez, así el costo por
+  movimiento es O(1) amortizado.
+
+El valor total del inventario y el costo de ventas por día y por mes se mantienen al día
+con cada movimiento, así leerlos no recorre el historial.
+"""
+
+import threading
+from collections import deque
+
+from almacenamiento import VistaMovimientos
+
+METODOS = ('promedio', 'fifo')
+RESIDUO = 1e-9  # Cantidades menores a esto se consideran cero (errores de redondeo)
+
+class ValoracionArticulo:
+    __slots__ = ('cantidad', 'valor_promedio', 'valor_fifo', 'capas')
+
+    def __init__(self):
+        """
+        Inicializa la valoración de un artículo sin existencias
+        """
+        self.cantidad = 0.0
+        self.valor_promedio = 0.0
+        self.valor_fifo = 0.0
+        self.capas = deque()  # [cantidad, costo unitario], de la más antigua a la más nueva
+
+    @property
+    def costo_promedio(self):
+        return self.valor_promedio / self.cantidad if self.cantidad > RESIDUO else 0.0
+
+    def entrada(self, cantidad, costo_unitario):
+        """
+        Agrega existencias al artículo
+
+        Args:
+            cantidad (float): Cantidad que entra
+            costo_unitario (float): Costo de cada unidad, o None para usar el costo promedio vigente
+
+        Returns:
+            float: Valor agregado (igual para los dos métodos)
+        """
+        if costo_unitario is None:
+            costo_unitario = self.costo_promedio
+        valor = cantidad * costo_unitario
+        self.cantidad += cantidad
+        self.valor_promedio += valor
+        self.valor_fifo += valor
+        self.capas.append([cantidad, costo_unitario])
+        return valor
+
+    def salida(self, cantidad):
+        """
+        Retira existencias del artículo
+
+        Args:
+            cantidad (float): Cantidad que sale
+
+        Returns:
+            tuple: (costo por promedio, costo por FIFO) de lo que salió
+        """
+        if cantidad >= self.cantidad - RESIDUO:
+            # Sale todo: así no quedan restos de redondeo en el valor
+            costos = self.valor_promedio, self.valor_fifo
+            self.cantidad = self.valor_promedio = self.valor_fifo = 0.0
+            self.capas.clear()
+            return costos
+
+        costo_promedio = cantidad * self.costo_promedio
+        costo_fifo = 0.0
+        pendiente = cantidad
+        capas = self.capas
+        while pendiente > RESIDUO and capas:
+            capa = capas[0]
+            if capa[0] <= pendiente + RESIDUO:
+                costo_fifo += capa[0] * capa[1]
+                pendiente -= capa[0]
+                capas.popleft()
+            else:
+                costo_fifo += pendiente * capa[1]
+                capa[0] -= pendiente
+                pendiente = 0.0
+        self.cantidad -= cantidad
+        self.valor_promedio -= costo_promedio
+        self.valor_fifo -= costo_fifo
+        return costo_promedio, costo_fifo
+
+    def obtener_info(self):
+        return {
+            'cantidad': self.cantidad,
+            'costo_promedio': self.costo_promedio,
+            'valor_promedio': self.valor_promedio,
+            'valor_fifo': self.valor_fifo,
+            'capas_fifo': [tuple(capa) for capa in self.capas]
+        }
+
+class ValoracionInventario:
+    def __init__(self):
+        """
+        Inicializa una valoración vacía; se completa desde el almacén la primera vez que se
+        usa, o desde la instantánea si el inventario tiene persistencia (ver restaurar)
+        """
+        self.articulos = {}  # Código -> ValoracionArticulo
+        self.valor_total = dict.fromkeys(METODOS, 0.0)
+        self.costo_ventas_dia = {}  # 'AAAA-MM-DD' -> {'promedio': costo, 'fifo': costo}
+        self.costo_ventas_mes = {}  # 'AAAA-MM' -> {'promedio': costo, 'fifo': costo}
+        self._construido = False
+        self._leer_registro = None  # Ver restaurar_diferido
+        self._pendientes = []  # Movimientos que llegan antes de leer el registro diferido
+        self._candado = threading.Lock()
+
+    def construir(self, almacen):
+        """
+        Arma la valoración recorriendo todo el historial del almacén (solo la primera vez)
+
+        Args:
+            almacen: Almacén del inventario
+        """
+        with self._candado:
+            if self._leer_registro is not None:
+                self._completar()
+            if self._construido:
+                return
+            inicio, fin = almacen.posiciones_entre()
+            for movimiento in VistaMovimientos(almacen.movimientos_en_posiciones, range(inicio, fin)):
+                self._aplicar(movimiento)
+            self._construido = True
+
+    def restaurar(self, registro, articulos):
+        """
+        Carga la valoración guardada en una instantánea
+
+        Los artículos con stock que no figuran en el registro (instantáneas anteriores a la
+        valoración) empiezan con una capa de costo 0.
+
+        Args:
+            registro (dict): Resultado de a_registro(), o None si no hay
+            articulos (iterable): Artículos cargados de la instantánea
+        """
+        with self._candado:
+            self._leer_registro = None
+            self._pendientes = []
+            self._restaurar(registro, articulos)
+
+    def restaurar_diferido(self, leer):
+        """
+        Como restaurar, pero el registro se lee recién la primera vez que se consulta la
+        valoración (o se guarda una instantánea); los movimientos de mientras se aplican
+        después de leerlo
+
+        Args:
+            leer (callable): Función sin argumentos que retorna el registro
+        """
+        with self._candado:
+            self._leer_registro = leer
+            self._pendientes = []
+            self._construido = True
+
+    def _completar(self):
+        leer, pendientes = self._leer_registro, self._pendientes
+        self._leer_registro, self._pendientes = None, []
+        self._restaurar(leer(), ())
+        for movimiento in pendientes:
+            self._aplicar(movimiento)
+
+    def _restaurar(self, registro, articulos):
+        self.articulos = {}
+        self.valor_total = dict.fromkeys(METODOS, 0.0)
+        registro = registro or {}
+        for codigo, (cantidad, valor_promedio, capas) in registro.get('articulos', {}).items():
+            valoracion = ValoracionArticulo()
+            valoracion.cantidad = cantidad
+            valoracion.valor_promedio = valor_promedio
+            valoracion.capas = deque([list(capa) for capa in capas])
+            valoracion.valor_fifo = sum(c * costo for c, costo in capas)
+            self.articulos[codigo] = valoracion
+        for articulo in articulos:
+            if articulo.codigo not in self.articulos and articulo.cantidad > 0:
+                valoracion = self.articulos[articulo.codigo] = ValoracionArticulo()
+                valoracion.entrada(articulo.cantidad, 0.0)
+        for valoracion in self.articulos.values():
+            self.valor_total['promedio'] += valoracion.valor_promedio
+            self.valor_total['fifo'] += valoracion.valor_fifo
+        self.costo_ventas_dia = registro.get('costo_ventas_dia', {})
+        self.costo_ventas_mes = registro.get('costo_ventas_mes', {})
+        self._construido = True
+
+    def completar(self):
+        """
+        Lee ya el registro diferido si todavía no se leyó (ver restaurar_diferido), por
+        ejemplo antes de tomar una instantánea con el inventario detenido
+        """
+        with self._candado:
+            if self._leer_registro is not None:
+                self._completar()
+
+    def a_registro(self, codigos=None):
+        """
+        Retorna la valoración como registro serializable (para las instantáneas)
+
+        Es una copia: se puede escribir después aunque sigan llegando movimientos.
+
+        Args:
+            codigos (iterable): Solo estos artículos, incluidos los que quedaron sin stock
+                (instantáneas incrementales), o None para todos los que tienen stock
+
+        Returns:
+            dict: Cantidad, valor promedio y capas FIFO por artículo, y costo de ventas por periodo
+        """
+        with self._candado:
+            if self._leer_registro is not None:
+                self._completar()
+            if codigos is None:
+                articulos = {codigo: v for codigo, v in self.articulos.items() if v.cantidad > RESIDUO}
+            else:
+                articulos = {codigo: self.articulos.get(codigo) or ValoracionArticulo() for codigo in codigos}
+            return {
+                'articulos': {
+                    codigo: [v.cantidad, v.valor_promedio, [list(capa) for capa in v.capas]]
+                    for codigo, v in articulos.items()
+                },
+                'costo_ventas_dia': {clave: dict(costos) for clave, costos in self.costo_ventas_dia.items()},
+                'costo_ventas_mes': {clave: dict(costos) for clave, costos in self.costo_ventas_mes.items()}
+            }
+
+    def registrar(self, movimientos):
+        """
+        Actualiza la valoración con movimientos ya aplicados al stock
+
+        Args:
+            movimientos (iterable): Movimientos en orden
+        """
+        with self._candado:
+            if not self._construido:
+                return
+            if self._leer_registro is not None:
+                self._pendientes.extend(movimientos)
+                return
+            for movimiento in movimientos:
+                self._aplicar(movimiento)
+
+    def _aplicar(self, movimiento):
+        valoracion = self.articulos.get(movimiento.codigo_articulo)
+        if valoracion is None:
+            valoracion = self.articulos[movimiento.codigo_articulo] = ValoracionArticulo()
+        if movimiento.es_entrada():
+            valor = valoracion.entrada(movimiento.cantidad, movimiento.costo_unitario)
+            self.valor_total['promedio'] += valor
+            self.valor_total['fifo'] += valor
+            return
+
+        costo_promedio, costo_fifo = valoracion.salida(movimiento.cantidad)
+        self.valor_total['promedio'] -= costo_promedio
+        self.valor_total['fifo'] -= costo_fifo
+        dia = movimiento.fecha_hora.date().isoformat()
+        for periodos, clave in ((self.costo_ventas_dia, dia), (self.costo_ventas_mes, dia[:7])):
+            costos = periodos.get(clave)
+            if costos is None:
+                costos = periodos[clave] = dict.fromkeys(METODOS, 0.0)
+            costos['promedio'] += costo_promedio
+            costos['fifo'] += costo_fifo
+
+    def valor_inventario(self, almacen):
+        """
+        Retorna el valor total del inventario
+
+        Args:
+            almacen: Almacén del inventario (se usa solo la primera vez)
+
+        Returns:
+            dict: {'promedio': valor, 'fifo': valor}
+        """
+        self.construir(almacen)
+        with self._candado:
+            return dict(self.valor_total)
+
+    def valoracion_articulo(self, codigo, almacen):
+        """
+        Retorna la valoración de un artículo (ver ValoracionArticulo.obtener_info)
+
+        Args:
+            codigo (str): Código del artículo
+            almacen: Almacén del inventario (se usa solo la primera vez)
+
+        Returns:
+            dict: Cantidad, costo promedio, valor por cada método y capas FIFO
+        """
+        self.construir(almacen)
+        with self._candado:
+            valoracion = self.articulos.get(codigo)
+            return (valoracion or ValoracionArticulo()).obtener_info()
+
+    def costo_ventas(self, almacen, periodo='mes'):
+        """
+        Retorna el costo de ventas (costo de lo que salió) por periodo
+
+        Args:
+            almacen: Almacén del inventario (se usa solo la primera vez)
+            periodo (str): 'dia' o 'mes'
+
+        Returns:
+            dict: 'AAAA-MM-DD' o 'AAAA-MM' -> {'promedio': costo, 'fifo': costo}, en orden
+        """
+        self.construir(almacen)
+        periodos = self.costo_ventas_dia if periodo == 'dia' else self.costo_ventas_mes
+        with self._candado:
+            return {clave: dict(periodos[clave]) for clave in sorted(periodos)}